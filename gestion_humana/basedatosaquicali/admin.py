@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PersonalUrl, ExperienciaTotal, ContratoHistorico, ConsolidadoBaseDatos
+from .models import PersonalUrl, ExperienciaTotal, ContratoHistorico, ConsolidadoBaseDatos, ResumenHistorico
 
 @admin.register(PersonalUrl)
 class PersonalUrlAdmin(admin.ModelAdmin):
@@ -18,6 +18,29 @@ class ContratoHistoricoAdmin(admin.ModelAdmin):
     search_fields = ('contrato', 'nombre_contratista', 'cedula')
     list_filter = ('traslape',)
 
+    # Los reportes, resúmenes y cálculos de experiencia incluyen estos contratos (ver formapp.signals)
+    def _contratos_eliminados(self, cedulas):
+        from formapp.signals import invalidar_reportes
+        from formapp.services import actualizar_por_contratos_historicos
+        invalidar_reportes(cedula__in=[str(cedula) for cedula in cedulas])
+        actualizar_por_contratos_historicos(cedulas)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self._contratos_eliminados({obj.cedula})
+
+    def delete_queryset(self, request, queryset):
+        cedulas = set(queryset.values_list('cedula', flat=True))
+        super().delete_queryset(request, queryset)
+        self._contratos_eliminados(cedulas)
+
+@admin.register(ResumenHistorico)
+class ResumenHistoricoAdmin(admin.ModelAdmin):
+    list_display = ('cedula', 'total_contratos', 'experiencia_texto', 'fecha_primera', 'fecha_ultima', 'actualizado')
+    search_fields = ('cedula',)
+    readonly_fields = ('cedula', 'total_contratos', 'total_dias', 'fecha_primera', 'fecha_ultima',
+                       'experiencia_texto', 'actualizado')
+
 @admin.register(ConsolidadoBaseDatos)
 class ConsolidadoBaseDatosAdmin(admin.ModelAdmin):
     list_display = ('numero_contrato_otrosi', 'nombre_contratista', 'cedula', 'fecha_firma', 'fecha_final', 'estado')
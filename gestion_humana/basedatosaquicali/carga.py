@@ -0,0 +1,573 @@
+"""
+Carga del archivo histórico (link.xlsx) en las tablas de basedatosaquicali.
+
+Cada hoja se convierte con operaciones vectorizadas de pandas (incluidas las
+fechas, que llegan mezcladas como datetime de Excel y texto DD/MM/AAAA) y se
+inserta con bulk_create por lotes, en lugar de recorrer las filas con
+iterrows() y crear un registro por consulta.
+
+Hay dos modos de guardar cada hoja:
+    sincronizar: compara con la tabla por la clave natural de la hoja y solo
+        inserta, actualiza o elimina las filas que cambiaron.
+    insertar: vacía la tabla y vuelve a insertar todo.
+
+Para libros grandes, leer_bloques lee cada hoja por bloques con openpyxl en
+modo solo lectura; cada bloque se valida, se convierte con preparar_hoja y
+se guarda con sincronizar_bloque, y un PuntoControl permite reanudar. Cada
+fila guardada o confirmada queda marcada con el identificador de la carga y
+el bloque (marca_carga); al terminar la hoja se eliminan en la base de datos
+las filas sin la marca de esta carga, así el avance no depende de guardar
+los registros vistos.
+"""
+import calendar
+import json
+import os
+import re
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+import pandas as pd
+from dateutil import parser
+
+from .models import PersonalUrl, ExperienciaTotal, ContratoHistorico, ConsolidadoBaseDatos
+
+# Registros por INSERT en bulk_create
+TAMANO_LOTE = 1000
+
+PATRON_FECHA = r'^\s*(\d{1,2})/(\d{1,2})/(\d{4})\s*$'
+
+# Hojas del Excel en el orden de carga.
+#   columnas: campo del modelo -> encabezado en la hoja
+#   fechas: campos que se convierten con parsear_fechas
+#   omitir_errores: si es True, las filas con fechas inválidas se omiten y se
+#       reportan; si es False, la primera fecha inválida detiene la carga
+#   clave: campos que identifican una fila entre cargas (clave natural)
+HOJAS = [
+    {
+        'hoja': 'personal_url',
+        'modelo': PersonalUrl,
+        'columnas': {
+            'carpeta_general': 'Carpeta General',
+            'area': 'Área (Nivel 1)',
+            'contratista': 'Contratista (Nivel 2)',
+            'enlace_carpeta': 'Enlace Carpeta Contratista',
+            'cedula': 'CEDULA',
+        },
+        'fechas': [],
+        'omitir_errores': False,
+        'clave': ['cedula'],
+    },
+    {
+        'hoja': 'experiencia_total',
+        'modelo': ExperienciaTotal,
+        'columnas': {
+            'cedula': 'Cédula del Contratista',
+            'nombre_contratista': 'Nombre del Contratista',
+            'experiencia_bruta_dias': 'Experiencia Bruta (Días - Con Traslape)',
+            'experiencia_neta_dias': 'Experiencia Neta (Días - Sin Superposición)',
+            'experiencia_neta_texto': 'Experiencia Neta (Años, Meses, Días)',
+        },
+        'fechas': [],
+        'omitir_errores': False,
+        'clave': ['cedula'],
+    },
+    {
+        'hoja': 'eXperiencia',
+        'modelo': ContratoHistorico,
+        'columnas': {
+            'cedula': 'Cédula',
+            'nombre_contratista': 'Nombre Contratista',
+            'numero_registro': 'N°',
+            'contrato': 'Contrato',
+            'fecha_inicio': 'Fecha Inicio',
+            'fecha_fin': 'Fecha Fin',
+            'dias_brutos': 'Días Brutos',
+            'traslape': '¿Traslape/Unión?',
+            'explicacion_detallada': 'Explicación Detallada',
+            'dias_reales_contribuidos': 'Días Reales Contribuidos',
+        },
+        'fechas': ['fecha_inicio', 'fecha_fin'],
+        'omitir_errores': False,
+        'clave': ['cedula', 'contrato', 'fecha_inicio', 'fecha_fin'],
+    },
+    {
+        'hoja': 'consolidado_basedatos',
+        'modelo': ConsolidadoBaseDatos,
+        'columnas': {
+            'area': 'area',
+            'tipo_documento': 'Tipo de Documento',
+            'numero_contrato_otrosi': 'No. de Contrato / Otrosí',
+            'nombre_contratista': 'Nombre del Contratista',
+            'cedula': 'Cédula del Contratista',
+            'contratante_nit': 'Contratante (NIT)',
+            'objeto_contrato': 'Objeto del Contrato',
+            'fecha_firma': 'Fecha de Firma',
+            'fecha_final': 'Plazo de Duración (Fecha Final) (DD/MM/AAAA)',
+            'actividades_especificas': 'Actividades Específicas del Contratista / Modificación',
+            'estado': 'ESTADO',
+        },
+        'fechas': ['fecha_firma', 'fecha_final'],
+        'omitir_errores': True,
+        'clave': ['cedula', 'numero_contrato_otrosi', 'fecha_firma', 'fecha_final'],
+    },
+]
+
+
+def parsear_fecha_flexible(fecha_value):
+    """
+    Parsea una fecha de forma flexible, manejando formatos mixtos y fechas inválidas.
+    Si el día es inválido para el mes, ajusta al último día válido del mes.
+
+    Returns:
+        tuple: (date, ajustada) donde ajustada indica si se corrigió el día.
+
+    Raises:
+        ValueError: Si el valor no se puede interpretar como fecha.
+    """
+    # Si ya es un datetime (o Timestamp de pandas), convertir a date
+    if isinstance(fecha_value, datetime):
+        return fecha_value.date(), False
+
+    if isinstance(fecha_value, str):
+        try:
+            # Intentar parsear con dayfirst=True
+            return parser.parse(fecha_value, dayfirst=True).date(), False
+        except ValueError:
+            # Si falla, intentar ajustar fechas inválidas (ej: 31/09/2017)
+            match = re.match(r'(\d{1,2})/(\d{1,2})/(\d{4})', fecha_value)
+            if match:
+                dia, mes, anio = int(match.group(1)), int(match.group(2)), int(match.group(3))
+
+                # Ajustar día al último día válido del mes
+                max_dia = calendar.monthrange(anio, mes)[1]
+                ajustada = dia > max_dia
+                return datetime(anio, mes, min(dia, max_dia)).date(), ajustada
+            raise
+
+    raise ValueError(f"No se pudo parsear la fecha: {fecha_value}")
+
+
+def parsear_fechas(serie):
+    """
+    Convierte una columna de fechas mixtas con las mismas reglas que
+    parsear_fecha_flexible, pero de forma vectorizada: los datetime de Excel
+    y los textos DD/MM/AAAA (con el día ajustado al último día válido del
+    mes) se convierten en bloque; el resto de valores, que son raros, pasan
+    uno por uno por parsear_fecha_flexible.
+
+    Args:
+        serie: pandas.Series con la columna tal como la lee read_excel.
+
+    Returns:
+        tuple: (fechas, ajustadas, errores)
+            fechas: Series de date con el mismo índice (vacía donde hubo error).
+            ajustadas: Lista de índices cuya fecha se ajustó al último día del mes.
+            errores: Diccionario {índice: mensaje} de los valores inválidos.
+    """
+    fechas = pd.Series(None, index=serie.index, dtype=object)
+    es_fecha = serie.map(lambda valor: isinstance(valor, datetime)).astype(bool)
+    es_texto = serie.map(lambda valor: isinstance(valor, str)).astype(bool)
+
+    if es_fecha.any():
+        fechas[es_fecha] = pd.to_datetime(serie[es_fecha]).dt.date
+
+    # Textos DD/MM/AAAA con mes y día plausibles; dateutil los interpreta igual
+    partes = serie[es_texto].astype(object).str.extract(PATRON_FECHA).astype(float)
+    validas = (
+        partes[0].between(1, 31) & partes[1].between(1, 12) & partes[2].between(1700, 2200)
+    )
+    partes = partes[validas].astype(int)
+    ajustadas = []
+    if len(partes):
+        primer_dia = pd.to_datetime(pd.DataFrame({'year': partes[2], 'month': partes[1], 'day': 1}))
+        max_dia = primer_dia.dt.days_in_month
+        dias = partes[0].where(partes[0] <= max_dia, max_dia)
+        fechas[partes.index] = (primer_dia + pd.to_timedelta(dias - 1, unit='D')).dt.date
+        ajustadas = partes.index[partes[0] > max_dia].tolist()
+
+    errores = {}
+    convertidas = es_fecha.to_numpy() | serie.index.isin(partes.index)
+    for indice in serie.index[~convertidas]:
+        try:
+            fechas[indice], ajustada = parsear_fecha_flexible(serie[indice])
+        except (ValueError, OverflowError) as e:
+            errores[indice] = str(e)
+            continue
+        if ajustada:
+            ajustadas.append(indice)
+    return fechas, sorted(ajustadas), errores
+
+
+def preparar_hoja(df, hoja):
+    """
+    Convierte el DataFrame de una hoja en instancias del modelo (sin guardar).
+
+    Los textos vacíos se guardan como cadena vacía y los números se convierten
+    a int de Python.
+
+    Args:
+        df: DataFrame leído con read_excel.
+        hoja: Elemento de HOJAS.
+
+    Returns:
+        tuple: (instancias, ajustes, errores)
+            ajustes: Lista de (fila_excel, valor_original, date) de fechas ajustadas.
+            errores: Lista de (fila_excel, mensaje) de filas con fechas inválidas.
+
+    Raises:
+        ValueError: Si una fecha es inválida y la hoja no permite omitir errores.
+    """
+    modelo = hoja['modelo']
+    columnas = {}
+    ajustes = []
+    filas_con_error = {}
+
+    for campo, encabezado in hoja['columnas'].items():
+        serie = df[encabezado]
+        if campo in hoja['fechas']:
+            serie_fechas, ajustadas, errores = parsear_fechas(serie)
+            for indice in ajustadas:
+                ajustes.append((indice + 1, serie[indice], serie_fechas[indice]))
+            for indice, mensaje in errores.items():
+                if not hoja['omitir_errores']:
+                    raise ValueError(f'Fila {indice + 1}, {encabezado}: {mensaje}')
+                filas_con_error.setdefault(indice, f'{encabezado}: {mensaje}')
+            columnas[campo] = serie_fechas
+        elif modelo._meta.get_field(campo).get_internal_type() in ('CharField', 'TextField'):
+            columnas[campo] = serie.astype(object).where(serie.notna(), '')
+        else:
+            columnas[campo] = serie
+
+    datos = pd.DataFrame(columnas)
+    if filas_con_error:
+        datos = datos.drop(index=list(filas_con_error))
+    campos = list(datos.columns)
+    instancias = [
+        modelo(**dict(zip(campos, valores)))
+        for valores in zip(*(datos[campo].tolist() for campo in campos))
+    ]
+    errores = [(indice + 1, mensaje) for indice, mensaje in sorted(filas_con_error.items())]
+    return instancias, ajustes, errores
+
+
+def campos_datos(modelo):
+    """Campos que se cargan desde la hoja (sin la pk ni marca_carga)"""
+    return [f for f in modelo._meta.concrete_fields if not f.primary_key and f.attname != 'marca_carga']
+
+
+def insertar(modelo, instancias, tamano_lote=TAMANO_LOTE):
+    """Reemplaza el contenido de la tabla con las instancias, insertadas por lotes"""
+    modelo.objects.all().delete()
+    modelo.objects.bulk_create(instancias, batch_size=tamano_lote)
+    return len(instancias)
+
+
+def _claves_con_ordinal(claves):
+    """
+    Agrega a cada clave su número de aparición, de modo que las filas con la
+    misma clave natural (duplicados en el Excel) se emparejan en orden.
+    """
+    vistas = defaultdict(int)
+    resultado = []
+    for clave in claves:
+        resultado.append((clave, vistas[clave]))
+        vistas[clave] += 1
+    return resultado
+
+
+def sincronizar(modelo, instancias, clave, tamano_lote=TAMANO_LOTE):
+    """
+    Actualiza la tabla para que quede igual a las instancias tocando solo lo
+    que cambió: inserta las filas nuevas, actualiza las que cambiaron y
+    elimina las que ya no están, todo con operaciones por lote.
+
+    Args:
+        modelo: Modelo de la tabla.
+        instancias: Instancias sin guardar con el contenido completo de la hoja.
+        clave: Campos de la clave natural (ver HOJAS).
+        tamano_lote: Registros por consulta.
+
+    Returns:
+        dict: Conteos 'creados', 'actualizados', 'eliminados' y 'sin_cambios'.
+    """
+    campos = campos_datos(modelo)
+    nombres = [f.attname for f in campos]
+    posiciones_clave = [nombres.index(campo) for campo in clave]
+
+    # Valores normalizados (p. ej. números en campos de texto pasan a str) como en la base de datos
+    nuevas = [
+        tuple(campo.to_python(getattr(instancia, campo.attname)) for campo in campos)
+        for instancia in instancias
+    ]
+    existentes = {}
+    filas_bd = list(modelo.objects.order_by('pk').values_list('pk', *nombres))
+    for clave_bd, fila in zip(
+        _claves_con_ordinal(tuple(fila[1 + i] for i in posiciones_clave) for fila in filas_bd), filas_bd
+    ):
+        existentes[clave_bd] = fila
+
+    por_crear, por_actualizar = [], []
+    sin_cambios = 0
+    for clave_nueva, instancia, valores in zip(
+        _claves_con_ordinal(tuple(v[i] for i in posiciones_clave) for v in nuevas), instancias, nuevas
+    ):
+        fila = existentes.pop(clave_nueva, None)
+        if fila is None:
+            por_crear.append(instancia)
+        elif fila[1:] != valores:
+            instancia.pk = fila[0]
+            por_actualizar.append(instancia)
+        else:
+            sin_cambios += 1
+
+    eliminados = [fila[0] for fila in existentes.values()]
+    for inicio in range(0, len(eliminados), tamano_lote):
+        modelo.objects.filter(pk__in=eliminados[inicio:inicio + tamano_lote]).delete()
+    if por_actualizar:
+        modelo.objects.bulk_update(por_actualizar, nombres, batch_size=tamano_lote)
+    modelo.objects.bulk_create(por_crear, batch_size=tamano_lote)
+
+    return {
+        'creados': len(por_crear),
+        'actualizados': len(por_actualizar),
+        'eliminados': len(eliminados),
+        'sin_cambios': sin_cambios,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Carga por bloques (libros grandes con poca memoria)
+# ---------------------------------------------------------------------------
+
+# Filas por bloque en la carga por bloques
+TAMANO_BLOQUE = 2000
+
+
+# Textos que read_excel interpreta como vacíos por defecto; la lectura por
+# bloques los trata igual para que ambas cargas guarden lo mismo
+VALORES_VACIOS = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
+
+def leer_bloques(ruta, hoja, tamano_bloque=TAMANO_BLOQUE, desde=0):
+    """
+    Lee una hoja en bloques de filas con openpyxl en modo solo lectura, sin
+    cargar el libro completo en memoria.
+
+    Args:
+        ruta: Ruta del libro.
+        hoja: Elemento de HOJAS.
+        tamano_bloque: Filas por bloque.
+        desde: Número de filas de datos a saltar (para reanudar).
+
+    Yields:
+        DataFrame: Bloque con los encabezados de la hoja. Su índice es la
+            posición de la fila de datos en la hoja (0 = primera fila después
+            del encabezado), igual que en read_excel.
+
+    Raises:
+        ValueError: Si la hoja no existe o le faltan columnas.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        if hoja['hoja'] not in wb.sheetnames:
+            raise ValueError(f"El libro no tiene la hoja '{hoja['hoja']}'")
+        filas = wb[hoja['hoja']].iter_rows(values_only=True)
+        encabezados = [str(valor).strip() if valor is not None else '' for valor in next(filas, ())]
+        faltantes = [c for c in hoja['columnas'].values() if c not in encabezados]
+        if faltantes:
+            raise ValueError(f"A la hoja '{hoja['hoja']}' le faltan las columnas: {', '.join(faltantes)}")
+
+        bloque, indices = [], []
+        for indice, fila in enumerate(filas):
+            if indice < desde:
+                continue
+            fila = [
+                None if isinstance(valor, str) and valor in VALORES_VACIOS else valor
+                for valor in fila[:len(encabezados)]
+            ]
+            if all(valor is None for valor in fila):
+                continue
+            bloque.append(fila)
+            indices.append(indice)
+            if len(bloque) >= tamano_bloque:
+                yield pd.DataFrame(bloque, columns=encabezados, index=indices)
+                bloque, indices = [], []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=encabezados, index=indices)
+    finally:
+        wb.close()
+
+
+def marca_bloque(carga, fila):
+    """
+    Marca de las filas guardadas por el bloque que empieza en `fila`. El
+    número va con ceros a la izquierda para que las marcas de una misma carga
+    se ordenen como los bloques.
+    """
+    return f'{carga}:{fila:010d}'
+
+
+def sincronizar_bloque(modelo, instancias, clave, carga, fila, tamano_lote=TAMANO_LOTE):
+    """
+    Inserta o actualiza un bloque de filas comparando por clave natural solo
+    con los registros de las cédulas (primer campo de la clave) del bloque.
+    Los registros emparejados y los nuevos quedan con la marca del bloque.
+    No elimina nada: las filas que desaparecieron se borran al final de la
+    hoja con eliminar_no_marcados.
+
+    Un registro que ya tiene la marca de un bloque anterior de la misma carga
+    no se vuelve a emparejar. Los del mismo bloque sí: si la carga se cortó
+    después de confirmarlo y antes de guardar el punto de control, al
+    reanudar el bloque se repite sin duplicar filas.
+
+    Args:
+        modelo: Modelo de la tabla.
+        instancias: Instancias sin guardar del bloque.
+        clave: Campos de la clave natural.
+        carga: Identificador de la carga de la hoja (ver PuntoControl).
+        fila: Posición en la hoja desde la que se leyó el bloque.
+        tamano_lote: Registros por consulta.
+
+    Returns:
+        dict: Conteos 'creados', 'actualizados' y 'sin_cambios'.
+    """
+    marca = marca_bloque(carga, fila)
+    campos = campos_datos(modelo)
+    nombres = [f.attname for f in campos]
+    posiciones_clave = [nombres.index(campo) for campo in clave]
+    nuevas = [
+        tuple(campo.to_python(getattr(instancia, campo.attname)) for campo in campos)
+        for instancia in instancias
+    ]
+
+    # Registros existentes aún no emparejados en esta carga, por clave y en orden de pk
+    existentes = defaultdict(list)
+    valores_busqueda = sorted({valores[posiciones_clave[0]] for valores in nuevas})
+    for inicio in range(0, len(valores_busqueda), tamano_lote):
+        filtro = {f'{clave[0]}__in': valores_busqueda[inicio:inicio + tamano_lote]}
+        filas = (
+            modelo.objects.filter(**filtro)
+            .exclude(marca_carga__startswith=f'{carga}:', marca_carga__lt=marca)
+            .order_by('pk')
+            .values_list('pk', *nombres)
+        )
+        for fila_bd in filas:
+            existentes[tuple(fila_bd[1 + i] for i in posiciones_clave)].append(fila_bd)
+
+    por_crear, por_actualizar, por_marcar = [], [], []
+    for instancia, valores in zip(instancias, nuevas):
+        instancia.marca_carga = marca
+        candidatos = existentes.get(tuple(valores[i] for i in posiciones_clave))
+        if not candidatos:
+            por_crear.append(instancia)
+            continue
+        fila_bd = candidatos.pop(0)
+        if fila_bd[1:] != valores:
+            instancia.pk = fila_bd[0]
+            por_actualizar.append(instancia)
+        else:
+            por_marcar.append(fila_bd[0])
+
+    if por_actualizar:
+        modelo.objects.bulk_update(por_actualizar, nombres + ['marca_carga'], batch_size=tamano_lote)
+    for inicio in range(0, len(por_marcar), tamano_lote):
+        modelo.objects.filter(pk__in=por_marcar[inicio:inicio + tamano_lote]).update(marca_carga=marca)
+    modelo.objects.bulk_create(por_crear, batch_size=tamano_lote)
+
+    return {'creados': len(por_crear), 'actualizados': len(por_actualizar), 'sin_cambios': len(por_marcar)}
+
+
+def eliminar_no_marcados(modelo, carga, tamano_lote=TAMANO_LOTE):
+    """
+    Elimina por lotes los registros de la tabla que ningún bloque de la carga
+    marcó (las filas que ya no están en la hoja). La selección se hace en la
+    base de datos; en memoria solo queda un lote de pks a la vez.
+    """
+    sobrantes = modelo.objects.exclude(marca_carga__startswith=f'{carga}:').order_by('pk')
+    eliminados = 0
+    while True:
+        lote = list(sobrantes.values_list('pk', flat=True)[:tamano_lote])
+        if not lote:
+            return eliminados
+        modelo.objects.filter(pk__in=lote).delete()
+        eliminados += len(lote)
+
+
+class PuntoControl:
+    """
+    Avance de una carga por bloques guardado en un archivo JSON después de
+    cada bloque confirmado, para reanudar desde ahí si la carga se interrumpe.
+    Solo es válido para el mismo archivo (ruta, tamaño y fecha de modificación).
+
+    Por hoja guarda la fila siguiente al último bloque y el identificador de
+    la carga con que se marcan sus registros: su tamaño no crece con la hoja.
+    """
+
+    def __init__(self, ruta, archivo):
+        self.ruta = ruta
+        estadistica = os.stat(archivo)
+        self.archivo = {
+            'ruta': os.path.abspath(archivo),
+            'tamano': estadistica.st_size,
+            'modificado': estadistica.st_mtime,
+        }
+        self.hojas_completas = []
+        self.hoja = None
+        self.fila = 0
+        self.carga = None
+
+    def cargar(self):
+        """
+        Lee el avance guardado.
+
+        Returns:
+            bool: True si había un avance válido para el mismo archivo.
+        """
+        if not os.path.exists(self.ruta):
+            return False
+        with open(self.ruta, encoding='utf-8') as f:
+            datos = json.load(f)
+        if datos.get('archivo') != self.archivo or 'carga' not in datos:
+            return False
+        self.hojas_completas = datos['hojas_completas']
+        self.hoja = datos['hoja']
+        self.fila = datos['fila']
+        self.carga = datos['carga']
+        return True
+
+    def guardar(self):
+        """Escribe el avance de forma atómica (archivo temporal + reemplazo)"""
+        temporal = f'{self.ruta}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({
+                'archivo': self.archivo,
+                'hojas_completas': self.hojas_completas,
+                'hoja': self.hoja,
+                'fila': self.fila,
+                'carga': self.carga,
+            }, f)
+        os.replace(temporal, self.ruta)
+
+    def iniciar_hoja(self, hoja):
+        """
+        Posición desde la que se lee la hoja: 0 con una carga nueva si no es
+        la hoja que se interrumpió.
+        """
+        if self.hoja != hoja:
+            self.hoja, self.fila, self.carga = hoja, 0, uuid.uuid4().hex
+        return self.fila
+
+    def completar_hoja(self, hoja):
+        self.hojas_completas.append(hoja)
+        self.hoja, self.fila, self.carga = None, 0, None
+        self.guardar()
+
+    def eliminar(self):
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
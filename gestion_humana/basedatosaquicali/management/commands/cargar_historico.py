@@ -1,167 +1,251 @@
 import os
+import time
+
 import pandas as pd
-from datetime import datetime
-from dateutil import parser
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from basedatosaquicali.models import (
-    PersonalUrl, ExperienciaTotal, ContratoHistorico, ConsolidadoBaseDatos
+
+from basedatosaquicali.carga import (
+    HOJAS, TAMANO_LOTE, TAMANO_BLOQUE, PuntoControl,
+    preparar_hoja, insertar, sincronizar,
+    leer_bloques, sincronizar_bloque, eliminar_no_marcados,
 )
 
+ARCHIVO_POR_DEFECTO = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', 'archivos_excel', 'link.xlsx'
+)
+
+
 class Command(BaseCommand):
     help = 'Carga datos históricos desde el archivo Excel "link.xlsx" a las tablas de la aplicación basedatosaquicali.'
 
-    def parse_fecha_flexible(self, fecha_value):
-        """
-        Parsea fechas de forma flexible, manejando formatos mixtos y fechas inválidas.
-        Si el día es inválido para el mes, ajusta al último día válido del mes.
-        """
-        # Si ya es un datetime de pandas, convertir a date
-        if isinstance(fecha_value, pd.Timestamp):
-            return fecha_value.date()
-
-        # Si es string, intentar parsear
-        if isinstance(fecha_value, str):
-            try:
-                # Intentar parsear con dayfirst=True
-                return parser.parse(fecha_value, dayfirst=True).date()
-            except ValueError as e:
-                # Si falla, intentar ajustar fechas inválidas (ej: 31/09/2017)
-                import re
-                match = re.match(r'(\d{1,2})/(\d{1,2})/(\d{4})', fecha_value)
-                if match:
-                    dia, mes, anio = int(match.group(1)), int(match.group(2)), int(match.group(3))
-
-                    # Ajustar día al último día válido del mes
-                    import calendar
-                    max_dia = calendar.monthrange(anio, mes)[1]
-                    if dia > max_dia:
-                        dia = max_dia
-                        self.stdout.write(self.style.WARNING(
-                            f'   📅 Fecha ajustada: {fecha_value} → {dia:02d}/{mes:02d}/{anio} (último día válido del mes)'
-                        ))
-
-                    return datetime(anio, mes, dia).date()
-                raise
-
-        # Si es datetime, convertir a date
-        if isinstance(fecha_value, datetime):
-            return fecha_value.date()
-
-        raise ValueError(f"No se pudo parsear la fecha: {fecha_value}")
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modo',
+            choices=['incremental', 'reemplazar'],
+            default='incremental',
+            help='incremental: solo inserta, actualiza o elimina las filas que cambiaron (por clave natural); '
+                 'reemplazar: vacía cada tabla y la vuelve a cargar completa (default: incremental)'
+        )
+        parser.add_argument(
+            '--archivo',
+            type=str,
+            default=ARCHIVO_POR_DEFECTO,
+            help='Ruta del Excel a cargar (default: archivos_excel/link.xlsx)'
+        )
+        parser.add_argument(
+            '--tamano-lote',
+            type=int,
+            default=TAMANO_LOTE,
+            help=f'Registros por INSERT (default: {TAMANO_LOTE})'
+        )
+        parser.add_argument(
+            '--por-bloques',
+            action='store_true',
+            help='Lee cada hoja por bloques de filas (openpyxl en modo solo lectura) y guarda cada bloque '
+                 'en su propia transacción, con un punto de control para reanudar. Para libros grandes.'
+        )
+        parser.add_argument(
+            '--tamano-bloque',
+            type=int,
+            default=TAMANO_BLOQUE,
+            help=f'Filas por bloque con --por-bloques (default: {TAMANO_BLOQUE})'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default=None,
+            help='Archivo JSON del punto de control con --por-bloques (default: <archivo>.checkpoint.json)'
+        )
+        parser.add_argument(
+            '--reanudar',
+            action='store_true',
+            help='Con --por-bloques, continúa desde el último bloque guardado en el punto de control'
+        )
 
     def handle(self, *args, **options):
-        excel_file_path = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), 
-            '..', '..', 'archivos_excel', 'link.xlsx'
-        )
+        excel_file_path = options['archivo']
 
         if not os.path.exists(excel_file_path):
             raise CommandError(f'El archivo Excel no se encontró en: {excel_file_path}')
 
-        self.stdout.write(self.style.SUCCESS(f"Iniciando carga desde {excel_file_path}..."))
+        self.stdout.write(self.style.SUCCESS(f"Iniciando carga ({options['modo']}) desde {excel_file_path}..."))
+        inicio_total = time.perf_counter()
+
+        if options['por_bloques']:
+            self._cargar_por_bloques(excel_file_path, options)
+            self.stdout.write(self.style.SUCCESS(
+                f'¡Carga de datos históricos completada exitosamente! ({time.perf_counter() - inicio_total:.2f} s)'
+            ))
+            return
 
         try:
             xls = pd.ExcelFile(excel_file_path)
 
             with transaction.atomic():
-                # --- Cargar PersonalUrl ---
-                self.stdout.write(self.style.HTTP_INFO('Cargando PersonalUrl...'))
-                PersonalUrl.objects.all().delete() # Limpiar tabla existente
-                df_personal_url = pd.read_excel(xls, sheet_name='personal_url')
-                for index, row in df_personal_url.iterrows():
-                    PersonalUrl.objects.create(
-                        carpeta_general=row['Carpeta General'],
-                        area=row['Área (Nivel 1)'],
-                        contratista=row['Contratista (Nivel 2)'],
-                        enlace_carpeta=row['Enlace Carpeta Contratista'],
-                        cedula=row['CEDULA']
-                    )
-                self.stdout.write(self.style.SUCCESS(f'Cargados {len(df_personal_url)} registros en PersonalUrl.'))
-
-                # --- Cargar ExperienciaTotal ---
-                self.stdout.write(self.style.HTTP_INFO('Cargando ExperienciaTotal...'))
-                ExperienciaTotal.objects.all().delete()
-                df_experiencia_total = pd.read_excel(xls, sheet_name='experiencia_total')
-                for index, row in df_experiencia_total.iterrows():
-                    ExperienciaTotal.objects.create(
-                        cedula=row['Cédula del Contratista'],
-                        nombre_contratista=row['Nombre del Contratista'],
-                        experiencia_bruta_dias=row['Experiencia Bruta (Días - Con Traslape)'],
-                        experiencia_neta_dias=row['Experiencia Neta (Días - Sin Superposición)'],
-                        experiencia_neta_texto=row['Experiencia Neta (Años, Meses, Días)']
-                    )
-                self.stdout.write(self.style.SUCCESS(f'Cargados {len(df_experiencia_total)} registros en ExperienciaTotal.'))
-
-                # --- Cargar ContratoHistorico ---
-                self.stdout.write(self.style.HTTP_INFO('Cargando ContratoHistorico...'))
-                ContratoHistorico.objects.all().delete()
-                df_experiencia = pd.read_excel(xls, sheet_name='eXperiencia')
-                for index, row in df_experiencia.iterrows():
-                    # Convertir fechas con formato más flexible
-                    fecha_inicio = self.parse_fecha_flexible(row['Fecha Inicio'])
-                    fecha_fin = self.parse_fecha_flexible(row['Fecha Fin'])
-
-                    ContratoHistorico.objects.create(
-                        cedula=row['Cédula'],
-                        nombre_contratista=row['Nombre Contratista'],
-                        numero_registro=row['N°'],
-                        contrato=row['Contrato'],
-                        fecha_inicio=fecha_inicio,
-                        fecha_fin=fecha_fin,
-                        dias_brutos=row['Días Brutos'],
-                        traslape=row['¿Traslape/Unión?'],
-                        explicacion_detallada=row['Explicación Detallada'] if pd.notna(row['Explicación Detallada']) else '',
-                        dias_reales_contribuidos=row['Días Reales Contribuidos']
-                    )
-                self.stdout.write(self.style.SUCCESS(f'Cargados {len(df_experiencia)} registros en ContratoHistorico.'))
-
-                # --- Cargar ConsolidadoBaseDatos ---
-                self.stdout.write(self.style.HTTP_INFO('Cargando ConsolidadoBaseDatos...'))
-                ConsolidadoBaseDatos.objects.all().delete()
-                df_consolidado = pd.read_excel(xls, sheet_name='consolidado_basedatos')
-
-                registros_cargados = 0
-                registros_con_error = 0
-
-                for index, row in df_consolidado.iterrows():
-                    try:
-                        # Convertir fechas con formato más flexible
-                        fecha_firma = self.parse_fecha_flexible(row['Fecha de Firma'])
-                        fecha_final = self.parse_fecha_flexible(row['Plazo de Duración (Fecha Final) (DD/MM/AAAA)'])
-
-                        ConsolidadoBaseDatos.objects.create(
-                            area=row['area'],
-                            tipo_documento=row['Tipo de Documento'],
-                            numero_contrato_otrosi=row['No. de Contrato / Otrosí'],
-                            nombre_contratista=row['Nombre del Contratista'],
-                            cedula=row['Cédula del Contratista'],
-                            contratante_nit=row['Contratante (NIT)'],
-                            objeto_contrato=row['Objeto del Contrato'],
-                            fecha_firma=fecha_firma,
-                            fecha_final=fecha_final,
-                            actividades_especificas=row['Actividades Específicas del Contratista / Modificación'] if pd.notna(row['Actividades Específicas del Contratista / Modificación']) else '',
-                            estado=row['ESTADO']
-                        )
-                        registros_cargados += 1
-                    except Exception as e:
-                        registros_con_error += 1
-                        self.stdout.write(self.style.WARNING(
-                            f'⚠️ Error en fila {index + 1} (Contrato: {row.get("No. de Contrato / Otrosí", "N/A")}): {str(e)}'
-                        ))
-                        self.stdout.write(self.style.WARNING(
-                            f'   Fecha de Firma: {row["Fecha de Firma"]}, Fecha Final: {row["Plazo de Duración (Fecha Final) (DD/MM/AAAA)"]}'
-                        ))
-
-                self.stdout.write(self.style.SUCCESS(
-                    f'Cargados {registros_cargados} registros en ConsolidadoBaseDatos.'
-                ))
-                if registros_con_error > 0:
-                    self.stdout.write(self.style.WARNING(
-                        f'⚠️ {registros_con_error} registros con errores fueron omitidos.'
-                    ))
+                hubo_cambios = False
+                for hoja in HOJAS:
+                    hubo_cambios |= self._cargar_hoja(xls, hoja, options['modo'], options['tamano_lote'])
 
-            self.stdout.write(self.style.SUCCESS('¡Carga de datos históricos completada exitosamente!'))
+            # Los reportes por persona en caché incluyen la experiencia histórica
+            if hubo_cambios:
+                self._invalidar_calculos()
 
         except Exception as e:
-            raise CommandError(f'Ocurrió un error durante la carga de datos: {e}')
\ No newline at end of file
+            raise CommandError(f'Ocurrió un error durante la carga de datos: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'¡Carga de datos históricos completada exitosamente! ({time.perf_counter() - inicio_total:.2f} s)'
+        ))
+
+    def _cargar_hoja(self, xls, hoja, modo, tamano_lote):
+        """
+        Lee, convierte y guarda una hoja, reportando el tiempo de cada paso.
+
+        Returns:
+            bool: True si la tabla cambió.
+        """
+        modelo = hoja['modelo']
+        nombre = modelo.__name__
+        self.stdout.write(self.style.HTTP_INFO(f'Cargando {nombre}...'))
+
+        inicio = time.perf_counter()
+        df = pd.read_excel(xls, sheet_name=hoja['hoja'])
+        lectura = time.perf_counter()
+        instancias, ajustes, errores = preparar_hoja(df, hoja)
+        conversion = time.perf_counter()
+        if modo == 'incremental':
+            conteos = sincronizar(modelo, instancias, hoja['clave'], tamano_lote)
+        else:
+            cargados = insertar(modelo, instancias, tamano_lote)
+        fin = time.perf_counter()
+
+        for fila, original, fecha in ajustes:
+            self.stdout.write(self.style.WARNING(
+                f'   📅 Fecha ajustada en fila {fila}: {original} → {fecha:%d/%m/%Y} (último día válido del mes)'
+            ))
+        for fila, mensaje in errores:
+            self.stdout.write(self.style.WARNING(f'⚠️ Error en fila {fila}: {mensaje}'))
+
+        if modo == 'incremental':
+            self.stdout.write(self.style.SUCCESS(
+                f"Sincronizados {len(instancias)} registros en {nombre}: {conteos['creados']} nuevos, "
+                f"{conteos['actualizados']} actualizados, {conteos['eliminados']} eliminados, "
+                f"{conteos['sin_cambios']} sin cambios."
+            ))
+            cambio = any(conteos[clave] for clave in ('creados', 'actualizados', 'eliminados'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Cargados {cargados} registros en {nombre}.'))
+            cambio = True
+        if errores:
+            self.stdout.write(self.style.WARNING(f'⚠️ {len(errores)} registros con errores fueron omitidos.'))
+        self.stdout.write(
+            f'   ⏱️  {fin - inicio:.2f} s (lectura {lectura - inicio:.2f} s, '
+            f'conversión {conversion - lectura:.2f} s, escritura {fin - conversion:.2f} s)'
+        )
+        return cambio
+
+    def _invalidar_calculos(self):
+        """Actualiza o invalida lo que se calculó con el histórico anterior"""
+        from formapp.signals import invalidar_reportes
+        from formapp.services import actualizar_resumenes_historicos, descartar_intervalos_fusionados
+        invalidar_reportes()
+        # La próxima actualización de experiencia de cada persona se calcula completa
+        descartar_intervalos_fusionados()
+        inicio = time.perf_counter()
+        total = actualizar_resumenes_historicos()
+        self.stdout.write(self.style.SUCCESS(
+            f'Resúmenes históricos actualizados: {total} cédulas ({time.perf_counter() - inicio:.2f} s)'
+        ))
+
+    def _cargar_por_bloques(self, excel_file_path, options):
+        """
+        Carga incremental hoja por hoja y bloque por bloque. Cada bloque se
+        guarda en su propia transacción (un savepoint si ya hay una abierta) y
+        el avance queda en el punto de control, de modo que una carga
+        interrumpida se puede reanudar con --reanudar.
+        """
+        if options['modo'] != 'incremental':
+            # Vaciar la tabla y confirmar bloque por bloque la dejaría incompleta a la vista de todos
+            raise CommandError('La carga por bloques solo está disponible en modo incremental.')
+        if options['tamano_bloque'] < 1:
+            raise CommandError('--tamano-bloque debe ser mayor que 0.')
+
+        punto = PuntoControl(options['checkpoint'] or f'{excel_file_path}.checkpoint.json', excel_file_path)
+        reanudada = options['reanudar'] and punto.cargar()
+        if reanudada:
+            self.stdout.write(self.style.WARNING(
+                f'↩️  Reanudando: hojas completas {punto.hojas_completas or "ninguna"}'
+                + (f', {punto.hoja} desde la fila {punto.fila + 1}' if punto.hoja else '')
+            ))
+        elif options['reanudar']:
+            self.stdout.write(self.style.WARNING('No hay un punto de control válido para este archivo; se inicia desde el principio.'))
+
+        # Si se reanuda no se sabe si los bloques anteriores cambiaron algo
+        hubo_cambios = reanudada
+        try:
+            for hoja in HOJAS:
+                if hoja['hoja'] in punto.hojas_completas:
+                    self.stdout.write(f"Omitiendo {hoja['modelo'].__name__} (ya cargada).")
+                    continue
+                hubo_cambios |= self._cargar_hoja_por_bloques(excel_file_path, hoja, punto, options)
+        except Exception as e:
+            raise CommandError(
+                f'Ocurrió un error durante la carga de datos: {e}\n'
+                f'Los bloques anteriores quedaron guardados; corrija el archivo y use --reanudar para continuar.'
+            )
+
+        punto.eliminar()
+        if hubo_cambios:
+            self._invalidar_calculos()
+
+    def _cargar_hoja_por_bloques(self, excel_file_path, hoja, punto, options):
+        """
+        Carga una hoja por bloques y al final elimina los registros que ya no están.
+
+        Returns:
+            bool: True si la tabla cambió.
+        """
+        modelo = hoja['modelo']
+        nombre = modelo.__name__
+        desde = punto.iniciar_hoja(hoja['hoja'])
+        self.stdout.write(self.style.HTTP_INFO(f'Cargando {nombre} por bloques de {options["tamano_bloque"]} filas...'))
+
+        inicio = time.perf_counter()
+        totales = {'creados': 0, 'actualizados': 0, 'sin_cambios': 0, 'omitidos': 0}
+        for bloque in leer_bloques(excel_file_path, hoja, options['tamano_bloque'], desde):
+            with transaction.atomic():
+                instancias, ajustes, errores = preparar_hoja(bloque, hoja)
+                conteos = sincronizar_bloque(
+                    modelo, instancias, hoja['clave'], punto.carga, punto.fila, options['tamano_lote']
+                )
+            punto.fila = int(bloque.index[-1]) + 1
+            punto.guardar()
+
+            for fila, original, fecha in ajustes:
+                self.stdout.write(self.style.WARNING(
+                    f'   📅 Fecha ajustada en fila {fila}: {original} → {fecha:%d/%m/%Y} (último día válido del mes)'
+                ))
+            for fila, mensaje in errores:
+                self.stdout.write(self.style.WARNING(f'⚠️ Error en fila {fila}: {mensaje}'))
+            for clave, valor in conteos.items():
+                totales[clave] += valor
+            totales['omitidos'] += len(errores)
+            self.stdout.write(
+                f'   Filas {int(bloque.index[0]) + 1}-{punto.fila}: {conteos["creados"]} nuevos, '
+                f'{conteos["actualizados"]} actualizados, {conteos["sin_cambios"]} sin cambios'
+            )
+
+        with transaction.atomic():
+            eliminados = eliminar_no_marcados(modelo, punto.carga, options['tamano_lote'])
+        punto.completar_hoja(hoja['hoja'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sincronizados {nombre}: {totales['creados']} nuevos, {totales['actualizados']} actualizados, "
+            f"{eliminados} eliminados, {totales['sin_cambios']} sin cambios."
+        ))
+        if totales['omitidos']:
+            self.stdout.write(self.style.WARNING(f"⚠️ {totales['omitidos']} registros con errores fueron omitidos."))
+        self.stdout.write(f'   ⏱️  {time.perf_counter() - inicio:.2f} s')
+        return bool(totales['creados'] or totales['actualizados'] or eliminados)
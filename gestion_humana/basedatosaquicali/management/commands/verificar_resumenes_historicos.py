@@ -0,0 +1,51 @@
+"""
+Comando para verificar que ResumenHistorico coincide con ContratoHistorico.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from formapp.services import actualizar_resumenes_historicos, verificar_resumenes_historicos
+
+
+class Command(BaseCommand):
+    help = 'Verifica que los resúmenes históricos por cédula coinciden con los contratos (y opcionalmente los corrige)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corregir',
+            action='store_true',
+            help='Recalcula los resúmenes de las cédulas con diferencias'
+        )
+        parser.add_argument(
+            '--mostrar',
+            type=int,
+            default=20,
+            help='Cédulas a listar por tipo de diferencia (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('🔎 Verificando resúmenes históricos...'))
+        diferencias = verificar_resumenes_historicos()
+
+        etiquetas = {
+            'faltantes': 'Cédulas con contratos y sin resumen',
+            'sobrantes': 'Resúmenes de cédulas sin contratos',
+            'distintos': 'Resúmenes que no coinciden con los contratos',
+        }
+        afectadas = set()
+        for clave, etiqueta in etiquetas.items():
+            cedulas = diferencias[clave]
+            afectadas.update(cedulas)
+            if cedulas:
+                muestra = ', '.join(str(cedula) for cedula in cedulas[:options['mostrar']])
+                resto = f' y {len(cedulas) - options["mostrar"]} más' if len(cedulas) > options['mostrar'] else ''
+                self.stdout.write(self.style.WARNING(f'⚠️ {etiqueta}: {len(cedulas)} ({muestra}{resto})'))
+
+        if not afectadas:
+            self.stdout.write(self.style.SUCCESS('✅ Los resúmenes coinciden con los contratos.'))
+            return
+
+        if not options['corregir']:
+            raise CommandError(f'{len(afectadas)} cédulas con diferencias. Use --corregir para recalcularlas.')
+
+        actualizar_resumenes_historicos(afectadas)
+        self.stdout.write(self.style.SUCCESS(f'✅ Resúmenes corregidos: {len(afectadas)} cédulas.'))
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:36
+
+from django.db import migrations, models
+
+
+def llenar_resumenes(apps, schema_editor):
+    """Calcula el resumen de cada cédula con los contratos que ya existen"""
+    ContratoHistorico = apps.get_model('basedatosaquicali', 'ContratoHistorico')
+    ResumenHistorico = apps.get_model('basedatosaquicali', 'ResumenHistorico')
+
+    por_cedula = {}
+    for cedula, inicio, fin in ContratoHistorico.objects.order_by('cedula', 'fecha_inicio').values_list(
+            'cedula', 'fecha_inicio', 'fecha_fin').iterator():
+        por_cedula.setdefault(cedula, []).append((inicio, fin))
+
+    registros = []
+    for cedula, intervalos in por_cedula.items():
+        con_fechas = sorted((inicio, fin) for inicio, fin in intervalos if inicio and fin)
+        total_dias = 0
+        actual = None
+        for inicio, fin in con_fechas:
+            if actual and inicio <= actual[1]:
+                actual[1] = max(actual[1], fin)
+            else:
+                if actual:
+                    total_dias += (actual[1] - actual[0]).days + 1
+                actual = [inicio, fin]
+        if actual:
+            total_dias += (actual[1] - actual[0]).days + 1
+
+        anos, sobrantes = divmod(total_dias, 365)
+        meses, dias = divmod(sobrantes, 30)
+        texto = f"{anos} años, {meses} meses y {dias} días" if dias > 0 else f"{anos} años y {meses} meses"
+        registros.append(ResumenHistorico(
+            cedula=cedula, total_contratos=len(intervalos), total_dias=total_dias,
+            fecha_primera=min((i for i, _ in con_fechas), default=None),
+            fecha_ultima=max((f for _, f in con_fechas), default=None),
+            experiencia_texto=texto,
+        ))
+    ResumenHistorico.objects.bulk_create(registros, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basedatosaquicali', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenHistorico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cedula', models.BigIntegerField(unique=True, verbose_name='Cédula')),
+                ('total_contratos', models.IntegerField(verbose_name='Total Contratos')),
+                ('total_dias', models.IntegerField(verbose_name='Días Netos (Sin Superposición)')),
+                ('fecha_primera', models.DateField(blank=True, null=True, verbose_name='Primera Fecha')),
+                ('fecha_ultima', models.DateField(blank=True, null=True, verbose_name='Última Fecha')),
+                ('experiencia_texto', models.CharField(max_length=100, verbose_name='Experiencia (Años, Meses, Días)')),
+                ('actualizado', models.DateTimeField(auto_now=True, verbose_name='Actualizado')),
+            ],
+            options={
+                'verbose_name': 'Resumen Histórico',
+                'verbose_name_plural': 'Resúmenes Históricos por Cédula',
+            },
+        ),
+        migrations.RunPython(llenar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basedatosaquicali', '0002_resumen_historico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consolidadobasedatos',
+            name='marca_carga',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='contratohistorico',
+            name='marca_carga',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='experienciatotal',
+            name='marca_carga',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='personalurl',
+            name='marca_carga',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50),
+        ),
+    ]
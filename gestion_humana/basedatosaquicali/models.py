@@ -6,6 +6,8 @@ class PersonalUrl(models.Model):
     contratista = models.CharField(max_length=200, verbose_name="Contratista (Nivel 2)")
     enlace_carpeta = models.URLField(max_length=500, verbose_name="Enlace Carpeta Contratista")
     cedula = models.BigIntegerField(verbose_name="Cédula", db_index=True)
+    # Última carga por bloques que vio la fila (ver basedatosaquicali.carga.sincronizar_bloque)
+    marca_carga = models.CharField(max_length=50, blank=True, default='', db_index=True, editable=False)
 
     class Meta:
         verbose_name = "URL Carpeta Personal"
@@ -21,6 +23,8 @@ class ExperienciaTotal(models.Model):
     experiencia_bruta_dias = models.IntegerField(verbose_name="Experiencia Bruta (Días - Con Traslape)")
     experiencia_neta_dias = models.IntegerField(verbose_name="Experiencia Neta (Días - Sin Superposición)")
     experiencia_neta_texto = models.CharField(max_length=100, verbose_name="Experiencia Neta (Años, Meses, Días)")
+    # Última carga por bloques que vio la fila (ver basedatosaquicali.carga.sincronizar_bloque)
+    marca_carga = models.CharField(max_length=50, blank=True, default='', db_index=True, editable=False)
 
     class Meta:
         verbose_name = "Experiencia Total Acumulada"
@@ -41,6 +45,8 @@ class ContratoHistorico(models.Model):
     traslape = models.CharField(max_length=10, verbose_name="¿Traslape/Unión?") # Usamos Char por si viene 'SI'/'NO'
     explicacion_detallada = models.TextField(verbose_name="Explicación Detallada", blank=True, null=True)
     dias_reales_contribuidos = models.IntegerField(verbose_name="Días Reales Contribuidos")
+    # Última carga por bloques que vio la fila (ver basedatosaquicali.carga.sincronizar_bloque)
+    marca_carga = models.CharField(max_length=50, blank=True, default='', db_index=True, editable=False)
 
     class Meta:
         verbose_name = "Contrato Histórico"
@@ -51,6 +57,28 @@ class ContratoHistorico(models.Model):
         return f"{self.contrato} - {self.nombre_contratista}"
 
 
+class ResumenHistorico(models.Model):
+    """
+    Resumen de la experiencia histórica de cada cédula calculado desde
+    ContratoHistorico. Lo actualizan cargar_historico y los cambios de
+    contratos; verificar_resumenes_historicos detecta diferencias.
+    """
+    cedula = models.BigIntegerField(verbose_name="Cédula", unique=True)
+    total_contratos = models.IntegerField(verbose_name="Total Contratos")
+    total_dias = models.IntegerField(verbose_name="Días Netos (Sin Superposición)")
+    fecha_primera = models.DateField(verbose_name="Primera Fecha", blank=True, null=True)
+    fecha_ultima = models.DateField(verbose_name="Última Fecha", blank=True, null=True)
+    experiencia_texto = models.CharField(max_length=100, verbose_name="Experiencia (Años, Meses, Días)")
+    actualizado = models.DateTimeField(auto_now=True, verbose_name="Actualizado")
+
+    class Meta:
+        verbose_name = "Resumen Histórico"
+        verbose_name_plural = "Resúmenes Históricos por Cédula"
+
+    def __str__(self):
+        return f"{self.cedula} - {self.experiencia_texto}"
+
+
 class ConsolidadoBaseDatos(models.Model):
     area = models.CharField(max_length=100, verbose_name="Área")
     tipo_documento = models.CharField(max_length=100, verbose_name="Tipo de Documento")
@@ -63,6 +91,8 @@ class ConsolidadoBaseDatos(models.Model):
     fecha_final = models.DateField(verbose_name="Plazo de Duración (Fecha Final)")
     actividades_especificas = models.TextField(verbose_name="Actividades Específicas / Modificación", blank=True, null=True)
     estado = models.CharField(max_length=50, verbose_name="ESTADO")
+    # Última carga por bloques que vio la fila (ver basedatosaquicali.carga.sincronizar_bloque)
+    marca_carga = models.CharField(max_length=50, blank=True, default='', db_index=True, editable=False)
 
     class Meta:
         verbose_name = "Consolidado Base de Datos"
@@ -0,0 +1,338 @@
+"""
+Tests para la carga del archivo histórico (comando cargar_historico) con
+fechas vectorizadas e inserciones por lote.
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, datetime
+from unittest import mock
+
+import pandas as pd
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from basedatosaquicali import carga
+from basedatosaquicali.carga import parsear_fecha_flexible, parsear_fechas
+from basedatosaquicali.models import (
+    PersonalUrl, ExperienciaTotal, ContratoHistorico, ConsolidadoBaseDatos, ResumenHistorico,
+)
+from formapp.models import InformacionBasica
+
+
+def hojas_historico(filas=3, fecha_fin_experiencia='31/12/2020'):
+    """DataFrames con la estructura de link.xlsx"""
+    cedulas = [1000 + i for i in range(filas)]
+    return {
+        'personal_url': pd.DataFrame({
+            'Carpeta General': ['2024'] * filas, 'Área (Nivel 1)': ['Social'] * filas,
+            'Contratista (Nivel 2)': [f'Contratista {c}' for c in cedulas],
+            'Enlace Carpeta Contratista': [f'https://drive/{c}' for c in cedulas], 'CEDULA': cedulas,
+        }),
+        'experiencia_total': pd.DataFrame({
+            'Cédula del Contratista': cedulas, 'Nombre del Contratista': [f'Contratista {c}' for c in cedulas],
+            'Experiencia Bruta (Días - Con Traslape)': [400] * filas,
+            'Experiencia Neta (Días - Sin Superposición)': [365] * filas,
+            'Experiencia Neta (Años, Meses, Días)': ['1 año'] * filas,
+        }),
+        'eXperiencia': pd.DataFrame({
+            'Cédula': cedulas, 'Nombre Contratista': [f'Contratista {c}' for c in cedulas],
+            'N°': list(range(1, filas + 1)), 'Contrato': [f'CT-{c}' for c in cedulas],
+            'Fecha Inicio': [datetime(2020, 1, 7)] + ['15/03/2020'] * (filas - 1),
+            'Fecha Fin': [fecha_fin_experiencia] * filas,
+            'Días Brutos': [359] * filas, '¿Traslape/Unión?': ['NO'] * filas,
+            'Explicación Detallada': [None] * filas, 'Días Reales Contribuidos': [359] * filas,
+        }),
+        'consolidado_basedatos': pd.DataFrame({
+            'area': ['Social'] * filas, 'Tipo de Documento': ['Contrato'] * filas,
+            'No. de Contrato / Otrosí': [f'CT-{c}' for c in cedulas],
+            'Nombre del Contratista': [f'Contratista {c}' for c in cedulas], 'Cédula del Contratista': cedulas,
+            'Contratante (NIT)': ['FUNDACIÓN NIT 900'] * filas, 'Objeto del Contrato': [None] + ['Objeto'] * (filas - 1),
+            'Fecha de Firma': ['31/09/2017', 'sin fecha'] + ['01/02/2021'] * (filas - 2),
+            'Plazo de Duración (Fecha Final) (DD/MM/AAAA)': [datetime(2021, 12, 31)] * filas,
+            'Actividades Específicas del Contratista / Modificación': [None] * filas,
+            'ESTADO': ['TERMINADO'] * filas,
+        }),
+    }
+
+
+class ParsearFechasTest(TestCase):
+    """La versión vectorizada interpreta las fechas igual que la de fila por fila"""
+
+    def test_igual_que_parsear_fecha_flexible(self):
+        valores = [
+            datetime(2020, 1, 5), pd.Timestamp('2022-02-02'), '31/09/2017', ' 1/2/2021 ', '29/02/2024',
+            '29/02/2021 00:00', '05/13/2020', '2021-03-04', '32/01/2020', None, 'abc',
+        ]
+        fechas, ajustadas, errores = parsear_fechas(pd.Series(valores))
+
+        for indice, valor in enumerate(valores):
+            if indice in errores:
+                with self.assertRaises(ValueError):
+                    parsear_fecha_flexible(valor)
+                continue
+            esperada, ajustada = parsear_fecha_flexible(valor)
+            self.assertEqual(fechas[indice], esperada, valor)
+            self.assertEqual(indice in ajustadas, ajustada, valor)
+        self.assertEqual(sorted(errores), [9, 10])
+        self.assertEqual(fechas[2], date(2017, 9, 30))
+
+
+class CargarHistoricoTest(TestCase):
+    """Tests para el comando cargar_historico"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+
+    def _archivo(self, hojas):
+        ruta = os.path.join(self.directorio, 'link.xlsx')
+        with pd.ExcelWriter(ruta) as writer:
+            for nombre, df in hojas.items():
+                df.to_excel(writer, sheet_name=nombre, index=False)
+        return ruta
+
+    def test_carga_por_lotes(self):
+        ruta = self._archivo(hojas_historico(filas=30))
+        ContratoHistorico.objects.create(
+            cedula=1, nombre_contratista='Anterior', numero_registro=1, contrato='X',
+            fecha_inicio=date(2019, 1, 1), fecha_fin=date(2019, 2, 1), dias_brutos=31,
+            traslape='NO', dias_reales_contribuidos=31,
+        )
+        salida = io.StringIO()
+
+        with CaptureQueriesContext(connection) as consultas:
+            call_command('cargar_historico', archivo=ruta, modo='reemplazar', tamano_lote=10, stdout=salida)
+
+        inserciones = [q for q in consultas.captured_queries
+                       if q['sql'].startswith('INSERT') and 'resumenhistorico' not in q['sql']]
+        # 30 filas en lotes de 10 en cada una de las cuatro tablas
+        self.assertEqual(len(inserciones), 4 * 3)
+        self.assertEqual(PersonalUrl.objects.count(), 30)
+        self.assertEqual(ExperienciaTotal.objects.count(), 30)
+        self.assertEqual(ContratoHistorico.objects.count(), 30)
+        self.assertFalse(ContratoHistorico.objects.filter(contrato='X').exists())
+
+        contrato = ContratoHistorico.objects.get(cedula=1000)
+        self.assertEqual((contrato.fecha_inicio, contrato.fecha_fin), (date(2020, 1, 7), date(2020, 12, 31)))
+        self.assertEqual(contrato.explicacion_detallada, '')
+        self.assertEqual(ContratoHistorico.objects.get(cedula=1001).fecha_inicio, date(2020, 3, 15))
+
+        # La fila con fecha ilegible se omite y la de día inválido se ajusta
+        self.assertEqual(ConsolidadoBaseDatos.objects.count(), 29)
+        self.assertFalse(ConsolidadoBaseDatos.objects.filter(cedula=1001).exists())
+        consolidado = ConsolidadoBaseDatos.objects.get(cedula=1000)
+        self.assertEqual(consolidado.fecha_firma, date(2017, 9, 30))
+        self.assertEqual(consolidado.objeto_contrato, '')
+        self.assertEqual(ConsolidadoBaseDatos.objects.get(cedula=1002).fecha_firma, date(2021, 2, 1))
+
+        # Los resúmenes por cédula se recalculan con los contratos cargados
+        self.assertEqual(ResumenHistorico.objects.count(), 30)
+        self.assertEqual(ResumenHistorico.objects.get(cedula=1000).total_dias, 360)
+
+        texto = salida.getvalue()
+        self.assertIn('Fecha ajustada en fila 1: 31/09/2017 → 30/09/2017', texto)
+        self.assertIn('1 registros con errores fueron omitidos', texto)
+        self.assertEqual(texto.count('⏱️'), 4)
+
+    def test_fecha_invalida_en_contratos_revierte_la_carga(self):
+        PersonalUrl.objects.create(carpeta_general='2023', area='A', contratista='Previo',
+                                   enlace_carpeta='https://drive/previo', cedula=1)
+        ruta = self._archivo(hojas_historico(fecha_fin_experiencia='sin fecha'))
+
+        with self.assertRaises(CommandError):
+            call_command('cargar_historico', archivo=ruta, stdout=io.StringIO())
+
+        self.assertEqual(list(PersonalUrl.objects.values_list('contratista', flat=True)), ['Previo'])
+        self.assertEqual(ContratoHistorico.objects.count(), 0)
+
+    def test_modo_incremental_solo_toca_lo_que_cambio(self):
+        hojas = hojas_historico(filas=4)
+        call_command('cargar_historico', archivo=self._archivo(hojas), stdout=io.StringIO())
+        ids = dict(ContratoHistorico.objects.values_list('contrato', 'pk'))
+        applicant = InformacionBasica.objects.create(
+            primer_nombre='Ana', primer_apellido='Paz', cedula='1000', genero='Femenino',
+            tipo_via='Calle', numero_via='1', numero_casa='2', telefono='3000000000', correo='ana@test.com',
+        )
+        version = InformacionBasica.objects.get(pk=applicant.pk).version_reportes
+
+        # Sin cambios en el Excel no se escribe nada ni se invalidan los reportes
+        salida = io.StringIO()
+        with CaptureQueriesContext(connection) as consultas:
+            call_command('cargar_historico', archivo=self._archivo(hojas), stdout=salida)
+        escrituras = [q for q in consultas.captured_queries
+                      if q['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+        self.assertEqual(escrituras, [])
+        self.assertIn('0 nuevos, 0 actualizados, 0 eliminados, 4 sin cambios', salida.getvalue())
+        self.assertEqual(InformacionBasica.objects.get(pk=applicant.pk).version_reportes, version)
+
+        # Una fila cambia, una desaparece y otra es nueva
+        experiencia = hojas['eXperiencia']
+        experiencia.loc[0, 'Días Reales Contribuidos'] = 100
+        experiencia = experiencia.drop(index=1)
+        experiencia.loc[9] = [2000, 'Nuevo', 9, 'CT-2000', '01/01/2022', '30/06/2022', 180, 'NO', None, 180]
+        hojas['eXperiencia'] = experiencia
+        salida = io.StringIO()
+        call_command('cargar_historico', archivo=self._archivo(hojas), stdout=salida)
+
+        self.assertIn('1 nuevos, 1 actualizados, 1 eliminados, 2 sin cambios', salida.getvalue())
+        self.assertEqual(ContratoHistorico.objects.get(contrato='CT-1000').pk, ids['CT-1000'])
+        self.assertEqual(ContratoHistorico.objects.get(contrato='CT-1000').dias_reales_contribuidos, 100)
+        self.assertFalse(ContratoHistorico.objects.filter(contrato='CT-1001').exists())
+        self.assertEqual(ContratoHistorico.objects.get(contrato='CT-2000').fecha_fin, date(2022, 6, 30))
+        self.assertEqual(ContratoHistorico.objects.get(contrato='CT-1003').pk, ids['CT-1003'])
+        self.assertGreater(InformacionBasica.objects.get(pk=applicant.pk).version_reportes, version)
+
+    def test_claves_duplicadas_se_emparejan_en_orden(self):
+        hojas = hojas_historico(filas=3)
+        hojas['eXperiencia'].loc[2, ['Cédula', 'Contrato', 'Fecha Inicio']] = [1001, 'CT-1001', '15/03/2020']
+        call_command('cargar_historico', archivo=self._archivo(hojas), stdout=io.StringIO())
+        self.assertEqual(ContratoHistorico.objects.filter(contrato='CT-1001').count(), 2)
+
+        hojas['eXperiencia'].loc[2, 'Días Brutos'] = 10
+        salida = io.StringIO()
+        call_command('cargar_historico', archivo=self._archivo(hojas), stdout=salida)
+
+        self.assertIn('0 nuevos, 1 actualizados, 0 eliminados, 2 sin cambios', salida.getvalue())
+        self.assertEqual(
+            sorted(ContratoHistorico.objects.filter(contrato='CT-1001').values_list('dias_brutos', flat=True)),
+            [10, 359],
+        )
+
+
+class CargarHistoricoPorBloquesTest(TestCase):
+    """Tests para la carga por bloques con punto de control"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        self.ruta = os.path.join(self.directorio, 'link.xlsx')
+        self.checkpoint = self.ruta + '.checkpoint.json'
+
+    def _archivo(self, hojas):
+        with pd.ExcelWriter(self.ruta) as writer:
+            for nombre, df in hojas.items():
+                df.to_excel(writer, sheet_name=nombre, index=False)
+
+    def _filas(self, modelo):
+        campos = [f.attname for f in carga.campos_datos(modelo)]
+        return sorted(modelo.objects.values_list(*campos))
+
+    def test_mismo_resultado_que_la_carga_completa(self):
+        hojas = hojas_historico(filas=12)
+        hojas['consolidado_basedatos'].loc[3, 'Objeto del Contrato'] = 'N/A'
+        self._archivo(hojas)
+        modelos = (PersonalUrl, ExperienciaTotal, ContratoHistorico, ConsolidadoBaseDatos)
+        call_command('cargar_historico', archivo=self.ruta, stdout=io.StringIO())
+        esperado = [self._filas(modelo) for modelo in modelos]
+
+        salida = io.StringIO()
+        call_command('cargar_historico', archivo=self.ruta, modo='reemplazar', stdout=io.StringIO())
+        for modelo in modelos:
+            modelo.objects.all().delete()
+        call_command('cargar_historico', archivo=self.ruta, por_bloques=True, tamano_bloque=5, stdout=salida)
+
+        self.assertEqual([self._filas(modelo) for modelo in modelos], esperado)
+        texto = salida.getvalue()
+        self.assertIn('Filas 6-10: 5 nuevos', texto)
+        self.assertIn('Fecha ajustada en fila 1: 31/09/2017', texto)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_reanudar_despues_de_un_error(self):
+        hojas = hojas_historico(filas=12)
+        self._archivo(hojas)
+        sincronizar_bloque = carga.sincronizar_bloque
+        llamadas = []
+
+        def falla_en_contratos(modelo, *args, **kwargs):
+            llamadas.append(modelo)
+            if modelo is ContratoHistorico and llamadas.count(ContratoHistorico) == 2:
+                raise RuntimeError('conexión perdida')
+            return sincronizar_bloque(modelo, *args, **kwargs)
+
+        comando = 'basedatosaquicali.management.commands.cargar_historico.sincronizar_bloque'
+        with mock.patch(comando, side_effect=falla_en_contratos):
+            with self.assertRaisesMessage(CommandError, '--reanudar'):
+                call_command('cargar_historico', archivo=self.ruta, por_bloques=True, tamano_bloque=5,
+                             stdout=io.StringIO())
+
+        # Las hojas anteriores y el primer bloque de contratos quedaron guardados
+        self.assertEqual(PersonalUrl.objects.count(), 12)
+        self.assertEqual(ContratoHistorico.objects.count(), 5)
+        self.assertEqual(ConsolidadoBaseDatos.objects.count(), 0)
+        self.assertTrue(os.path.exists(self.checkpoint))
+        # El punto de control solo guarda la posición y la carga, no los registros vistos
+        with open(self.checkpoint, encoding='utf-8') as f:
+            punto = json.load(f)
+        self.assertEqual(sorted(punto), ['archivo', 'carga', 'fila', 'hoja', 'hojas_completas'])
+        self.assertEqual((punto['hoja'], punto['fila']), ('eXperiencia', 5))
+
+        salida = io.StringIO()
+        call_command('cargar_historico', archivo=self.ruta, por_bloques=True, tamano_bloque=5, reanudar=True,
+                     stdout=salida)
+
+        texto = salida.getvalue()
+        self.assertIn('Omitiendo PersonalUrl (ya cargada)', texto)
+        self.assertIn('Filas 6-10: 5 nuevos', texto)
+        # Solo la hoja de consolidado empieza desde la primera fila
+        self.assertEqual(texto.count('Filas 1-5:'), 1)
+        self.assertEqual(PersonalUrl.objects.count(), 12)
+        self.assertEqual(ContratoHistorico.objects.count(), 12)
+        self.assertEqual(ContratoHistorico.objects.values('contrato').distinct().count(), 12)
+        self.assertEqual(ConsolidadoBaseDatos.objects.count(), 11)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_reanudar_bloque_confirmado_sin_punto_de_control(self):
+        """Si se corta entre el bloque confirmado y el punto de control, el bloque se repite sin duplicar"""
+        self._archivo(hojas_historico(filas=12))
+        guardar = carga.PuntoControl.guardar
+
+        def falla_despues_del_segundo_bloque(punto):
+            if punto.hoja == 'eXperiencia' and punto.fila == 10:
+                raise OSError('disco lleno')
+            guardar(punto)
+
+        with mock.patch.object(carga.PuntoControl, 'guardar', falla_despues_del_segundo_bloque):
+            with self.assertRaises(CommandError):
+                call_command('cargar_historico', archivo=self.ruta, por_bloques=True, tamano_bloque=5,
+                             stdout=io.StringIO())
+        self.assertEqual(ContratoHistorico.objects.count(), 10)
+
+        salida = io.StringIO()
+        call_command('cargar_historico', archivo=self.ruta, por_bloques=True, tamano_bloque=5, reanudar=True,
+                     stdout=salida)
+
+        self.assertIn('Filas 6-10: 0 nuevos, 0 actualizados, 5 sin cambios', salida.getvalue())
+        self.assertEqual(ContratoHistorico.objects.count(), 12)
+        self.assertEqual(ContratoHistorico.objects.values('contrato').distinct().count(), 12)
+
+    def test_segunda_carga_elimina_lo_que_ya_no_esta(self):
+        hojas = hojas_historico(filas=12)
+        self._archivo(hojas)
+        call_command('cargar_historico', archivo=self.ruta, por_bloques=True, tamano_bloque=5, stdout=io.StringIO())
+        ids = dict(ContratoHistorico.objects.values_list('contrato', 'pk'))
+
+        # Desaparecen filas del primer y del último bloque; la primera cambia de bloque
+        hojas['eXperiencia'] = hojas['eXperiencia'].drop(index=[1, 11])
+        self._archivo(hojas)
+        salida = io.StringIO()
+        call_command('cargar_historico', archivo=self.ruta, por_bloques=True, tamano_bloque=5, stdout=salida)
+
+        self.assertIn('Sincronizados ContratoHistorico: 0 nuevos, 0 actualizados, 2 eliminados, 10 sin cambios',
+                      salida.getvalue())
+        self.assertEqual(
+            dict(ContratoHistorico.objects.values_list('contrato', 'pk')),
+            {contrato: pk for contrato, pk in ids.items() if contrato not in ('CT-1001', 'CT-1011')},
+        )
+        self.assertEqual(ResumenHistorico.objects.filter(cedula__in=[1001, 1011]).count(), 0)
+
+    def test_solo_modo_incremental(self):
+        self._archivo(hojas_historico())
+        with self.assertRaises(CommandError):
+            call_command('cargar_historico', archivo=self.ruta, por_bloques=True, modo='reemplazar',
+                         stdout=io.StringIO())
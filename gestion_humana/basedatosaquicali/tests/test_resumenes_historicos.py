@@ -0,0 +1,77 @@
+"""
+Tests para la tabla ResumenHistorico: se mantiene al cambiar los contratos
+históricos y el comando verificar_resumenes_historicos detecta diferencias.
+"""
+import io
+from datetime import date
+
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, RequestFactory
+
+from basedatosaquicali.models import ContratoHistorico, ResumenHistorico
+from formapp.services import obtener_resumen_experiencia_historica
+from formapp.tests import crear_contrato_historico
+
+
+class ResumenHistoricoTest(TestCase):
+    """El resumen guardado sigue a los contratos de la cédula"""
+
+    def test_se_actualiza_al_guardar_contratos(self):
+        crear_contrato_historico(3000, date(2020, 1, 1), date(2020, 12, 31))
+        contrato = crear_contrato_historico(3000, date(2020, 6, 1), date(2021, 6, 30))
+
+        resumen = ResumenHistorico.objects.get(cedula=3000)
+        self.assertEqual((resumen.total_contratos, resumen.total_dias), (2, 547))
+        self.assertEqual((resumen.fecha_primera, resumen.fecha_ultima), (date(2020, 1, 1), date(2021, 6, 30)))
+        self.assertEqual(resumen.experiencia_texto, '1 años, 6 meses y 2 días')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(obtener_resumen_experiencia_historica('3000')['total_dias'], 547)
+
+        # Al cambiar de cédula se actualizan las dos
+        contrato.cedula = 3001
+        contrato.save()
+        self.assertEqual(ResumenHistorico.objects.get(cedula=3000).total_dias, 366)
+        self.assertEqual(ResumenHistorico.objects.get(cedula=3001).total_contratos, 1)
+
+    def test_eliminar_desde_el_admin(self):
+        contrato = crear_contrato_historico(3000, date(2020, 1, 1), date(2020, 12, 31))
+        crear_contrato_historico(3001, date(2020, 1, 1), date(2020, 12, 31))
+        model_admin = site._registry[ContratoHistorico]
+        request = RequestFactory().post('/')
+
+        model_admin.delete_model(request, contrato)
+        model_admin.delete_queryset(request, ContratoHistorico.objects.filter(cedula=3001))
+
+        self.assertFalse(ResumenHistorico.objects.exists())
+        self.assertFalse(obtener_resumen_experiencia_historica(3000)['tiene_experiencia'])
+
+    def test_verificar_y_corregir(self):
+        crear_contrato_historico(3000, date(2020, 1, 1), date(2020, 12, 31))
+        crear_contrato_historico(3001, date(2020, 1, 1), date(2020, 12, 31))
+        call_command('verificar_resumenes_historicos', stdout=io.StringIO())
+
+        # bulk_create y update no disparan señales
+        ContratoHistorico.objects.bulk_create([ContratoHistorico(
+            cedula=3002, nombre_contratista='X', numero_registro=1, contrato='CT', fecha_inicio=date(2021, 1, 1),
+            fecha_fin=date(2021, 1, 31), dias_brutos=0, traslape='NO', dias_reales_contribuidos=0,
+        )])
+        ContratoHistorico.objects.filter(cedula=3001).update(fecha_fin=date(2021, 12, 31))
+        ResumenHistorico.objects.create(cedula=4000, total_contratos=1, total_dias=1, experiencia_texto='x')
+
+        salida = io.StringIO()
+        with self.assertRaisesMessage(CommandError, '3 cédulas con diferencias'):
+            call_command('verificar_resumenes_historicos', stdout=salida)
+        self.assertIn('Cédulas con contratos y sin resumen: 1 (3002)', salida.getvalue())
+        self.assertIn('Resúmenes de cédulas sin contratos: 1 (4000)', salida.getvalue())
+        self.assertIn('Resúmenes que no coinciden con los contratos: 1 (3001)', salida.getvalue())
+
+        call_command('verificar_resumenes_historicos', corregir=True, stdout=io.StringIO())
+
+        self.assertEqual(sorted(ResumenHistorico.objects.values_list('cedula', flat=True)), [3000, 3001, 3002])
+        self.assertEqual(ResumenHistorico.objects.get(cedula=3001).total_dias, 731)
+        salida = io.StringIO()
+        call_command('verificar_resumenes_historicos', stdout=salida)
+        self.assertIn('coinciden', salida.getvalue())
@@ -5,4 +5,5 @@ app_name = 'basedatosaquicali'
 
 urlpatterns = [
     path('buscar/', views.buscar_historico, name='buscar_historico'),
+    path('certificados/', views.descargar_certificados, name='descargar_certificados'),
 ]
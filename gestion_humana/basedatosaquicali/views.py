@@ -1,7 +1,12 @@
+import re
+
 from django.shortcuts import render
 from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponseBadRequest, StreamingHttpResponse
 from .models import PersonalUrl, ExperienciaTotal, ContratoHistorico, ConsolidadoBaseDatos
 from django.contrib.auth.decorators import login_required, user_passes_test
+from formapp.report_generators_pdf import generar_certificados_historicos_pdf, iterar_certificados_historicos
+from formapp.zip_streaming import iterar_zip
 
 def es_admin(user):
     return user.is_staff or user.is_superuser
@@ -38,4 +43,56 @@ def buscar_historico(request):
             # Si no es un número, mostrar error o buscar por nombre (opcional, por ahora solo cédula por seguridad)
             context['error'] = "Por favor ingrese un número de cédula válido (sin puntos ni comas)."
 
-    return render(request, 'basedatosaquicali/busqueda_historica.html', context)
\ No newline at end of file
+    return render(request, 'basedatosaquicali/busqueda_historica.html', context)
+
+
+def _parsear_cedulas(texto):
+    """
+    Convierte una lista de cédulas separadas por comas, espacios o saltos de línea.
+
+    Raises:
+        ValueError: Si algún valor no es un número.
+    """
+    cedulas = []
+    for valor in re.split(r'[\s,;]+', texto.strip()):
+        if valor and int(valor) not in cedulas:
+            cedulas.append(int(valor))
+    return cedulas
+
+
+@login_required
+@user_passes_test(es_admin)
+def descargar_certificados(request):
+    """
+    Descarga los certificados de todos los contratos del consolidado de una o
+    varias cédulas (?cedulas=1,2,3).
+
+    Con formato=pdf (default) se descarga un solo PDF con una página por
+    contrato; con formato=zip, un ZIP con un PDF por contrato que se genera
+    mientras se envía.
+    """
+    try:
+        cedulas = _parsear_cedulas(request.GET.get('cedulas', ''))
+    except ValueError:
+        return HttpResponseBadRequest("Ingrese números de cédula válidos (sin puntos ni comas de miles).")
+    formato = request.GET.get('formato', 'pdf')
+    if not cedulas or formato not in ('pdf', 'zip'):
+        return HttpResponseBadRequest("Indique al menos una cédula y un formato válido (pdf o zip).")
+
+    contratos = ConsolidadoBaseDatos.objects.filter(cedula__in=cedulas).order_by('cedula', 'fecha_firma', 'pk')
+    if not contratos.exists():
+        raise Http404("No hay contratos en el consolidado para las cédulas indicadas.")
+
+    nombre = f'Certificados_{cedulas[0]}' if len(cedulas) == 1 else f'Certificados_{len(cedulas)}_cedulas'
+    if formato == 'zip':
+        entradas = iterar_certificados_historicos(contratos.iterator())
+        response = StreamingHttpResponse(iterar_zip(entradas), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{nombre}.zip"'
+        return response
+
+    return FileResponse(
+        generar_certificados_historicos_pdf(contratos),
+        as_attachment=True,
+        filename=f'{nombre}.pdf',
+        content_type='application/pdf',
+    )
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import InformacionBasica, ExperienciaLaboral, InformacionAcademica, Posgrado, Especializacion, CalculoExperiencia, DocumentosIdentidad, Antecedentes, AnexosAdicionales, EducacionBasica, EducacionSuperior, HistorialCorreccion
+from .models import InformacionBasica, ExperienciaLaboral, InformacionAcademica, Posgrado, Especializacion, CalculoExperiencia, DocumentosIdentidad, Antecedentes, AnexosAdicionales, EducacionBasica, EducacionSuperior, HistorialCorreccion, ExportacionPersonal
 
 class ExperienciaLaboralInline(admin.TabularInline):
     model = ExperienciaLaboral
@@ -148,27 +148,29 @@ class InformacionBasicaAdmin(admin.ModelAdmin):
         CalculoExperienciaInline
     ]
 
-    def save_model(self, request, obj, form, change):
-        """Guarda el modelo y recalcula la experiencia"""
-        super().save_model(request, obj, form, change)
-        # Importar aquí para evitar importación circular
-        from .views import calcular_experiencia_total
-        if obj.experiencias_laborales.exists():
-            calcular_experiencia_total(obj)
+    def save_related(self, request, form, formsets, change):
+        """Los reportes de la persona se invalidan una vez por guardado, no por cada fila de los inlines"""
+        from .signals import reportes_agrupados
+        with reportes_agrupados():
+            super().save_related(request, form, formsets, change)
 
     def save_formset(self, request, form, formset, change):
         """Guarda los formsets y recalcula la experiencia si es necesario"""
+        if formset.model == ExperienciaLaboral:
+            from .services import marcar_actualizacion_incremental
+            marcar_actualizacion_incremental(formset)
         instances = formset.save(commit=False)
         for instance in instances:
             instance.save()
         formset.save_m2m()
 
-        # Recalcular experiencia después de guardar experiencias laborales
+        # Actualizar la experiencia con los intervalos que cambiaron (o completa si cambió la cédula)
         if formset.model == ExperienciaLaboral:
-            from .views import calcular_experiencia_total
+            # Importar aquí para evitar importación circular
+            from .services import actualizar_experiencia_incremental, intervalos_cambiados
             obj = form.instance
             if obj.experiencias_laborales.exists():
-                calcular_experiencia_total(obj)
+                actualizar_experiencia_incremental(obj, *intervalos_cambiados(formset))
 
 @admin.register(EducacionBasica)
 class EducacionBasicaAdmin(admin.ModelAdmin):
@@ -373,3 +375,9 @@ class HistorialCorreccionAdmin(admin.ModelAdmin):
     fue_corregido.boolean = True
     fue_corregido.short_description = 'Corregido'
 
+
+@admin.register(ExportacionPersonal)
+class ExportacionPersonalAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tipo', 'estado', 'fase', 'solicitado_por', 'created_at', 'finalizado_en', 'archivo']
+    list_filter = ['estado', 'tipo', 'created_at']
+    readonly_fields = ['created_at', 'iniciado_en', 'finalizado_en']
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FormappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'formapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,252 @@
+"""
+Caché local de documentos para las exportaciones.
+Guarda en disco el contenido de los archivos de Cloudinary (o del storage
+configurado) para que exportaciones repetidas de documentos sin cambios
+lean del disco local en lugar de volver a descargarlos por la red.
+
+Cada entrada se identifica por el hash SHA-256 del nombre en el storage y
+su versión (segmento /v<número>/ de la URL de Cloudinary o una versión
+explícita), de modo que un documento reemplazado produce una clave nueva.
+El tamaño total está acotado y se desalojan primero las entradas usadas
+hace más tiempo (LRU).
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Segmento de versión que Cloudinary incluye en las URLs de entrega
+PATRON_VERSION_URL = re.compile(r'/v(\d+)/')
+
+SUFIJO_TEMPORAL = '.tmp'
+
+
+def version_documento(file_field):
+    """
+    Obtiene la versión de un archivo a partir de su URL.
+
+    Args:
+        file_field: FieldFile del modelo.
+
+    Returns:
+        str: Versión de Cloudinary o cadena vacía si no se puede determinar.
+    """
+    try:
+        url = file_field.url
+    except Exception:
+        return ''
+    coincidencia = PATRON_VERSION_URL.search(url or '')
+    return coincidencia.group(1) if coincidencia else ''
+
+
+class CacheDocumentos:
+    """
+    Caché en disco acotada por tamaño con desalojo LRU.
+    Es segura para usarse desde varios hilos del mismo proceso.
+    """
+
+    def __init__(self, directorio, tamano_maximo):
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._tamano_total = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self._cargar_indice()
+
+    def _cargar_indice(self):
+        """Reconstruye el índice LRU a partir de los archivos ya presentes en disco"""
+        os.makedirs(self.directorio, exist_ok=True)
+        encontrados = []
+        for raiz, _, archivos in os.walk(self.directorio):
+            for nombre in archivos:
+                ruta = os.path.join(raiz, nombre)
+                if nombre.endswith(SUFIJO_TEMPORAL):
+                    # Escrituras interrumpidas
+                    self._eliminar_archivo(ruta)
+                    continue
+                try:
+                    info = os.stat(ruta)
+                except OSError:
+                    continue
+                encontrados.append((info.st_mtime, nombre, info.st_size))
+
+        for _, clave, tamano in sorted(encontrados):
+            self._entradas[clave] = tamano
+            self._tamano_total += tamano
+        self._desalojar()
+
+    @staticmethod
+    def clave(nombre, version=''):
+        return hashlib.sha256(f'{nombre}|{version}'.encode('utf-8')).hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave[:2], clave)
+
+    @staticmethod
+    def _eliminar_archivo(ruta):
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+    def leer(self, clave):
+        """Retorna el contenido almacenado o None si no está en caché"""
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'rb') as f:
+                contenido = f.read()
+        except OSError:
+            with self._lock:
+                self.fallos += 1
+                # Otro proceso pudo haberla desalojado
+                if clave in self._entradas:
+                    self._tamano_total -= self._entradas.pop(clave)
+            return None
+
+        with self._lock:
+            self.aciertos += 1
+            if clave not in self._entradas:
+                self._entradas[clave] = len(contenido)
+                self._tamano_total += len(contenido)
+            self._entradas.move_to_end(clave)
+        try:
+            # El mtime conserva el orden LRU entre reinicios
+            os.utime(ruta)
+        except OSError:
+            pass
+        return contenido
+
+    def guardar(self, clave, contenido):
+        """Almacena el contenido y desaloja las entradas menos recientes si hace falta"""
+        if contenido is None or len(contenido) > self.tamano_maximo:
+            return
+
+        ruta = self._ruta(clave)
+        temporal = f'{ruta}.{threading.get_ident()}{SUFIJO_TEMPORAL}'
+        try:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            with open(temporal, 'wb') as f:
+                f.write(contenido)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el documento en caché: {e}")
+            self._eliminar_archivo(temporal)
+            return
+
+        with self._lock:
+            anterior = self._entradas.pop(clave, 0)
+            self._entradas[clave] = len(contenido)
+            self._tamano_total += len(contenido) - anterior
+            self._desalojar()
+
+    def _desalojar(self):
+        while self._tamano_total > self.tamano_maximo and self._entradas:
+            clave, tamano = self._entradas.popitem(last=False)
+            self._tamano_total -= tamano
+            self.desalojos += 1
+            self._eliminar_archivo(self._ruta(clave))
+
+    def obtener(self, nombre, cargar, version=''):
+        """
+        Retorna el contenido de un documento desde la caché o lo carga.
+
+        Args:
+            nombre: Nombre del archivo en el storage.
+            cargar: Función sin argumentos que obtiene los bytes si no están en caché.
+                Puede retornar None (no se almacena) o lanzar excepciones.
+            version: Versión del archivo (ver version_documento).
+
+        Returns:
+            bytes | None: Contenido del documento.
+        """
+        clave = self.clave(nombre, version)
+        contenido = self.leer(clave)
+        if contenido is not None:
+            return contenido
+
+        contenido = cargar()
+        if contenido is not None:
+            self.guardar(clave, contenido)
+        return contenido
+
+    def limpiar(self):
+        """Elimina todas las entradas de la caché"""
+        with self._lock:
+            while self._entradas:
+                clave, _ = self._entradas.popitem()
+                self._eliminar_archivo(self._ruta(clave))
+            self._tamano_total = 0
+
+    def estadisticas(self):
+        """Contadores de uso para monitoreo"""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0.0,
+                'desalojos': self.desalojos,
+                'entradas': len(self._entradas),
+                'tamano_bytes': self._tamano_total,
+                'tamano_maximo_bytes': self.tamano_maximo,
+            }
+
+
+_caches = {}
+_cache_lock = threading.Lock()
+
+
+def _obtener_instancia(prefijo):
+    """
+    Retorna la caché compartida del proceso configurada con los settings
+    <prefijo>_ACTIVO, <prefijo>_ROOT y <prefijo>_MAX_MB, o None si está desactivada.
+    Se recrea si cambia el directorio o el tamaño configurado.
+    """
+    if not getattr(settings, f'{prefijo}_ACTIVO', False):
+        return None
+
+    directorio = getattr(settings, f'{prefijo}_ROOT')
+    tamano_maximo = getattr(settings, f'{prefijo}_MAX_MB') * 1024 * 1024
+    with _cache_lock:
+        cache = _caches.get(prefijo)
+        if (cache is None or cache.directorio != directorio
+                or cache.tamano_maximo != tamano_maximo):
+            cache = _caches[prefijo] = CacheDocumentos(directorio, tamano_maximo)
+        return cache
+
+
+def obtener_cache():
+    """Caché de documentos descargados (DOCUMENTOS_CACHE_*)"""
+    return _obtener_instancia('DOCUMENTOS_CACHE')
+
+
+def obtener_cache_reportes():
+    """Caché de reportes generados por persona (REPORTES_CACHE_*)"""
+    return _obtener_instancia('REPORTES_CACHE')
+
+
+def leer_documento_con_cache(file_field, cargar):
+    """
+    Lee un documento pasando por la caché compartida si está activa.
+
+    Args:
+        file_field: FieldFile del modelo.
+        cargar: Función sin argumentos que obtiene los bytes del storage.
+
+    Returns:
+        bytes | None: Contenido del documento.
+    """
+    cache = obtener_cache()
+    nombre = getattr(file_field, 'name', None)
+    if cache is None or not nombre:
+        return cargar()
+    return cache.obtener(nombre, cargar, version_documento(file_field))
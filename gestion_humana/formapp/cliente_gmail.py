@@ -0,0 +1,145 @@
+"""
+Cliente compartido de la API de Gmail.
+Las credenciales se leen una sola vez por proceso (GMAIL_TOKEN_JSON o
+token.json) y se renuevan antes de que venza el token de acceso, así cada
+correo cuesta una sola llamada a la API (sin el 401 y la renovación que
+generaba el token guardado sin fecha de expiración). El documento de
+descubrimiento es el estático que trae googleapiclient y se interpreta una
+vez; cada hilo arma su propio servicio sobre él porque httplib2 no es seguro
+entre hilos.
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+logger = logging.getLogger(__name__)
+
+# Gmail API scope
+SCOPES = ['https://www.googleapis.com/auth/gmail.send']
+
+# El token se renueva cuando le falta menos que esto para vencer
+MARGEN_RENOVACION = timedelta(minutes=5)
+
+_credenciales = None
+_documento = None
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def leer_token():
+    """
+    Datos del token de Gmail desde GMAIL_TOKEN_JSON o, si no está, desde token.json.
+
+    Returns:
+        dict o None si no hay token o el JSON es inválido
+    """
+    gmail_token_json = os.getenv('GMAIL_TOKEN_JSON')
+    if gmail_token_json:
+        try:
+            token_data = json.loads(gmail_token_json)
+        except json.JSONDecodeError:
+            return None
+        if token_data:
+            return token_data
+
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    token_path = os.path.join(BASE_DIR, 'token.json')
+    if not os.path.exists(token_path):
+        return None
+    with open(token_path, 'r') as token_file:
+        return json.load(token_file)
+
+
+def crear_credenciales(token_data):
+    """Credentials a partir de los datos del token (incluida la expiración si viene)"""
+    creds = Credentials(
+        token=token_data.get('token'),
+        refresh_token=token_data.get('refresh_token'),
+        token_uri=token_data.get('token_uri'),
+        client_id=token_data.get('client_id'),
+        client_secret=token_data.get('client_secret'),
+        scopes=token_data.get('scopes', SCOPES)
+    )
+    if token_data.get('expiry'):
+        # Mismo formato que escribe Credentials.to_json (UTC sin zona)
+        creds.expiry = datetime.strptime(token_data['expiry'].rstrip('Z').split('.')[0], '%Y-%m-%dT%H:%M:%S')
+    return creds
+
+
+def necesita_renovacion(creds):
+    """
+    Indica si hay que renovar el token antes de usarlo: no hay token, vence
+    dentro de MARGEN_RENOVACION o no se conoce su expiración (token guardado).
+    """
+    if not creds.refresh_token:
+        return False
+    if not creds.token or creds.expiry is None:
+        return True
+    ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+    return creds.expiry - MARGEN_RENOVACION <= ahora
+
+
+def obtener_credenciales():
+    """
+    Retorna las credenciales compartidas del proceso, leyéndolas la primera
+    vez y renovándolas antes de que venzan.
+
+    Returns:
+        Credentials o None si no hay token configurado
+    """
+    global _credenciales
+    with _lock:
+        if _credenciales is None:
+            token_data = leer_token()
+            if not token_data:
+                return None
+            _credenciales = crear_credenciales(token_data)
+
+        if necesita_renovacion(_credenciales):
+            try:
+                _credenciales.refresh(Request())
+            except RefreshError:
+                # Token revocado o inválido: volver a leerlo en el próximo intento
+                _credenciales = None
+                raise
+            logger.info(f'Token de Gmail renovado (vence {_credenciales.expiry})')
+        return _credenciales
+
+
+def _documento_gmail():
+    global _documento
+    with _lock:
+        if _documento is None:
+            _documento = json.loads(get_static_doc('gmail', 'v1'))
+        return _documento
+
+
+def obtener_servicio():
+    """
+    Servicio de Gmail del hilo actual, sobre las credenciales compartidas.
+
+    Returns:
+        googleapiclient Resource o None si no hay token configurado
+    """
+    creds = obtener_credenciales()
+    if creds is None:
+        return None
+    if getattr(_local, 'credenciales', None) is not creds:
+        _local.servicio = build_from_document(_documento_gmail(), credentials=creds)
+        _local.credenciales = creds
+    return _local.servicio
+
+
+def reiniciar():
+    """Descarta las credenciales en memoria (p. ej. después de cambiar el token)"""
+    global _credenciales
+    with _lock:
+        _credenciales = None
@@ -0,0 +1,138 @@
+"""
+Cliente HTTP compartido para leer documentos remotos (Cloudinary).
+Una única sesión por proceso reutiliza las conexiones keep-alive hacia el
+CDN entre todos los hilos de descarga, con reintentos de estados HTTP
+transitorios y métricas por solicitud (bytes, latencia y código de estado).
+Los cortes de conexión y de lectura no se reintentan aquí: los reintenta
+MotorDescargas (una sola capa), así un documento colgado tarda a lo sumo
+DESCARGAS_INTENTOS × timeout y no el producto de ambas capas.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Códigos HTTP que vale la pena reintentar (saturación o fallas transitorias del CDN)
+ESTADOS_REINTENTABLES = (429, 500, 502, 503, 504)
+
+
+class MetricasHTTP:
+    """Contadores acumulados de las solicitudes del proceso (seguros entre hilos)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.solicitudes = 0
+            self.errores = 0
+            self.bytes_recibidos = 0
+            self.latencia_total = 0.0
+            self.latencia_maxima = 0.0
+            self.por_estado = Counter()
+
+    def registrar(self, estado, num_bytes, latencia):
+        """
+        Registra una solicitud.
+
+        Args:
+            estado: Código HTTP o None si no hubo respuesta (timeout, conexión).
+            num_bytes: Bytes recibidos en el cuerpo.
+            latencia: Segundos transcurridos.
+        """
+        with self._lock:
+            self.solicitudes += 1
+            self.bytes_recibidos += num_bytes
+            self.latencia_total += latencia
+            self.latencia_maxima = max(self.latencia_maxima, latencia)
+            self.por_estado[str(estado) if estado else 'sin_respuesta'] += 1
+            if estado is None or estado >= 400:
+                self.errores += 1
+
+    def resumen(self):
+        with self._lock:
+            return {
+                'solicitudes': self.solicitudes,
+                'errores': self.errores,
+                'bytes_recibidos': self.bytes_recibidos,
+                'latencia_promedio_ms': round(1000 * self.latencia_total / self.solicitudes, 1) if self.solicitudes else 0.0,
+                'latencia_maxima_ms': round(1000 * self.latencia_maxima, 1),
+                'por_estado': dict(self.por_estado),
+            }
+
+
+metricas = MetricasHTTP()
+
+_sesion = None
+_sesion_lock = threading.Lock()
+
+
+def crear_sesion():
+    """
+    Crea una sesión con pool de conexiones del tamaño de los hilos de
+    descarga y reintentos para estados transitorios (429 y 5xx).
+    """
+    reintentos = Retry(
+        total=settings.HTTP_REINTENTOS,
+        # Conexión y lectura las reintenta MotorDescargas con su espera exponencial
+        connect=0,
+        read=0,
+        backoff_factor=settings.DESCARGAS_ESPERA_BASE,
+        status_forcelist=ESTADOS_REINTENTABLES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adaptador = HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_HOSTS,
+        pool_maxsize=settings.DESCARGAS_MAX_WORKERS,
+        max_retries=reintentos,
+    )
+    sesion = requests.Session()
+    sesion.mount('https://', adaptador)
+    sesion.mount('http://', adaptador)
+    return sesion
+
+
+def obtener_sesion():
+    """Retorna la sesión compartida del proceso, creándola la primera vez"""
+    global _sesion
+    with _sesion_lock:
+        if _sesion is None:
+            _sesion = crear_sesion()
+        return _sesion
+
+
+def get(url, timeout):
+    """
+    GET con la sesión compartida, registrando métricas de la solicitud.
+
+    Args:
+        url: URL a descargar.
+        timeout: Tupla (connect_timeout, read_timeout) en segundos.
+
+    Returns:
+        requests.Response
+
+    Raises:
+        requests.RequestException: si la solicitud falla tras los reintentos
+    """
+    inicio = time.monotonic()
+    try:
+        response = obtener_sesion().get(url, timeout=timeout)
+    except requests.RequestException:
+        metricas.registrar(None, 0, time.monotonic() - inicio)
+        raise
+
+    latencia = time.monotonic() - inicio
+    metricas.registrar(response.status_code, len(response.content), latencia)
+    logger.debug(f"GET {url} -> {response.status_code} ({len(response.content)} bytes, {latencia:.2f}s)")
+    return response
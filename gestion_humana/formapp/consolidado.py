@@ -0,0 +1,358 @@
+"""
+Hoja consolidada "Personal Completo" (una fila por persona).
+Usa un libro de openpyxl en modo write-only: las filas se escriben en un
+archivo temporal a medida que se agregan en lugar de crear un objeto por
+celda, y los estilos son estilos con nombre registrados una sola vez por
+libro, así que la memoria no crece con la cantidad de personas.
+
+El libro se guarda directamente en el destino recibido (por ejemplo la
+entrada del ZIP que se está transmitiendo), sin copias intermedias en BytesIO.
+
+También arma la exportación tabular completa del personal (CSV o XLSX) con
+consultas .values()/.iterator() en lugar de instancias de modelos.
+"""
+import csv
+from copy import copy
+from datetime import datetime
+
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
+
+from .models import (
+    InformacionBasica,
+    ExperienciaLaboral,
+    InformacionAcademica,
+    EducacionBasica,
+    EducacionSuperior,
+    Posgrado,
+    Especializacion,
+    HistorialCorreccion,
+)
+
+TITULO_HOJA = "Personal Completo"
+TITULO_CONSOLIDADO = "REGISTRO COMPLETO DE PERSONAL"
+
+ENCABEZADOS_CONSOLIDADO = [
+    "Cédula", "Nombre Completo", "Género", "Teléfono", "Correo",
+    "Perfil", "Área del Conocimiento", "Profesión", "Contrato", "Observaciones",
+]
+
+ANCHO_COLUMNA = 20
+
+_BORDE_DELGADO = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+
+
+def _estilos_consolidado():
+    """Estilos con nombre de la hoja; se crean por libro porque openpyxl los asocia a él"""
+    titulo = NamedStyle(name='consolidado_titulo')
+    titulo.font = Font(bold=True, size=14, color="2C3E50")
+
+    encabezado = NamedStyle(name='consolidado_encabezado')
+    encabezado.font = Font(bold=True, color="FFFFFF")
+    encabezado.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    encabezado.alignment = Alignment(horizontal='center', vertical='center')
+    encabezado.border = _BORDE_DELGADO
+
+    celda = NamedStyle(name='consolidado_celda')
+    celda.border = _BORDE_DELGADO
+    return titulo, encabezado, celda
+
+
+def filas_consolidado(applicants):
+    """
+    Valores de la hoja consolidada para cada persona.
+
+    Args:
+        applicants: Iterable de InformacionBasica.
+
+    Yields:
+        list: Valores de las columnas de ENCABEZADOS_CONSOLIDADO.
+    """
+    for applicant in applicants:
+        yield [
+            applicant.cedula,
+            applicant.nombre_completo,
+            applicant.genero,
+            applicant.telefono,
+            applicant.correo,
+            applicant.perfil or "N/A",
+            applicant.area_del_conocimiento or "N/A",
+            applicant.profesion or "N/A",
+            applicant.contrato or "N/A",
+            applicant.observacion or "N/A",
+        ]
+
+
+def escribir_excel_consolidado(filas, destino, encabezados=ENCABEZADOS_CONSOLIDADO,
+                               titulo=TITULO_CONSOLIDADO):
+    """
+    Escribe el Excel consolidado en un archivo o flujo binario.
+
+    Args:
+        filas: Iterable de listas de valores (ver filas_consolidado). Se consume
+            de forma perezosa, por lo que puede venir de un .iterator().
+        destino: Ruta o archivo binario escribible. No necesita ser posicionable.
+        encabezados: Títulos de las columnas.
+        titulo: Texto de la primera fila.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(TITULO_HOJA)
+
+    estilo_titulo, estilo_encabezado, estilo_celda = _estilos_consolidado()
+    for estilo in (estilo_titulo, estilo_encabezado, estilo_celda):
+        wb.add_named_style(estilo)
+
+    # En modo write-only los anchos y las celdas combinadas se definen antes de escribir
+    for col in range(1, len(encabezados) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = ANCHO_COLUMNA
+    ws.merged_cells.add(f'A1:{get_column_letter(len(encabezados))}1')
+
+    # Resolver el estilo con nombre es costoso; se hace una vez y cada celda copia
+    # el índice de estilos ya resuelto
+    prototipos = {}
+    for estilo in (estilo_titulo, estilo_encabezado, estilo_celda):
+        prototipo = WriteOnlyCell(ws)
+        prototipo.style = estilo.name
+        prototipos[estilo.name] = prototipo._style
+
+    def _fila(valores, estilo):
+        indices = prototipos[estilo.name]
+        fila = []
+        for valor in valores:
+            cell = WriteOnlyCell(ws, value=valor)
+            cell._style = copy(indices)
+            fila.append(cell)
+        return fila
+
+    ws.append(_fila([titulo], estilo_titulo))
+    ws.append([])
+    ws.append(_fila(encabezados, estilo_encabezado))
+    for valores in filas:
+        ws.append(_fila(valores, estilo_celda))
+
+    wb.save(destino)
+
+
+
+# --- Exportación tabular completa (CSV/XLSX) ---
+
+# Filas que trae cada consulta al recorrer el queryset con .iterator()
+TAMANO_LOTE_CONSOLIDADO = 2000
+
+TITULO_EXPORTACION_COMPLETA = "PERSONAL REGISTRADO - EXPORTACIÓN COMPLETA"
+
+# (clave en .values(), encabezado); el orden define las columnas del archivo
+COLUMNAS_EXPORTACION = [
+    ('id', 'ID'),
+    ('cedula', 'Cédula'),
+    ('primer_apellido', 'Primer Apellido'),
+    ('segundo_apellido', 'Segundo Apellido'),
+    ('primer_nombre', 'Primer Nombre'),
+    ('segundo_nombre', 'Segundo Nombre'),
+    ('nombre_completo', 'Nombre Completo'),
+    ('genero', 'Género'),
+    ('telefono', 'Teléfono'),
+    ('correo', 'Correo'),
+    ('tipo_via', 'Tipo de Vía'),
+    ('numero_via', 'Número de Vía'),
+    ('numero_casa', 'Número de Casa'),
+    ('complemento_direccion', 'Complemento Dirección'),
+    ('barrio', 'Barrio'),
+    ('perfil', 'Perfil'),
+    ('perfil_otro', 'Perfil (Otro)'),
+    ('area_del_conocimiento', 'Área del Conocimiento'),
+    ('area_del_conocimiento_otro', 'Área del Conocimiento (Otro)'),
+    ('profesion', 'Profesión'),
+    ('profesion_otro', 'Profesión (Otro)'),
+    ('contrato', 'Contrato'),
+    ('observacion', 'Observaciones'),
+    ('estado', 'Estado'),
+    ('campos_a_corregir', 'Campos a Corregir'),
+    ('comentarios_correccion', 'Comentarios de Corrección'),
+    ('correcciones_solicitadas', 'Correcciones Solicitadas'),
+    ('ultima_solicitud_correccion', 'Última Solicitud de Corrección'),
+    ('ultima_correccion_realizada', 'Última Corrección Realizada'),
+    ('calculo_experiencia__total_meses_experiencia', 'Total Meses Experiencia'),
+    ('calculo_experiencia__total_dias_experiencia', 'Total Días Experiencia'),
+    ('calculo_experiencia__total_experiencia_anos', 'Total Experiencia (Años)'),
+    ('calculo_experiencia__anos_y_meses_experiencia', 'Años y Meses de Experiencia'),
+    ('num_experiencias_laborales', 'N° Experiencias Laborales'),
+    ('num_formacion_academica', 'N° Formación Académica'),
+    ('num_educacion_basica', 'N° Educación Básica'),
+    ('num_educacion_superior', 'N° Educación Superior'),
+    ('num_posgrados', 'N° Posgrados'),
+    ('num_especializaciones', 'N° Especializaciones'),
+    ('updated_at', 'Última Actualización'),
+]
+
+FORMATOS_EXPORTACION = ('csv', 'xlsx')
+
+
+def _conteo(modelo):
+    """Subconsulta con la cantidad de registros de un modelo relacionado por persona"""
+    return Coalesce(
+        Subquery(
+            modelo.objects.filter(informacion_basica=OuterRef('pk'))
+            .order_by()
+            .values('informacion_basica')
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def _maximo(modelo, campo):
+    """Subconsulta con el valor máximo de un campo de un modelo relacionado por persona"""
+    return Subquery(
+        modelo.objects.filter(informacion_basica=OuterRef('pk'), **{f'{campo}__isnull': False})
+        .order_by(f'-{campo}')
+        .values(campo)[:1]
+    )
+
+
+def filtrar_personal(queryset, filtros):
+    """
+    Aplica los filtros de la exportación.
+
+    Args:
+        queryset: QuerySet de InformacionBasica.
+        filtros: QueryDict o dict con claves opcionales:
+            search (cédula o nombre, como en el listado), estado (se puede
+            repetir), perfil, actualizado_desde y actualizado_hasta (AAAA-MM-DD).
+
+    Returns:
+        QuerySet filtrado.
+
+    Raises:
+        ValueError: si un filtro no es válido.
+    """
+    search = (filtros.get('search') or '').strip()
+    if search:
+        queryset = queryset.filter(Q(cedula__icontains=search) | Q(nombre_completo__icontains=search))
+
+    estados = filtros.getlist('estado') if hasattr(filtros, 'getlist') else filtros.get('estado')
+    if isinstance(estados, str):
+        estados = [estados]
+    estados = [estado for estado in (estados or []) if estado]
+    if estados:
+        validos = {clave for clave, _ in InformacionBasica.ESTADO_CHOICES}
+        invalidos = set(estados) - validos
+        if invalidos:
+            raise ValueError(f'Estados no válidos: {", ".join(sorted(invalidos))}')
+        queryset = queryset.filter(estado__in=estados)
+
+    perfil = (filtros.get('perfil') or '').strip()
+    if perfil:
+        queryset = queryset.filter(perfil=perfil)
+
+    for parametro, lookup in (('actualizado_desde', 'gte'), ('actualizado_hasta', 'lte')):
+        texto = filtros.get(parametro)
+        if not texto:
+            continue
+        fecha = parse_date(texto)
+        if fecha is None:
+            raise ValueError(f'El parámetro "{parametro}" debe ser una fecha AAAA-MM-DD')
+        queryset = queryset.filter(**{f'updated_at__date__{lookup}': fecha})
+
+    return queryset
+
+
+def queryset_consolidado(filtros=None):
+    """
+    Consulta de la exportación completa como diccionarios (.values()), con los
+    conteos de registros relacionados y el estado de corrección calculados en
+    subconsultas para no multiplicar filas con JOINs.
+
+    Args:
+        filtros: Ver filtrar_personal.
+
+    Returns:
+        QuerySet de diccionarios con las claves de COLUMNAS_EXPORTACION.
+    """
+    queryset = filtrar_personal(InformacionBasica.objects.all(), filtros or {})
+    queryset = queryset.annotate(
+        num_experiencias_laborales=_conteo(ExperienciaLaboral),
+        num_formacion_academica=_conteo(InformacionAcademica),
+        num_educacion_basica=_conteo(EducacionBasica),
+        num_educacion_superior=_conteo(EducacionSuperior),
+        num_posgrados=_conteo(Posgrado),
+        num_especializaciones=_conteo(Especializacion),
+        correcciones_solicitadas=_conteo(HistorialCorreccion),
+        ultima_solicitud_correccion=_maximo(HistorialCorreccion, 'fecha_solicitud'),
+        ultima_correccion_realizada=_maximo(HistorialCorreccion, 'fecha_correccion'),
+    )
+    return queryset.order_by('id').values(*(clave for clave, _ in COLUMNAS_EXPORTACION))
+
+
+def _valor_exportable(clave, valor, estados):
+    """Convierte un valor de .values() a algo que CSV y Excel representen igual"""
+    if valor is None:
+        return ''
+    if clave == 'estado':
+        return estados.get(valor, valor)
+    if clave == 'campos_a_corregir':
+        return ', '.join(str(campo) for campo in valor) if isinstance(valor, list) else str(valor)
+    if isinstance(valor, datetime):
+        # Excel no admite zonas horarias
+        return timezone.localtime(valor).replace(tzinfo=None) if timezone.is_aware(valor) else valor
+    return valor
+
+
+def iterar_filas_exportacion(queryset):
+    """
+    Recorre la consulta por lotes y entrega las filas listas para escribir.
+
+    Yields:
+        list: Valores en el orden de COLUMNAS_EXPORTACION.
+    """
+    estados = dict(InformacionBasica.ESTADO_CHOICES)
+    claves = [clave for clave, _ in COLUMNAS_EXPORTACION]
+    for registro in queryset.iterator(chunk_size=TAMANO_LOTE_CONSOLIDADO):
+        yield [_valor_exportable(clave, registro[clave], estados) for clave in claves]
+
+
+class _EcoCSV:
+    """Pseudo-archivo para csv.writer que retorna la línea en lugar de guardarla"""
+
+    def write(self, valor):
+        return valor
+
+
+def iterar_csv_exportacion(queryset):
+    """
+    Genera el CSV de la exportación completa línea por línea.
+    Empieza con BOM UTF-8 para que Excel reconozca las tildes.
+
+    Yields:
+        str: Líneas del CSV.
+    """
+    escritor = csv.writer(_EcoCSV())
+    yield '\ufeff' + escritor.writerow([encabezado for _, encabezado in COLUMNAS_EXPORTACION])
+    for fila in iterar_filas_exportacion(queryset):
+        yield escritor.writerow([
+            valor.strftime('%Y-%m-%d %H:%M:%S') if isinstance(valor, datetime) else valor
+            for valor in fila
+        ])
+
+
+def escribir_xlsx_exportacion(queryset, destino):
+    """Escribe la exportación completa como Excel en modo write-only"""
+    escribir_excel_consolidado(
+        iterar_filas_exportacion(queryset),
+        destino,
+        encabezados=[encabezado for _, encabezado in COLUMNAS_EXPORTACION],
+        titulo=TITULO_EXPORTACION_COMPLETA,
+    )
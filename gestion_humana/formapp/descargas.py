@@ -0,0 +1,164 @@
+"""
+Descarga concurrente de documentos para las exportaciones.
+Motor reutilizable por la descarga individual y la masiva: concurrencia
+configurable, reintentos con espera exponencial y timeouts por archivo.
+Las lecturas HTTP usan la sesión compartida de cliente_http.
+
+Los hilos de descarga entregan los archivos a una cola acotada que consume
+un único escritor (el ZIP). Si el escritor se atrasa, los hilos esperan, de
+modo que la memoria queda en O((profundidad_cola + hilos) × archivo más grande).
+"""
+import logging
+import queue
+import threading
+import time
+
+import requests
+from django.conf import settings
+
+from . import cliente_http
+from .cache_documentos import leer_documento_con_cache
+
+logger = logging.getLogger(__name__)
+
+
+def descargar_documento(file_field, connect_timeout=5, read_timeout=20):
+    """
+    Lee el contenido de un archivo local o remoto (Cloudinary) pasando por la
+    caché local de documentos.
+
+    Raises:
+        requests.RequestException: si falla la descarga HTTP
+        OSError: si falla la lectura desde el storage
+    """
+    def cargar():
+        try:
+            file_url = getattr(file_field, 'url', None)
+        except Exception:
+            file_url = None
+
+        # Si es URL remota, usar la sesión compartida con timeout explícito.
+        if isinstance(file_url, str) and file_url.startswith(('http://', 'https://')):
+            response = cliente_http.get(file_url, timeout=(connect_timeout, read_timeout))
+            response.raise_for_status()
+            return response.content
+
+        # Fallback para almacenamiento local.
+        with file_field.open('rb') as f:
+            return f.read()
+
+    return leer_documento_con_cache(file_field, cargar)
+
+
+def _es_reintentable(error):
+    """
+    Los estados HTTP ya los reintenta la sesión compartida (y un 4xx no cambia);
+    aquí se reintentan cortes de conexión o lectura y errores del storage.
+    """
+    if isinstance(error, requests.HTTPError):
+        return False
+    return isinstance(error, (requests.RequestException, OSError))
+
+
+class MotorDescargas:
+    """
+    Descarga documentos en paralelo con un número acotado de hilos.
+
+    Args:
+        max_workers: Descargas simultáneas (default: settings.DESCARGAS_MAX_WORKERS).
+        intentos: Intentos por archivo antes de darlo por fallido.
+        espera_base: Segundos de espera antes del primer reintento; se duplica en cada intento.
+        connect_timeout / read_timeout: Timeouts por archivo, en segundos.
+        profundidad_cola: Archivos descargados que pueden esperar al consumidor.
+    """
+
+    # Segundos entre revisiones de cancelación mientras un hilo espera espacio en la cola
+    ESPERA_COLA = 0.5
+
+    def __init__(self, max_workers=None, intentos=None, espera_base=None,
+                 connect_timeout=None, read_timeout=None, profundidad_cola=None):
+        self.max_workers = max_workers or settings.DESCARGAS_MAX_WORKERS
+        self.profundidad_cola = profundidad_cola or settings.DESCARGAS_PROFUNDIDAD_COLA
+        self.intentos = intentos or settings.DESCARGAS_INTENTOS
+        self.espera_base = settings.DESCARGAS_ESPERA_BASE if espera_base is None else espera_base
+        self.connect_timeout = connect_timeout or settings.DESCARGAS_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or settings.DESCARGAS_READ_TIMEOUT
+
+    def descargar_uno(self, file_field):
+        """
+        Descarga un archivo reintentando los errores transitorios.
+
+        Returns:
+            bytes | None: Contenido, o None si todos los intentos fallaron.
+        """
+        nombre = getattr(file_field, 'name', 'sin_nombre')
+        for intento in range(1, self.intentos + 1):
+            try:
+                return descargar_documento(file_field, self.connect_timeout, self.read_timeout)
+            except Exception as e:
+                if intento >= self.intentos or not _es_reintentable(e):
+                    logger.error(f"Error descargando {nombre} (intento {intento}/{self.intentos}): {e}")
+                    return None
+                espera = self.espera_base * (2 ** (intento - 1))
+                logger.warning(f"Reintentando {nombre} en {espera:.1f}s (intento {intento}/{self.intentos}): {e}")
+                time.sleep(espera)
+        return None
+
+    def descargar(self, tareas):
+        """
+        Descarga los archivos de las tareas y los entrega a medida que terminan.
+        Cada archivo se libera apenas el consumidor pasa al siguiente.
+
+        Args:
+            tareas: Iterable de tuplas (field, clave). La clave identifica el
+                archivo para quien consume (por ejemplo, la ruta dentro del ZIP).
+
+        Yields:
+            tuple: (clave, field, contenido). contenido es None si la descarga falló.
+        """
+        pendientes = queue.SimpleQueue()
+        total = 0
+        for field, clave in tareas:
+            pendientes.put((field, clave))
+            total += 1
+        if not total:
+            return
+
+        resultados = queue.Queue(maxsize=self.profundidad_cola)
+        detener = threading.Event()
+
+        def entregar(resultado):
+            # Bloquea mientras la cola está llena (contrapresión), salvo si se canceló
+            while not detener.is_set():
+                try:
+                    resultados.put(resultado, timeout=self.ESPERA_COLA)
+                    return
+                except queue.Full:
+                    continue
+
+        def trabajador():
+            while not detener.is_set():
+                try:
+                    field, clave = pendientes.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    contenido = self.descargar_uno(field)
+                except Exception as e:
+                    logger.error(f"Error en descarga paralela de {clave}: {e}")
+                    contenido = None
+                entregar((clave, field, contenido))
+
+        hilos = [
+            threading.Thread(target=trabajador, daemon=True)
+            for _ in range(min(self.max_workers, total))
+        ]
+        for hilo in hilos:
+            hilo.start()
+
+        try:
+            for _ in range(total):
+                yield resultados.get()
+        finally:
+            # Si el consumidor abandona antes de terminar, los hilos dejan de descargar
+            detener.set()
@@ -0,0 +1,502 @@
+"""
+Exportación masiva del personal.
+Construcción de las entradas del ZIP completo (reportes + documentos) y
+ejecución de exportaciones en segundo plano fuera del ciclo de la petición.
+"""
+import os
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import InformacionBasica, ExportacionPersonal
+from .generacion_reportes import iterar_reportes
+from .zip_streaming import iterar_zip
+from .consolidado import escribir_excel_consolidado, filas_consolidado
+from . import cliente_http
+from .cache_documentos import obtener_cache
+from .descargas import MotorDescargas
+
+logger = logging.getLogger(__name__)
+
+# Intervalo mínimo (segundos) entre escrituras de progreso en la base de datos
+INTERVALO_PROGRESO = 2
+
+
+def get_file_extension(file_field, file_content=None):
+    """Helper para obtener la extensión del archivo"""
+    if not file_field:
+        return '.pdf'
+    
+    ext = os.path.splitext(file_field.name)[1]
+    if not ext and hasattr(file_field, 'url'):
+        url = file_field.url
+        if '.' in url.split('/')[-1]:
+            ext = '.' + url.split('/')[-1].split('.')[-1].split('?')[0]
+            
+    if not ext:
+        # Intentar detectar por contenido magic bytes
+        if file_content:
+             content_start = file_content[:10]
+        else:
+             try:
+                 with file_field.open('rb') as f:
+                     content_start = f.read(10)
+                     file_field.seek(0)
+             except:
+                 content_start = b''
+                 
+        if content_start.startswith(b'%PDF'):
+            ext = '.pdf'
+        elif content_start.startswith(b'\x89PNG'):
+            ext = '.png'
+        elif content_start.startswith(b'\xff\xd8\xff'):
+            ext = '.jpg'
+        else:
+            ext = '.pdf' # Default
+            
+    return ext
+
+
+def _tareas_documentos(applicant, filename_safe):
+    """
+    Lista los documentos de una persona a incluir en el ZIP.
+
+    Returns:
+        Lista de tuplas (field, zip_path_sin_extension, origen), donde origen es
+        el related_name del modelo con updated_at propio ('documentos_identidad',
+        'antecedentes', 'anexos_adicionales') o None si depende de la persona.
+    """
+    tareas = []
+
+    def _collect(field, path, origen=None):
+        if field:
+            tareas.append((field, path, origen))
+
+    # 3. Documentos de identidad
+    if hasattr(applicant, 'documentos_identidad') and applicant.documentos_identidad:
+        docs_id = applicant.documentos_identidad
+        _collect(docs_id.fotocopia_cedula,  f"Personal/{filename_safe}/Documentos_Identidad/Cedula", 'documentos_identidad')
+        _collect(docs_id.hoja_de_vida,      f"Personal/{filename_safe}/Documentos_Identidad/Hoja_de_Vida", 'documentos_identidad')
+        _collect(docs_id.libreta_militar,   f"Personal/{filename_safe}/Documentos_Identidad/Libreta_Militar", 'documentos_identidad')
+
+    # 4. Antecedentes
+    if hasattr(applicant, 'antecedentes') and applicant.antecedentes:
+        antec = applicant.antecedentes
+        _collect(antec.certificado_procuraduria,       f"Personal/{filename_safe}/Antecedentes/Procuraduria", 'antecedentes')
+        _collect(antec.certificado_contraloria,        f"Personal/{filename_safe}/Antecedentes/Contraloria", 'antecedentes')
+        _collect(antec.certificado_policia,            f"Personal/{filename_safe}/Antecedentes/Policia", 'antecedentes')
+        _collect(antec.certificado_medidas_correctivas,f"Personal/{filename_safe}/Antecedentes/Medidas_Correctivas", 'antecedentes')
+        _collect(antec.certificado_delitos_sexuales,   f"Personal/{filename_safe}/Antecedentes/Delitos_Sexuales", 'antecedentes')
+        _collect(antec.certificado_redam,              f"Personal/{filename_safe}/Antecedentes/REDAM", 'antecedentes')
+
+    # 5. Documentos académicos
+    for idx, academica in enumerate(applicant.formacion_academica.all(), start=1):
+        profesion_safe = academica.profesion.replace(' ', '_').replace('/', '-')[:30]
+        _collect(academica.fotocopia_titulo,               f"Personal/{filename_safe}/Documentos_Academicos/{idx}_{profesion_safe}_Titulo")
+        _collect(academica.fotocopia_tarjeta_profesional,  f"Personal/{filename_safe}/Documentos_Academicos/{idx}_{profesion_safe}_Tarjeta_Profesional")
+        _collect(academica.certificado_vigencia_tarjeta,   f"Personal/{filename_safe}/Documentos_Academicos/{idx}_{profesion_safe}_Vigencia_Tarjeta")
+
+    # 5.1. Educación Básica
+    for idx, edu in enumerate(applicant.educacion_basica.all(), start=1):
+        _collect(edu.acta_grado_diploma, f"Personal/{filename_safe}/Educacion_Basica/{idx}_Diploma_Bachiller")
+
+    # 5.2. Educación Superior
+    for idx, edu in enumerate(applicant.educacion_superior.all(), start=1):
+        nivel_safe = edu.nivel.replace(' ', '_')
+        _collect(edu.documento_soporte, f"Personal/{filename_safe}/Educacion_Superior/{idx}_{nivel_safe}_Diploma")
+
+    # 5.3. Posgrados
+    for idx, edu in enumerate(applicant.posgrados.all(), start=1):
+        nombre_safe = edu.nombre_posgrado.replace(' ', '_')[:30]
+        _collect(edu.acta_grado_diploma, f"Personal/{filename_safe}/Posgrados/{idx}_{nombre_safe}_Diploma")
+
+    # 5.4. Especializaciones
+    for idx, edu in enumerate(applicant.especializaciones.all(), start=1):
+        nombre_safe = edu.nombre_especializacion.replace(' ', '_')[:30]
+        _collect(edu.acta_grado_diploma, f"Personal/{filename_safe}/Especializaciones/{idx}_{nombre_safe}_Diploma")
+
+    # 6. Anexos adicionales
+    if hasattr(applicant, 'anexos_adicionales') and applicant.anexos_adicionales:
+        anexos = applicant.anexos_adicionales
+        _collect(anexos.anexo_03_datos_personales, f"Personal/{filename_safe}/Anexos/Anexo_03_Datos_Personales", 'anexos_adicionales')
+        _collect(anexos.carta_intencion,           f"Personal/{filename_safe}/Anexos/Carta_Intencion", 'anexos_adicionales')
+        _collect(anexos.otros_documentos,          f"Personal/{filename_safe}/Anexos/Otros_Documentos", 'anexos_adicionales')
+
+    # 7. Certificados laborales
+    for idx, experiencia in enumerate(applicant.experiencias_laborales.all(), start=1):
+        if experiencia.certificado_laboral:
+            cargo_safe = experiencia.cargo.replace(' ', '_').replace('/', '-')[:30]
+            _collect(experiencia.certificado_laboral, f"Personal/{filename_safe}/Certificados_Laborales/{idx}_{cargo_safe}")
+
+    return tareas
+
+
+def _modificado_desde(applicant, origen, desde):
+    """Indica si la persona (origen=None) o uno de sus modelos de documentos cambió desde la fecha dada"""
+    if origen is None:
+        return applicant.updated_at is not None and applicant.updated_at >= desde
+    relacionado = getattr(applicant, origen, None)
+    return relacionado is not None and relacionado.updated_at >= desde
+
+
+def iterar_entradas_personal(applicants, progreso=None, desde=None, manifiesto=None):
+    """
+    Genera las entradas (ruta, contenido) del ZIP de todo el personal.
+    Cada entrada se produce apenas está lista para que el ZIP se transmita
+    mientras se generan los reportes y se descargan los documentos. El Excel
+    consolidado va al final: su entrada se entrega completa al terminar de
+    escribirla y recorre a todo el personal, así no retrasa el primer byte.
+
+    Args:
+        applicants: QuerySet de InformacionBasica con relaciones precargadas
+        progreso: Callable opcional progreso(fase, hechos, total) que se invoca
+            tras cada persona procesada y cada documento descargado
+        desde: datetime opcional. Si se indica, solo se incluyen los reportes de
+            personas modificadas y los documentos cuyo modelo cambió desde esa fecha
+        manifiesto: Lista opcional que se completa con las rutas (sin extensión)
+            de TODO el estado actual, se incluyan o no en este ZIP
+    """
+    total_personas = len(applicants)
+
+    # --- Fase 1: qué reportes regenerar y recolección de tareas HTTP ---
+    file_tasks = []  # lista de (field, zip_path_sin_extension)
+    personas = []  # lista de (applicant, filename_safe, necesita_reportes)
+
+    for applicant in applicants:
+        filename_safe = applicant.nombre_completo.replace(' ', '_')
+        persona_modificada = desde is None or _modificado_desde(applicant, None, desde)
+        tareas = _tareas_documentos(applicant, filename_safe)
+
+        if manifiesto is not None:
+            manifiesto.append(f"Personal/{filename_safe}/{filename_safe}_Informacion")
+            manifiesto.append(f"Personal/{filename_safe}/{filename_safe}_ANEXO_11")
+            manifiesto.extend(path for _, path, _ in tareas)
+
+        if desde is not None:
+            tareas = [
+                tarea for tarea in tareas
+                if persona_modificada or _modificado_desde(applicant, tarea[2], desde)
+            ]
+
+        personas.append((applicant, filename_safe, persona_modificada or bool(tareas)))
+
+        # Recolectar tareas de descarga HTTP (documentos en Cloudinary)
+        file_tasks.extend((field, path) for field, path, _ in tareas)
+
+    # --- Fase 2: Excel/PDF individual por persona (CPU; en varios procesos si está configurado) ---
+    reportes = iterar_reportes(applicant for applicant, _, necesita in personas if necesita)
+
+    for num_persona, (applicant, filename_safe, necesita_reportes) in enumerate(personas, start=1):
+        if necesita_reportes:
+            _, excel_bytes, pdf_bytes = next(reportes)
+            # 1. Excel individual
+            yield f"Personal/{filename_safe}/{filename_safe}_Informacion.xlsx", excel_bytes
+            # 1.1. PDF ANEXO 11 individual
+            if pdf_bytes is not None:
+                yield f"Personal/{filename_safe}/{filename_safe}_ANEXO_11.pdf", pdf_bytes
+
+        if progreso:
+            progreso('REPORTES', num_persona, total_personas)
+    # Libera el pool de procesos antes de la fase de descargas
+    reportes.close()
+
+    # --- Fase 3: descargar en paralelo y entregar cada archivo al llegar ---
+    logger.info(f"Descargando {len(file_tasks)} archivos de Cloudinary en paralelo…")
+
+    total_archivos = len(file_tasks)
+    if progreso:
+        progreso('DOCUMENTOS', 0, total_archivos)
+
+    motor = MotorDescargas(connect_timeout=10, read_timeout=60)
+    descargas = motor.descargar((field, zip_path) for field, zip_path in file_tasks)
+    for num_archivo, (zip_path, field, content) in enumerate(descargas, start=1):
+        if progreso:
+            progreso('DOCUMENTOS', num_archivo, total_archivos)
+        if not content:
+            continue
+        try:
+            ext = get_file_extension(field, content)
+        except Exception as e:
+            logger.error(f"Error al escribir {zip_path} al ZIP: {e}")
+            continue
+        yield f"{zip_path}{ext}", content
+
+    # --- Fase 4: Excel consolidado con TODO el personal, escrito directamente en la entrada del ZIP ---
+    yield "Personal_Completo.xlsx", lambda destino: escribir_excel_consolidado(
+        filas_consolidado(applicants), destino
+    )
+
+
+def iterar_entradas_incrementales(applicants, desde, manifiesto_base=None, base_id=None,
+                                  progreso=None, manifiesto=None):
+    """
+    Entradas de un ZIP incremental: solo lo modificado desde `desde` más
+    `_cambios.json` con las rutas agregadas/actualizadas y las eliminadas
+    respecto al manifiesto de la exportación base.
+
+    Args:
+        applicants: QuerySet de InformacionBasica con relaciones precargadas
+        desde: datetime de corte
+        manifiesto_base: Rutas (sin extensión) del estado exportado en la base
+        base_id: ID de la exportación base (informativo)
+        progreso: Ver iterar_entradas_personal
+        manifiesto: Lista que se completa con el estado actual completo
+    """
+    if manifiesto is None:
+        manifiesto = []
+    actualizados = []
+
+    for ruta, contenido in iterar_entradas_personal(
+        applicants, progreso=progreso, desde=desde, manifiesto=manifiesto
+    ):
+        actualizados.append(ruta)
+        yield ruta, contenido
+
+    eliminados = sorted(set(manifiesto_base or []) - set(manifiesto))
+    cambios = {
+        'exportacion_base': base_id,
+        'desde': desde.isoformat(),
+        'generado': timezone.now().isoformat(),
+        'actualizados': actualizados,
+        'eliminados': eliminados,
+        'eliminados_disponibles': manifiesto_base is not None,
+    }
+    yield '_cambios.json', json.dumps(cambios, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def resolver_base_incremental(base_id=None, desde=None):
+    """
+    Determina fecha de corte y manifiesto base para una exportación incremental.
+
+    Con base_id se usa el inicio de esa exportación como corte (cubre cambios
+    hechos mientras se generaba). Con solo `desde` se toma como base la última
+    exportación completada iniciada antes de esa fecha, si existe, para poder
+    listar eliminados.
+
+    Returns:
+        tuple: (desde, exportacion_base o None)
+
+    Raises:
+        ExportacionPersonal.DoesNotExist: si base_id no es una exportación completada
+    """
+    if base_id:
+        base = ExportacionPersonal.objects.get(pk=base_id, estado='COMPLETADO')
+        return desde or base.iniciado_en, base
+
+    base = (
+        ExportacionPersonal.objects
+        .filter(estado='COMPLETADO', iniciado_en__lte=desde)
+        .order_by('-iniciado_en')
+        .first()
+    )
+    return desde, base
+
+
+def queryset_exportacion():
+    """QuerySet de personas con todas las relaciones que usa la exportación"""
+    return (
+        InformacionBasica.objects
+        .select_related('documentos_identidad', 'antecedentes', 'anexos_adicionales')
+        .prefetch_related(
+            'formacion_academica',
+            'educacion_basica',
+            'educacion_superior',
+            'posgrados',
+            'especializaciones',
+            'experiencias_laborales',
+        )
+    )
+
+
+def ruta_archivo_exportacion(exportacion):
+    """Ruta absoluta en disco del ZIP generado por una exportación"""
+    return os.path.join(settings.EXPORTACIONES_ROOT, exportacion.archivo)
+
+
+class Latido:
+    """
+    Hilo que actualiza ExportacionPersonal.latido cada
+    EXPORTACIONES_LATIDO_SEGUNDOS mientras la exportación está en curso.
+    Se usa como context manager alrededor de la generación del ZIP.
+    """
+
+    def __init__(self, exportacion_id):
+        self.exportacion_id = exportacion_id
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._latir, daemon=True)
+
+    def _latir(self):
+        try:
+            while not self._detener.wait(settings.EXPORTACIONES_LATIDO_SEGUNDOS):
+                ExportacionPersonal.objects.filter(
+                    pk=self.exportacion_id, estado='EN_PROCESO'
+                ).update(latido=timezone.now())
+        except Exception as e:
+            logger.warning(f'Latido de la exportación #{self.exportacion_id} detenido: {str(e)}')
+        finally:
+            close_old_connections()
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._detener.set()
+        self._hilo.join()
+
+
+def recuperar_exportaciones_abandonadas(reencolar=True, **filtros):
+    """
+    Libera las exportaciones EN_PROCESO cuyo proceso dejó de dar latido por más
+    de EXPORTACIONES_LATIDO_MAXIMO segundos (worker reiniciado o terminado):
+    sin esto quedarían EN_PROCESO para siempre, porque solo se toman las PENDIENTE.
+
+    Args:
+        reencolar: True las devuelve a PENDIENTE para que el worker las repita
+            (hasta EXPORTACIONES_MAX_INTENTOS); False las marca con ERROR.
+        **filtros: Filtros adicionales (p. ej. pk=...).
+
+    Returns:
+        dict: reencoladas y fallidas (cantidad de exportaciones)
+    """
+    limite = timezone.now() - timedelta(seconds=settings.EXPORTACIONES_LATIDO_MAXIMO)
+    abandonadas = ExportacionPersonal.objects.filter(estado='EN_PROCESO', **filtros).filter(
+        Q(latido__lt=limite) | Q(latido__isnull=True, iniciado_en__lt=limite)
+    )
+    if reencolar:
+        fallidas = abandonadas.filter(intentos__gte=settings.EXPORTACIONES_MAX_INTENTOS).update(
+            estado='ERROR',
+            mensaje_error=f'Exportación interrumpida {settings.EXPORTACIONES_MAX_INTENTOS} veces sin terminar',
+            finalizado_en=timezone.now(),
+        )
+        reencoladas = abandonadas.update(
+            estado='PENDIENTE', fase='EN_COLA', iniciado_en=None, latido=None,
+            personas_procesadas=0, archivos_procesados=0,
+        )
+    else:
+        reencoladas = 0
+        fallidas = abandonadas.update(
+            estado='ERROR',
+            mensaje_error='Exportación interrumpida: el proceso que la generaba terminó',
+            finalizado_en=timezone.now(),
+        )
+    if reencoladas or fallidas:
+        logger.warning(f'Exportaciones abandonadas: {reencoladas} reencoladas, {fallidas} con error')
+    return {'reencoladas': reencoladas, 'fallidas': fallidas}
+
+
+def ejecutar_exportacion(exportacion_id):
+    """
+    Genera el ZIP (completo o incremental) de una exportación y lo guarda en
+    EXPORTACIONES_ROOT, actualizando estado, progreso y manifiesto en la base de datos.
+
+    Args:
+        exportacion_id: ID de ExportacionPersonal a procesar
+
+    Returns:
+        ExportacionPersonal: Registro actualizado
+    """
+    # Tomar el trabajo solo si sigue pendiente (evita doble procesamiento)
+    tomado = ExportacionPersonal.objects.filter(
+        pk=exportacion_id, estado='PENDIENTE'
+    ).update(
+        estado='EN_PROCESO', fase='REPORTES', iniciado_en=timezone.now(), latido=timezone.now(),
+        intentos=F('intentos') + 1,
+    )
+    exportacion = ExportacionPersonal.objects.get(pk=exportacion_id)
+    if not tomado:
+        logger.warning(f'Exportación #{exportacion_id} no está pendiente ({exportacion.estado})')
+        return exportacion
+
+    applicants = queryset_exportacion()
+    ultima_escritura = [0.0]
+
+    def _progreso(fase, hechos, total):
+        campos = {'fase': fase}
+        if fase == 'REPORTES':
+            campos.update(personas_procesadas=hechos, total_personas=total)
+        else:
+            campos.update(archivos_procesados=hechos, total_archivos=total)
+        ahora = time.monotonic()
+        if hechos == 0 or hechos == total or ahora - ultima_escritura[0] >= INTERVALO_PROGRESO:
+            ExportacionPersonal.objects.filter(pk=exportacion_id).update(latido=timezone.now(), **campos)
+            ultima_escritura[0] = ahora
+
+    timestamp = timezone.localtime().strftime('%Y%m%d_%H%M%S')
+    prefijo = 'Personal_Cambios' if exportacion.tipo == 'INCREMENTAL' else 'Personal_Completo'
+    nombre_archivo = f'{prefijo}_{exportacion_id}_{timestamp}.zip'
+    os.makedirs(settings.EXPORTACIONES_ROOT, exist_ok=True)
+    ruta_final = os.path.join(settings.EXPORTACIONES_ROOT, nombre_archivo)
+    ruta_temporal = f'{ruta_final}.part'
+
+    manifiesto = []
+    if exportacion.tipo == 'INCREMENTAL':
+        base = exportacion.base
+        entradas = iterar_entradas_incrementales(
+            applicants,
+            exportacion.desde,
+            manifiesto_base=base.manifiesto if base else None,
+            base_id=base.pk if base else None,
+            progreso=_progreso,
+            manifiesto=manifiesto,
+        )
+    else:
+        entradas = iterar_entradas_personal(applicants, progreso=_progreso, manifiesto=manifiesto)
+
+    try:
+        with Latido(exportacion_id), open(ruta_temporal, 'wb') as destino:
+            for datos in iterar_zip(entradas):
+                destino.write(datos)
+        os.replace(ruta_temporal, ruta_final)
+
+        ExportacionPersonal.objects.filter(pk=exportacion_id).update(
+            estado='COMPLETADO',
+            fase='FINALIZADO',
+            archivo=nombre_archivo,
+            manifiesto=manifiesto,
+            finalizado_en=timezone.now(),
+        )
+        logger.info(f'Exportación #{exportacion_id} completada: {nombre_archivo}')
+        cache = obtener_cache()
+        if cache is not None:
+            logger.info(f'Caché de documentos: {cache.estadisticas()}')
+        logger.info(f'Descargas HTTP: {cliente_http.metricas.resumen()}')
+    except Exception as e:
+        logger.error(f'Error en exportación #{exportacion_id}: {str(e)}')
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        ExportacionPersonal.objects.filter(pk=exportacion_id).update(
+            estado='ERROR',
+            mensaje_error=str(e),
+            finalizado_en=timezone.now(),
+        )
+
+    exportacion.refresh_from_db()
+    return exportacion
+
+
+def ejecutar_exportacion_async(exportacion):
+    """
+    Procesa una exportación en un thread separado (EXPORTACIONES_EN_HILO=True).
+    La petición que la solicita responde de inmediato; el avance se consulta
+    con el endpoint de estado. Si el proceso web termina antes, la exportación
+    queda abandonada y recuperar_exportaciones_abandonadas la marca con ERROR.
+    """
+    def exportacion_thread():
+        try:
+            ejecutar_exportacion(exportacion.pk)
+        except Exception as e:
+            logger.error(f'Error en thread de exportación: {str(e)}')
+        finally:
+            close_old_connections()
+
+    thread = threading.Thread(target=exportacion_thread)
+    thread.daemon = True
+    thread.start()
@@ -0,0 +1,238 @@
+"""
+Generación de los reportes por persona (Excel de información y PDF ANEXO 11).
+Permite repartir la generación entre varios procesos: el proceso principal
+toma una instantánea (snapshot) de cada persona con sus relaciones ya
+cargadas y los procesos hijos generan los archivos sin acceder al ORM.
+
+Los reportes generados se guardan en una caché en disco por persona y
+versión (InformacionBasica.version_reportes, que incrementan las señales de
+formapp.signals), así que solo se regeneran cuando algo cambió. El PDF
+además incluye la fecha del día, por lo que se regenera una vez por día.
+"""
+import io
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+from . import reportes_worker
+from .cache_documentos import obtener_cache_reportes
+from .report_generators_excel import create_excel_for_person
+from .report_generators_pdf import obtener_renderizador_anexo11
+from .services import (
+    obtener_experiencias_historicas,
+    obtener_experiencias_historicas_por_cedula,
+    historicos_de,
+    obtener_resumen_experiencia_historica,
+    obtener_resumenes_experiencia_historica,
+)
+
+logger = logging.getLogger(__name__)
+
+# Relaciones uno-a-muchos que usan los generadores
+RELACIONES_SNAPSHOT = [
+    'experiencias_laborales',
+    'formacion_academica',
+    'educacion_basica',
+    'educacion_superior',
+    'posgrados',
+    'especializaciones',
+]
+
+
+class RelacionSnapshot(list):
+    """Lista que responde a .all() como un related manager"""
+
+    def all(self):
+        return self
+
+
+def _valores(instancia):
+    """Copia los campos concretos de una instancia como atributos simples"""
+    valores = {}
+    for field in instancia._meta.concrete_fields:
+        valor = getattr(instancia, field.attname)
+        if isinstance(valor, FieldFile):
+            valor = valor.name
+        valores[field.attname] = valor
+    return SimpleNamespace(**valores)
+
+
+def crear_snapshot(applicant, experiencias_historicas=None, resumen_historico=None):
+    """
+    Serializa una persona con todo lo que necesitan los generadores.
+    El resultado se puede enviar a otro proceso (pickle) y no requiere base de datos.
+
+    Args:
+        applicant: InformacionBasica, idealmente con relaciones precargadas.
+        experiencias_historicas: Contratos históricos ya consultados. Si es None
+            se consultan por la cédula.
+        resumen_historico: Resumen ya calculado de esos contratos. Si es None
+            se lee de ResumenHistorico.
+
+    Returns:
+        SimpleNamespace con los campos de la persona, sus relaciones como
+        RelacionSnapshot, calculo_experiencia (si existe) y los datos históricos.
+    """
+    snapshot = _valores(applicant)
+    for relacion in RELACIONES_SNAPSHOT:
+        setattr(snapshot, relacion, RelacionSnapshot(
+            _valores(obj) for obj in getattr(applicant, relacion).all()
+        ))
+
+    # Sin cálculo, el atributo no existe (igual que el related object del ORM)
+    try:
+        snapshot.calculo_experiencia = _valores(applicant.calculo_experiencia)
+    except Exception:
+        pass
+
+    if experiencias_historicas is None:
+        experiencias_historicas = obtener_experiencias_historicas(applicant.cedula)
+    snapshot.experiencias_historicas = [_valores(contrato) for contrato in experiencias_historicas]
+    if not snapshot.experiencias_historicas:
+        resumen_historico = None
+    elif resumen_historico is None:
+        resumen_historico = obtener_resumen_experiencia_historica(applicant.cedula)
+    snapshot.resumen_historico = resumen_historico
+    return snapshot
+
+
+def generar_reportes_persona(applicant, experiencias_historicas=None, resumen_historico=None):
+    """
+    Genera el Excel de información y el PDF ANEXO 11 de una persona.
+
+    Returns:
+        tuple: (excel_bytes, pdf_bytes). pdf_bytes es None si falló el PDF.
+    """
+    wb = create_excel_for_person(applicant, experiencias_historicas, resumen_historico)
+    excel_buffer = io.BytesIO()
+    wb.save(excel_buffer)
+
+    try:
+        pdf_bytes = obtener_renderizador_anexo11().renderizar(applicant)
+    except Exception as e:
+        logger.error(f"Error al generar PDF ANEXO 11 para {applicant.nombre_completo}: {str(e)}")
+        pdf_bytes = None
+
+    return excel_buffer.getvalue(), pdf_bytes
+
+
+def _claves_cache(applicant):
+    """Claves (excel, pdf) en la caché de reportes para la versión actual de la persona"""
+    cache = obtener_cache_reportes()
+    # updated_at distingue registros con el mismo id en otra base de datos (p. ej. restaurada)
+    version = f'{applicant.version_reportes}:{applicant.updated_at.isoformat() if applicant.updated_at else ""}'
+    return (
+        cache.clave(f'reportes/{applicant.pk}/informacion', version),
+        cache.clave(f'reportes/{applicant.pk}/anexo11', f'{version}:{timezone.localdate().isoformat()}'),
+    )
+
+
+def leer_reportes_cache(applicant):
+    """
+    Retorna (excel_bytes, pdf_bytes) desde la caché o None si falta alguno.
+    """
+    cache = obtener_cache_reportes()
+    if cache is None or applicant.pk is None:
+        return None
+    clave_excel, clave_pdf = _claves_cache(applicant)
+    excel_bytes = cache.leer(clave_excel)
+    pdf_bytes = cache.leer(clave_pdf) if excel_bytes is not None else None
+    if excel_bytes is None or pdf_bytes is None:
+        return None
+    return excel_bytes, pdf_bytes
+
+
+def guardar_reportes_cache(applicant, excel_bytes, pdf_bytes):
+    """Guarda los reportes generados (un PDF fallido no se guarda)"""
+    cache = obtener_cache_reportes()
+    if cache is None or applicant.pk is None:
+        return
+    clave_excel, clave_pdf = _claves_cache(applicant)
+    cache.guardar(clave_excel, excel_bytes)
+    cache.guardar(clave_pdf, pdf_bytes)
+
+
+def obtener_reportes_persona(applicant, experiencias_historicas=None, resumen_historico=None):
+    """
+    Reportes de una persona desde la caché, generándolos si cambiaron.
+
+    Args:
+        applicant: InformacionBasica.
+        experiencias_historicas: Contratos históricos ya consultados (ver
+            iterar_reportes). Si es None se consultan al generar.
+        resumen_historico: Resumen de esos contratos ya calculado. Si es None
+            se lee al generar.
+
+    Returns:
+        tuple: (excel_bytes, pdf_bytes). pdf_bytes es None si falló el PDF.
+    """
+    reportes = leer_reportes_cache(applicant)
+    if reportes is None:
+        reportes = generar_reportes_persona(applicant, experiencias_historicas, resumen_historico)
+        guardar_reportes_cache(applicant, *reportes)
+    return reportes
+
+
+def iterar_reportes(applicants, procesos=None):
+    """
+    Genera los reportes de varias personas conservando el orden de entrada.
+    Los contratos históricos de todas las personas se cargan por adelantado
+    en una consulta (por lote de cédulas) en lugar de dos por persona, igual
+    que sus resúmenes de ResumenHistorico.
+
+    Args:
+        applicants: Iterable de InformacionBasica.
+        procesos: Procesos a usar (default: settings.REPORTES_PROCESOS).
+            Con 0 o 1 se genera en el proceso actual.
+
+    Yields:
+        tuple: (applicant, excel_bytes, pdf_bytes)
+    """
+    procesos = settings.REPORTES_PROCESOS if procesos is None else procesos
+    applicants = list(applicants)
+    historicos = obtener_experiencias_historicas_por_cedula(applicant.cedula for applicant in applicants)
+    resumenes = obtener_resumenes_experiencia_historica(applicant.cedula for applicant in applicants)
+
+    def _historicos(applicant):
+        return historicos_de(historicos, applicant.cedula), resumenes[applicant.cedula]
+
+    if procesos <= 1:
+        for applicant in applicants:
+            yield (applicant, *obtener_reportes_persona(applicant, *_historicos(applicant)))
+        return
+
+    # 'spawn' evita heredar las conexiones a la base de datos del proceso padre
+    contexto = multiprocessing.get_context('spawn')
+    # Ventana acotada de trabajos en curso para no acumular resultados en memoria
+    max_en_vuelo = procesos * 2
+    en_vuelo = deque()
+
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto,
+                             initializer=reportes_worker.inicializar_proceso) as executor:
+        def _resultado(applicant, pendiente):
+            # Los aciertos de caché ya vienen resueltos; los demás se guardan al llegar
+            if isinstance(pendiente, tuple):
+                return pendiente
+            reportes = pendiente.result()
+            guardar_reportes_cache(applicant, *reportes)
+            return reportes
+
+        for applicant in applicants:
+            pendiente = leer_reportes_cache(applicant)
+            if pendiente is None:
+                snapshot = crear_snapshot(applicant, *_historicos(applicant))
+                pendiente = executor.submit(reportes_worker.generar_desde_snapshot, snapshot)
+            en_vuelo.append((applicant, pendiente))
+            if len(en_vuelo) >= max_en_vuelo:
+                anterior, pendiente = en_vuelo.popleft()
+                yield (anterior, *_resultado(anterior, pendiente))
+
+        while en_vuelo:
+            anterior, pendiente = en_vuelo.popleft()
+            yield (anterior, *_resultado(anterior, pendiente))
@@ -0,0 +1,170 @@
+"""
+Aritmética de intervalos de fechas para los cálculos de experiencia.
+
+Un intervalo es una tupla (inicio, fin) con el fin incluido, en fechas o en
+ordinales (date.toordinal()). Aquí están la fusión de traslapes (una sola
+implementación, que aprovecha las entradas ya ordenadas), los bloques
+fusionados que se guardan en CalculoExperiencia para actualizarlos de forma
+incremental, la fusión vectorizada de muchas personas a la vez con numpy y la
+conversión de días a años, meses y días (base de 365 y 30 días).
+"""
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+
+# Base calendario: se usa 365 para evitar el desfase de 5 días por año que genera la base 360
+DIAS_POR_ANO = 365
+DIAS_POR_MES = 30
+
+
+def fusionar_intervalos(intervalos):
+    """
+    Fusiona intervalos de fechas que se traslapan.
+
+    Args:
+        intervalos: Iterable de tuplas (fecha_inicio, fecha_fin), en fechas u ordinales.
+            Si ya vienen ordenados por inicio (p. ej. con order_by) el
+            ordenamiento es lineal: sorted detecta la secuencia ordenada.
+
+    Returns:
+        list: Intervalos fusionados ordenados por fecha de inicio
+    """
+    intervalos = sorted(intervalos, key=itemgetter(0))
+    if not intervalos:
+        return []
+
+    merged = []
+    curr_start, curr_end = intervalos[0]
+    for next_start, next_end in intervalos[1:]:
+        if next_start <= curr_end:  # Hay traslape
+            # Extender el final del intervalo actual si el siguiente termina después
+            if next_end > curr_end:
+                curr_end = next_end
+        else:
+            # No hay traslape, guardar intervalo actual e iniciar uno nuevo
+            merged.append((curr_start, curr_end))
+            curr_start, curr_end = next_start, next_end
+    merged.append((curr_start, curr_end))
+    return merged
+
+
+def bloques_fusionados(intervalos):
+    """
+    Intervalos fusionados en ordinales, como se guardan en CalculoExperiencia.
+
+    Args:
+        intervalos: Iterable de tuplas (fecha_inicio, fecha_fin)
+
+    Returns:
+        list: Bloques [inicio, fin] (ordinales) ordenados y sin traslapes
+    """
+    return [
+        [inicio, fin]
+        for inicio, fin in fusionar_intervalos((inicio.toordinal(), fin.toordinal()) for inicio, fin in intervalos)
+    ]
+
+
+def dias_bloque(bloque):
+    """Días de un bloque [inicio, fin] en ordinales (fin incluido)"""
+    return bloque[1] - bloque[0] + 1
+
+
+def dias_bloques(bloques):
+    """Días totales de bloques que no se traslapan"""
+    return sum(fin - inicio + 1 for inicio, fin in bloques)
+
+
+def bloques_afectados(bloques, inicio, fin):
+    """
+    Posiciones [desde, hasta) de los bloques fusionados que se traslapan con
+    [inicio, fin] (ordinales). Como los bloques están ordenados y no se
+    traslapan, sus inicios y fines están ordenados y basta con bisect.
+    """
+    desde = bisect_left(bloques, inicio, key=itemgetter(1))
+    hasta = bisect_right(bloques, fin, key=itemgetter(0))
+    return desde, max(desde, hasta)
+
+
+def agregar_bloque(bloques, inicio, fin):
+    """
+    Agrega [inicio, fin] a los bloques fusionados uniéndolo solo con sus vecinos.
+
+    Returns:
+        int: Días que cambió el total
+    """
+    desde, hasta = bloques_afectados(bloques, inicio, fin)
+    afectados = bloques[desde:hasta]
+    if afectados:
+        inicio = min(inicio, afectados[0][0])
+        fin = max(fin, afectados[-1][1])
+    bloques[desde:hasta] = [[inicio, fin]]
+    return dias_bloque([inicio, fin]) - dias_bloques(afectados)
+
+
+def dias_fusionados_por_grupo(grupos, inicios, fines, total_grupos):
+    """
+    Días sin traslapes por grupo, fusionando los intervalos de todos los
+    grupos a la vez con numpy.
+
+    Args:
+        grupos: Índice de grupo (0..total_grupos-1) de cada intervalo.
+        inicios, fines: Ordinales de fecha de cada intervalo (fin incluido).
+        total_grupos: Cantidad de grupos.
+
+    Returns:
+        numpy.ndarray: Días por grupo.
+    """
+    import numpy as np
+
+    if not len(grupos):
+        return np.zeros(total_grupos, dtype=np.int64)
+
+    # Desplazar cada grupo a su propia franja hace que un solo máximo
+    # acumulado sirva para todos: ningún intervalo alcanza al grupo siguiente.
+    franja = int(max(fines.max(), inicios.max())) + 2
+    inicios = inicios + grupos * franja
+    fines = fines + grupos * franja
+    orden = np.lexsort((inicios, grupos))
+    grupos, inicios, fines = grupos[orden], inicios[orden], fines[orden]
+
+    fin_acumulado = np.maximum.accumulate(fines)
+    # Empieza un bloque donde el intervalo no se traslapa con los anteriores (next_start <= curr_end)
+    nuevos = np.flatnonzero(np.concatenate(([True], inicios[1:] > fin_acumulado[:-1])))
+    dias = np.maximum.reduceat(fines, nuevos) - inicios[nuevos] + 1
+    return np.bincount(grupos[nuevos], weights=dias, minlength=total_grupos).astype(np.int64)
+
+
+def anos_meses_dias(total_dias):
+    """
+    Convierte días en años de 365 días, meses de 30 días y días restantes.
+
+    Returns:
+        tuple: (anos, meses, dias)
+    """
+    anos, dias_sobrantes_ano = divmod(total_dias, DIAS_POR_ANO)
+    meses, dias = divmod(dias_sobrantes_ano, DIAS_POR_MES)
+    return anos, meses, dias
+
+
+def texto_anos_meses_dias(total_dias):
+    """Texto "X años, Y meses y Z días" (o "X años y Y meses" si no sobran días)"""
+    anos, meses, dias = anos_meses_dias(total_dias)
+    if dias > 0:
+        # Si sobran días que no completan un mes
+        return f"{anos} años, {meses} meses y {dias} días"
+    return f"{anos} años y {meses} meses"
+
+
+def meses_y_dias_entre(fecha_inicio, fecha_fin):
+    """
+    Meses completos de calendario y días entre dos fechas, como se guardan en
+    ExperienciaLaboral (meses_experiencia y dias_experiencia).
+
+    Returns:
+        tuple: (meses, dias)
+    """
+    meses = (fecha_fin.year - fecha_inicio.year) * 12 + fecha_fin.month - fecha_inicio.month
+    if fecha_fin.day < fecha_inicio.day:
+        # El último mes no se completó
+        meses -= 1
+    return meses, (fecha_fin - fecha_inicio).days
@@ -0,0 +1,250 @@
+"""
+Comando para medir el rendimiento de las piezas de la exportación del personal.
+Usa datos sintéticos, por lo que no necesita red ni Cloudinary.
+
+Pruebas disponibles:
+    zip: Compara comprimir todas las entradas con deflate contra la política
+         por entrada (guardar sin comprimir JPEG/PNG/PDF y comprimir el resto).
+    excel: Tiempo y asignaciones de memoria del Excel de información por
+           persona (create_excel_for_person + guardado).
+    anexo11: Tiempo por PDF ANEXO 11 creando el renderizador en cada PDF
+             contra el renderizador compartido.
+"""
+import io
+import random
+import time
+import tracemalloc
+import zipfile
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from openpyxl import Workbook
+
+from formapp.generacion_reportes import RelacionSnapshot
+from formapp.report_generators_excel import create_excel_for_person
+from formapp.report_generators_pdf import RenderizadorAnexo11, obtener_renderizador_anexo11
+from formapp.zip_streaming import iterar_zip
+
+PRUEBAS = ['zip', 'excel', 'anexo11']
+
+
+def _medir(funcion, repeticiones):
+    """Retorna (tiempo CPU, tiempo real) promedio en segundos y el último resultado"""
+    cpu_total = real_total = 0.0
+    resultado = None
+    for _ in range(repeticiones):
+        cpu_inicio, real_inicio = time.process_time(), time.perf_counter()
+        resultado = funcion()
+        cpu_total += time.process_time() - cpu_inicio
+        real_total += time.perf_counter() - real_inicio
+    return cpu_total / repeticiones, real_total / repeticiones, resultado
+
+
+def _documentos_sinteticos(cantidad, tamano_kb, semilla=42):
+    """
+    Genera entradas parecidas a las de una exportación real: la mayoría son
+    escaneos (JPEG/PDF ya comprimidos, simulados con bytes aleatorios) y
+    algunos reportes XLSX y archivos de texto.
+    """
+    aleatorio = random.Random(semilla)
+    tamano = tamano_kb * 1024
+
+    wb = Workbook()
+    ws = wb.active
+    for fila in range(1, 200):
+        ws.append([f'Dato {fila}', fila, fila * 1.5, 'Texto de ejemplo para el reporte'])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    xlsx = buffer.getvalue()
+
+    texto = ('cedula;nombre;cargo;fecha_inicio;fecha_fin\n' * (tamano // 45)).encode()
+
+    entradas = []
+    for i in range(cantidad):
+        tipo = i % 10
+        if tipo < 5:
+            entradas.append((f'doc_{i}.jpg', b'\xff\xd8\xff\xe0' + aleatorio.randbytes(tamano)))
+        elif tipo < 8:
+            entradas.append((f'doc_{i}.pdf', b'%PDF-1.4\n' + aleatorio.randbytes(tamano)))
+        elif tipo == 8:
+            entradas.append((f'doc_{i}.xlsx', xlsx))
+        else:
+            entradas.append((f'doc_{i}.csv', texto))
+    return entradas
+
+
+def _persona_sintetica(indice, experiencias=8, contratos=10):
+    """
+    Snapshot con la forma de crear_snapshot: una persona con varias
+    experiencias, formación en todos los niveles y contratos históricos.
+    """
+    inicio = date(2015, 1, 1)
+    experiencias_laborales = RelacionSnapshot(
+        SimpleNamespace(
+            cargo=f'Profesional {i}', cargo_anexo_11='Profesional',
+            fecha_inicial=inicio + timedelta(days=200 * i), fecha_terminacion=inicio + timedelta(days=200 * i + 180),
+            meses_experiencia=6, dias_experiencia=181,
+            objeto_contractual='Prestación de servicios profesionales ' * 5,
+            funciones='Actividades de apoyo a la gestión ' * 8,
+        )
+        for i in range(experiencias)
+    )
+    persona = SimpleNamespace(
+        cedula=f'{10 ** 9 + indice}', nombre_completo=f'PERSONA SINTETICA {indice}', genero='Femenino',
+        tipo_via='Calle', numero_via='10', numero_casa='5-20', complemento_direccion=None, barrio='Centro',
+        telefono='3001234567', correo=f'persona{indice}@example.com', perfil='Profesional',
+        area_del_conocimiento='Ciencias Sociales', profesion='Psicología', contrato=None, observacion=None,
+        experiencias_laborales=experiencias_laborales,
+        formacion_academica=RelacionSnapshot([SimpleNamespace(
+            profesion='Psicología', universidad='Universidad', tarjeta_profesional='Tarjeta Profesional',
+            numero_tarjeta_resolucion='12345', fecha_expedicion=None, fecha_grado=date(2014, 6, 1),
+        )]),
+        educacion_basica=RelacionSnapshot([SimpleNamespace(institucion='Colegio', anio_grado=2008, titulo='Bachiller')]),
+        educacion_superior=RelacionSnapshot([SimpleNamespace(
+            nivel='Tecnólogo', institucion='SENA', titulo='Tecnólogo', fecha_grado=date(2010, 12, 1),
+            tarjeta_profesional=None,
+        )]),
+        posgrados=RelacionSnapshot(),
+        especializaciones=RelacionSnapshot([SimpleNamespace(
+            nombre_especializacion='Gerencia', universidad='Universidad', fecha_terminacion=date(2016, 6, 1),
+        )]),
+        calculo_experiencia=SimpleNamespace(
+            total_meses_experiencia=48, total_dias_experiencia=1448, total_experiencia_anos=4,
+            anos_y_meses_experiencia='4 años',
+        ),
+    )
+    historicas = [
+        SimpleNamespace(
+            contrato=f'CT-{indice}-{i}', fecha_inicio=date(2018, 1, 1) + timedelta(days=120 * i),
+            fecha_fin=date(2018, 1, 1) + timedelta(days=120 * i + 110), dias_brutos=111,
+            dias_reales_contribuidos=111, traslape=False, explicacion_detallada='',
+        )
+        for i in range(contratos)
+    ]
+    resumen = {'total_contratos': contratos, 'experiencia_texto': '3 años y 1 mes'}
+    return persona, historicas, resumen
+
+
+class Command(BaseCommand):
+    help = 'Mide el rendimiento de la generación de exportaciones con datos sintéticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'pruebas',
+            nargs='*',
+            help=f'Pruebas a ejecutar: {", ".join(PRUEBAS)} (default: todas)'
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=3,
+            help='Veces que se repite cada medición (default: 3)'
+        )
+        parser.add_argument(
+            '--archivos',
+            type=int,
+            default=100,
+            help='Documentos sintéticos en la prueba zip (default: 100)'
+        )
+        parser.add_argument(
+            '--tamano-kb',
+            type=int,
+            default=300,
+            help='Tamaño de cada documento escaneado en KB (default: 300)'
+        )
+        parser.add_argument(
+            '--personas',
+            type=int,
+            default=50,
+            help='Personas sintéticas en las pruebas excel y anexo11 (default: 50)'
+        )
+
+    def handle(self, *args, **options):
+        pruebas = options['pruebas'] or PRUEBAS
+        invalidas = set(pruebas) - set(PRUEBAS)
+        if invalidas:
+            raise CommandError(f'Pruebas no reconocidas: {", ".join(sorted(invalidas))}')
+        repeticiones = options['repeticiones']
+
+        self.stdout.write(self.style.SUCCESS(f'\n⏱️  Benchmark de exportaciones ({repeticiones} repeticiones)\n'))
+
+        if 'zip' in pruebas:
+            self._benchmark_zip(options['archivos'], options['tamano_kb'], repeticiones)
+        if 'excel' in pruebas:
+            self._benchmark_excel(options['personas'], repeticiones)
+        if 'anexo11' in pruebas:
+            self._benchmark_anexo11(options['personas'], repeticiones)
+
+    def _reportar(self, nombre, cpu, real, extra=''):
+        self.stdout.write(f'  {nombre:<32} CPU {cpu * 1000:9.1f} ms   real {real * 1000:9.1f} ms   {extra}')
+
+    def _benchmark_zip(self, archivos, tamano_kb, repeticiones):
+        entradas = _documentos_sinteticos(archivos, tamano_kb)
+        total_mb = sum(len(c) for _, c in entradas) / (1024 * 1024)
+        self.stdout.write(f'📦 ZIP: {archivos} archivos, {total_mb:.1f} MB sin comprimir')
+
+        def construir(compression):
+            return lambda: b''.join(iterar_zip(iter(entradas), compression=compression))
+
+        cpu_base, real_base, zip_base = _medir(construir(zipfile.ZIP_DEFLATED), repeticiones)
+        cpu_pol, real_pol, zip_pol = _medir(construir(None), repeticiones)
+
+        self._reportar('Deflate en todas las entradas', cpu_base, real_base, f'{len(zip_base) / (1024 * 1024):.2f} MB')
+        self._reportar('Política por entrada', cpu_pol, real_pol, f'{len(zip_pol) / (1024 * 1024):.2f} MB')
+
+        ahorro = (1 - cpu_pol / cpu_base) * 100 if cpu_base else 0.0
+        self.stdout.write(self.style.SUCCESS(f'  ✅ CPU ahorrada: {ahorro:.1f}%\n'))
+
+    def _benchmark_excel(self, personas, repeticiones):
+        datos = [_persona_sintetica(i) for i in range(personas)]
+        self.stdout.write(f'📊 Excel por persona: {personas} personas')
+
+        def construir():
+            for persona, historicas, resumen in datos:
+                create_excel_for_person(persona, historicas, resumen)
+
+        def construir_y_guardar():
+            for persona, historicas, resumen in datos:
+                create_excel_for_person(persona, historicas, resumen).save(io.BytesIO())
+
+        cpu_libro, real_libro, _ = _medir(construir, repeticiones)
+        cpu_total, real_total, _ = _medir(construir_y_guardar, repeticiones)
+        self._reportar('Construcción del libro', cpu_libro / personas, real_libro / personas, 'por persona')
+        self._reportar('Construcción + guardado', cpu_total / personas, real_total / personas, 'por persona')
+
+        # Asignaciones que quedan vivas en un libro y pico de memoria al generarlo
+        persona, historicas, resumen = datos[0]
+        tracemalloc.start()
+        try:
+            wb = create_excel_for_person(persona, historicas, resumen)
+            bloques = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+            wb.save(io.BytesIO())
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.stdout.write(f'  Asignaciones vivas por libro: {bloques}   pico de memoria: {pico / 1024:.0f} KB')
+        self.stdout.write(self.style.SUCCESS(f'  ✅ {personas / real_total:.1f} personas/s\n'))
+
+    def _benchmark_anexo11(self, personas, repeticiones):
+        applicants = [_persona_sintetica(i)[0] for i in range(personas)]
+        self.stdout.write(f'📄 PDF ANEXO 11: {personas} personas')
+
+        def sin_cache():
+            for applicant in applicants:
+                RenderizadorAnexo11().renderizar(applicant)
+
+        renderizador = obtener_renderizador_anexo11()
+
+        def individual():
+            for applicant in applicants:
+                renderizador.renderizar(applicant)
+
+        cpu_base, real_base, _ = _medir(sin_cache, repeticiones)
+        cpu_ind, real_ind, _ = _medir(individual, repeticiones)
+
+        self._reportar('Estilos creados en cada PDF', cpu_base / personas, real_base / personas, 'por PDF')
+        self._reportar('Renderizador compartido', cpu_ind / personas, real_ind / personas, 'por PDF')
+
+        ahorro = (1 - cpu_ind / cpu_base) * 100 if cpu_base else 0.0
+        self.stdout.write(self.style.SUCCESS(f'  ✅ {personas / real_ind:.1f} PDF/s, CPU ahorrada: {ahorro:.1f}%\n'))
@@ -0,0 +1,67 @@
+"""
+Comando para procesar exportaciones del ZIP completo del personal en cola.
+Pensado para correr como worker independiente del proceso web
+(EXPORTACIONES_EN_HILO=False y EXPORTACIONES_WORKER=True), sin el límite de
+tiempo de gunicorn. Debe compartir EXPORTACIONES_ROOT con el proceso web.
+Antes de cada consulta de la cola vuelve a encolar las exportaciones que
+quedaron EN_PROCESO sin latido (p. ej. porque el worker se reinició).
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from formapp.models import ExportacionPersonal
+from formapp.exportaciones import ejecutar_exportacion, recuperar_exportaciones_abandonadas
+
+
+class Command(BaseCommand):
+    help = 'Procesa las exportaciones de personal pendientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help='Seguir esperando nuevas exportaciones en lugar de terminar al vaciar la cola'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=10,
+            help='Segundos entre consultas de la cola en modo continuo (default: 10)'
+        )
+
+    def handle(self, *args, **options):
+        continuo = options.get('continuo', False)
+        intervalo = options.get('intervalo', 10)
+
+        while True:
+            recuperadas = recuperar_exportaciones_abandonadas()
+            if recuperadas['reencoladas'] or recuperadas['fallidas']:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️ Exportaciones abandonadas: {recuperadas['reencoladas']} reencoladas, "
+                    f"{recuperadas['fallidas']} con error"
+                ))
+
+            pendientes = list(
+                ExportacionPersonal.objects.filter(estado='PENDIENTE')
+                .order_by('created_at')
+                .values_list('pk', flat=True)
+            )
+
+            for exportacion_id in pendientes:
+                self.stdout.write(f'🔄 Procesando exportación #{exportacion_id}...')
+                exportacion = ejecutar_exportacion(exportacion_id)
+                if exportacion.estado == 'COMPLETADO':
+                    self.stdout.write(self.style.SUCCESS(
+                        f'✅ Exportación #{exportacion_id} completada: {exportacion.archivo}'
+                    ))
+                elif exportacion.estado == 'ERROR':
+                    self.stdout.write(self.style.ERROR(
+                        f'❌ Exportación #{exportacion_id} falló: {exportacion.mensaje_error}'
+                    ))
+
+            if not continuo:
+                if not pendientes:
+                    self.stdout.write('No hay exportaciones pendientes.')
+                break
+
+            time.sleep(intervalo)
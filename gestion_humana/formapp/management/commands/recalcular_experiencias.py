@@ -2,9 +2,11 @@
 Comando para recalcular la experiencia total de todos los candidatos.
 Combina experiencias del formulario + experiencias históricas.
 """
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from formapp.models import InformacionBasica
-from formapp.services import calcular_experiencia_total, obtener_experiencias_historicas
+from formapp.services import recalcular_experiencias_en_lote, recalcular_experiencias_en_paralelo
 
 
 class Command(BaseCommand):
@@ -21,10 +23,20 @@ class Command(BaseCommand):
             action='store_true',
             help='Mostrar información detallada'
         )
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=1,
+            help='Reparte los candidatos por rangos de cédula entre varios procesos '
+                 '(requiere una base de datos con escrituras concurrentes, p. ej. PostgreSQL)'
+        )
 
     def handle(self, *args, **options):
         cedula_especifica = options.get('cedula')
         verbose = options.get('verbose', False)
+        procesos = options.get('procesos') or 1
+        if procesos < 1:
+            raise CommandError('--procesos debe ser mayor que 0.')
 
         # Filtrar candidatos
         if cedula_especifica:
@@ -38,61 +50,47 @@ class Command(BaseCommand):
         total = candidatos.count()
         self.stdout.write(self.style.SUCCESS(f'\n🔄 Recalculando experiencia para {total} candidato(s)...\n'))
 
-        procesados = 0
-        con_historico = 0
-        sin_historico = 0
-        errores = 0
-
-        for candidato in candidatos:
-            try:
-                # Obtener información previa
-                exp_formulario = candidato.experiencias_laborales.count()
-                exp_historicas = obtener_experiencias_historicas(candidato.cedula)
-                count_historicas = len(exp_historicas)
-
-                # Recalcular
-                calculo = calcular_experiencia_total(candidato)
+        inicio = time.perf_counter()
+        try:
+            if procesos > 1:
+                resultado = recalcular_experiencias_en_paralelo(candidatos, procesos, detalle=verbose)
+            else:
+                resultado = recalcular_experiencias_en_lote(candidatos, detalle=verbose)
+        except Exception as e:
+            # Los cálculos se guardan en una transacción: no queda nada a medias
+            raise CommandError(f'❌ Error recalculando experiencias: {str(e)}')
+        duracion = time.perf_counter() - inicio
 
-                # Estadísticas
-                procesados += 1
-                if count_historicas > 0:
-                    con_historico += 1
-
-                    if verbose:
-                        self.stdout.write(
-                            f'✅ {candidato.nombre_completo} (Cédula: {candidato.cedula})\n'
-                            f'   📝 Formulario: {exp_formulario} exp | '
-                            f'💾 Histórico: {count_historicas} exp | '
-                            f'📊 Total: {calculo.anos_y_meses_experiencia}'
-                        )
-                else:
-                    sin_historico += 1
-                    if verbose:
-                        self.stdout.write(
-                            f'✅ {candidato.nombre_completo} (Cédula: {candidato.cedula})\n'
-                            f'   📝 Solo formulario: {exp_formulario} exp | '
-                            f'📊 Total: {calculo.anos_y_meses_experiencia}'
-                        )
-
-            except Exception as e:
-                errores += 1
+        for nombre, cedula, exp_formulario, count_historicas, anos_y_meses in resultado.get('detalle', []):
+            if count_historicas > 0:
                 self.stdout.write(
-                    self.style.ERROR(
-                        f'❌ Error con {candidato.nombre_completo} (Cédula: {candidato.cedula}): {str(e)}'
-                    )
+                    f'✅ {nombre} (Cédula: {cedula})\n'
+                    f'   📝 Formulario: {exp_formulario} exp | '
+                    f'💾 Histórico: {count_historicas} exp | '
+                    f'📊 Total: {anos_y_meses}'
                 )
+            else:
+                self.stdout.write(
+                    f'✅ {nombre} (Cédula: {cedula})\n'
+                    f'   📝 Solo formulario: {exp_formulario} exp | '
+                    f'📊 Total: {anos_y_meses}'
+                )
+
+        for nombre, cedula, mensaje in resultado['errores']:
+            self.stdout.write(self.style.ERROR(f'❌ Error con {nombre} (Cédula: {cedula}): {mensaje}'))
 
         # Resumen final
         self.stdout.write('\n' + '='*70)
         self.stdout.write(self.style.SUCCESS('\n📊 RESUMEN DE RECÁLCULO:\n'))
-        self.stdout.write(f'   Total procesados: {procesados}/{total}')
-        self.stdout.write(f'   ✅ Con experiencia histórica: {con_historico}')
-        self.stdout.write(f'   📝 Solo formulario: {sin_historico}')
-        if errores > 0:
-            self.stdout.write(self.style.ERROR(f'   ❌ Errores: {errores}'))
+        self.stdout.write(f'   Total procesados: {resultado["procesados"]}/{total}')
+        self.stdout.write(f'   ✅ Con experiencia histórica: {resultado["con_historico"]}')
+        self.stdout.write(f'   📝 Solo formulario: {resultado["sin_historico"]}')
+        if resultado['errores']:
+            self.stdout.write(self.style.ERROR(f'   ❌ Errores: {len(resultado["errores"])}'))
+        self.stdout.write(f'   ⏱️  {duracion:.2f} s')
         self.stdout.write('\n' + '='*70)
 
-        if errores == 0:
+        if not resultado['errores']:
             self.stdout.write(self.style.SUCCESS('\n✅ Recálculo completado exitosamente!\n'))
         else:
             self.stdout.write(self.style.WARNING('\n⚠️ Recálculo completado con algunos errores.\n'))
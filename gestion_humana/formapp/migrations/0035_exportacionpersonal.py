@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('formapp', '0034_alter_educacionsuperior_tarjeta_profesional'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportacionPersonal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En Proceso'), ('COMPLETADO', 'Completado'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20, verbose_name='Estado')),
+                ('fase', models.CharField(choices=[('EN_COLA', 'En cola'), ('REPORTES', 'Generando Excel y PDF'), ('DOCUMENTOS', 'Descargando documentos'), ('FINALIZADO', 'Finalizado')], default='EN_COLA', max_length=20, verbose_name='Fase')),
+                ('solicitado_por', models.CharField(blank=True, max_length=150, verbose_name='Solicitado por')),
+                ('total_personas', models.PositiveIntegerField(default=0, verbose_name='Total Personas')),
+                ('personas_procesadas', models.PositiveIntegerField(default=0, verbose_name='Personas Procesadas')),
+                ('total_archivos', models.PositiveIntegerField(default=0, verbose_name='Total Archivos')),
+                ('archivos_procesados', models.PositiveIntegerField(default=0, verbose_name='Archivos Procesados')),
+                ('archivo', models.CharField(blank=True, help_text='Nombre del ZIP dentro de EXPORTACIONES_ROOT', max_length=255, verbose_name='Archivo Generado')),
+                ('mensaje_error', models.TextField(blank=True, null=True, verbose_name='Mensaje de Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('iniciado_en', models.DateTimeField(blank=True, null=True, verbose_name='Inicio del Proceso')),
+                ('finalizado_en', models.DateTimeField(blank=True, null=True, verbose_name='Fin del Proceso')),
+            ],
+            options={
+                'verbose_name': 'Exportación de Personal',
+                'verbose_name_plural': 'Exportaciones de Personal',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('formapp', '0035_exportacionpersonal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportacionpersonal',
+            name='base',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='incrementales', to='formapp.exportacionpersonal', verbose_name='Exportación Base'),
+        ),
+        migrations.AddField(
+            model_name='exportacionpersonal',
+            name='desde',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Cambios Desde'),
+        ),
+        migrations.AddField(
+            model_name='exportacionpersonal',
+            name='manifiesto',
+            field=models.JSONField(blank=True, default=list, help_text='Rutas (sin extensión) que componen el estado exportado; base para calcular eliminados', verbose_name='Manifiesto'),
+        ),
+        migrations.AddField(
+            model_name='exportacionpersonal',
+            name='tipo',
+            field=models.CharField(choices=[('COMPLETA', 'Completa'), ('INCREMENTAL', 'Incremental (solo cambios)')], default='COMPLETA', max_length=20, verbose_name='Tipo'),
+        ),
+        migrations.AddField(
+            model_name='informacionbasica',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Última Actualización'),
+        ),
+    ]
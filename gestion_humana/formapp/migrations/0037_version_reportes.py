@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('formapp', '0036_exportacion_incremental'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='informacionbasica',
+            name='version_reportes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Versión de Reportes'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('formapp', '0037_version_reportes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calculoexperiencia',
+            name='intervalos_fusionados',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name='Intervalos Fusionados'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('formapp', '0038_calculo_intervalos_fusionados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportacionpersonal',
+            name='intentos',
+            field=models.PositiveIntegerField(default=0, verbose_name='Intentos'),
+        ),
+        migrations.AddField(
+            model_name='exportacionpersonal',
+            name='latido',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Último Latido'),
+        ),
+    ]
@@ -190,6 +190,14 @@ class InformacionBasica(models.Model):
         help_text='Debe aceptar la política de tratamiento de datos para continuar.'
     )
 
+    # Se actualiza en cada guardado del formulario (incluye cambios en sus formsets);
+    # lo usan las exportaciones incrementales para detectar personas modificadas
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Última Actualización')
+
+    # Versión de los reportes (Excel/ANEXO 11) en caché; la incrementan las señales
+    # de formapp.signals cuando cambia la persona o cualquier dato que aparece en ellos
+    version_reportes = models.PositiveIntegerField(default=0, editable=False, verbose_name='Versión de Reportes')
+
     def save(self, *args, **kwargs):
         # Normalizar a mayúsculas
         self.primer_apellido = self.primer_apellido.upper().strip() if self.primer_apellido else ''
@@ -403,6 +411,9 @@ class CalculoExperiencia(models.Model):
     total_dias_experiencia = models.IntegerField(verbose_name='Total Días Experiencia Certificada')
     total_experiencia_anos = models.DecimalField(max_digits=5, decimal_places=2, verbose_name='Total Experiencia en Años')
     anos_y_meses_experiencia = models.CharField(max_length=200, verbose_name='Años y Meses de Experiencia')
+    # {'cedula': ..., 'bloques': [[inicio, fin], ...]} con los intervalos ya fusionados en ordinales de
+    # fecha; permite actualizar el cálculo sin releer todas las experiencias. None = hay que recalcular.
+    intervalos_fusionados = models.JSONField(null=True, blank=True, editable=False, verbose_name='Intervalos Fusionados')
 
     def __str__(self):
         return f'Cálculo de experiencia para {self.informacion_basica.cedula}'
@@ -744,4 +755,117 @@ class HistorialCorreccion(models.Model):
     @property
     def fue_corregido(self):
         """Retorna True si el candidato ya corrigió la información"""
-        return self.fecha_correccion is not None
\ No newline at end of file
+        return self.fecha_correccion is not None
+
+class ExportacionPersonal(models.Model):
+    """
+    Trabajo de exportación del ZIP completo del personal.
+    Se procesa fuera del ciclo de la petición (hilo o comando
+    procesar_exportaciones) y el archivo resultante queda en disco local
+    para descargarlo después.
+    """
+    ESTADO_CHOICES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_PROCESO', 'En Proceso'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    ]
+
+    TIPO_CHOICES = [
+        ('COMPLETA', 'Completa'),
+        ('INCREMENTAL', 'Incremental (solo cambios)'),
+    ]
+
+    FASE_CHOICES = [
+        ('EN_COLA', 'En cola'),
+        ('REPORTES', 'Generando Excel y PDF'),
+        ('DOCUMENTOS', 'Descargando documentos'),
+        ('FINALIZADO', 'Finalizado'),
+    ]
+
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='PENDIENTE',
+        verbose_name='Estado'
+    )
+
+    fase = models.CharField(
+        max_length=20,
+        choices=FASE_CHOICES,
+        default='EN_COLA',
+        verbose_name='Fase'
+    )
+
+    solicitado_por = models.CharField(
+        max_length=150,
+        blank=True,
+        verbose_name='Solicitado por'
+    )
+
+    tipo = models.CharField(
+        max_length=20,
+        choices=TIPO_CHOICES,
+        default='COMPLETA',
+        verbose_name='Tipo'
+    )
+
+    # Para exportaciones incrementales: exportación de referencia y/o fecha de corte
+    base = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='incrementales',
+        verbose_name='Exportación Base'
+    )
+    desde = models.DateTimeField(blank=True, null=True, verbose_name='Cambios Desde')
+
+    manifiesto = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Manifiesto',
+        help_text='Rutas (sin extensión) que componen el estado exportado; base para calcular eliminados'
+    )
+
+    total_personas = models.PositiveIntegerField(default=0, verbose_name='Total Personas')
+    personas_procesadas = models.PositiveIntegerField(default=0, verbose_name='Personas Procesadas')
+    total_archivos = models.PositiveIntegerField(default=0, verbose_name='Total Archivos')
+    archivos_procesados = models.PositiveIntegerField(default=0, verbose_name='Archivos Procesados')
+
+    archivo = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Archivo Generado',
+        help_text='Nombre del ZIP dentro de EXPORTACIONES_ROOT'
+    )
+
+    mensaje_error = models.TextField(blank=True, null=True, verbose_name='Mensaje de Error')
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')
+    iniciado_en = models.DateTimeField(blank=True, null=True, verbose_name='Inicio del Proceso')
+    finalizado_en = models.DateTimeField(blank=True, null=True, verbose_name='Fin del Proceso')
+
+    # Lo actualiza periódicamente el proceso que genera el ZIP; si deja de
+    # hacerlo (worker reiniciado o terminado) la exportación se da por abandonada
+    latido = models.DateTimeField(blank=True, null=True, verbose_name='Último Latido')
+    intentos = models.PositiveIntegerField(default=0, verbose_name='Intentos')
+
+    class Meta:
+        verbose_name = 'Exportación de Personal'
+        verbose_name_plural = 'Exportaciones de Personal'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'Exportación #{self.pk} - {self.get_estado_display()}'
+
+    @property
+    def porcentaje(self):
+        """Avance aproximado (0-100) combinando reportes generados y documentos descargados"""
+        if self.estado == 'COMPLETADO':
+            return 100
+        total = self.total_personas + self.total_archivos
+        if not total:
+            return 0
+        hechos = self.personas_procesadas + self.archivos_procesados
+        return min(99, int(hechos * 100 / total))
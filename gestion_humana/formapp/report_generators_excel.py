@@ -1,34 +1,194 @@
+"""
+Generación del Excel de información por persona.
+
+La estructura de las hojas (títulos, encabezados, anchos y celdas
+combinadas) se compila una sola vez en PLANTILLA_HOJAS y los formatos son
+estilos con nombre que se registran una vez por libro. Cada celda copia el
+índice de su estilo ya resuelto, en lugar de crear objetos Font, PatternFill
+y Border por celda, así que por persona solo se escriben los datos.
+"""
+from copy import copy
+
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.merge import MergedCellRange
+
 from .services import obtener_experiencias_historicas, obtener_resumen_experiencia_historica
 
-def create_excel_for_person(applicant):
-    """Crea un archivo Excel con toda la información de una persona"""
+_BORDE = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+
+
+def _definir_estilos():
+    """Estilos con nombre del reporte; se crean por libro porque openpyxl los asocia a él"""
+    titulo = NamedStyle(name='reporte_titulo')
+    titulo.font = Font(bold=True, size=14, color="2C3E50")
+
+    encabezado = NamedStyle(name='reporte_encabezado')
+    encabezado.font = Font(bold=True, color="FFFFFF", size=12)
+    encabezado.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    encabezado.alignment = Alignment(horizontal='center', vertical='center')
+    encabezado.border = _BORDE
+
+    etiqueta = NamedStyle(name='reporte_etiqueta')
+    etiqueta.font = Font(bold=True)
+    etiqueta.fill = PatternFill(start_color="E8E8E8", end_color="E8E8E8", fill_type="solid")
+    etiqueta.border = _BORDE
+
+    etiqueta_resumen = NamedStyle(name='reporte_etiqueta_resumen')
+    etiqueta_resumen.font = Font(bold=True)
+    etiqueta_resumen.border = _BORDE
+
+    titulo_resumen = NamedStyle(name='reporte_titulo_resumen')
+    titulo_resumen.font = Font(bold=True, size=11)
+    titulo_resumen.fill = PatternFill(start_color="FFF4E6", end_color="FFF4E6", fill_type="solid")
+
+    # Sin fuente propia, NamedStyle no hereda la predeterminada del libro
+    celda = NamedStyle(name='reporte_celda')
+    celda.font = copy(DEFAULT_FONT)
+    celda.border = _BORDE
+
+    return [titulo, encabezado, etiqueta, etiqueta_resumen, titulo_resumen, celda]
+
+
+def _compilar_tabla(titulo, encabezados, ancho, fila_encabezados=3):
+    """Parte fija de una hoja con tabla: título, encabezados, anchos y celda combinada"""
+    return {
+        'titulo': titulo,
+        'encabezados': encabezados,
+        'fila_encabezados': fila_encabezados,
+        'combinar_titulo': f'A1:{get_column_letter(len(encabezados))}1',
+        'anchos': [(get_column_letter(col), ancho) for col in range(1, len(encabezados) + 1)],
+    }
+
+
+# Plantilla compilada de las hojas, en el orden en que aparecen en el libro
+PLANTILLA_HOJAS = {
+    'Experiencia Laboral': _compilar_tabla(
+        "EXPERIENCIA LABORAL",
+        ["Cargo", "Cargo Anexo 11", "Fecha Inicial", "Fecha Terminación",
+         "Meses", "Días", "Objeto Contractual", "Funciones"],
+        20,
+    ),
+    'Experiencia Histórica': _compilar_tabla(
+        "EXPERIENCIA HISTÓRICA (CONTRATOS 2017-2025)",
+        ["N°", "Contrato", "Fecha Inicio", "Fecha Fin",
+         "Días Brutos", "Días Reales", "Traslape", "Observación"],
+        18,
+        fila_encabezados=7,
+    ),
+    'Bachiller': _compilar_tabla(
+        "EDUCACIÓN BÁSICA (BACHILLER)",
+        ["Institución", "Año Grado", "Título"],
+        25,
+    ),
+    'Técnico y Tecnólogo': _compilar_tabla(
+        "EDUCACIÓN SUPERIOR (TÉCNICO/TECNÓLOGO)",
+        ["Nivel", "Institución", "Título", "Fecha Grado", "Tarjeta Profesional"],
+        25,
+    ),
+    'Información Académica': _compilar_tabla(
+        "INFORMACIÓN ACADÉMICA",
+        ["Profesión", "Universidad", "Tarjeta Profesional",
+         "N° Tarjeta/Resolución", "Fecha Expedición", "Fecha Grado"],
+        20,
+    ),
+    'Posgrados': _compilar_tabla(
+        "POSGRADOS",
+        ["Nombre Posgrado", "Universidad", "Fecha Terminación"],
+        25,
+    ),
+    'Especializaciones': _compilar_tabla(
+        "ESPECIALIZACIONES",
+        ["Nombre Especialización", "Universidad", "Fecha Terminación"],
+        25,
+    ),
+}
+
+NO_CALCULADO = "No calculado"
+
+
+def _fecha(valor):
+    return valor.strftime('%Y-%m-%d')
+
+
+class _Escritor:
+    """Escribe celdas en un libro copiando el índice de estilo ya resuelto de cada estilo con nombre"""
+
+    def __init__(self, wb):
+        self.prototipos = {}
+        for estilo in _definir_estilos():
+            wb.add_named_style(estilo)
+            self.prototipos[estilo.name] = estilo.as_tuple()
+
+    def celda(self, ws, fila, columna, valor, estilo=None):
+        cell = ws.cell(row=fila, column=columna, value=valor)
+        if estilo is not None:
+            cell._style = copy(self.prototipos[estilo])
+        return cell
+
+    def fila(self, ws, fila, valores, estilo='reporte_celda'):
+        for columna, valor in enumerate(valores, start=1):
+            self.celda(ws, fila, columna, valor, estilo)
+
+    @staticmethod
+    def combinar(ws, rango):
+        # Las celdas combinadas de estos títulos no tienen bordes; registrar solo
+        # el rango evita que merge_cells cree y formatee cada celda cubierta
+        ws.merged_cells.add(MergedCellRange(ws, rango))
+
+    def titulo(self, ws, texto, rango):
+        self.celda(ws, 1, 1, texto, 'reporte_titulo')
+        self.combinar(ws, rango)
+
+    def pares(self, ws, fila, pares):
+        """Filas etiqueta/valor; retorna la siguiente fila libre"""
+        for etiqueta, valor in pares:
+            self.celda(ws, fila, 1, etiqueta, 'reporte_etiqueta')
+            self.celda(ws, fila, 2, valor, 'reporte_celda')
+            fila += 1
+        return fila
+
+    def tabla(self, wb, nombre, applicant, filas):
+        """Crea una hoja de PLANTILLA_HOJAS y escribe sus filas de datos"""
+        plantilla = PLANTILLA_HOJAS[nombre]
+        ws = wb.create_sheet(nombre)
+        self.titulo(ws, f"{plantilla['titulo']} - {applicant.nombre_completo}", plantilla['combinar_titulo'])
+        fila = plantilla['fila_encabezados']
+        self.fila(ws, fila, plantilla['encabezados'], 'reporte_encabezado')
+        for fila, valores in enumerate(filas, start=fila + 1):
+            self.fila(ws, fila, valores)
+        for letra, ancho in plantilla['anchos']:
+            ws.column_dimensions[letra].width = ancho
+        return ws
+
+
+def create_excel_for_person(applicant, experiencias_historicas=None, resumen_historico=None):
+    """
+    Crea un archivo Excel con toda la información de una persona.
+
+    Args:
+        applicant: InformacionBasica (o un snapshot con los mismos atributos)
+        experiencias_historicas: Contratos históricos ya consultados. Si es None
+            se consultan por la cédula.
+        resumen_historico: Resumen ya calculado. Si es None se lee de
+            ResumenHistorico.
+    """
     wb = Workbook()
-
-    # Estilos
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    title_font = Font(bold=True, size=14, color="2C3E50")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    escritor = _Escritor(wb)
 
     # Hoja 1: Información Básica
     ws1 = wb.active
     ws1.title = "Información Básica"
+    escritor.titulo(ws1, f"INFORMACIÓN PERSONAL - {applicant.nombre_completo}", 'A1:B1')
 
-    # Título
-    ws1['A1'] = f"INFORMACIÓN PERSONAL - {applicant.nombre_completo}"
-    ws1['A1'].font = title_font
-    ws1.merge_cells('A1:B1')
-
-    # Datos personales
-    row = 3
-    personal_data = [
+    row = escritor.pares(ws1, 3, [
         ("Cédula", applicant.cedula),
         ("Nombre Completo", applicant.nombre_completo),
         ("Género", applicant.genero),
@@ -37,274 +197,92 @@ def create_excel_for_person(applicant):
         ("Barrio", applicant.barrio or "N/A"),
         ("Teléfono", applicant.telefono),
         ("Correo", applicant.correo),
-    ]
-
-    for label, value in personal_data:
-        ws1[f'A{row}'] = label
-        ws1[f'A{row}'].font = Font(bold=True)
-        ws1[f'A{row}'].fill = PatternFill(start_color="E8E8E8", end_color="E8E8E8", fill_type="solid")
-        ws1[f'B{row}'] = value
-        ws1[f'A{row}'].border = border
-        ws1[f'B{row}'].border = border
-        row += 1
+    ])
 
     # Información profesional
     row += 2
-    ws1[f'A{row}'] = "INFORMACIÓN PROFESIONAL"
-    ws1[f'A{row}'].font = title_font
-    ws1.merge_cells(f'A{row}:B{row}')
-    row += 2
-
-    professional_data = [
+    escritor.celda(ws1, row, 1, "INFORMACIÓN PROFESIONAL", 'reporte_titulo')
+    escritor.combinar(ws1, f'A{row}:B{row}')
+    escritor.pares(ws1, row + 2, [
         ("Perfil", applicant.perfil or "N/A"),
         ("Área del Conocimiento", applicant.area_del_conocimiento or "N/A"),
         ("Profesión", applicant.profesion or "N/A"),
         ("Contrato", applicant.contrato or "N/A"),
         ("Observaciones", applicant.observacion or "N/A"),
-    ]
-
-    for label, value in professional_data:
-        ws1[f'A{row}'] = label
-        ws1[f'A{row}'].font = Font(bold=True)
-        ws1[f'A{row}'].fill = PatternFill(start_color="E8E8E8", end_color="E8E8E8", fill_type="solid")
-        ws1[f'B{row}'] = value
-        ws1[f'A{row}'].border = border
-        ws1[f'B{row}'].border = border
-        row += 1
+    ])
 
     ws1.column_dimensions['A'].width = 30
     ws1.column_dimensions['B'].width = 50
 
     # Hoja 2: Experiencia Laboral
-    ws2 = wb.create_sheet("Experiencia Laboral")
-    ws2['A1'] = f"EXPERIENCIA LABORAL - {applicant.nombre_completo}"
-    ws2['A1'].font = title_font
-    ws2.merge_cells('A1:H1')
-
-    # Encabezados
-    headers = ["Cargo", "Cargo Anexo 11", "Fecha Inicial", "Fecha Terminación",
-               "Meses", "Días", "Objeto Contractual", "Funciones"]
-    for col, header in enumerate(headers, start=1):
-        cell = ws2.cell(row=3, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-
-    # Datos
-    row = 4
-    for exp in applicant.experiencias_laborales.all():
-        ws2.cell(row=row, column=1, value=exp.cargo).border = border
-        ws2.cell(row=row, column=2, value=exp.cargo_anexo_11).border = border
-        ws2.cell(row=row, column=3, value=exp.fecha_inicial.strftime('%Y-%m-%d')).border = border
-        ws2.cell(row=row, column=4, value=exp.fecha_terminacion.strftime('%Y-%m-%d')).border = border
-        ws2.cell(row=row, column=5, value=exp.meses_experiencia).border = border
-        ws2.cell(row=row, column=6, value=exp.dias_experiencia).border = border
-        ws2.cell(row=row, column=7, value=exp.objeto_contractual).border = border
-        ws2.cell(row=row, column=8, value=exp.funciones).border = border
-        row += 1
-
-    for col in range(1, 9):
-        ws2.column_dimensions[chr(64 + col)].width = 20
+    escritor.tabla(wb, "Experiencia Laboral", applicant, (
+        [exp.cargo, exp.cargo_anexo_11, _fecha(exp.fecha_inicial), _fecha(exp.fecha_terminacion),
+         exp.meses_experiencia, exp.dias_experiencia, exp.objeto_contractual, exp.funciones]
+        for exp in applicant.experiencias_laborales.all()
+    ))
 
     # Hoja 2.5: Experiencia Histórica (Base de Datos Caquetá)
-    experiencias_historicas = obtener_experiencias_historicas(applicant.cedula)
+    if experiencias_historicas is None:
+        experiencias_historicas = obtener_experiencias_historicas(applicant.cedula)
     if experiencias_historicas:
-        resumen_historico = obtener_resumen_experiencia_historica(applicant.cedula)
+        if resumen_historico is None:
+            # Resumen guardado en ResumenHistorico
+            resumen_historico = obtener_resumen_experiencia_historica(applicant.cedula)
 
-        ws_hist = wb.create_sheet("Experiencia Histórica")
-        ws_hist['A1'] = f"EXPERIENCIA HISTÓRICA (CONTRATOS 2017-2025) - {applicant.nombre_completo}"
-        ws_hist['A1'].font = title_font
-        ws_hist.merge_cells('A1:H1')
+        ws_hist = escritor.tabla(wb, "Experiencia Histórica", applicant, (
+            [idx, exp_hist.contrato, _fecha(exp_hist.fecha_inicio), _fecha(exp_hist.fecha_fin),
+             exp_hist.dias_brutos, exp_hist.dias_reales_contribuidos, exp_hist.traslape,
+             exp_hist.explicacion_detallada or ""]
+            for idx, exp_hist in enumerate(experiencias_historicas, start=1)
+        ))
 
         # Resumen
-        ws_hist['A3'] = "Resumen de Experiencia Histórica"
-        ws_hist['A3'].font = Font(bold=True, size=11)
-        ws_hist['A3'].fill = PatternFill(start_color="FFF4E6", end_color="FFF4E6", fill_type="solid")
-        ws_hist.merge_cells('A3:B3')
-
-        ws_hist['A4'] = "Total Contratos:"
-        ws_hist['B4'] = resumen_historico['total_contratos']
-        ws_hist['A5'] = "Experiencia Total:"
-        ws_hist['B5'] = resumen_historico['experiencia_texto']
-
-        for row_num in [4, 5]:
-            ws_hist[f'A{row_num}'].font = Font(bold=True)
-            ws_hist[f'A{row_num}'].border = border
-            ws_hist[f'B{row_num}'].border = border
-
-        # Encabezados
-        headers_hist = ["N°", "Contrato", "Fecha Inicio", "Fecha Fin",
-                       "Días Brutos", "Días Reales", "Traslape", "Observación"]
-        for col, header in enumerate(headers_hist, start=1):
-            cell = ws_hist.cell(row=7, column=col)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = border
-
-        # Datos
-        row = 8
-        for idx, exp_hist in enumerate(experiencias_historicas, start=1):
-            ws_hist.cell(row=row, column=1, value=idx).border = border
-            ws_hist.cell(row=row, column=2, value=exp_hist.contrato).border = border
-            ws_hist.cell(row=row, column=3, value=exp_hist.fecha_inicio.strftime('%Y-%m-%d')).border = border
-            ws_hist.cell(row=row, column=4, value=exp_hist.fecha_fin.strftime('%Y-%m-%d')).border = border
-            ws_hist.cell(row=row, column=5, value=exp_hist.dias_brutos).border = border
-            ws_hist.cell(row=row, column=6, value=exp_hist.dias_reales_contribuidos).border = border
-            ws_hist.cell(row=row, column=7, value=exp_hist.traslape).border = border
-            ws_hist.cell(row=row, column=8, value=exp_hist.explicacion_detallada or "").border = border
-            row += 1
-
-        for col in range(1, 9):
-            ws_hist.column_dimensions[chr(64 + col)].width = 18
+        escritor.celda(ws_hist, 3, 1, "Resumen de Experiencia Histórica", 'reporte_titulo_resumen')
+        escritor.combinar(ws_hist, 'A3:B3')
+        escritor.celda(ws_hist, 4, 1, "Total Contratos:", 'reporte_etiqueta_resumen')
+        escritor.celda(ws_hist, 4, 2, resumen_historico['total_contratos'], 'reporte_celda')
+        escritor.celda(ws_hist, 5, 1, "Experiencia Total:", 'reporte_etiqueta_resumen')
+        escritor.celda(ws_hist, 5, 2, resumen_historico['experiencia_texto'], 'reporte_celda')
 
     # Hoja 2.1: Educación Básica (Bachiller)
-    ws_basica = wb.create_sheet("Bachiller")
-    ws_basica['A1'] = f"EDUCACIÓN BÁSICA (BACHILLER) - {applicant.nombre_completo}"
-    ws_basica['A1'].font = title_font
-    ws_basica.merge_cells('A1:C1')
-
-    headers_basica = ["Institución", "Año Grado", "Título"]
-    for col, header in enumerate(headers_basica, start=1):
-        cell = ws_basica.cell(row=3, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-
-    row = 4
-    for basica in applicant.educacion_basica.all():
-        ws_basica.cell(row=row, column=1, value=basica.institucion).border = border
-        ws_basica.cell(row=row, column=2, value=basica.anio_grado).border = border
-        ws_basica.cell(row=row, column=3, value=basica.titulo).border = border
-        row += 1
-    
-    for col in range(1, 4):
-        ws_basica.column_dimensions[chr(64 + col)].width = 25
+    escritor.tabla(wb, "Bachiller", applicant, (
+        [basica.institucion, basica.anio_grado, basica.titulo]
+        for basica in applicant.educacion_basica.all()
+    ))
 
     # Hoja 2.2: Educación Superior (Técnico/Tecnólogo)
-    ws_superior = wb.create_sheet("Técnico y Tecnólogo")
-    ws_superior['A1'] = f"EDUCACIÓN SUPERIOR (TÉCNICO/TECNÓLOGO) - {applicant.nombre_completo}"
-    ws_superior['A1'].font = title_font
-    ws_superior.merge_cells('A1:E1')
-
-    headers_superior = ["Nivel", "Institución", "Título", "Fecha Grado", "Tarjeta Profesional"]
-    for col, header in enumerate(headers_superior, start=1):
-        cell = ws_superior.cell(row=3, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-
-    row = 4
-    for superior in applicant.educacion_superior.all():
-        ws_superior.cell(row=row, column=1, value=superior.nivel).border = border
-        ws_superior.cell(row=row, column=2, value=superior.institucion).border = border
-        ws_superior.cell(row=row, column=3, value=superior.titulo).border = border
-        ws_superior.cell(row=row, column=4, value=superior.fecha_grado.strftime('%Y-%m-%d')).border = border
-        ws_superior.cell(row=row, column=5, value=superior.tarjeta_profesional or "N/A").border = border
-        row += 1
-    
-    for col in range(1, 6):
-        ws_superior.column_dimensions[chr(64 + col)].width = 25
+    escritor.tabla(wb, "Técnico y Tecnólogo", applicant, (
+        [superior.nivel, superior.institucion, superior.titulo, _fecha(superior.fecha_grado),
+         superior.tarjeta_profesional or "N/A"]
+        for superior in applicant.educacion_superior.all()
+    ))
 
     # Hoja 3: Información Académica
-    ws3 = wb.create_sheet("Información Académica")
-    ws3['A1'] = f"INFORMACIÓN ACADÉMICA - {applicant.nombre_completo}"
-    ws3['A1'].font = title_font
-    ws3.merge_cells('A1:F1')
-
-    # Encabezados
-    headers = ["Profesión", "Universidad", "Tarjeta Profesional",
-               "N° Tarjeta/Resolución", "Fecha Expedición", "Fecha Grado"]
-    for col, header in enumerate(headers, start=1):
-        cell = ws3.cell(row=3, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-
-    # Datos
-    row = 4
-    for academica in applicant.formacion_academica.all():
-        ws3.cell(row=row, column=1, value=academica.profesion).border = border
-        ws3.cell(row=row, column=2, value=academica.universidad).border = border
-        ws3.cell(row=row, column=3, value=academica.tarjeta_profesional).border = border
-        ws3.cell(row=row, column=4, value=academica.numero_tarjeta_resolucion or "N/A").border = border
-        ws3.cell(row=row, column=5, value=academica.fecha_expedicion.strftime('%Y-%m-%d') if academica.fecha_expedicion else "N/A").border = border
-        ws3.cell(row=row, column=6, value=academica.fecha_grado.strftime('%Y-%m-%d')).border = border
-        row += 1
-
-    for col in range(1, 7):
-        ws3.column_dimensions[chr(64 + col)].width = 20
+    escritor.tabla(wb, "Información Académica", applicant, (
+        [academica.profesion, academica.universidad, academica.tarjeta_profesional,
+         academica.numero_tarjeta_resolucion or "N/A",
+         _fecha(academica.fecha_expedicion) if academica.fecha_expedicion else "N/A",
+         _fecha(academica.fecha_grado)]
+        for academica in applicant.formacion_academica.all()
+    ))
 
     # Hoja 4: Posgrados
-    ws4 = wb.create_sheet("Posgrados")
-    ws4['A1'] = f"POSGRADOS - {applicant.nombre_completo}"
-    ws4['A1'].font = title_font
-    ws4.merge_cells('A1:C1')
-
-    # Encabezados
-    headers = ["Nombre Posgrado", "Universidad", "Fecha Terminación"]
-    for col, header in enumerate(headers, start=1):
-        cell = ws4.cell(row=3, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-
-    # Datos
-    row = 4
-    for posgrado in applicant.posgrados.all():
-        ws4.cell(row=row, column=1, value=posgrado.nombre_posgrado).border = border
-        ws4.cell(row=row, column=2, value=posgrado.universidad).border = border
-        ws4.cell(row=row, column=3, value=posgrado.fecha_terminacion.strftime('%Y-%m-%d')).border = border
-        row += 1
-
-    for col in range(1, 4):
-        ws4.column_dimensions[chr(64 + col)].width = 25
+    escritor.tabla(wb, "Posgrados", applicant, (
+        [posgrado.nombre_posgrado, posgrado.universidad, _fecha(posgrado.fecha_terminacion)]
+        for posgrado in applicant.posgrados.all()
+    ))
 
     # Hoja 5: Especializaciones
-    ws5 = wb.create_sheet("Especializaciones")
-    ws5['A1'] = f"ESPECIALIZACIONES - {applicant.nombre_completo}"
-    ws5['A1'].font = title_font
-    ws5.merge_cells('A1:C1')
-
-    # Encabezados
-    headers = ["Nombre Especialización", "Universidad", "Fecha Terminación"]
-    for col, header in enumerate(headers, start=1):
-        cell = ws5.cell(row=3, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-
-    # Datos
-    row = 4
-    for especializacion in applicant.especializaciones.all():
-        ws5.cell(row=row, column=1, value=especializacion.nombre_especializacion).border = border
-        ws5.cell(row=row, column=2, value=especializacion.universidad).border = border
-        ws5.cell(row=row, column=3, value=especializacion.fecha_terminacion.strftime('%Y-%m-%d')).border = border
-        row += 1
-
-    for col in range(1, 4):
-        ws5.column_dimensions[chr(64 + col)].width = 25
+    escritor.tabla(wb, "Especializaciones", applicant, (
+        [especializacion.nombre_especializacion, especializacion.universidad,
+         _fecha(especializacion.fecha_terminacion)]
+        for especializacion in applicant.especializaciones.all()
+    ))
 
     # Hoja 6: Cálculo de Experiencia
     ws6 = wb.create_sheet("Cálculo Experiencia")
-    ws6['A1'] = f"CÁLCULO DE EXPERIENCIA - {applicant.nombre_completo}"
-    ws6['A1'].font = title_font
-    ws6.merge_cells('A1:B1')
+    escritor.titulo(ws6, f"CÁLCULO DE EXPERIENCIA - {applicant.nombre_completo}", 'A1:B1')
 
-    row = 3
     try:
         calculo = applicant.calculo_experiencia
         calculo_data = [
@@ -313,25 +291,16 @@ def create_excel_for_person(applicant):
             ("Total Experiencia (Años)", calculo.total_experiencia_anos),
             ("Años y Meses", calculo.anos_y_meses_experiencia),
         ]
-    except:
+    except Exception:
         calculo_data = [
-            ("Total Meses Experiencia", "No calculado"),
-            ("Total Días Experiencia", "No calculado"),
-            ("Total Experiencia (Años)", "No calculado"),
-            ("Años y Meses", "No calculado"),
+            ("Total Meses Experiencia", NO_CALCULADO),
+            ("Total Días Experiencia", NO_CALCULADO),
+            ("Total Experiencia (Años)", NO_CALCULADO),
+            ("Años y Meses", NO_CALCULADO),
         ]
-
-    for label, value in calculo_data:
-        ws6[f'A{row}'] = label
-        ws6[f'A{row}'].font = Font(bold=True)
-        ws6[f'A{row}'].fill = PatternFill(start_color="E8E8E8", end_color="E8E8E8", fill_type="solid")
-        ws6[f'B{row}'] = value
-        ws6[f'A{row}'].border = border
-        ws6[f'B{row}'].border = border
-        row += 1
+    escritor.pares(ws6, 3, calculo_data)
 
     ws6.column_dimensions['A'].width = 30
     ws6.column_dimensions['B'].width = 30
 
     return wb
-
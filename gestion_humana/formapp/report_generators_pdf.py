@@ -1,25 +1,120 @@
+import copy
 import io
+import os
+import re
+import threading
 from datetime import datetime
 
-def generar_certificado_historico_pdf(contrato_historico):
+
+def _ruta_plantilla_certificado():
+    from django.conf import settings
+    return os.path.join(settings.BASE_DIR.parent, 'archivos word', 'plantilla_certificacion.pdf')
+
+
+class PlantillaCertificado:
     """
-    Genera un certificado PDF para un contrato histórico usando la plantilla oficial
+    Página de la plantilla oficial de certificación leída una sola vez.
+
+    La página se guarda como un Form XObject (con sus propios recursos) que
+    cada certificado dibuja debajo de su contenido, así que no hay que volver
+    a leer el archivo ni analizar y renombrar los content streams de la
+    plantilla con merge_page en cada certificado.
     """
-    from reportlab.pdfgen import canvas
+
+    NOMBRE_XOBJECT = '/PlantillaCertificado'
+
+    def __init__(self, ruta):
+        from PyPDF2 import PdfReader
+        from PyPDF2.generic import DecodedStreamObject, NameObject
+
+        self.ruta = ruta
+        self.modificado = os.path.getmtime(ruta)
+        self._reader = PdfReader(ruta)
+        pagina = self._reader.pages[0]
+
+        formulario = DecodedStreamObject()
+        formulario.set_data(pagina.get_contents().get_data())
+        formulario = formulario.flate_encode()
+        formulario[NameObject('/Type')] = NameObject('/XObject')
+        formulario[NameObject('/Subtype')] = NameObject('/Form')
+        formulario[NameObject('/BBox')] = pagina.mediabox
+        formulario[NameObject('/Resources')] = pagina.raw_get('/Resources')
+        self._formulario = formulario
+
+        # Atributos de la página (tamaño, grupo de transparencia...) que se copian a cada certificado
+        self._atributos = {
+            NameObject(clave): pagina.raw_get(clave)
+            for clave in pagina
+            if clave not in ('/Resources', '/Contents', '/Parent', '/Annots')
+        }
+        # Los objetos de la plantilla se leen del reader al copiarlos a un writer
+        self._lock = threading.Lock()
+
+    def _componer(self, pagina_contenido):
+        """Página nueva con la plantilla debajo del contenido de pagina_contenido"""
+        from PyPDF2 import PageObject
+        from PyPDF2.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject
+
+        pagina = PageObject(self._reader)
+        pagina.update(self._atributos)
+
+        recursos = DictionaryObject()
+        for clave, valor in pagina_contenido['/Resources'].items():
+            valor = valor.get_object()
+            recursos[NameObject(clave)] = (
+                DictionaryObject(valor) if isinstance(valor, DictionaryObject) else ArrayObject(valor)
+            )
+        xobjects = recursos.setdefault(NameObject('/XObject'), DictionaryObject())
+        xobjects[NameObject(self.NOMBRE_XOBJECT)] = self._formulario
+        pagina[NameObject('/Resources')] = recursos
+
+        contenido = DecodedStreamObject()
+        contenido.set_data(
+            f'q {self.NOMBRE_XOBJECT} Do Q\n'.encode() + pagina_contenido.get_contents().get_data()
+        )
+        pagina[NameObject('/Contents')] = contenido.flate_encode()
+        return pagina
+
+    def agregar_paginas(self, writer, contenido_pdf):
+        """
+        Agrega al writer una página por cada página de contenido_pdf, cada una
+        sobre la plantilla.
+
+        Args:
+            writer: PdfWriter de destino.
+            contenido_pdf: PDF (bytes) con el texto de los certificados.
+        """
+        from PyPDF2 import PdfReader
+
+        for pagina_contenido in PdfReader(io.BytesIO(contenido_pdf)).pages:
+            pagina = self._componer(pagina_contenido)
+            with self._lock:
+                writer.add_page(pagina)
+
+
+_plantilla_certificado = None
+_plantilla_certificado_lock = threading.Lock()
+
+
+def obtener_plantilla_certificado():
+    """Plantilla de certificación en memoria; se vuelve a leer si el archivo cambió"""
+    global _plantilla_certificado
+    ruta = _ruta_plantilla_certificado()
+    plantilla = _plantilla_certificado
+    if plantilla is None or plantilla.ruta != ruta or plantilla.modificado != os.path.getmtime(ruta):
+        with _plantilla_certificado_lock:
+            plantilla = _plantilla_certificado
+            if plantilla is None or plantilla.ruta != ruta or plantilla.modificado != os.path.getmtime(ruta):
+                plantilla = _plantilla_certificado = PlantillaCertificado(ruta)
+    return plantilla
+
+
+def _dibujar_certificado_historico(c, contrato_historico, fecha_actual):
+    """Dibuja en la página actual del canvas el texto del certificado de un contrato"""
     from reportlab.lib.pagesizes import letter
     from reportlab.lib.units import inch
     from reportlab.lib.utils import simpleSplit
-    from PyPDF2 import PdfReader, PdfWriter
-    import os
-    from django.conf import settings
-
-    # Ruta a la plantilla
-    BASE_DIR = settings.BASE_DIR.parent
-    plantilla_path = os.path.join(BASE_DIR, 'archivos word', 'plantilla_certificacion.pdf')
 
-    # Crear buffer para el contenido
-    contenido_buffer = io.BytesIO()
-    c = canvas.Canvas(contenido_buffer, pagesize=letter)
     width, height = letter
 
     # Márgenes y posiciones
@@ -33,16 +128,6 @@ def generar_certificado_historico_pdf(contrato_historico):
         text_w = c.stringWidth(text, font, size)
         c.drawString((width - text_w) / 2, y, text)
 
-    def draw_paragraph(text, y_start, line_height=14):
-        """Dibuja un párrafo con word wrap automático"""
-        c.setFont("Helvetica", 10)
-        lines = simpleSplit(text, "Helvetica", 10, text_width)
-        y = y_start
-        for line in lines:
-            c.drawString(margin_left, y, line)
-            y -= line_height
-        return y
-
     # ENCABEZADO - Título dinámico desde contratante_nit
     # El contratante_nit puede ser largo, así que lo mostramos en una línea
     draw_centered_text(contrato_historico.contratante_nit, y_position, "Helvetica-Bold", 11)
@@ -121,13 +206,8 @@ def generar_certificado_historico_pdf(contrato_historico):
     c.drawString(margin_left + 260, y_position, f"{fecha_fin_formateada}.")
 
     # Fecha de expedición del certificado
-    fecha_actual = datetime.now()
     dia = fecha_actual.day
-    mes_nombres = {
-        1: 'enero', 2: 'febrero', 3: 'marzo', 4: 'abril', 5: 'mayo', 6: 'junio',
-        7: 'julio', 8: 'agosto', 9: 'septiembre', 10: 'octubre', 11: 'noviembre', 12: 'diciembre'
-    }
-    mes = mes_nombres[fecha_actual.month]
+    mes = MESES_ES[fecha_actual.month]
     anio = fecha_actual.year
 
     y_position -= 25
@@ -155,471 +235,587 @@ def generar_certificado_historico_pdf(contrato_historico):
     y_firma -= 11
     draw_centered_text("Sebastián Arias Hernández – Líder Jurídico", y_firma, "Helvetica", 8)
 
-    # Finalizar canvas
-    c.save()
 
-    # Fusionar con la plantilla
-    contenido_buffer.seek(0)
-    plantilla_reader = PdfReader(plantilla_path)
-    contenido_reader = PdfReader(contenido_buffer)
-
-    writer = PdfWriter()
-    plantilla_page = plantilla_reader.pages[0]
-    contenido_page = contenido_reader.pages[0]
-    plantilla_page.merge_page(contenido_page)
-    writer.add_page(plantilla_page)
-
-    output_buffer = io.BytesIO()
-    writer.write(output_buffer)
-    output_buffer.seek(0)
-
-    return output_buffer
+def generar_certificados_historicos_pdf(contratos, fecha=None):
+    """
+    Genera en un solo PDF los certificados de varios contratos (una página
+    por contrato) sobre la plantilla oficial.
 
+    Args:
+        contratos: Iterable de ConsolidadoBaseDatos.
+        fecha: Fecha de expedición (default: ahora)
 
-def generar_anexo11_pdf(applicant):
-    """
-    Genera un PDF en formato ANEXO 11 con la información del candidato
+    Returns:
+        BytesIO: PDF listo para leer (vacío si no hay contratos).
     """
+    from reportlab.pdfgen import canvas
     from reportlab.lib.pagesizes import letter
-    from reportlab.lib import colors
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
-
-    # Función auxiliar para convertir números a texto en español
-    def numero_a_texto_es(n):
-        """Convierte números del 1 al 31 a texto en español"""
-        numeros = {
-            1: 'uno', 2: 'dos', 3: 'tres', 4: 'cuatro', 5: 'cinco',
-            6: 'seis', 7: 'siete', 8: 'ocho', 9: 'nueve', 10: 'diez',
-            11: 'once', 12: 'doce', 13: 'trece', 14: 'catorce', 15: 'quince',
-            16: 'dieciséis', 17: 'diecisiete', 18: 'dieciocho', 19: 'diecinueve', 20: 'veinte',
-            21: 'veintiuno', 22: 'veintidós', 23: 'veintitrés', 24: 'veinticuatro', 25: 'veinticinco',
-            26: 'veintiséis', 27: 'veintisiete', 28: 'veintiocho', 29: 'veintinueve', 30: 'treinta',
-            31: 'treinta y uno'
-        }
-        return numeros.get(n, str(n))
-
-    # Diccionario de meses en español
-    meses_es = {
-        1: 'enero', 2: 'febrero', 3: 'marzo', 4: 'abril', 5: 'mayo', 6: 'junio',
-        7: 'julio', 8: 'agosto', 9: 'septiembre', 10: 'octubre', 11: 'noviembre', 12: 'diciembre'
-    }
-
-    # Crear buffer en memoria para el PDF
-    pdf_buffer = io.BytesIO()
-
-    # Crear documento
-    doc = SimpleDocTemplate(
-        pdf_buffer,
-        pagesize=letter,
-        rightMargin=0.75*inch,
-        leftMargin=0.75*inch,
-        topMargin=0.5*inch,
-        bottomMargin=0.5*inch
-    )
+    from PyPDF2 import PdfWriter
 
-    # Estilos
-    styles = getSampleStyleSheet()
-
-    # Estilo para el título
-    titulo_style = ParagraphStyle(
-        'TituloAnexo',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#2C3E50'),
-        spaceAfter=6,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
+    fecha = fecha or datetime.now()
+    contenido_buffer = io.BytesIO()
+    c = canvas.Canvas(contenido_buffer, pagesize=letter)
+    paginas = 0
+    for contrato_historico in contratos:
+        _dibujar_certificado_historico(c, contrato_historico, fecha)
+        c.showPage()
+        paginas += 1
 
-    # Estilo para subtítulos
-    subtitulo_style = ParagraphStyle(
-        'Subtitulo',
-        parent=styles['Heading2'],
-        fontSize=12,
-        textColor=colors.HexColor('#2C3E50'),
-        spaceAfter=12,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
+    output_buffer = io.BytesIO()
+    if paginas:
+        c.save()
+        writer = PdfWriter()
+        obtener_plantilla_certificado().agregar_paginas(writer, contenido_buffer.getvalue())
+        writer.write(output_buffer)
+    output_buffer.seek(0)
+    return output_buffer
 
-    # Estilo para texto normal
-    normal_style = ParagraphStyle(
-        'NormalText',
-        parent=styles['Normal'],
-        fontSize=10,
-        alignment=TA_JUSTIFY,
-        spaceAfter=12
-    )
 
-    # Estilo para texto pequeño
-    small_style = ParagraphStyle(
-        'SmallText',
-        parent=styles['Normal'],
-        fontSize=9,
-        alignment=TA_LEFT
-    )
+def nombre_certificado_historico(contrato_historico):
+    """Nombre de archivo del certificado de un contrato dentro del ZIP"""
+    contrato = re.sub(r'[^\w.-]+', '_', contrato_historico.numero_contrato_otrosi or '').strip('_')
+    return f"{contrato_historico.cedula}/Certificado_{contrato or 'contrato'}_{contrato_historico.pk}.pdf"
 
-    # Estilo para texto en celdas de tabla (con word wrap)
-    cell_style = ParagraphStyle(
-        'CellText',
-        parent=styles['Normal'],
-        fontSize=8,
-        alignment=TA_LEFT,
-        leading=10,  # Espaciado entre líneas
-        wordWrap='CJK'  # Permite ajuste de texto
-    )
 
-    # Estilo para texto centrado en celdas de tabla
-    cell_center_style = ParagraphStyle(
-        'CellCenterText',
-        parent=styles['Normal'],
-        fontSize=8,
-        alignment=TA_CENTER,
-        leading=10,
-        wordWrap='CJK'
-    )
+def iterar_certificados_historicos(contratos, fecha=None):
+    """
+    Entradas (ruta, bytes) para iterar_zip con un certificado por contrato.
+    Cada PDF se genera justo antes de entregarlo.
 
-    # Contenido del documento
-    elementos = []
+    Args:
+        contratos: Iterable de ConsolidadoBaseDatos.
+        fecha: Fecha de expedición (default: ahora)
 
-    # Título principal
-    elementos.append(Paragraph("ANEXO 11", titulo_style))
-    elementos.append(Paragraph("CARTA DE COMPROMISO PERSONAL", subtitulo_style))
-    elementos.append(Spacer(1, 0.3*inch))
+    Yields:
+        tuple: (ruta_en_zip, pdf_bytes)
+    """
+    fecha = fecha or datetime.now()
+    for contrato_historico in contratos:
+        pdf = generar_certificados_historicos_pdf([contrato_historico], fecha)
+        yield nombre_certificado_historico(contrato_historico), pdf.getvalue()
 
-    # ==================== PÁGINA 1 ====================
 
-    # Fecha y destinatario
-    fecha_obj = datetime.now()
-    dia = fecha_obj.day
-    mes = fecha_obj.month
-    anio = fecha_obj.year
+def generar_certificado_historico_pdf(contrato_historico):
+    """
+    Genera un certificado PDF para un contrato histórico usando la plantilla oficial
+    """
+    return generar_certificados_historicos_pdf([contrato_historico])
+
+
+# Números del 1 al 31 en texto, para la fecha de firma del ANEXO 11
+NUMEROS_ES = {
+    1: 'uno', 2: 'dos', 3: 'tres', 4: 'cuatro', 5: 'cinco',
+    6: 'seis', 7: 'siete', 8: 'ocho', 9: 'nueve', 10: 'diez',
+    11: 'once', 12: 'doce', 13: 'trece', 14: 'catorce', 15: 'quince',
+    16: 'dieciséis', 17: 'diecisiete', 18: 'dieciocho', 19: 'diecinueve', 20: 'veinte',
+    21: 'veintiuno', 22: 'veintidós', 23: 'veintitrés', 24: 'veinticuatro', 25: 'veinticinco',
+    26: 'veintiséis', 27: 'veintisiete', 28: 'veintiocho', 29: 'veintinueve', 30: 'treinta',
+    31: 'treinta y uno'
+}
+
+MESES_ES = {
+    1: 'enero', 2: 'febrero', 3: 'marzo', 4: 'abril', 5: 'mayo', 6: 'junio',
+    7: 'julio', 8: 'agosto', 9: 'septiembre', 10: 'octubre', 11: 'noviembre', 12: 'diciembre'
+}
+
+ORGANIZACION_ANEXO11 = "UNIÓN TEMPORAL COMISIÓN ARQUIDIOCESANA VIDA JUSTICIA Y PAZ 25-2"
+PROCESO_ANEXO11_DEFECTO = "4146.010.32.1.2366.2025"
+REPRESENTANTE_LEGAL_ANEXO11 = 'Diego Fernando Guzmán Ruiz'
+
+OBJETO_PROCESO_ANEXO11 = """AUNAR ESFUERZOS TÉCNICOS, HUMANOS, ADMINISTRATIVOS Y FINANCIEROS PARA EL MEJORAMIENTO DE LAS
+    CONDICIONES DE SEGURIDAD ALIMENTARIA DE LA POBLACIÓN VULNERABLE, GARANTIZANDO SU ACCESO A LOS
+    ALIMENTOS Y BRINDANDO INTERVENCIÓN PSICOSOCIAL, EN EL DISTRITO DE SANTIAGO DE CALI, DE CONFORMIDAD
+    CON EL PROYECTO DE INVERSIÓN "FORTALECIMIENTO DEL PROGRAMA DE SEGURIDAD ALIMENTARIA Y NUTRICIONAL
+    EN SANTIAGO DE CALI" - BP-26005417 de acuerdo con lo establecido en la invitación, el estudio
+    previo y documento denominado ANEXO TÉCNICO."""
 
-    # Nombre del día en texto y mes en español
-    dia_texto = numero_a_texto_es(dia)
-    mes_nombre = meses_es.get(mes, 'error')
 
-    # Fecha en formato "04 de noviembre de 2025"
-    fecha_actual = f"{dia:02d} de {mes_nombre} de {anio}"
+def numero_a_texto_es(n):
+    """Convierte números del 1 al 31 a texto en español"""
+    return NUMEROS_ES.get(n, str(n))
 
-    elementos.append(Paragraph(f"Cali, {fecha_actual}", normal_style))
-    elementos.append(Spacer(1, 0.2*inch))
 
-    elementos.append(Paragraph("Señores:", normal_style))
-    elementos.append(Paragraph("<b>SECRETARÍA DE BIENESTAR SOCIAL</b>", normal_style))
-    elementos.append(Paragraph("<b>DISTRITO ESPECIAL DE SANTIAGO DE CALI</b>", normal_style))
-    elementos.append(Paragraph("Ciudad", normal_style))
-    elementos.append(Spacer(1, 0.2*inch))
+class RenderizadorAnexo11:
+    """
+    Genera el PDF ANEXO 11 (carta de compromiso) de los candidatos.
 
-    # Referencia - usar el campo contrato
-    numero_proceso = applicant.contrato or "4146.010.32.1.2366.2025"
-    elementos.append(Paragraph(f"<b>REFERENCIA:</b> Proceso No. {numero_proceso}", normal_style))
-    elementos.append(Spacer(1, 0.2*inch))
+    Los estilos de párrafo y de tabla y los párrafos fijos de la carta se
+    construyen una sola vez; en cada PDF solo se arman las partes que
+    dependen del candidato y de la fecha. Usar obtener_renderizador_anexo11()
+    para compartir la instancia del proceso.
+    """
 
-    # Cuerpo de la carta - usar el campo perfil
-    organizacion = "UNIÓN TEMPORAL COMISIÓN ARQUIDIOCESANA VIDA JUSTICIA Y PAZ 25-2"
-    cargo_propuesto = applicant.perfil or "el cargo correspondiente"
+    def __init__(self):
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib import colors
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
+
+        self._SimpleDocTemplate = SimpleDocTemplate
+        self._Table = Table
+        self._TableStyle = TableStyle
+        self._Paragraph = Paragraph
+        self._Spacer = Spacer
+        self._pagesize = letter
+        self._inch = inch
+        self._colors = colors
+
+        styles = getSampleStyleSheet()
+
+        # Estilo para el título
+        self.titulo_style = ParagraphStyle(
+            'TituloAnexo',
+            parent=styles['Heading1'],
+            fontSize=16,
+            textColor=colors.HexColor('#2C3E50'),
+            spaceAfter=6,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        )
+
+        # Estilo para subtítulos
+        self.subtitulo_style = ParagraphStyle(
+            'Subtitulo',
+            parent=styles['Heading2'],
+            fontSize=12,
+            textColor=colors.HexColor('#2C3E50'),
+            spaceAfter=12,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        )
+
+        # Estilo para texto normal
+        self.normal_style = ParagraphStyle(
+            'NormalText',
+            parent=styles['Normal'],
+            fontSize=10,
+            alignment=TA_JUSTIFY,
+            spaceAfter=12
+        )
+
+        # Estilo para texto pequeño
+        self.small_style = ParagraphStyle(
+            'SmallText',
+            parent=styles['Normal'],
+            fontSize=9,
+            alignment=TA_LEFT
+        )
+
+        # Estilo para texto en celdas de tabla (con word wrap)
+        self.cell_style = ParagraphStyle(
+            'CellText',
+            parent=styles['Normal'],
+            fontSize=8,
+            alignment=TA_LEFT,
+            leading=10,  # Espaciado entre líneas
+            wordWrap='CJK'  # Permite ajuste de texto
+        )
+
+        # Estilo para texto centrado en celdas de tabla
+        self.cell_center_style = ParagraphStyle(
+            'CellCenterText',
+            parent=styles['Normal'],
+            fontSize=8,
+            alignment=TA_CENTER,
+            leading=10,
+            wordWrap='CJK'
+        )
+
+        # Párrafos fijos de la carta (se copian en cada PDF porque reportlab
+        # guarda el resultado del ajuste de líneas en el propio párrafo)
+        self._encabezado = [
+            Paragraph("ANEXO 11", self.titulo_style),
+            Paragraph("CARTA DE COMPROMISO PERSONAL", self.subtitulo_style),
+            Spacer(1, 0.3*inch),
+        ]
+        self._destinatario = [
+            Spacer(1, 0.2*inch),
+            Paragraph("Señores:", self.normal_style),
+            Paragraph("<b>SECRETARÍA DE BIENESTAR SOCIAL</b>", self.normal_style),
+            Paragraph("<b>DISTRITO ESPECIAL DE SANTIAGO DE CALI</b>", self.normal_style),
+            Paragraph("Ciudad", self.normal_style),
+            Spacer(1, 0.2*inch),
+        ]
+        self._cierre_compromiso = [
+            Spacer(1, 0.15*inch),
+            Paragraph(
+                "Por lo que me comprometo a formar parte del equipo de trabajo durante el plazo que dure el convenio de asociación.",
+                self.normal_style
+            ),
+            Spacer(1, 0.2*inch),
+        ]
+        self._salto_pagina = PageBreak()
+
+        self._estilo_tabla_firmas = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 1), (-1, 2), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('TOPPADDING', (0, 0), (-1, 0), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 15),
+        ])
+
+        self._estilo_tabla_experiencia = TableStyle([
+            # Título - Primera fila con fondo gris
+            ('SPAN', (0, 0), (1, 0)),  # Combinar columnas para el título
+            ('BACKGROUND', (0, 0), (1, 0), colors.HexColor('#D3D3D3')),  # Gris
+            ('TEXTCOLOR', (0, 0), (1, 0), colors.black),
+            ('ALIGN', (0, 0), (1, 0), 'CENTER'),
+            ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (1, 0), 10),
+            ('TOPPADDING', (0, 0), (1, 0), 8),
+            ('BOTTOMPADDING', (0, 0), (1, 0), 8),
+
+            # Resto de las filas
+            ('BACKGROUND', (0, 1), (0, -1), colors.HexColor('#E8E8E8')),
+            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+            ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+            ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 1), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # Cambiar a TOP para textos largos
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 1), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+        ])
+
+        # La tabla de estudios tiene 6 o 7 filas según si hay tarjeta profesional
+        self._estilos_tabla_estudios = {
+            num_filas: self._crear_estilo_tabla_estudios(num_filas, con_tarjeta)
+            for num_filas, con_tarjeta in ((6, False), (7, True))
+        }
 
-    texto_compromiso = f"""
+    def _crear_estilo_tabla_estudios(self, num_filas, con_tarjeta):
+        colors = self._colors
+        estilos_base = [
+            # Título - Primera fila con fondo gris y span
+            ('SPAN', (0, 0), (3, 0)),
+            ('BACKGROUND', (0, 0), (3, 0), colors.HexColor('#D3D3D3')),
+            ('TEXTCOLOR', (0, 0), (3, 0), colors.black),
+            ('ALIGN', (0, 0), (3, 0), 'CENTER'),
+            ('FONTNAME', (0, 0), (3, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (3, 0), 10),
+
+            # Encabezados de columnas - Segunda fila
+            ('BACKGROUND', (0, 1), (3, 1), colors.HexColor('#366092')),
+            ('TEXTCOLOR', (0, 1), (3, 1), colors.whitesmoke),
+            ('ALIGN', (0, 1), (3, 1), 'CENTER'),
+            ('FONTNAME', (0, 1), (3, 1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 1), (3, 1), 9),
+
+            # Primera columna (DESCRIPCIÓN) - Negrita para todas las filas de datos
+            ('BACKGROUND', (0, 2), (0, num_filas - 1), colors.HexColor('#E8E8E8')),
+            ('FONTNAME', (0, 2), (0, num_filas - 1), 'Helvetica-Bold'),
+            ('ALIGN', (0, 2), (0, num_filas - 1), 'LEFT'),
+            ('FONTSIZE', (0, 2), (0, num_filas - 1), 8),
+
+            # Resto de datos
+            ('FONTNAME', (1, 2), (3, num_filas - 1), 'Helvetica'),
+            ('FONTSIZE', (1, 2), (3, num_filas - 1), 8),
+            ('ALIGN', (1, 2), (3, num_filas - 1), 'CENTER'),
+
+            # Bordes y espaciado
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # TOP para textos largos
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('LEFTPADDING', (0, 0), (-1, -1), 6),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+        ]
+
+        # Tarjeta profesional (si existe, es la penúltima fila); span solo en la primera columna
+        if con_tarjeta:
+            fila_tarjeta = num_filas - 2
+            estilos_base.append(('SPAN', (1, fila_tarjeta), (3, fila_tarjeta)))
+
+        # Experiencia (última fila)
+        fila_experiencia = num_filas - 1
+        estilos_base.append(('SPAN', (1, fila_experiencia), (3, fila_experiencia)))
+        return self._TableStyle(estilos_base)
+
+    @staticmethod
+    def _copias(flowables):
+        return [copy.copy(flowable) for flowable in flowables]
+
+    def _elementos(self, applicant, fecha_obj):
+        """Flowables del documento para un candidato"""
+        Paragraph, Spacer, Table, inch = self._Paragraph, self._Spacer, self._Table, self._inch
+        normal_style = self.normal_style
+        cell_style = self.cell_style
+        cell_center_style = self.cell_center_style
+
+        # Título principal
+        elementos = self._copias(self._encabezado)
+
+        # ==================== PÁGINA 1 ====================
+
+        # Fecha y destinatario
+        dia = fecha_obj.day
+        mes = fecha_obj.month
+        anio = fecha_obj.year
+
+        # Nombre del día en texto y mes en español
+        dia_texto = numero_a_texto_es(dia)
+        mes_nombre = MESES_ES.get(mes, 'error')
+
+        # Fecha en formato "04 de noviembre de 2025"
+        fecha_actual = f"{dia:02d} de {mes_nombre} de {anio}"
+
+        elementos.append(Paragraph(f"Cali, {fecha_actual}", normal_style))
+        elementos.extend(self._copias(self._destinatario))
+
+        # Referencia - usar el campo contrato
+        numero_proceso = applicant.contrato or PROCESO_ANEXO11_DEFECTO
+        elementos.append(Paragraph(f"<b>REFERENCIA:</b> Proceso No. {numero_proceso}", normal_style))
+        elementos.append(Spacer(1, 0.2*inch))
+
+        # Cuerpo de la carta - usar el campo perfil
+        cargo_propuesto = applicant.perfil or "el cargo correspondiente"
+
+        texto_compromiso = f"""
     Yo, <b>{applicant.nombre_completo}</b>, identificado con c.c. <b>{applicant.cedula}</b>,
-    acepto ser presentado por la empresa <b>{organizacion}</b>
+    acepto ser presentado por la empresa <b>{ORGANIZACION_ANEXO11}</b>
     como <b>{cargo_propuesto}</b> en su propuesta dentro de los equipo de profesionales, y participar dentro
     de la ejecución del proceso de selección No. <b>{numero_proceso}</b>, que tiene como objeto:
-    AUNAR ESFUERZOS TÉCNICOS, HUMANOS, ADMINISTRATIVOS Y FINANCIEROS PARA EL MEJORAMIENTO DE LAS
-    CONDICIONES DE SEGURIDAD ALIMENTARIA DE LA POBLACIÓN VULNERABLE, GARANTIZANDO SU ACCESO A LOS
-    ALIMENTOS Y BRINDANDO INTERVENCIÓN PSICOSOCIAL, EN EL DISTRITO DE SANTIAGO DE CALI, DE CONFORMIDAD
-    CON EL PROYECTO DE INVERSIÓN "FORTALECIMIENTO DEL PROGRAMA DE SEGURIDAD ALIMENTARIA Y NUTRICIONAL
-    EN SANTIAGO DE CALI" - BP-26005417 de acuerdo con lo establecido en la invitación, el estudio
-    previo y documento denominado ANEXO TÉCNICO.
+    {OBJETO_PROCESO_ANEXO11}
     """
 
-    elementos.append(Paragraph(texto_compromiso, normal_style))
-    elementos.append(Spacer(1, 0.15*inch))
-
-    elementos.append(Paragraph(
-        "Por lo que me comprometo a formar parte del equipo de trabajo durante el plazo que dure el convenio de asociación.",
-        normal_style
-    ))
-    elementos.append(Spacer(1, 0.2*inch))
-
-    # Texto de firma con fecha dinámica en español
-    texto_firma = f"Para constancia se firma a los {dia_texto} ({dia}) días del mes de {mes_nombre} del {anio}."
-    elementos.append(Paragraph(texto_firma, normal_style))
-    elementos.append(Spacer(1, 0.5*inch))
-
-    # Tabla de firmas
-    firmas_data = [
-        ['_________________________', '_________________________'],
-        [f'{applicant.nombre_completo}', 'Diego Fernando Guzmán Ruiz'],
-        ['Firma del Profesional', 'Firma del Representante Legal']
-    ]
-
-    tabla_firmas = Table(firmas_data, colWidths=[3.5*inch, 3.5*inch])
-    tabla_firmas.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 1), (-1, 2), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('TOPPADDING', (0, 0), (-1, 0), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 15),
-    ]))
-
-    elementos.append(tabla_firmas)
-
-    # ==================== SALTO DE PÁGINA ====================
-    elementos.append(PageBreak())
-
-    # ==================== PÁGINA 2 ====================
-
-    # 1. Tabla: RELACIÓN DE EXPERIENCIA PROFESIONALES PARA EL PERSONAL BASE
-    # Construir dirección completa
-    direccion_completa = f"{applicant.tipo_via} {applicant.numero_via} #{applicant.numero_casa}"
-    if applicant.complemento_direccion:
-        direccion_completa += f" {applicant.complemento_direccion}"
-    if applicant.barrio:
-        direccion_completa += f", Barrio {applicant.barrio}"
-
-    # Datos de la tabla con título en la primera fila con fondo gris
-    # Usar Paragraph para textos largos que puedan desbordarse
-    tabla_experiencia_data = [
-        ['RELACIÓN DE EXPERIENCIA PROFESIONALES PARA EL PERSONAL BASE', ''],  # Título con span
-        ['CARGO PROPUESTO:', Paragraph(str(cargo_propuesto or ''), cell_style)],
-        ['NOMBRES Y APELLIDOS:', Paragraph(str(applicant.nombre_completo or ''), cell_style)],
-        ['TIPO Y Nº DOCUMENTO DE IDENTIDAD:', Paragraph(f'CC {applicant.cedula}', cell_style)],
-        ['DIRECCIÓN:', Paragraph(str(direccion_completa or ''), cell_style)],
-        ['TELÉFONO:', Paragraph(str(applicant.telefono or ''), cell_style)],
-        ['CORREO ELECTRÓNICO:', Paragraph(str(applicant.correo or ''), cell_style)],
-    ]
-
-    tabla_experiencia = Table(tabla_experiencia_data, colWidths=[2.5*inch, 4.5*inch])
-    tabla_experiencia.setStyle(TableStyle([
-        # Título - Primera fila con fondo gris
-        ('SPAN', (0, 0), (1, 0)),  # Combinar columnas para el título
-        ('BACKGROUND', (0, 0), (1, 0), colors.HexColor('#D3D3D3')),  # Gris
-        ('TEXTCOLOR', (0, 0), (1, 0), colors.black),
-        ('ALIGN', (0, 0), (1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (1, 0), 10),
-        ('TOPPADDING', (0, 0), (1, 0), 8),
-        ('BOTTOMPADDING', (0, 0), (1, 0), 8),
-
-        # Resto de las filas
-        ('BACKGROUND', (0, 1), (0, -1), colors.HexColor('#E8E8E8')),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-        ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 1), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # Cambiar a TOP para textos largos
-        ('LEFTPADDING', (0, 0), (-1, -1), 8),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 1), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-    ]))
-
-    elementos.append(tabla_experiencia)
-    elementos.append(Spacer(1, 0.3*inch))
-
-    # 2. Tabla: ESTUDIOS REALIZADOS - Formato de 4 columnas
-    # Obtener todos los estudios
-    formaciones_academicas = list(applicant.formacion_academica.all())
-    posgrados = list(applicant.posgrados.all())
-    especializaciones = list(applicant.especializaciones.all())
-    educacion_basica = list(applicant.educacion_basica.all())
-    educacion_superior = list(applicant.educacion_superior.all())
-
-    # Calcular experiencia en años
-    try:
-        calculo_exp = applicant.calculo_experiencia
-        experiencia_anos = f"{calculo_exp.total_experiencia_anos} años"
-    except:
-        experiencia_anos = "No calculada"
-
-    # Construir contenido consolidado para cada columna
-    # UNIVERSITARIOS - Agrupar todos los estudios universitarios
-    contenido_titulos_univ = ''
-    contenido_instituciones_univ = ''
-    contenido_fechas_univ = ''
-    tarjeta_texto = ''
-    
-    for formacion in formaciones_academicas:
-        titulo = formacion.profesion or ''
-        institucion = formacion.universidad or ''
-        fecha = formacion.fecha_grado.strftime('%d/%m/%Y') if formacion.fecha_grado else ''
-        
-        if titulo:
-            contenido_titulos_univ += f'{titulo}<br/>'
-        if institucion:
-            contenido_instituciones_univ += f'{institucion}<br/>'
-        if fecha:
-            contenido_fechas_univ += f'{fecha}<br/>'
-        
-        # Tarjeta profesional (solo la primera o consolidar todas)
+        elementos.append(Paragraph(texto_compromiso, normal_style))
+        elementos.extend(self._copias(self._cierre_compromiso))
+
+        # Texto de firma con fecha dinámica en español
+        texto_firma = f"Para constancia se firma a los {dia_texto} ({dia}) días del mes de {mes_nombre} del {anio}."
+        elementos.append(Paragraph(texto_firma, normal_style))
+        elementos.append(Spacer(1, 0.5*inch))
+
+        # Tabla de firmas
+        firmas_data = [
+            ['_________________________', '_________________________'],
+            [f'{applicant.nombre_completo}', REPRESENTANTE_LEGAL_ANEXO11],
+            ['Firma del Profesional', 'Firma del Representante Legal']
+        ]
+
+        tabla_firmas = Table(firmas_data, colWidths=[3.5*inch, 3.5*inch])
+        tabla_firmas.setStyle(self._estilo_tabla_firmas)
+
+        elementos.append(tabla_firmas)
+
+        # ==================== SALTO DE PÁGINA ====================
+        elementos.append(self._salto_pagina)
+
+        # ==================== PÁGINA 2 ====================
+
+        # 1. Tabla: RELACIÓN DE EXPERIENCIA PROFESIONALES PARA EL PERSONAL BASE
+        # Construir dirección completa
+        direccion_completa = f"{applicant.tipo_via} {applicant.numero_via} #{applicant.numero_casa}"
+        if applicant.complemento_direccion:
+            direccion_completa += f" {applicant.complemento_direccion}"
+        if applicant.barrio:
+            direccion_completa += f", Barrio {applicant.barrio}"
+
+        # Datos de la tabla con título en la primera fila con fondo gris
+        # Usar Paragraph para textos largos que puedan desbordarse
+        tabla_experiencia_data = [
+            ['RELACIÓN DE EXPERIENCIA PROFESIONALES PARA EL PERSONAL BASE', ''],  # Título con span
+            ['CARGO PROPUESTO:', Paragraph(str(cargo_propuesto or ''), cell_style)],
+            ['NOMBRES Y APELLIDOS:', Paragraph(str(applicant.nombre_completo or ''), cell_style)],
+            ['TIPO Y Nº DOCUMENTO DE IDENTIDAD:', Paragraph(f'CC {applicant.cedula}', cell_style)],
+            ['DIRECCIÓN:', Paragraph(str(direccion_completa or ''), cell_style)],
+            ['TELÉFONO:', Paragraph(str(applicant.telefono or ''), cell_style)],
+            ['CORREO ELECTRÓNICO:', Paragraph(str(applicant.correo or ''), cell_style)],
+        ]
+
+        tabla_experiencia = Table(tabla_experiencia_data, colWidths=[2.5*inch, 4.5*inch])
+        tabla_experiencia.setStyle(self._estilo_tabla_experiencia)
+
+        elementos.append(tabla_experiencia)
+        elementos.append(Spacer(1, 0.3*inch))
+
+        # 2. Tabla: ESTUDIOS REALIZADOS - Formato de 4 columnas
+        # Obtener todos los estudios
+        formaciones_academicas = list(applicant.formacion_academica.all())
+        posgrados = list(applicant.posgrados.all())
+        especializaciones = list(applicant.especializaciones.all())
+        educacion_basica = list(applicant.educacion_basica.all())
+        educacion_superior = list(applicant.educacion_superior.all())
+
+        # Calcular experiencia en años
+        try:
+            calculo_exp = applicant.calculo_experiencia
+            experiencia_anos = f"{calculo_exp.total_experiencia_anos} años"
+        except Exception:
+            experiencia_anos = "No calculada"
+
+        # Construir contenido consolidado para cada columna
+        # UNIVERSITARIOS - Agrupar todos los estudios universitarios
+        contenido_titulos_univ = ''
+        contenido_instituciones_univ = ''
+        contenido_fechas_univ = ''
+        tarjeta_texto = ''
+
+        for formacion in formaciones_academicas:
+            titulo = formacion.profesion or ''
+            institucion = formacion.universidad or ''
+            fecha = formacion.fecha_grado.strftime('%d/%m/%Y') if formacion.fecha_grado else ''
+
+            if titulo:
+                contenido_titulos_univ += f'{titulo}<br/>'
+            if institucion:
+                contenido_instituciones_univ += f'{institucion}<br/>'
+            if fecha:
+                contenido_fechas_univ += f'{fecha}<br/>'
+
+            # Tarjeta profesional (solo la primera o consolidar todas)
+            if not tarjeta_texto:
+                if formacion.tarjeta_profesional == 'Tarjeta Profesional':
+                    tarjeta_texto = f"Tarjeta Profesional: {formacion.numero_tarjeta_resolucion or 'N/A'}"
+                elif formacion.tarjeta_profesional == 'Resolución':
+                    tarjeta_texto = f"Resolución: {formacion.numero_tarjeta_resolucion or 'N/A'}"
+
+        # ESPECIALIZACIÓN - Agrupar todas las especializaciones
+        contenido_titulos_esp = ''
+        contenido_instituciones_esp = ''
+        contenido_fechas_esp = ''
+
+        for especializacion in especializaciones:
+            titulo = especializacion.nombre_especializacion or ''
+            institucion = especializacion.universidad or ''
+            fecha = especializacion.fecha_terminacion.strftime('%d/%m/%Y') if especializacion.fecha_terminacion else ''
+
+            if titulo:
+                contenido_titulos_esp += f'{titulo}<br/>'
+            if institucion:
+                contenido_instituciones_esp += f'{institucion}<br/>'
+            if fecha:
+                contenido_fechas_esp += f'{fecha}<br/>'
+
+        # OTROS (POSGRADOS, BACHILLER, TÉCNICO/TECNÓLOGO) - Agrupar todos en OTROS
+        contenido_titulos_otros = ''
+        contenido_instituciones_otros = ''
+        contenido_fechas_otros = ''
+
+        # 1. Posgrados
+        for posgrado in posgrados:
+            titulo = posgrado.nombre_posgrado or ''
+            institucion = posgrado.universidad or ''
+            fecha = posgrado.fecha_terminacion.strftime('%d/%m/%Y') if posgrado.fecha_terminacion else ''
+
+            if titulo:
+                contenido_titulos_otros += f'<b>(Posgrado)</b> {titulo}<br/>'
+            if institucion:
+                contenido_instituciones_otros += f'{institucion}<br/>'
+            if fecha:
+                contenido_fechas_otros += f'{fecha}<br/>'
+
+        # 2. Educación Superior (Técnico/Tecnólogo)
+        for superior in educacion_superior:
+            titulo = superior.titulo or ''
+            institucion = superior.institucion or ''
+            fecha = superior.fecha_grado.strftime('%d/%m/%Y') if superior.fecha_grado else ''
+            nivel = superior.nivel or 'Técnico/Tecnólogo'
+
+            if titulo:
+                contenido_titulos_otros += f'<b>({nivel})</b> {titulo}<br/>'
+            if institucion:
+                contenido_instituciones_otros += f'{institucion}<br/>'
+            if fecha:
+                contenido_fechas_otros += f'{fecha}<br/>'
+
+        # 3. Educación Básica (Bachiller)
+        for basica in educacion_basica:
+            titulo = basica.titulo or ''
+            institucion = basica.institucion or ''
+            anio_grado = str(basica.anio_grado) if basica.anio_grado else ''
+
+            if titulo:
+                contenido_titulos_otros += f'<b>(Bachiller)</b> {titulo}<br/>'
+            if institucion:
+                contenido_instituciones_otros += f'{institucion}<br/>'
+            if anio_grado:
+                contenido_fechas_otros += f'{anio_grado}<br/>'
+
+        # Si no hay tarjeta profesional, poner "No Aplica"
         if not tarjeta_texto:
-            if formacion.tarjeta_profesional == 'Tarjeta Profesional':
-                tarjeta_texto = f"Tarjeta Profesional: {formacion.numero_tarjeta_resolucion or 'N/A'}"
-            elif formacion.tarjeta_profesional == 'Resolución':
-                tarjeta_texto = f"Resolución: {formacion.numero_tarjeta_resolucion or 'N/A'}"
-    
-    # ESPECIALIZACIÓN - Agrupar todas las especializaciones
-    contenido_titulos_esp = ''
-    contenido_instituciones_esp = ''
-    contenido_fechas_esp = ''
-    
-    for especializacion in especializaciones:
-        titulo = especializacion.nombre_especializacion or ''
-        institucion = especializacion.universidad or ''
-        fecha = especializacion.fecha_terminacion.strftime('%d/%m/%Y') if especializacion.fecha_terminacion else ''
-        
-        if titulo:
-            contenido_titulos_esp += f'{titulo}<br/>'
-        if institucion:
-            contenido_instituciones_esp += f'{institucion}<br/>'
-        if fecha:
-            contenido_fechas_esp += f'{fecha}<br/>'
-    
-    # OTROS (POSGRADOS, BACHILLER, TÉCNICO/TECNÓLOGO) - Agrupar todos en OTROS
-    contenido_titulos_otros = ''
-    contenido_instituciones_otros = ''
-    contenido_fechas_otros = ''
-    
-    # 1. Posgrados
-    for posgrado in posgrados:
-        titulo = posgrado.nombre_posgrado or ''
-        institucion = posgrado.universidad or ''
-        fecha = posgrado.fecha_terminacion.strftime('%d/%m/%Y') if posgrado.fecha_terminacion else ''
-        
-        if titulo:
-            contenido_titulos_otros += f'<b>(Posgrado)</b> {titulo}<br/>'
-        if institucion:
-            contenido_instituciones_otros += f'{institucion}<br/>'
-        if fecha:
-            contenido_fechas_otros += f'{fecha}<br/>'
-
-    # 2. Educación Superior (Técnico/Tecnólogo)
-    for superior in educacion_superior:
-        titulo = superior.titulo or ''
-        institucion = superior.institucion or ''
-        fecha = superior.fecha_grado.strftime('%d/%m/%Y') if superior.fecha_grado else ''
-        nivel = superior.nivel or 'Técnico/Tecnólogo'
-        
-        if titulo:
-            contenido_titulos_otros += f'<b>({nivel})</b> {titulo}<br/>'
-        if institucion:
-            contenido_instituciones_otros += f'{institucion}<br/>'
-        if fecha:
-            contenido_fechas_otros += f'{fecha}<br/>'
-
-    # 3. Educación Básica (Bachiller)
-    for basica in educacion_basica:
-        titulo = basica.titulo or ''
-        institucion = basica.institucion or ''
-        anio = str(basica.anio_grado) if basica.anio_grado else ''
-        
-        if titulo:
-            contenido_titulos_otros += f'<b>(Bachiller)</b> {titulo}<br/>'
-        if institucion:
-            contenido_instituciones_otros += f'{institucion}<br/>'
-        if anio:
-            contenido_fechas_otros += f'{anio}<br/>'
-    
-    # Si no hay tarjeta profesional, poner "No Aplica"
-    if not tarjeta_texto:
-        tarjeta_texto = "No Aplica"
-
-    # Construir la tabla con datos consolidados
-    estudios_nueva_data = [
-        # Fila de título con fondo gris
-        ['ESTUDIOS REALIZADOS', '', '', ''],
-        # Fila de encabezados de columnas
-        ['DESCRIPCIÓN', 'UNIVERSITARIOS', 'ESPECIALIZACIÓN', 'OTROS'],
-        # Fila de TÍTULO OBTENIDO con todos los títulos consolidados
-        ['TÍTULO OBTENIDO',
-         Paragraph(contenido_titulos_univ, cell_center_style) if contenido_titulos_univ else '',
-         Paragraph(contenido_titulos_esp, cell_center_style) if contenido_titulos_esp else '',
-         Paragraph(contenido_titulos_otros, cell_center_style) if contenido_titulos_otros else ''],
-        # Fila de INSTITUCIÓN con todas las instituciones consolidadas
-        ['INSTITUCIÓN',
-         Paragraph(contenido_instituciones_univ, cell_center_style) if contenido_instituciones_univ else '',
-         Paragraph(contenido_instituciones_esp, cell_center_style) if contenido_instituciones_esp else '',
-         Paragraph(contenido_instituciones_otros, cell_center_style) if contenido_instituciones_otros else ''],
-        # Fila de FECHA DE GRADO con todas las fechas consolidadas
-        ['FECHA DE GRADO',
-         Paragraph(contenido_fechas_univ, cell_center_style) if contenido_fechas_univ else '',
-         Paragraph(contenido_fechas_esp, cell_center_style) if contenido_fechas_esp else '',
-         Paragraph(contenido_fechas_otros, cell_center_style) if contenido_fechas_otros else ''],
-    ]
-
-    # Agregar fila de tarjeta profesional (solo para universitarios)
-    if formaciones_academicas:
-        estudios_nueva_data.append(['TARJETA PROFESIONAL', Paragraph(str(tarjeta_texto or ''), cell_center_style), '', ''])
-    
-    # Agregar fila de experiencia
-    estudios_nueva_data.append(['2. EXPERIENCIA:', Paragraph(str(experiencia_anos or ''), cell_center_style), '', ''])
-
-    tabla_estudios_nueva = Table(estudios_nueva_data, colWidths=[1.75*inch, 1.75*inch, 1.75*inch, 1.75*inch])
-    
-    # Calcular número de filas para los estilos
-    num_filas = len(estudios_nueva_data)
-    
-    # Construir lista de estilos base
-    estilos_base = [
-        # Título - Primera fila con fondo gris y span
-        ('SPAN', (0, 0), (3, 0)),
-        ('BACKGROUND', (0, 0), (3, 0), colors.HexColor('#D3D3D3')),
-        ('TEXTCOLOR', (0, 0), (3, 0), colors.black),
-        ('ALIGN', (0, 0), (3, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (3, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (3, 0), 10),
-
-        # Encabezados de columnas - Segunda fila
-        ('BACKGROUND', (0, 1), (3, 1), colors.HexColor('#366092')),
-        ('TEXTCOLOR', (0, 1), (3, 1), colors.whitesmoke),
-        ('ALIGN', (0, 1), (3, 1), 'CENTER'),
-        ('FONTNAME', (0, 1), (3, 1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 1), (3, 1), 9),
-
-        # Primera columna (DESCRIPCIÓN) - Negrita para todas las filas de datos
-        ('BACKGROUND', (0, 2), (0, num_filas - 1), colors.HexColor('#E8E8E8')),
-        ('FONTNAME', (0, 2), (0, num_filas - 1), 'Helvetica-Bold'),
-        ('ALIGN', (0, 2), (0, num_filas - 1), 'LEFT'),
-        ('FONTSIZE', (0, 2), (0, num_filas - 1), 8),
-
-        # Resto de datos
-        ('FONTNAME', (1, 2), (3, num_filas - 1), 'Helvetica'),
-        ('FONTSIZE', (1, 2), (3, num_filas - 1), 8),
-        ('ALIGN', (1, 2), (3, num_filas - 1), 'CENTER'),
-
-        # Bordes y espaciado
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # TOP para textos largos
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-    ]
-    
-    # Agregar estilos para tarjeta profesional y experiencia (span solo en la primera columna)
-    # Tarjeta profesional (si existe, es la penúltima fila)
-    if formaciones_academicas:
-        fila_tarjeta = num_filas - 2  # Penúltima fila
-        estilos_base.append(('SPAN', (1, fila_tarjeta), (3, fila_tarjeta)))
-    
-    # Experiencia (última fila)
-    fila_experiencia = num_filas - 1
-    estilos_base.append(('SPAN', (1, fila_experiencia), (3, fila_experiencia)))
-    
-    tabla_estudios_nueva.setStyle(TableStyle(estilos_base))
-
-    elementos.append(tabla_estudios_nueva)
-
-    # Construir PDF
-    doc.build(elementos)
-
-    # Retornar buffer
-    pdf_buffer.seek(0)
-    return pdf_buffer
+            tarjeta_texto = "No Aplica"
+
+        def celda(contenido):
+            return Paragraph(contenido, cell_center_style) if contenido else ''
+
+        # Construir la tabla con datos consolidados
+        estudios_nueva_data = [
+            # Fila de título con fondo gris
+            ['ESTUDIOS REALIZADOS', '', '', ''],
+            # Fila de encabezados de columnas
+            ['DESCRIPCIÓN', 'UNIVERSITARIOS', 'ESPECIALIZACIÓN', 'OTROS'],
+            # Fila de TÍTULO OBTENIDO con todos los títulos consolidados
+            ['TÍTULO OBTENIDO', celda(contenido_titulos_univ), celda(contenido_titulos_esp),
+             celda(contenido_titulos_otros)],
+            # Fila de INSTITUCIÓN con todas las instituciones consolidadas
+            ['INSTITUCIÓN', celda(contenido_instituciones_univ), celda(contenido_instituciones_esp),
+             celda(contenido_instituciones_otros)],
+            # Fila de FECHA DE GRADO con todas las fechas consolidadas
+            ['FECHA DE GRADO', celda(contenido_fechas_univ), celda(contenido_fechas_esp),
+             celda(contenido_fechas_otros)],
+        ]
+
+        # Agregar fila de tarjeta profesional (solo para universitarios)
+        if formaciones_academicas:
+            estudios_nueva_data.append(['TARJETA PROFESIONAL', Paragraph(str(tarjeta_texto or ''), cell_center_style), '', ''])
+
+        # Agregar fila de experiencia
+        estudios_nueva_data.append(['2. EXPERIENCIA:', Paragraph(str(experiencia_anos or ''), cell_center_style), '', ''])
+
+        tabla_estudios_nueva = Table(estudios_nueva_data, colWidths=[1.75*inch, 1.75*inch, 1.75*inch, 1.75*inch])
+        tabla_estudios_nueva.setStyle(self._estilos_tabla_estudios[len(estudios_nueva_data)])
+
+        elementos.append(tabla_estudios_nueva)
+        return elementos
+
+    def renderizar(self, applicant, fecha=None):
+        """
+        Genera el ANEXO 11 de un candidato.
+
+        Args:
+            applicant: InformacionBasica (o un snapshot con los mismos atributos)
+            fecha: Fecha de la carta (default: ahora)
+
+        Returns:
+            bytes: Contenido del PDF.
+        """
+        inch = self._inch
+        pdf_buffer = io.BytesIO()
+        doc = self._SimpleDocTemplate(
+            pdf_buffer,
+            pagesize=self._pagesize,
+            rightMargin=0.75*inch,
+            leftMargin=0.75*inch,
+            topMargin=0.5*inch,
+            bottomMargin=0.5*inch
+        )
+        doc.build(self._elementos(applicant, fecha or datetime.now()))
+        return pdf_buffer.getvalue()
+
+
+_renderizador_anexo11 = None
+_renderizador_lock = threading.Lock()
+
+
+def obtener_renderizador_anexo11():
+    """Instancia del renderizador compartida por el proceso (se crea al primer uso)"""
+    global _renderizador_anexo11
+    if _renderizador_anexo11 is None:
+        with _renderizador_lock:
+            if _renderizador_anexo11 is None:
+                _renderizador_anexo11 = RenderizadorAnexo11()
+    return _renderizador_anexo11
+
+
+def generar_anexo11_pdf(applicant):
+    """
+    Genera un PDF en formato ANEXO 11 con la información del candidato
+    """
+    return io.BytesIO(obtener_renderizador_anexo11().renderizar(applicant))
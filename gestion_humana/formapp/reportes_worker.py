@@ -0,0 +1,19 @@
+"""
+Punto de entrada de los procesos hijos que generan reportes.
+No importa modelos al cargarse: con el método 'spawn' este módulo se importa
+en el hijo antes de que Django esté configurado.
+"""
+
+
+def inicializar_proceso():
+    """Prepara Django en el proceso hijo (los generadores importan modelos)"""
+    import django
+    django.setup()
+
+
+def generar_desde_snapshot(snapshot):
+    """Genera (excel_bytes, pdf_bytes) de un snapshot creado con crear_snapshot"""
+    from .generacion_reportes import generar_reportes_persona
+    return generar_reportes_persona(
+        snapshot, snapshot.experiencias_historicas, snapshot.resumen_historico
+    )
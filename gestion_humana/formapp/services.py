@@ -2,23 +2,28 @@
 Servicios de lógica de negocio para formapp.
 Extracción de funciones de utilidad y lógica de negocio desde views.py
 """
-import os
-import json
 import base64
 import logging
 import threading
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from django.conf import settings
 from django.utils import timezone
 from django.template.loader import render_to_string
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import pytz
 
+from . import cliente_gmail
+from .intervalos import (
+    agregar_bloque,
+    anos_meses_dias,
+    bloques_afectados,
+    bloques_fusionados,
+    dias_bloques,
+    dias_fusionados_por_grupo,
+    texto_anos_meses_dias,
+)
 from .models import CalculoExperiencia
 
 # Importar modelos de experiencia histórica
@@ -34,8 +39,145 @@ logger = logging.getLogger(__name__)
 # Zona horaria de Colombia
 COLOMBIA_TZ = pytz.timezone('America/Bogota')
 
-# Gmail API scope
-SCOPES = ['https://www.googleapis.com/auth/gmail.send']
+
+def _campos_por_total_dias(total_dias):
+    """Totales de CalculoExperiencia a partir de los días sin traslapes"""
+    # CÁLCULO REAL (BASE CALENDARIO 365 DÍAS, remanente en meses de 30 días)
+    anos, meses_restantes, _ = anos_meses_dias(total_dias)
+    return {
+        'total_meses_experiencia': (anos * 12) + meses_restantes,
+        'total_dias_experiencia': total_dias,
+        'total_experiencia_anos': round(total_dias / 365, 2),
+        'anos_y_meses_experiencia': texto_anos_meses_dias(total_dias),
+    }
+
+
+def campos_calculo_experiencia(intervalos, cedula):
+    """
+    Valores de CalculoExperiencia para un conjunto de intervalos, descontando traslapes.
+
+    Args:
+        intervalos: Iterable de tuplas (fecha_inicio, fecha_fin)
+        cedula: Cédula con la que se consultaron los contratos históricos
+
+    Returns:
+        dict: total_meses_experiencia, total_dias_experiencia,
+            total_experiencia_anos, anos_y_meses_experiencia e intervalos_fusionados
+    """
+    bloques = bloques_fusionados(intervalos)
+    # Calcular días totales sumando los intervalos fusionados
+    campos = _campos_por_total_dias(dias_bloques(bloques))
+    campos['intervalos_fusionados'] = {'cedula': str(cedula), 'bloques': bloques}
+    return campos
+
+
+def _intervalos_en_rango(informacion_basica, inicio, fin):
+    """Intervalos del formulario y del histórico de una persona que se traslapan con [inicio, fin]"""
+    intervalos = list(
+        informacion_basica.experiencias_laborales
+        .filter(fecha_inicial__lte=fin, fecha_terminacion__gte=inicio)
+        .values_list('fecha_inicial', 'fecha_terminacion')
+    )
+    if TIENE_HISTORICO and ContratoHistorico:
+        try:
+            intervalos += ContratoHistorico.objects.filter(
+                cedula=int(informacion_basica.cedula), fecha_inicio__lte=fin, fecha_fin__gte=inicio,
+            ).values_list('fecha_inicio', 'fecha_fin')
+        except (TypeError, ValueError):
+            pass
+    return intervalos
+
+
+def actualizar_experiencia_incremental(informacion_basica, agregados=(), eliminados=()):
+    """
+    Actualiza el cálculo de experiencia a partir de los intervalos que
+    cambiaron, sobre los intervalos fusionados guardados en CalculoExperiencia.
+    Un intervalo agregado solo se une con los bloques vecinos; uno eliminado
+    obliga a volver a fusionar únicamente el bloque que lo contenía, con los
+    intervalos de ese rango de fechas. Si no hay intervalos guardados (o se
+    calcularon con otra cédula) hace el cálculo completo.
+
+    Args:
+        informacion_basica: Instancia de InformacionBasica (con los cambios ya guardados)
+        agregados: Intervalos (fecha_inicio, fecha_fin) nuevos
+        eliminados: Intervalos (fecha_inicio, fecha_fin) que ya no están
+
+    Returns:
+        CalculoExperiencia: Registro con el cálculo consolidado
+    """
+    calculo = CalculoExperiencia.objects.filter(informacion_basica=informacion_basica).first()
+    guardados = calculo.intervalos_fusionados if calculo else None
+    if not guardados or guardados.get('cedula') != str(informacion_basica.cedula):
+        return calcular_experiencia_total(informacion_basica)
+
+    if not agregados and not eliminados:
+        return calculo
+
+    bloques = [list(bloque) for bloque in guardados['bloques']]
+    total_dias = calculo.total_dias_experiencia
+    for inicio, fin in eliminados:
+        desde, hasta = bloques_afectados(bloques, inicio.toordinal(), fin.toordinal())
+        if desde == hasta:
+            # El intervalo no estaba en el cálculo guardado
+            return calcular_experiencia_total(informacion_basica)
+        rango = date.fromordinal(bloques[desde][0]), date.fromordinal(bloques[hasta - 1][1])
+        total_dias -= dias_bloques(bloques[desde:hasta])
+        del bloques[desde:hasta]
+        for inicio_rango, fin_rango in _intervalos_en_rango(informacion_basica, *rango):
+            total_dias += agregar_bloque(bloques, inicio_rango.toordinal(), fin_rango.toordinal())
+    for inicio, fin in agregados:
+        total_dias += agregar_bloque(bloques, inicio.toordinal(), fin.toordinal())
+
+    campos = _campos_por_total_dias(total_dias)
+    campos['intervalos_fusionados'] = {'cedula': guardados['cedula'], 'bloques': bloques}
+    for campo, valor in campos.items():
+        setattr(calculo, campo, valor)
+    calculo.save(update_fields=list(campos))
+    return calculo
+
+
+def intervalos_cambiados(formset):
+    """
+    Intervalos agregados y eliminados en un formset de ExperienciaLaboral ya
+    validado, para actualizar_experiencia_incremental. Un cambio de fechas
+    cuenta como eliminar el intervalo anterior y agregar el nuevo.
+
+    Returns:
+        tuple: (agregados, eliminados)
+    """
+    agregados, eliminados = [], []
+    existentes = set(formset.initial_forms)
+    for form in formset.forms:
+        datos = getattr(form, 'cleaned_data', None) or {}
+        existente = form in existentes
+        borrado = bool(datos.get('DELETE'))
+        fechas_cambiaron = 'fecha_inicial' in form.changed_data or 'fecha_terminacion' in form.changed_data
+        if existente and (borrado or fechas_cambiaron):
+            if form.initial.get('fecha_inicial') and form.initial.get('fecha_terminacion'):
+                eliminados.append((form.initial['fecha_inicial'], form.initial['fecha_terminacion']))
+        if not borrado and (fechas_cambiaron or (not existente and form.has_changed())):
+            if datos.get('fecha_inicial') and datos.get('fecha_terminacion'):
+                agregados.append((datos['fecha_inicial'], datos['fecha_terminacion']))
+    return agregados, eliminados
+
+
+def marcar_actualizacion_incremental(formset):
+    """
+    Marca las experiencias de un formset que se van a guardar (o eliminar)
+    y cuyo cambio se aplicará luego con actualizar_experiencia_incremental,
+    para que las señales no descarten los intervalos fusionados guardados.
+    Cualquier otro guardado de ExperienciaLaboral los descarta.
+    """
+    for form in formset.forms:
+        form.instance._actualizacion_incremental = True
+
+
+def descartar_intervalos_fusionados(**filtros):
+    """
+    Marca como desactualizados los intervalos fusionados guardados (p. ej. al
+    cambiar los contratos históricos) para que el próximo cálculo sea completo.
+    """
+    CalculoExperiencia.objects.filter(**filtros).update(intervalos_fusionados=None)
 
 
 def calcular_experiencia_total(informacion_basica):
@@ -77,115 +219,224 @@ def calcular_experiencia_total(informacion_basica):
         if exp_hist.fecha_inicio and exp_hist.fecha_fin:
             intervalos.append((exp_hist.fecha_inicio, exp_hist.fecha_fin))
 
-    # 4. Calcular total de días con fusión de intervalos
-    # Inicializar variables para evitar referencias sin asignación
-    anos = 0
-    meses_restantes = 0
-    dias_restantes = 0
-    total_anos = 0.0
+    # 4. Crear o actualizar el registro de cálculo
+    calculo, created = CalculoExperiencia.objects.update_or_create(
+        informacion_basica=informacion_basica,
+        defaults=campos_calculo_experiencia(intervalos, informacion_basica.cedula)
+    )
+    return calculo
 
-    if not intervalos:
-        total_dias = 0
-        total_meses = 0
-    else:
-        # Ordenar por fecha de inicio
-        intervalos.sort(key=lambda x: x[0])
-
-        # Algoritmo de fusión de intervalos
-        merged = []
-        curr_start, curr_end = intervalos[0]
-
-        for i in range(1, len(intervalos)):
-            next_start, next_end = intervalos[i]
-
-            if next_start <= curr_end:  # Hay traslape
-                # Extender el final del intervalo actual si el siguiente termina después
-                curr_end = max(curr_end, next_end)
-            else:
-                # No hay traslape, guardar intervalo actual e iniciar uno nuevo
-                merged.append((curr_start, curr_end))
-                curr_start, curr_end = next_start, next_end
-
-        merged.append((curr_start, curr_end))
-
-        # Calcular días totales sumando los intervalos fusionados
-        total_dias = 0
-        for start, end in merged:
-            dias_intervalo = (end - start).days
-            total_dias += dias_intervalo + 1
-
-        # CÁLCULO REAL (BASE CALENDARIO 365 DÍAS)
-        # Se usa 365 para evitar el desfase de 5 días por año que genera la base 360
-        anos = total_dias // 365
-        dias_sobrantes_ano = total_dias % 365
-        
-        # El remanente se aproxima a meses de 30 días
-        meses_restantes = dias_sobrantes_ano // 30
-        dias_restantes = dias_sobrantes_ano % 30
-        
-        # Totales para la base de datos
-        total_meses = (anos * 12) + meses_restantes
-        total_anos = round(total_dias / 365, 2)
 
-    # Convertir a años (considerando 360 días por año laboral estándar o 12 meses)
-    # total_anos variable updated above
+# Registros de CalculoExperiencia por INSERT en el recálculo masivo
+TAMANO_LOTE_CALCULOS = 500
 
-    # Calcular años y meses para formato legible
-    # variables anos, meses_restantes, dias_restantes updated above
-    
-    if dias_restantes > 0:
-        # Si sobran días que no completan un mes
-        anos_y_meses = f"{anos} años, {meses_restantes} meses y {dias_restantes} días"
-    else:
-        anos_y_meses = f"{anos} años y {meses_restantes} meses"
+CAMPOS_CALCULO_EXPERIENCIA = [
+    'total_meses_experiencia', 'total_dias_experiencia', 'total_experiencia_anos', 'anos_y_meses_experiencia',
+    'intervalos_fusionados',
+]
 
-    # Crear o actualizar el registro de cálculo
-    calculo, created = CalculoExperiencia.objects.update_or_create(
-        informacion_basica=informacion_basica,
-        defaults={
-            'total_meses_experiencia': total_meses,
-            'total_dias_experiencia': total_dias,
-            'total_experiencia_anos': total_anos,
-            'anos_y_meses_experiencia': anos_y_meses,
-        }
+
+def recalcular_experiencias_en_lote(candidatos, detalle=False, tamano_lote=TAMANO_LOTE_CALCULOS):
+    """
+    Recalcula la experiencia total de varios candidatos con consultas por
+    conjunto: una para los candidatos, una para todas sus experiencias del
+    formulario y una para los contratos históricos (por cada
+    TAMANO_LOTE_CEDULAS cédulas). Los totales se calculan en memoria; por
+    lote se comparan con los guardados y solo los que cambiaron se guardan
+    con un INSERT ... ON CONFLICT. Los reportes en caché se invalidan solo
+    para las personas cuyos totales cambiaron. Todo se guarda en una
+    transacción.
+
+    Un candidato cuyo cálculo falla se omite y se informa en errores, sin
+    detener el resto.
+
+    Args:
+        candidatos: QuerySet de InformacionBasica a recalcular.
+        detalle: Si es True, incluye el resultado de cada candidato.
+        tamano_lote: Registros por consulta.
+
+    Returns:
+        dict: procesados, con_historico, sin_historico,
+            errores: [(nombre_completo, cedula, mensaje)] y, si se pidió,
+            detalle: [(nombre_completo, cedula, exp_formulario, exp_historicas, anos_y_meses)]
+    """
+    from django.db import transaction
+    from .models import ExperienciaLaboral
+
+    personas = list(candidatos.order_by().values_list('pk', 'cedula', 'nombre_completo'))
+    resultado = {'procesados': 0, 'con_historico': 0, 'sin_historico': 0, 'errores': []}
+    if detalle:
+        resultado['detalle'] = []
+    if not personas:
+        return resultado
+
+    intervalos_formulario = {}
+    experiencias = (
+        ExperienciaLaboral.objects
+        .filter(informacion_basica__in=candidatos.order_by().values('pk'))
+        .values_list('informacion_basica_id', 'fecha_inicial', 'fecha_terminacion')
     )
-    return calculo
+    for pk, inicio, fin in experiencias:
+        if inicio and fin:
+            intervalos_formulario.setdefault(pk, []).append((inicio, fin))
+
+    # Los contratos se traen por las cédulas numéricas de los candidatos (no por
+    # rango: el orden de la cédula como texto no es el numérico)
+    numeros = {}
+    for pk, cedula, _ in personas:
+        try:
+            numeros[int(cedula)] = pk
+        except (TypeError, ValueError):
+            continue
+    intervalos_historicos = {}
+    if numeros and TIENE_HISTORICO and ContratoHistorico:
+        lista = sorted(numeros)
+        for inicio_lote in range(0, len(lista), TAMANO_LOTE_CEDULAS):
+            contratos = (
+                ContratoHistorico.objects
+                .filter(cedula__in=lista[inicio_lote:inicio_lote + TAMANO_LOTE_CEDULAS])
+                .values_list('cedula', 'fecha_inicio', 'fecha_fin')
+            )
+            for cedula, inicio, fin in contratos:
+                if inicio and fin:
+                    intervalos_historicos.setdefault(numeros[cedula], []).append((inicio, fin))
+
+    calculos = []
+    for pk, cedula, nombre in personas:
+        formulario = intervalos_formulario.get(pk, [])
+        historicos = intervalos_historicos.get(pk, [])
+        try:
+            campos = campos_calculo_experiencia(formulario + historicos, cedula)
+        except Exception as e:
+            logger.error(f'Error recalculando experiencia de {cedula}: {str(e)}')
+            resultado['errores'].append((nombre, cedula, str(e)))
+            continue
+        calculos.append(CalculoExperiencia(informacion_basica_id=pk, **campos))
+
+        resultado['procesados'] += 1
+        resultado['con_historico' if historicos else 'sin_historico'] += 1
+        if detalle:
+            resultado['detalle'].append(
+                (nombre, cedula, len(formulario), len(historicos), campos['anos_y_meses_experiencia'])
+            )
+
+    from .signals import invalidar_reportes
+
+    campos_modelo = [CalculoExperiencia._meta.get_field(campo) for campo in CAMPOS_CALCULO_EXPERIENCIA]
+    # Los intervalos fusionados no aparecen en los reportes
+    totales = [i for i, campo in enumerate(campos_modelo) if campo.name != 'intervalos_fusionados']
+    with transaction.atomic():
+        for inicio in range(0, len(calculos), tamano_lote):
+            lote = calculos[inicio:inicio + tamano_lote]
+            guardados = {
+                fila[0]: fila[1:]
+                for fila in CalculoExperiencia.objects
+                .filter(informacion_basica_id__in=[calculo.informacion_basica_id for calculo in lote])
+                .values_list('informacion_basica_id', *CAMPOS_CALCULO_EXPERIENCIA)
+            }
+            por_guardar, cambiados = [], []
+            for calculo in lote:
+                valores = tuple(campo.to_python(getattr(calculo, campo.attname)) for campo in campos_modelo)
+                anteriores = guardados.get(calculo.informacion_basica_id)
+                if valores == anteriores:
+                    continue
+                por_guardar.append(calculo)
+                if anteriores is None or any(valores[i] != anteriores[i] for i in totales):
+                    cambiados.append(calculo.informacion_basica_id)
+
+            if por_guardar:
+                CalculoExperiencia.objects.bulk_create(
+                    por_guardar,
+                    update_conflicts=True,
+                    unique_fields=['informacion_basica'],
+                    update_fields=CAMPOS_CALCULO_EXPERIENCIA,
+                )
+            if cambiados:
+                # bulk_create no dispara post_save: los reportes en caché muestran estos totales
+                invalidar_reportes(pk__in=cambiados)
+    return resultado
+
+
+def rangos_de_cedulas(candidatos, partes):
+    """
+    Divide los candidatos en rangos contiguos de cédula con una cantidad
+    parecida de personas cada uno.
 
+    Args:
+        candidatos: QuerySet de InformacionBasica.
+        partes: Número de rangos deseado.
+
+    Returns:
+        list: Tuplas (cedula_desde, cedula_hasta), ambas incluidas, en el
+            orden de la base de datos.
+    """
+    cedulas = list(candidatos.order_by('cedula').values_list('cedula', flat=True))
+    if not cedulas:
+        return []
+    partes = max(1, min(partes, len(cedulas)))
+    tamano = -(-len(cedulas) // partes)
+    return [
+        (cedulas[inicio], cedulas[min(inicio + tamano, len(cedulas)) - 1])
+        for inicio in range(0, len(cedulas), tamano)
+    ]
+
+
+def _recalcular_rango_de_cedulas(rango, consulta, detalle=False):
+    """Recalcula un rango de rangos_de_cedulas; se ejecuta en un proceso aparte"""
+    import django
+    from django.db import connections
+    django.setup()
+    from .models import InformacionBasica
 
-def get_gmail_service():
-    """Helper para obtener servicio autenticado de Gmail"""
     try:
-        token_data = None
-        gmail_token_json = os.getenv('GMAIL_TOKEN_JSON')
-        
-        if gmail_token_json:
-            try:
-                token_data = json.loads(gmail_token_json)
-            except json.JSONDecodeError:
-                return None
-
-        if not token_data:
-            BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            token_path = os.path.join(BASE_DIR, 'token.json')
-            if os.path.exists(token_path):
-                with open(token_path, 'r') as token_file:
-                    token_data = json.load(token_file)
-            else:
-                return None
-
-        creds = Credentials(
-            token=token_data.get('token'),
-            refresh_token=token_data.get('refresh_token'),
-            token_uri=token_data.get('token_uri'),
-            client_id=token_data.get('client_id'),
-            client_secret=token_data.get('client_secret'),
-            scopes=token_data.get('scopes', SCOPES)
-        )
+        desde, hasta = rango
+        candidatos = InformacionBasica.objects.all()
+        candidatos.query = consulta
+        candidatos = candidatos.filter(cedula__gte=desde, cedula__lte=hasta)
+        return recalcular_experiencias_en_lote(candidatos, detalle=detalle)
+    finally:
+        connections.close_all()
+
 
-        if creds.expired and creds.refresh_token:
-            creds.refresh(Request())
+def recalcular_experiencias_en_paralelo(candidatos, procesos, detalle=False):
+    """
+    Reparte el recálculo masivo en varios procesos, cada uno con un rango de
+    cédulas y su propia conexión a la base de datos.
+
+    Args:
+        candidatos: QuerySet de InformacionBasica.
+        procesos: Número de procesos.
+        detalle: Si es True, incluye el resultado de cada candidato.
 
-        return build('gmail', 'v1', credentials=creds)
+    Returns:
+        dict: Igual que recalcular_experiencias_en_lote, sumado sobre los rangos.
+            Cada rango se guarda en su propia transacción.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+    from django.db import connections
+
+    rangos = rangos_de_cedulas(candidatos, procesos)
+    if len(rangos) <= 1:
+        return recalcular_experiencias_en_lote(candidatos, detalle=detalle)
+
+    resultado = {'procesados': 0, 'con_historico': 0, 'sin_historico': 0, 'errores': []}
+    if detalle:
+        resultado['detalle'] = []
+    # Los procesos hijos no deben heredar la conexión abierta del padre
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=len(rangos)) as executor:
+        tarea = partial(_recalcular_rango_de_cedulas, consulta=candidatos.query, detalle=detalle)
+        for parcial in executor.map(tarea, rangos):
+            for clave, valor in parcial.items():
+                resultado[clave] += valor
+    return resultado
+
+
+def get_gmail_service():
+    """Helper para obtener servicio autenticado de Gmail (credenciales compartidas del proceso)"""
+    try:
+        return cliente_gmail.obtener_servicio()
     except Exception as e:
         logger.error(f'Error obteniendo servicio Gmail: {str(e)}')
         return None
@@ -359,72 +610,323 @@ def obtener_experiencias_historicas(cedula):
         return []
 
 
-def obtener_resumen_experiencia_historica(cedula):
+# Cédulas por consulta al precargar contratos (límite de parámetros de SQLite)
+TAMANO_LOTE_CEDULAS = 900
+
+
+def obtener_experiencias_historicas_por_cedula(cedulas):
+    """
+    Obtiene las experiencias históricas de varias personas agrupadas por cédula.
+    Hace una consulta por cada TAMANO_LOTE_CEDULAS cédulas en lugar de una por persona.
+
+    Args:
+        cedulas: Iterable de cédulas (str o int). Las no numéricas se ignoran.
+
+    Returns:
+        dict: {cedula (int): [ContratoHistorico ordenados por fecha_inicio]}.
+            Las cédulas sin contratos no aparecen.
+    """
+    if not TIENE_HISTORICO or not ContratoHistorico:
+        return {}
+
+    numeros = set()
+    for cedula in cedulas:
+        try:
+            numeros.add(int(cedula))
+        except (TypeError, ValueError):
+            continue
+
+    agrupadas = {}
+    numeros = sorted(numeros)
+    try:
+        for inicio in range(0, len(numeros), TAMANO_LOTE_CEDULAS):
+            lote = numeros[inicio:inicio + TAMANO_LOTE_CEDULAS]
+            contratos = ContratoHistorico.objects.filter(cedula__in=lote).order_by('cedula', 'fecha_inicio')
+            for contrato in contratos:
+                agrupadas.setdefault(contrato.cedula, []).append(contrato)
+    except Exception as e:
+        logger.warning(f'Error consultando experiencias históricas: {str(e)}')
+        return {}
+    return agrupadas
+
+
+def historicos_de(agrupadas, cedula):
+    """
+    Contratos precargados (obtener_experiencias_historicas_por_cedula) de una cédula.
+
+    Returns:
+        list: Contratos de la cédula o lista vacía.
+    """
+    try:
+        return agrupadas.get(int(cedula), [])
+    except (TypeError, ValueError):
+        return []
+
+
+def _resumen_historico(total_contratos, total_dias, fecha_primera=None, fecha_ultima=None):
+    """Resumen de experiencia histórica a partir de los contratos y los días sin traslapes"""
+    if not total_contratos:
+        return {
+            'total_contratos': 0,
+            'total_dias': 0,
+            'experiencia_texto': 'Sin experiencia histórica',
+            'tiene_experiencia': False,
+            'fecha_primera': None,
+            'fecha_ultima': None,
+        }
+
+    return {
+        'total_contratos': total_contratos,
+        'total_dias': total_dias,
+        'experiencia_texto': texto_anos_meses_dias(total_dias),
+        'tiene_experiencia': True,
+        'fecha_primera': fecha_primera,
+        'fecha_ultima': fecha_ultima,
+    }
+
+
+def resumir_contratos_historicos(filas):
+    """
+    Resúmenes de experiencia histórica de varias cédulas a partir de sus
+    contratos, fusionando los intervalos de todas a la vez.
+
+    Args:
+        filas: Iterable de tuplas (cedula, fecha_inicio, fecha_fin).
+
+    Returns:
+        dict: {cedula: resumen} solo para las cédulas con contratos.
+    """
+    import numpy as np
+
+    indices, contratos = {}, []
+    grupos, inicios, fines = [], [], []
+    for cedula, fecha_inicio, fecha_fin in filas:
+        grupo = indices.setdefault(cedula, len(indices))
+        if grupo == len(contratos):
+            contratos.append(0)
+        contratos[grupo] += 1
+        if fecha_inicio and fecha_fin:
+            grupos.append(grupo)
+            inicios.append(fecha_inicio.toordinal())
+            fines.append(fecha_fin.toordinal())
+    if not indices:
+        return {}
+
+    grupos = np.array(grupos, dtype=np.int64)
+    inicios = np.array(inicios, dtype=np.int64)
+    fines = np.array(fines, dtype=np.int64)
+    dias = dias_fusionados_por_grupo(grupos, inicios, fines, len(indices))
+    primeras = np.full(len(indices), np.iinfo(np.int64).max)
+    ultimas = np.full(len(indices), np.iinfo(np.int64).min)
+    np.minimum.at(primeras, grupos, inicios)
+    np.maximum.at(ultimas, grupos, fines)
+
+    resumenes = {}
+    for cedula, grupo in indices.items():
+        con_fechas = ultimas[grupo] != np.iinfo(np.int64).min
+        resumenes[cedula] = _resumen_historico(
+            contratos[grupo], int(dias[grupo]),
+            date.fromordinal(int(primeras[grupo])) if con_fechas else None,
+            date.fromordinal(int(ultimas[grupo])) if con_fechas else None,
+        )
+    return resumenes
+
+
+def _numeros_de_cedula(cedulas):
+    """{cedula (como se recibió): cedula (int)} de las cédulas numéricas"""
+    numeros = {}
+    for cedula in cedulas:
+        try:
+            numeros[cedula] = int(cedula)
+        except (TypeError, ValueError):
+            continue
+    return numeros
+
+
+def _resumen_desde_registro(registro):
+    """Resumen (igual al calculado) desde un ResumenHistorico"""
+    resumen = _resumen_historico(
+        registro.total_contratos, registro.total_dias, registro.fecha_primera, registro.fecha_ultima
+    )
+    resumen['experiencia_texto'] = registro.experiencia_texto
+    return resumen
+
+
+def obtener_resumen_experiencia_historica(cedula, experiencias=None):
     """
     Obtiene un resumen de la experiencia histórica total de un candidato.
 
     Args:
         cedula: Número de cédula (str o int)
+        experiencias: Contratos ya consultados de esa cédula. Si es None se lee
+            el resumen guardado en ResumenHistorico (una consulta por índice).
 
     Returns:
         dict con: {
             'total_contratos': int,
             'total_dias': int,
             'experiencia_texto': str,
-            'tiene_experiencia': bool
+            'tiene_experiencia': bool,
+            'fecha_primera': date o None,
+            'fecha_ultima': date o None
         }
     """
-    experiencias = obtener_experiencias_historicas(cedula)
+    if experiencias is None:
+        return obtener_resumenes_experiencia_historica([cedula])[cedula]
 
-    if not experiencias:
-        return {
-            'total_contratos': 0,
-            'total_dias': 0,
-            'experiencia_texto': 'Sin experiencia histórica',
-            'tiene_experiencia': False
-        }
+    filas = [(cedula, exp.fecha_inicio, exp.fecha_fin) for exp in experiencias]
+    return resumir_contratos_historicos(filas).get(cedula) or _resumen_historico(0, 0)
 
-    # Calcular total de días con fusión de intervalos
-    intervalos = []
-    for exp in experiencias:
-        if exp.fecha_inicio and exp.fecha_fin:
-            intervalos.append((exp.fecha_inicio, exp.fecha_fin))
 
-    if not intervalos:
-        total_dias = 0
+def obtener_resumenes_experiencia_historica(cedulas, agrupadas=None):
+    """
+    Resúmenes de experiencia histórica de varias personas leídos de
+    ResumenHistorico, con una consulta por cada TAMANO_LOTE_CEDULAS cédulas.
+
+    Args:
+        cedulas: Iterable de cédulas (str o int).
+        agrupadas: Contratos ya precargados con
+            obtener_experiencias_historicas_por_cedula; si se dan, los
+            resúmenes se calculan con ellos sin consultar.
+
+    Returns:
+        dict: {cedula (como se recibió): resumen igual al de
+            obtener_resumen_experiencia_historica}. Las cédulas sin contratos
+            o no numéricas tienen el resumen vacío.
+    """
+    cedulas = list(dict.fromkeys(cedulas))
+    numeros = _numeros_de_cedula(cedulas)
+
+    if agrupadas is not None:
+        por_numero = resumir_contratos_historicos(
+            (numero, contrato.fecha_inicio, contrato.fecha_fin)
+            for numero, contratos in agrupadas.items()
+            for contrato in contratos
+        )
     else:
-        intervalos.sort(key=lambda x: x[0])
-        merged = []
-        curr_start, curr_end = intervalos[0]
-
-        for i in range(1, len(intervalos)):
-            next_start, next_end = intervalos[i]
-            if next_start <= curr_end:
-                curr_end = max(curr_end, next_end)
-            else:
-                merged.append((curr_start, curr_end))
-                curr_start, curr_end = next_start, next_end
-
-        merged.append((curr_start, curr_end))
-
-        total_dias = sum((end - start).days + 1 for start, end in merged)
-
-    # Calcular años, meses y días
-    anos = total_dias // 365
-    dias_sobrantes = total_dias % 365
-    meses = dias_sobrantes // 30
-    dias = dias_sobrantes % 30
-
-    if dias > 0:
-        experiencia_texto = f"{anos} años, {meses} meses y {dias} días"
+        por_numero = {}
+        if numeros and TIENE_HISTORICO:
+            from basedatosaquicali.models import ResumenHistorico
+            lista = sorted(set(numeros.values()))
+            try:
+                for inicio in range(0, len(lista), TAMANO_LOTE_CEDULAS):
+                    for registro in ResumenHistorico.objects.filter(
+                        cedula__in=lista[inicio:inicio + TAMANO_LOTE_CEDULAS]
+                    ):
+                        por_numero[registro.cedula] = _resumen_desde_registro(registro)
+            except Exception as e:
+                logger.warning(f'Error consultando resúmenes históricos: {str(e)}')
+
+    return {
+        cedula: por_numero.get(numeros.get(cedula)) or _resumen_historico(0, 0)
+        for cedula in cedulas
+    }
+
+
+CAMPOS_RESUMEN_HISTORICO = [
+    'total_contratos', 'total_dias', 'fecha_primera', 'fecha_ultima', 'experiencia_texto', 'actualizado',
+]
+
+
+def _contratos_para_resumen(numeros=None):
+    """Filas (cedula, fecha_inicio, fecha_fin) de todas las cédulas o de las indicadas"""
+    consulta = ContratoHistorico.objects.order_by().values_list('cedula', 'fecha_inicio', 'fecha_fin')
+    if numeros is None:
+        return list(consulta.iterator(chunk_size=TAMANO_LOTE_CALCULOS * 4))
+    numeros = sorted(numeros)
+    filas = []
+    for inicio in range(0, len(numeros), TAMANO_LOTE_CEDULAS):
+        filas.extend(consulta.filter(cedula__in=numeros[inicio:inicio + TAMANO_LOTE_CEDULAS]))
+    return filas
+
+
+def actualizar_resumenes_historicos(cedulas=None):
+    """
+    Recalcula ResumenHistorico desde ContratoHistorico.
+
+    Args:
+        cedulas: Cédulas a actualizar; None actualiza todas (y elimina los
+            resúmenes de cédulas que ya no tienen contratos).
+
+    Returns:
+        int: Resúmenes escritos.
+    """
+    from django.db import transaction
+
+    if not TIENE_HISTORICO or not ContratoHistorico:
+        return 0
+    from basedatosaquicali.models import ResumenHistorico
+
+    numeros = None if cedulas is None else set(_numeros_de_cedula(cedulas).values())
+    if numeros is not None and not numeros:
+        return 0
+    resumenes = resumir_contratos_historicos(_contratos_para_resumen(numeros))
+
+    if numeros is None:
+        sin_contratos = set(ResumenHistorico.objects.values_list('cedula', flat=True)) - set(resumenes)
     else:
-        experiencia_texto = f"{anos} años y {meses} meses"
+        sin_contratos = numeros - set(resumenes)
+    registros = [
+        ResumenHistorico(
+            cedula=cedula,
+            total_contratos=resumen['total_contratos'],
+            total_dias=resumen['total_dias'],
+            fecha_primera=resumen['fecha_primera'],
+            fecha_ultima=resumen['fecha_ultima'],
+            experiencia_texto=resumen['experiencia_texto'],
+        )
+        for cedula, resumen in resumenes.items()
+    ]
+    with transaction.atomic():
+        sin_contratos = sorted(sin_contratos)
+        for inicio in range(0, len(sin_contratos), TAMANO_LOTE_CEDULAS):
+            ResumenHistorico.objects.filter(cedula__in=sin_contratos[inicio:inicio + TAMANO_LOTE_CEDULAS]).delete()
+        ResumenHistorico.objects.bulk_create(
+            registros,
+            batch_size=TAMANO_LOTE_CALCULOS,
+            update_conflicts=True,
+            unique_fields=['cedula'],
+            update_fields=CAMPOS_RESUMEN_HISTORICO,
+        )
+    return len(registros)
+
+
+def actualizar_por_contratos_historicos(cedulas):
+    """
+    Actualiza lo que depende de los contratos históricos de unas cédulas
+    después de guardarlos o eliminarlos uno a uno: su ResumenHistorico y los
+    intervalos fusionados de CalculoExperiencia (que se descartan).
 
+    Args:
+        cedulas: Cédulas (str o int) cuyos contratos cambiaron.
+    """
+    cedulas = {str(cedula) for cedula in cedulas}
+    descartar_intervalos_fusionados(informacion_basica__cedula__in=cedulas)
+    actualizar_resumenes_historicos(cedulas)
+
+
+def verificar_resumenes_historicos():
+    """
+    Compara ResumenHistorico con lo que resulta de los contratos actuales.
+
+    Returns:
+        dict: faltantes (cédulas con contratos y sin resumen), sobrantes
+            (resúmenes de cédulas sin contratos) y distintos (cédulas cuyo
+            resumen no coincide), cada uno como lista ordenada de cédulas.
+    """
+    from basedatosaquicali.models import ResumenHistorico
+
+    esperados = resumir_contratos_historicos(_contratos_para_resumen())
+    guardados = {
+        registro.cedula: _resumen_desde_registro(registro)
+        for registro in ResumenHistorico.objects.iterator(chunk_size=TAMANO_LOTE_CALCULOS * 4)
+    }
     return {
-        'total_contratos': len(experiencias),
-        'total_dias': total_dias,
-        'experiencia_texto': experiencia_texto,
-        'tiene_experiencia': True
+        'faltantes': sorted(set(esperados) - set(guardados)),
+        'sobrantes': sorted(set(guardados) - set(esperados)),
+        'distintos': sorted(
+            cedula for cedula in set(esperados) & set(guardados) if esperados[cedula] != guardados[cedula]
+        ),
     }
 
 
@@ -0,0 +1,156 @@
+"""
+Señales de formapp.
+Invalidan los reportes por persona guardados en caché (Excel de información y
+PDF ANEXO 11) incrementando InformacionBasica.version_reportes cada vez que
+cambia un dato que aparece en ellos, y descartan los intervalos fusionados de
+CalculoExperiencia cuando una experiencia cambia fuera del cálculo incremental.
+
+Las vistas que guardan una persona con sus formsets usan reportes_agrupados
+para que la versión se incremente una sola vez al final y no una vez por
+cada fila relacionada guardada.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db.models import F
+from django.utils import timezone
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import (
+    InformacionBasica,
+    ExperienciaLaboral,
+    InformacionAcademica,
+    EducacionBasica,
+    EducacionSuperior,
+    Posgrado,
+    Especializacion,
+    CalculoExperiencia,
+)
+
+# Modelos relacionados cuyo contenido aparece en los reportes
+MODELOS_EN_REPORTES = [
+    ExperienciaLaboral,
+    InformacionAcademica,
+    EducacionBasica,
+    EducacionSuperior,
+    Posgrado,
+    Especializacion,
+    CalculoExperiencia,
+]
+
+
+_agrupacion = threading.local()
+
+
+@contextmanager
+def reportes_agrupados():
+    """
+    Agrupa las invalidaciones por modelos relacionados: dentro del bloque solo
+    se anotan las personas y al salir sin errores se invalidan con un único
+    UPDATE. Debe usarse dentro de la transacción del guardado.
+    """
+    pendientes = getattr(_agrupacion, 'pendientes', None)
+    if pendientes is not None:
+        # Bloque anidado: invalida el más externo
+        yield
+        return
+
+    _agrupacion.pendientes = set()
+    try:
+        yield
+        pendientes = _agrupacion.pendientes
+    finally:
+        _agrupacion.pendientes = None
+    if pendientes:
+        invalidar_reportes(pk__in=pendientes)
+
+
+def _invalidar_persona(pk):
+    pendientes = getattr(_agrupacion, 'pendientes', None)
+    if pendientes is not None:
+        pendientes.add(pk)
+    else:
+        invalidar_reportes(pk=pk)
+
+
+def invalidar_reportes(**filtros):
+    """
+    Invalida los reportes en caché de las personas que cumplen los filtros.
+    Sin filtros invalida los de todo el personal (p. ej. tras recargar el histórico).
+    También actualiza updated_at (update() no aplica auto_now) para que las
+    exportaciones incrementales incluyan a la persona.
+    """
+    InformacionBasica.objects.filter(**filtros).update(
+        version_reportes=F('version_reportes') + 1, updated_at=timezone.now()
+    )
+
+
+@receiver(pre_save, sender=InformacionBasica)
+def incrementar_version_reportes(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance.pk is None:
+        return
+    # El valor en memoria puede estar desactualizado si una señal de un modelo
+    # relacionado lo incrementó en la base de datos: se incrementa en el mismo UPDATE.
+    instance.version_reportes = F('version_reportes') + 1
+
+
+@receiver(post_save, sender=InformacionBasica)
+def incrementar_version_reportes_parcial(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created:
+        return
+    # Queda como campo diferido: se lee de la base de datos solo si se consulta
+    instance.__dict__.pop('version_reportes', None)
+    # Un save(update_fields=...) no escribe version_reportes; se incrementa en la base de datos
+    if update_fields is not None and 'version_reportes' not in update_fields:
+        _invalidar_persona(instance.pk)
+
+
+def _invalidar_por_relacionado(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _invalidar_persona(instance.informacion_basica_id)
+
+
+for modelo in MODELOS_EN_REPORTES:
+    post_save.connect(_invalidar_por_relacionado, sender=modelo, dispatch_uid=f'reportes_{modelo.__name__}_save')
+    post_delete.connect(_invalidar_por_relacionado, sender=modelo, dispatch_uid=f'reportes_{modelo.__name__}_delete')
+
+
+@receiver(post_save, sender=ExperienciaLaboral)
+@receiver(post_delete, sender=ExperienciaLaboral)
+def descartar_intervalos_por_experiencia(sender, instance, raw=False, **kwargs):
+    # Los intervalos fusionados guardados solo siguen siendo válidos si el cambio
+    # lo aplica actualizar_experiencia_incremental (marcar_actualizacion_incremental);
+    # un guardado por otra vía (admin de ExperienciaLaboral, shell) obliga al cálculo completo.
+    if raw or getattr(instance, '_actualizacion_incremental', False):
+        return
+    from .services import descartar_intervalos_fusionados
+    descartar_intervalos_fusionados(informacion_basica_id=instance.informacion_basica_id)
+
+
+try:
+    from basedatosaquicali.models import ContratoHistorico
+
+    @receiver(pre_save, sender=ContratoHistorico)
+    def recordar_cedula_contrato_historico(sender, instance, raw=False, **kwargs):
+        # Si el contrato cambia de cédula también hay que actualizar la anterior
+        if raw or instance.pk is None:
+            return
+        instance._cedula_anterior = sender.objects.filter(pk=instance.pk).values_list('cedula', flat=True).first()
+
+    # Solo post_save: un receptor de post_delete obligaría a Django a cargar cada
+    # contrato al vaciar la tabla en la carga masiva, que invalida todo al terminar.
+    # Las eliminaciones desde el admin se atienden en ContratoHistoricoAdmin.
+    @receiver(post_save, sender=ContratoHistorico)
+    def invalidar_por_contrato_historico(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        cedulas = {instance.cedula, getattr(instance, '_cedula_anterior', None) or instance.cedula}
+        # La hoja "Experiencia Histórica" del Excel depende de los contratos de la cédula
+        invalidar_reportes(cedula__in=[str(cedula) for cedula in cedulas])
+        # Resumen histórico e intervalos fusionados de la experiencia
+        from .services import actualizar_por_contratos_historicos
+        actualizar_por_contratos_historicos(cedulas)
+except ImportError:
+    pass
@@ -1 +1,77 @@
 # Tests package for formapp
+#
+# Las cachés en disco de reportes y documentos se redirigen a un directorio
+# temporal para que la suite no escriba en el árbol del proyecto. Los tests que
+# prueban las cachés usan su propio directorio con override_settings.
+#
+# Las funciones crear_* comparten los datos mínimos que necesitan los tests.
+import atexit
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.test.utils import override_settings
+
+from basedatosaquicali.models import ConsolidadoBaseDatos, ContratoHistorico
+from formapp.models import InformacionBasica, ExperienciaLaboral
+
+DIRECTORIO_CACHES = tempfile.mkdtemp(prefix='formapp_tests_')
+atexit.register(shutil.rmtree, DIRECTORIO_CACHES, ignore_errors=True)
+
+override_settings(
+    REPORTES_CACHE_ROOT=os.path.join(DIRECTORIO_CACHES, 'cache_reportes'),
+    DOCUMENTOS_CACHE_ROOT=os.path.join(DIRECTORIO_CACHES, 'cache_documentos'),
+).enable()
+
+
+def crear_persona(cedula, **campos):
+    """InformacionBasica con los campos obligatorios; ``campos`` reemplaza los valores por defecto"""
+    datos = {
+        'primer_nombre': 'Ana', 'primer_apellido': f'Paz {cedula}', 'genero': 'Femenino',
+        'tipo_via': 'Calle', 'numero_via': '1', 'numero_casa': '2',
+        'telefono': '3000000000', 'correo': f'{cedula}@test.com',
+    }
+    datos.update(campos)
+    return InformacionBasica.objects.create(cedula=cedula, **datos)
+
+
+def crear_experiencia(persona, inicio, dias, incremental=False, **campos):
+    """ExperienciaLaboral de ``dias`` días desde ``inicio``"""
+    datos = {
+        'meses_experiencia': dias // 30, 'dias_experiencia': dias, 'cargo': 'Profesional',
+        'objeto_contractual': 'Objeto', 'funciones': 'Funciones',
+    }
+    datos.update(campos)
+    experiencia = ExperienciaLaboral(
+        informacion_basica=persona, fecha_inicial=inicio, fecha_terminacion=inicio + timedelta(days=dias), **datos
+    )
+    # Como lo hacen las vistas que luego llaman a actualizar_experiencia_incremental
+    experiencia._actualizacion_incremental = incremental
+    experiencia.save()
+    return experiencia
+
+
+def crear_contrato_historico(cedula, inicio, fin, **campos):
+    """ContratoHistorico entre ``inicio`` y ``fin``"""
+    dias = (fin - inicio).days
+    datos = {
+        'nombre_contratista': 'Contratista', 'numero_registro': 1, 'contrato': 'CT',
+        'dias_brutos': dias, 'traslape': 'NO', 'dias_reales_contribuidos': dias,
+    }
+    datos.update(campos)
+    return ContratoHistorico.objects.create(cedula=cedula, fecha_inicio=inicio, fecha_fin=fin, **datos)
+
+
+def crear_consolidado(cedula, fecha_firma, fecha_final, **campos):
+    """ConsolidadoBaseDatos de un contrato terminado"""
+    datos = {
+        'area': 'Social', 'tipo_documento': 'Contrato', 'numero_contrato_otrosi': 'CT',
+        'nombre_contratista': f'Contratista {cedula}',
+        'contratante_nit': 'FUNDACIÓN DE PRUEBA NIT 900.000.000-1',
+        'objeto_contrato': 'Prestar servicios profesionales', 'estado': 'TERMINADO',
+    }
+    datos.update(campos)
+    return ConsolidadoBaseDatos.objects.create(
+        cedula=cedula, fecha_firma=fecha_firma, fecha_final=fecha_final, **datos
+    )
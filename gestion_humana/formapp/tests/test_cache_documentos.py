@@ -0,0 +1,111 @@
+"""
+Tests para la caché local de documentos usada por las exportaciones.
+"""
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from formapp.cache_documentos import CacheDocumentos, obtener_cache
+from formapp.descargas import descargar_documento
+from formapp.models import InformacionBasica, DocumentosIdentidad
+
+
+class CacheDocumentosTest(TestCase):
+    """Tests para el almacenamiento LRU en disco"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def test_acierto_y_fallo(self):
+        """La segunda lectura se sirve desde disco sin llamar al cargador"""
+        cache = CacheDocumentos(self.directorio, 1024)
+        cargar = mock.Mock(return_value=b'contenido')
+
+        self.assertEqual(cache.obtener('doc.pdf', cargar), b'contenido')
+        self.assertEqual(cache.obtener('doc.pdf', cargar), b'contenido')
+
+        cargar.assert_called_once()
+        stats = cache.estadisticas()
+        self.assertEqual((stats['aciertos'], stats['fallos']), (1, 1))
+        self.assertEqual(stats['tasa_aciertos'], 0.5)
+
+    def test_version_distinta_invalida(self):
+        """Un documento con otra versión se vuelve a cargar"""
+        cache = CacheDocumentos(self.directorio, 1024)
+        cache.obtener('doc.pdf', lambda: b'v1', version='1')
+        self.assertEqual(cache.obtener('doc.pdf', lambda: b'v2', version='2'), b'v2')
+
+    def test_no_almacena_errores(self):
+        """Si el cargador retorna None no se guarda nada"""
+        cache = CacheDocumentos(self.directorio, 1024)
+        cache.obtener('doc.pdf', lambda: None)
+        self.assertEqual(cache.obtener('doc.pdf', lambda: b'ok'), b'ok')
+        self.assertEqual(cache.estadisticas()['entradas'], 1)
+
+    def test_desalojo_lru(self):
+        """Al superar el tamaño máximo se elimina la entrada usada hace más tiempo"""
+        cache = CacheDocumentos(self.directorio, 25)
+        cache.obtener('a', lambda: b'a' * 10)
+        cache.obtener('b', lambda: b'b' * 10)
+        # Usar 'a' la vuelve la más reciente
+        cache.obtener('a', lambda: b'x')
+        cache.obtener('c', lambda: b'c' * 10)
+
+        self.assertIsNotNone(cache.leer(cache.clave('a')))
+        self.assertIsNone(cache.leer(cache.clave('b')))
+        stats = cache.estadisticas()
+        self.assertEqual(stats['desalojos'], 1)
+        self.assertEqual(stats['tamano_bytes'], 20)
+
+    def test_reconstruye_indice_desde_disco(self):
+        """Una nueva instancia reutiliza las entradas que ya existen en disco"""
+        CacheDocumentos(self.directorio, 1024).obtener('doc.pdf', lambda: b'contenido')
+
+        cache = CacheDocumentos(self.directorio, 1024)
+        self.assertEqual(cache.estadisticas()['tamano_bytes'], len(b'contenido'))
+        self.assertEqual(cache.obtener('doc.pdf', mock.Mock()), b'contenido')
+
+
+class ReadFileContentCacheTest(TestCase):
+    """Tests de integración con la lectura de documentos de las exportaciones"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(
+            DOCUMENTOS_CACHE_ACTIVO=True,
+            DOCUMENTOS_CACHE_ROOT=self.directorio,
+            MEDIA_ROOT=self.media,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def test_segunda_exportacion_lee_de_cache(self):
+        applicant = InformacionBasica.objects.create(
+            primer_nombre='ANA', primer_apellido='PEREZ', cedula='123456789',
+            genero='Femenino', tipo_via='Calle', numero_via='1', numero_casa='1',
+            telefono='3001234567', correo='ana@test.com',
+        )
+        docs = DocumentosIdentidad(informacion_basica=applicant)
+        docs.fotocopia_cedula.save('cedula.pdf', SimpleUploadedFile('cedula.pdf', b'%PDF-1.4 cedula'), save=False)
+
+        self.assertEqual(descargar_documento(docs.fotocopia_cedula), b'%PDF-1.4 cedula')
+        os.remove(docs.fotocopia_cedula.path)
+        # El archivo ya no existe en el storage, pero la caché lo conserva
+        self.assertEqual(descargar_documento(docs.fotocopia_cedula), b'%PDF-1.4 cedula')
+        self.assertEqual(obtener_cache().estadisticas()['aciertos'], 1)
@@ -0,0 +1,114 @@
+"""
+Tests para la generación por lote de certificados de contratos históricos
+sobre la plantilla oficial y su descarga desde la consulta histórica.
+"""
+import io
+import zipfile
+from datetime import date, datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from PyPDF2 import PdfReader
+
+from formapp import report_generators_pdf
+from formapp.report_generators_pdf import (
+    generar_certificado_historico_pdf,
+    generar_certificados_historicos_pdf,
+    obtener_plantilla_certificado,
+)
+from formapp.tests import crear_consolidado
+
+
+class CertificadosHistoricosTest(TestCase):
+    """Tests para el generador de certificados con la plantilla en memoria"""
+
+    def setUp(self):
+        self.contratos = [
+            crear_consolidado(
+                1111, date(2020, 1, 1), date(2020, 2, 28), numero_contrato_otrosi='CT 1/2020',
+                actividades_especificas='Actividad uno\nActividad dos',
+            ),
+            crear_consolidado(1111, date(2020, 2, 1), date(2020, 3, 28), numero_contrato_otrosi='CT 2/2020'),
+            crear_consolidado(2222, date(2020, 3, 1), date(2020, 4, 28), numero_contrato_otrosi='CT 3/2020'),
+        ]
+
+    def test_lote_una_pagina_por_contrato(self):
+        """El PDF del lote tiene una página por contrato en el orden recibido"""
+        pdf = generar_certificados_historicos_pdf(self.contratos, datetime(2025, 3, 4))
+        paginas = PdfReader(pdf).pages
+
+        self.assertEqual(len(paginas), 3)
+        for pagina, contrato in zip(paginas, self.contratos):
+            texto = pagina.extract_text()
+            self.assertIn(contrato.nombre_contratista.upper(), texto)
+            self.assertIn(contrato.fecha_firma.strftime('%d/%m/%Y'), texto)
+            self.assertIn('a los 4 días del mes de marzo de 2025', texto)
+            # La plantilla queda debajo del texto como un Form XObject
+            self.assertIn('/PlantillaCertificado', pagina['/Resources']['/XObject'])
+        self.assertIn('ACTIVIDADES:', paginas[0].extract_text())
+        self.assertNotIn('ACTIVIDADES:', paginas[1].extract_text())
+
+    def test_plantilla_se_lee_una_vez(self):
+        """Varios certificados reutilizan la plantilla leída la primera vez"""
+        report_generators_pdf._plantilla_certificado = None
+        with mock.patch.object(
+            report_generators_pdf, 'PlantillaCertificado', wraps=report_generators_pdf.PlantillaCertificado
+        ) as plantilla:
+            generar_certificado_historico_pdf(self.contratos[0])
+            generar_certificados_historicos_pdf(self.contratos)
+
+        self.assertEqual(plantilla.call_count, 1)
+        self.assertIs(obtener_plantilla_certificado(), obtener_plantilla_certificado())
+
+    def test_sin_contratos(self):
+        self.assertEqual(generar_certificados_historicos_pdf([]).getvalue(), b'')
+
+
+class DescargarCertificadosViewTest(TestCase):
+    """Tests para la descarga de certificados desde la consulta histórica"""
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.client.login(username='admin', password='testpass123')
+        self.url = reverse('basedatosaquicali:descargar_certificados')
+        crear_consolidado(1111, date(2020, 1, 1), date(2020, 2, 28), numero_contrato_otrosi='CT 1/2020')
+        crear_consolidado(1111, date(2020, 2, 1), date(2020, 3, 28), numero_contrato_otrosi='CT 2/2020')
+        crear_consolidado(2222, date(2020, 3, 1), date(2020, 4, 28), numero_contrato_otrosi='CT 3/2020')
+        crear_consolidado(3333, date(2020, 4, 1), date(2020, 5, 28), numero_contrato_otrosi='CT 4/2020')
+
+    def test_pdf_de_varias_cedulas(self):
+        response = self.client.get(self.url, {'cedulas': '2222, 1111', 'formato': 'pdf'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('Certificados_2_cedulas.pdf', response['Content-Disposition'])
+        pdf = PdfReader(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(len(pdf.pages), 3)
+        self.assertIn('CONTRATISTA 1111', pdf.pages[0].extract_text())
+        self.assertIn('CONTRATISTA 2222', pdf.pages[2].extract_text())
+
+    def test_zip_transmitido_con_un_pdf_por_contrato(self):
+        response = self.client.get(self.url, {'cedulas': '1111', 'formato': 'zip'})
+
+        self.assertTrue(response.streaming)
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as zf:
+            nombres = zf.namelist()
+            self.assertEqual(len(nombres), 2)
+            self.assertTrue(all(nombre.startswith('1111/Certificado_CT_1_2020') or
+                                nombre.startswith('1111/Certificado_CT_2_2020') for nombre in nombres))
+            self.assertEqual(len(PdfReader(io.BytesIO(zf.read(nombres[0]))).pages), 1)
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get(self.url, {'cedulas': '11.11'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cedulas': '1111', 'formato': 'doc'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cedulas': '9999'}).status_code, 404)
+
+    def test_requiere_administrador(self):
+        User.objects.create_user(username='normal', password='testpass123')
+        self.client.login(username='normal', password='testpass123')
+
+        response = self.client.get(self.url, {'cedulas': '1111'})
+        self.assertEqual(response.status_code, 302)
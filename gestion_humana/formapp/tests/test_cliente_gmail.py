@@ -0,0 +1,103 @@
+"""
+Tests para el cliente compartido de Gmail: el token se lee una vez por
+proceso, se renueva antes de vencer y cada hilo tiene su propio servicio.
+"""
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.test import SimpleTestCase
+from google.auth.exceptions import RefreshError
+
+from formapp import cliente_gmail
+from formapp.services import get_gmail_service
+
+
+def ahora():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def token_json(expiry=None):
+    datos = {
+        'token': 'acceso', 'refresh_token': 'renovacion', 'token_uri': 'https://oauth2.googleapis.com/token',
+        'client_id': 'cliente', 'client_secret': 'secreto',
+    }
+    if expiry:
+        datos['expiry'] = expiry.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    return json.dumps(datos)
+
+
+class ClienteGmailTest(SimpleTestCase):
+    """Credenciales y servicio de Gmail compartidos"""
+
+    def setUp(self):
+        cliente_gmail.reiniciar()
+        self.addCleanup(cliente_gmail.reiniciar)
+        self.renovaciones = 0
+
+        def renovar(creds, request):
+            self.renovaciones += 1
+            creds.token = f'acceso-{self.renovaciones}'
+            creds.expiry = ahora() + timedelta(hours=1)
+
+        patcher = mock.patch('google.oauth2.credentials.Credentials.refresh', autospec=True, side_effect=renovar)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _con_token(self, valor):
+        patcher = mock.patch.dict('os.environ', {'GMAIL_TOKEN_JSON': valor})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lee_el_token_y_arma_el_servicio_una_vez(self):
+        self._con_token(token_json(ahora() + timedelta(hours=1)))
+
+        with mock.patch.object(cliente_gmail, 'leer_token', wraps=cliente_gmail.leer_token) as leer:
+            servicios = [get_gmail_service() for _ in range(5)]
+
+        self.assertEqual(leer.call_count, 1)
+        self.assertEqual(self.renovaciones, 0)
+        self.assertTrue(all(servicio is servicios[0] for servicio in servicios))
+        self.assertIsNotNone(servicios[0].users().messages().send)
+
+    def test_renueva_antes_de_vencer(self):
+        self._con_token(token_json(ahora() + timedelta(minutes=2)))
+
+        get_gmail_service()
+        get_gmail_service()
+
+        self.assertEqual(self.renovaciones, 1)
+        self.assertEqual(cliente_gmail.obtener_credenciales().token, 'acceso-1')
+
+    def test_token_sin_expiracion_se_renueva_una_vez(self):
+        self._con_token(token_json())
+
+        for _ in range(3):
+            get_gmail_service()
+
+        self.assertEqual(self.renovaciones, 1)
+
+    def test_un_servicio_por_hilo(self):
+        self._con_token(token_json(ahora() + timedelta(hours=1)))
+        servicios = []
+        hilos = [threading.Thread(target=lambda: servicios.append(get_gmail_service())) for _ in range(3)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(len({id(servicio) for servicio in servicios}), 3)
+        self.assertEqual(len({id(servicio._http.credentials) for servicio in servicios}), 1)
+
+    def test_token_revocado_se_vuelve_a_leer(self):
+        self._con_token(token_json())
+
+        with mock.patch('google.oauth2.credentials.Credentials.refresh', side_effect=RefreshError('invalid_grant')):
+            self.assertIsNone(get_gmail_service())
+        self.assertIsNotNone(get_gmail_service())
+        self.assertEqual(self.renovaciones, 1)
+
+    def test_sin_token(self):
+        self._con_token('no es json')
+        self.assertIsNone(get_gmail_service())
@@ -0,0 +1,146 @@
+"""
+Tests para el motor de descargas concurrentes de documentos.
+"""
+import threading
+import time
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ReadTimeoutError
+from urllib3.response import HTTPResponse
+
+from formapp import cliente_http
+from formapp.descargas import MotorDescargas
+
+
+def _error_http(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f'{status}', response=response)
+
+
+class MotorDescargasTest(SimpleTestCase):
+    """Tests para reintentos y concurrencia del motor de descargas"""
+
+    @mock.patch('formapp.descargas.descargar_documento')
+    def test_reintenta_errores_transitorios(self, descargar):
+        descargar.side_effect = [requests.ConnectionError('reset'), requests.ReadTimeout('lento'), b'ok']
+        motor = MotorDescargas(max_workers=2, intentos=3, espera_base=0)
+
+        self.assertEqual(motor.descargar_uno(mock.Mock(name='doc')), b'ok')
+        self.assertEqual(descargar.call_count, 3)
+
+    @mock.patch('formapp.descargas.descargar_documento')
+    def test_no_reintenta_errores_http(self, descargar):
+        """Los estados HTTP ya los reintentó la sesión compartida"""
+        descargar.side_effect = _error_http(503)
+        motor = MotorDescargas(max_workers=2, intentos=3, espera_base=0)
+
+        self.assertIsNone(motor.descargar_uno(mock.Mock(name='doc')))
+        self.assertEqual(descargar.call_count, 1)
+
+    @mock.patch('formapp.descargas.descargar_documento')
+    def test_concurrencia_acotada(self, descargar):
+        """Nunca hay más descargas simultáneas que hilos configurados"""
+        lock = threading.Lock()
+        estado = {'activas': 0, 'maximo': 0}
+
+        def lento(field, *args):
+            with lock:
+                estado['activas'] += 1
+                estado['maximo'] = max(estado['maximo'], estado['activas'])
+            time.sleep(0.01)
+            with lock:
+                estado['activas'] -= 1
+            return field.encode()
+
+        descargar.side_effect = lento
+        tareas = [(f'doc{i}', f'ruta{i}') for i in range(12)]
+        resultados = list(MotorDescargas(max_workers=3, espera_base=0).descargar(tareas))
+
+        self.assertEqual(sorted(r[0] for r in resultados), sorted(f'ruta{i}' for i in range(12)))
+        self.assertTrue(all(contenido == field.encode() for _, field, contenido in resultados))
+        self.assertLessEqual(estado['maximo'], 3)
+
+
+    @mock.patch('formapp.descargas.descargar_documento')
+    def test_cola_acotada_aplica_contrapresion(self, descargar):
+        """Con un consumidor lento, los archivos retenidos no superan cola + hilos"""
+        lock = threading.Lock()
+        estado = {'producidos': 0}
+
+        def rapido(field, *args):
+            with lock:
+                estado['producidos'] += 1
+            return b'x'
+
+        descargar.side_effect = rapido
+        motor = MotorDescargas(max_workers=2, profundidad_cola=3, espera_base=0)
+        tareas = [(f'doc{i}', f'ruta{i}') for i in range(20)]
+
+        retenidos = []
+        for consumidos, _ in enumerate(motor.descargar(tareas), start=1):
+            time.sleep(0.005)
+            with lock:
+                retenidos.append(estado['producidos'] - consumidos)
+
+        self.assertEqual(len(retenidos), 20)
+        self.assertLessEqual(max(retenidos), 3 + 2)
+
+    @mock.patch('formapp.descargas.descargar_documento', return_value=b'x')
+    def test_consumidor_abandona(self, descargar):
+        """Cerrar el generador detiene a los hilos sin descargar todo"""
+        motor = MotorDescargas(max_workers=1, profundidad_cola=1, espera_base=0)
+        motor.ESPERA_COLA = 0.01
+        descargas = motor.descargar([(f'doc{i}', f'ruta{i}') for i in range(50)])
+        next(descargas)
+        descargas.close()
+        time.sleep(0.1)
+
+        self.assertLess(descargar.call_count, 50)
+
+
+class ClienteHTTPTest(SimpleTestCase):
+    """Tests para la sesión HTTP compartida y sus métricas"""
+
+    def setUp(self):
+        cliente_http.metricas.reiniciar()
+
+    def test_sesion_compartida_con_pool(self):
+        sesion = cliente_http.obtener_sesion()
+        self.assertIs(sesion, cliente_http.obtener_sesion())
+        adaptador = sesion.get_adapter('https://res.cloudinary.com/')
+        self.assertEqual(adaptador.max_retries.total, 2)
+        self.assertIn(503, adaptador.max_retries.status_forcelist)
+
+    def test_sesion_no_reintenta_conexion_ni_lectura(self):
+        """Una sola capa de reintentos: los cortes los reintenta MotorDescargas"""
+        reintentos = cliente_http.crear_sesion().get_adapter('https://res.cloudinary.com/').max_retries
+        errores = [
+            ReadTimeoutError(None, '/a.pdf', 'lento'),
+            NewConnectionError(None, 'rechazada'),
+        ]
+        for error in errores:
+            with self.assertRaises(MaxRetryError):
+                reintentos.increment(method='GET', url='/a.pdf', error=error)
+        # Los estados transitorios sí se reintentan en la sesión
+        response = HTTPResponse(status=503)
+        self.assertIsNotNone(reintentos.increment(method='GET', url='/a.pdf', response=response))
+
+    @mock.patch('formapp.cliente_http.obtener_sesion')
+    def test_registra_metricas(self, obtener_sesion):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'x' * 100
+        obtener_sesion.return_value.get.side_effect = [response, requests.ConnectTimeout('lento')]
+
+        cliente_http.get('https://res.cloudinary.com/a.pdf', timeout=(1, 1))
+        with self.assertRaises(requests.ConnectTimeout):
+            cliente_http.get('https://res.cloudinary.com/b.pdf', timeout=(1, 1))
+
+        resumen = cliente_http.metricas.resumen()
+        self.assertEqual(resumen['solicitudes'], 2)
+        self.assertEqual(resumen['errores'], 1)
+        self.assertEqual(resumen['bytes_recibidos'], 100)
+        self.assertEqual(resumen['por_estado'], {'200': 1, 'sin_respuesta': 1})
@@ -2,6 +2,8 @@
 Tests para funcionalidad de experiencias históricas combinadas.
 Verifica la integración entre experiencias del formulario y datos históricos.
 """
+import random
+
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from datetime import date, timedelta
@@ -11,6 +13,9 @@ from formapp.models import InformacionBasica, ExperienciaLaboral, CalculoExperie
 from formapp.services import (
     obtener_experiencias_historicas,
     obtener_resumen_experiencia_historica,
+    obtener_resumenes_experiencia_historica,
+    obtener_experiencias_historicas_por_cedula,
+    actualizar_resumenes_historicos,
     calcular_experiencia_total
 )
 
@@ -180,6 +185,47 @@ class ObtenerResumenExperienciaHistoricaTest(TestCase):
         self.assertIn('mes', texto)
 
 
+class ObtenerResumenesExperienciaHistoricaTest(TestCase):
+    """Tests para los resúmenes por lote de varias cédulas"""
+
+    def setUp(self):
+        if not TIENE_HISTORICO:
+            self.skipTest("basedatosaquicali no está disponible")
+        aleatorio = random.Random(22)
+        contratos = []
+        for cedula in range(5000, 5030):
+            for numero in range(aleatorio.randrange(0, 8)):
+                inicio = date(2015, 1, 1) + timedelta(days=aleatorio.randrange(2500))
+                contratos.append(ContratoHistorico(
+                    cedula=cedula, nombre_contratista='X', numero_registro=numero, contrato=f'C-{numero}',
+                    fecha_inicio=inicio, fecha_fin=inicio + timedelta(days=aleatorio.randrange(0, 500)),
+                    dias_brutos=0, traslape='NO', dias_reales_contribuidos=0,
+                ))
+        ContratoHistorico.objects.bulk_create(contratos)
+        # bulk_create no dispara señales: los resúmenes se calculan aparte
+        actualizar_resumenes_historicos()
+        self.cedulas = [str(cedula) for cedula in range(5000, 5030)] + ['abc', 99999]
+
+    def test_igual_que_por_cedula(self):
+        with self.assertNumQueries(1):
+            resumenes = obtener_resumenes_experiencia_historica(self.cedulas)
+
+        self.assertEqual(list(resumenes), self.cedulas)
+        for cedula in self.cedulas:
+            calculado = obtener_resumen_experiencia_historica(cedula, obtener_experiencias_historicas(cedula))
+            self.assertEqual(resumenes[cedula], calculado, cedula)
+        self.assertFalse(resumenes['abc']['tiene_experiencia'])
+
+    def test_con_contratos_precargados(self):
+        agrupadas = obtener_experiencias_historicas_por_cedula(self.cedulas)
+
+        with self.assertNumQueries(0):
+            resumenes = obtener_resumenes_experiencia_historica(self.cedulas, agrupadas=agrupadas)
+
+        self.assertEqual(resumenes, obtener_resumenes_experiencia_historica(self.cedulas))
+        self.assertEqual(obtener_resumenes_experiencia_historica([]), {})
+
+
 class CalculoExperienciaTotalConHistoricasTest(TestCase):
     """Tests para calcular_experiencia_total() con experiencias históricas"""
 
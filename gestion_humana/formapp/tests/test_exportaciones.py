@@ -0,0 +1,459 @@
+"""
+Tests para la generación de exportaciones (ZIP en streaming y utilidades asociadas).
+"""
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from django.contrib.auth.models import User
+from openpyxl import load_workbook
+
+from formapp.models import (
+    InformacionBasica, ExportacionPersonal, ExperienciaLaboral, CalculoExperiencia, HistorialCorreccion
+)
+from formapp.exportaciones import ejecutar_exportacion, recuperar_exportaciones_abandonadas
+from basedatosaquicali.models import ContratoHistorico
+from formapp.zip_streaming import iterar_zip, TAMANO_BLOQUE
+from formapp.consolidado import (
+    ENCABEZADOS_CONSOLIDADO, escribir_excel_consolidado, filas_consolidado,
+    queryset_consolidado, iterar_filas_exportacion,
+)
+from formapp.tests import crear_persona
+
+TEMP_EXPORTACIONES_ROOT = tempfile.mkdtemp()
+
+
+class IterarZipTest(TestCase):
+    """Tests para el generador de ZIP en streaming"""
+
+    def test_genera_zip_valido(self):
+        """El resultado concatenado debe ser un ZIP legible con todas las entradas"""
+        entradas = [
+            ('a.txt', b'hola'),
+            ('carpeta/b.bin', bytes(range(256)) * 1000),
+            ('vacio.txt', b''),
+        ]
+        datos = b''.join(iterar_zip(iter(entradas)))
+
+        with zipfile.ZipFile(io.BytesIO(datos)) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(zip_file.namelist(), ['a.txt', 'carpeta/b.bin', 'vacio.txt'])
+            self.assertEqual(zip_file.read('carpeta/b.bin'), bytes(range(256)) * 1000)
+
+    def test_entrega_por_partes(self):
+        """Una entrada grande debe producir varios fragmentos en lugar de uno solo"""
+        contenido = b'x' * (TAMANO_BLOQUE * 4)
+        partes = list(iterar_zip(iter([('grande.bin', contenido)]), compression=zipfile.ZIP_STORED))
+
+        self.assertGreater(len(partes), 1)
+        with zipfile.ZipFile(io.BytesIO(b''.join(partes))) as zip_file:
+            self.assertEqual(zip_file.read('grande.bin'), contenido)
+
+    def test_omite_contenido_nulo(self):
+        """Las entradas sin contenido (descargas fallidas) no se agregan"""
+        datos = b''.join(iterar_zip(iter([('falla.pdf', None), ('ok.txt', b'ok')])))
+
+        with zipfile.ZipFile(io.BytesIO(datos)) as zip_file:
+            self.assertEqual(zip_file.namelist(), ['ok.txt'])
+
+    def test_politica_compresion_por_entrada(self):
+        """Los formatos ya comprimidos se guardan sin deflate; el resto se comprime"""
+        entradas = [
+            ('foto.jpg', b'\xff\xd8\xff' + b'a' * 1000),
+            ('sin_extension', b'%PDF-1.4' + b'a' * 1000),
+            ('reporte.xlsx', b'PK' + b'a' * 1000),
+            ('datos.csv', b'a;b\n' * 500),
+        ]
+        datos = b''.join(iterar_zip(iter(entradas)))
+
+        with zipfile.ZipFile(io.BytesIO(datos)) as zip_file:
+            tipos = {info.filename: info.compress_type for info in zip_file.infolist()}
+            self.assertIsNone(zip_file.testzip())
+        self.assertEqual(tipos['foto.jpg'], zipfile.ZIP_STORED)
+        self.assertEqual(tipos['sin_extension'], zipfile.ZIP_STORED)
+        self.assertEqual(tipos['reporte.xlsx'], zipfile.ZIP_DEFLATED)
+        self.assertEqual(tipos['datos.csv'], zipfile.ZIP_DEFLATED)
+
+    def test_nivel_compresion_configurable(self):
+        """ZIP_NIVEL_COMPRESION cambia el tamaño de las entradas comprimidas"""
+        contenido = ''.join(f'{i};persona {i};cargo {i % 7}\n' for i in range(5000)).encode()
+        tamanos = {}
+        for nivel in (1, 9):
+            with self.settings(ZIP_NIVEL_COMPRESION=nivel):
+                tamanos[nivel] = len(b''.join(iterar_zip(iter([('datos.csv', contenido)]))))
+        self.assertLess(tamanos[9], tamanos[1])
+
+    def test_entrada_escrita_por_funcion(self):
+        """Una entrada puede ser una función que escribe directamente en el ZIP"""
+        contenido = b'fila;valor\n' * 10000
+        entradas = [
+            ('antes.txt', b'a'),
+            ('generado.csv', lambda destino: destino.write(contenido)),
+            ('despues.txt', b'b'),
+        ]
+        datos = b''.join(iterar_zip(iter(entradas)))
+
+        with zipfile.ZipFile(io.BytesIO(datos)) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(zip_file.namelist(), ['antes.txt', 'generado.csv', 'despues.txt'])
+            self.assertEqual(zip_file.read('generado.csv'), contenido)
+            self.assertEqual(zip_file.getinfo('generado.csv').compress_type, zipfile.ZIP_DEFLATED)
+
+
+class ExcelConsolidadoTest(TestCase):
+    """Tests para la hoja consolidada en modo write-only"""
+
+    def test_contenido_y_estilos(self):
+        applicants = [crear_persona(f'200000000{i}') for i in range(3)]
+        datos = b''.join(iterar_zip(iter([
+            ('Personal_Completo.xlsx',
+             lambda destino: escribir_excel_consolidado(filas_consolidado(applicants), destino)),
+        ])))
+
+        with zipfile.ZipFile(io.BytesIO(datos)) as zip_file:
+            ws = load_workbook(io.BytesIO(zip_file.read('Personal_Completo.xlsx')))['Personal Completo']
+        self.assertEqual(ws['A1'].value, 'REGISTRO COMPLETO DE PERSONAL')
+        self.assertIn('A1:J1', [str(rango) for rango in ws.merged_cells.ranges])
+        self.assertEqual([c.value for c in ws[3]], ENCABEZADOS_CONSOLIDADO)
+        self.assertTrue(ws['A3'].font.b)
+        self.assertEqual(ws['A3'].fill.start_color.rgb, '00366092')
+        self.assertEqual(ws['J6'].border.left.style, 'thin')
+        self.assertEqual([ws.cell(row=4 + i, column=1).value for i in range(3)],
+                         [a.cedula for a in applicants])
+        self.assertEqual(ws['F4'].value, 'N/A')
+        self.assertEqual(ws.max_row, 6)
+
+
+class DownloadAllZipStreamingTest(TestCase):
+    """Tests para la descarga masiva transmitida en streaming"""
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='testuser', password='testpass123')
+        for i in range(2):
+            crear_persona(f'200000000{i}')
+
+    def test_respuesta_es_streaming_con_zip_valido(self):
+        """La descarga debe ser un StreamingHttpResponse con un ZIP completo"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('formapp:download_all'))
+
+        self.assertTrue(response.streaming)
+        datos = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(datos)) as zip_file:
+            nombres = zip_file.namelist()
+            self.assertIn('Personal_Completo.xlsx', nombres)
+            # El consolidado recorre a todo el personal: va al final para no retrasar el primer byte
+            self.assertTrue(nombres[0].endswith('_Informacion.xlsx'))
+            self.assertEqual(nombres[-1], 'Personal_Completo.xlsx')
+            self.assertEqual(len([n for n in nombres if n.endswith('_Informacion.xlsx')]), 2)
+            self.assertEqual(len([n for n in nombres if n.endswith('_ANEXO_11.pdf')]), 2)
+
+
+@override_settings(EXPORTACIONES_ROOT=TEMP_EXPORTACIONES_ROOT, EXPORTACIONES_EN_HILO=False, EXPORTACIONES_WORKER=True)
+class ExportacionSegundoPlanoTest(TestCase):
+    """Tests para las exportaciones procesadas fuera de la petición"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_EXPORTACIONES_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='testuser', password='testpass123')
+        for i in range(2):
+            crear_persona(f'200000000{i}')
+
+    def test_iniciar_requiere_post(self):
+        """El inicio de una exportación solo acepta POST"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('formapp:exportacion_iniciar'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_iniciar_deja_exportacion_en_cola(self):
+        """Sin hilo, la exportación queda pendiente para el comando"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post(reverse('formapp:exportacion_iniciar'))
+
+        self.assertEqual(response.status_code, 202)
+        exportacion = ExportacionPersonal.objects.get()
+        self.assertEqual(exportacion.estado, 'PENDIENTE')
+        self.assertEqual(exportacion.solicitado_por, 'testuser')
+        self.assertIsNone(response.json()['descarga_url'])
+
+    @override_settings(EXPORTACIONES_WORKER=False)
+    def test_no_encola_sin_worker(self):
+        """Sin hilo ni worker la exportación quedaría pendiente para siempre"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post(reverse('formapp:exportacion_iniciar'))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('worker', response.json()['error'])
+        self.assertFalse(ExportacionPersonal.objects.exists())
+
+    def test_ejecutar_genera_archivo_y_permite_descarga(self):
+        """La ejecución deja el ZIP en disco con progreso completo y se puede descargar"""
+        exportacion = ExportacionPersonal.objects.create(solicitado_por='testuser')
+        exportacion = ejecutar_exportacion(exportacion.pk)
+
+        self.assertEqual(exportacion.estado, 'COMPLETADO')
+        self.assertEqual(exportacion.total_personas, 2)
+        self.assertEqual(exportacion.personas_procesadas, 2)
+        self.assertEqual(exportacion.porcentaje, 100)
+        self.assertTrue(os.path.exists(os.path.join(TEMP_EXPORTACIONES_ROOT, exportacion.archivo)))
+
+        self.client.login(username='testuser', password='testpass123')
+        estado = self.client.get(reverse('formapp:exportacion_estado', kwargs={'pk': exportacion.pk})).json()
+        self.assertEqual(estado['estado'], 'COMPLETADO')
+
+        response = self.client.get(estado['descarga_url'])
+        self.assertEqual(response.status_code, 200)
+        datos = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(datos)) as zip_file:
+            self.assertIn('Personal_Completo.xlsx', zip_file.namelist())
+
+    def test_no_reprocesa_exportacion_tomada(self):
+        """Una exportación que ya no está pendiente no se vuelve a ejecutar"""
+        exportacion = ExportacionPersonal.objects.create(estado='EN_PROCESO')
+        resultado = ejecutar_exportacion(exportacion.pk)
+        self.assertEqual(resultado.estado, 'EN_PROCESO')
+        self.assertEqual(resultado.archivo, '')
+
+    def test_descarga_no_disponible_si_no_esta_completa(self):
+        """La descarga de una exportación pendiente responde 404"""
+        exportacion = ExportacionPersonal.objects.create()
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('formapp:exportacion_descargar', kwargs={'pk': exportacion.pk}))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(EXPORTACIONES_LATIDO_MAXIMO=300, EXPORTACIONES_MAX_INTENTOS=2)
+    def test_recupera_exportaciones_abandonadas(self):
+        """Las exportaciones EN_PROCESO sin latido se vuelven a encolar o fallan tras los intentos"""
+        hace = lambda minutos: timezone.now() - timedelta(minutes=minutos)
+        viva = ExportacionPersonal.objects.create(estado='EN_PROCESO', latido=hace(1), intentos=1)
+        abandonada = ExportacionPersonal.objects.create(estado='EN_PROCESO', latido=hace(10), intentos=1)
+        sin_latido = ExportacionPersonal.objects.create(estado='EN_PROCESO', iniciado_en=hace(10), intentos=1)
+        agotada = ExportacionPersonal.objects.create(estado='EN_PROCESO', latido=hace(10), intentos=2)
+
+        self.assertEqual(recuperar_exportaciones_abandonadas(), {'reencoladas': 2, 'fallidas': 1})
+
+        estados = {e.pk: e.estado for e in ExportacionPersonal.objects.all()}
+        self.assertEqual(estados[viva.pk], 'EN_PROCESO')
+        self.assertEqual(estados[abandonada.pk], 'PENDIENTE')
+        self.assertEqual(estados[sin_latido.pk], 'PENDIENTE')
+        self.assertEqual(estados[agotada.pk], 'ERROR')
+
+        # El worker toma de nuevo las reencoladas
+        salida = io.StringIO()
+        call_command('procesar_exportaciones', stdout=salida)
+        abandonada.refresh_from_db()
+        self.assertEqual(abandonada.estado, 'COMPLETADO')
+        self.assertEqual(abandonada.intentos, 2)
+        self.assertIsNotNone(abandonada.latido)
+
+    @override_settings(EXPORTACIONES_EN_HILO=True, EXPORTACIONES_LATIDO_MAXIMO=300)
+    def test_estado_informa_exportacion_en_hilo_abandonada(self):
+        """En modo hilo, consultar el estado de una exportación sin latido la marca con ERROR"""
+        exportacion = ExportacionPersonal.objects.create(
+            estado='EN_PROCESO', latido=timezone.now() - timedelta(minutes=10), intentos=1
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+        estado = self.client.get(reverse('formapp:exportacion_estado', kwargs={'pk': exportacion.pk})).json()
+
+        self.assertEqual(estado['estado'], 'ERROR')
+
+
+@override_settings(EXPORTACIONES_ROOT=TEMP_EXPORTACIONES_ROOT, EXPORTACIONES_EN_HILO=False, EXPORTACIONES_WORKER=True)
+class ExportacionIncrementalTest(TestCase):
+    """Tests para las exportaciones incrementales (solo cambios)"""
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.candidatos = [crear_persona(f'200000000{i}') for i in range(3)]
+        base = ExportacionPersonal.objects.create()
+        self.base = ejecutar_exportacion(base.pk)
+
+    def _leer_zip(self, exportacion):
+        ruta = os.path.join(TEMP_EXPORTACIONES_ROOT, exportacion.archivo)
+        with zipfile.ZipFile(ruta) as zip_file:
+            cambios = json.loads(zip_file.read('_cambios.json'))
+            return zip_file.namelist(), cambios
+
+    def test_exportacion_completa_guarda_manifiesto(self):
+        """El manifiesto de la base contiene los reportes de cada persona"""
+        informes = [r for r in self.base.manifiesto if r.endswith('_Informacion')]
+        self.assertEqual(len(informes), 3)
+
+    def test_incremental_incluye_solo_modificados_y_eliminados(self):
+        """Solo se regeneran las personas modificadas y se listan las eliminadas"""
+        modificado = self.candidatos[0]
+        modificado.telefono = '3119998877'
+        modificado.save()
+        eliminado_nombre = self.candidatos[1].nombre_completo.replace(' ', '_')
+        self.candidatos[1].delete()
+
+        incremental = ExportacionPersonal.objects.create(
+            tipo='INCREMENTAL', base=self.base, desde=self.base.iniciado_en
+        )
+        incremental = ejecutar_exportacion(incremental.pk)
+        self.assertEqual(incremental.estado, 'COMPLETADO')
+
+        nombres, cambios = self._leer_zip(incremental)
+        modificado_nombre = modificado.nombre_completo.replace(' ', '_')
+        informes = [n for n in nombres if n.endswith('_Informacion.xlsx')]
+        self.assertEqual(informes, [f'Personal/{modificado_nombre}/{modificado_nombre}_Informacion.xlsx'])
+
+        self.assertEqual(cambios['exportacion_base'], self.base.pk)
+        self.assertTrue(cambios['eliminados_disponibles'])
+        self.assertIn(f'Personal/{eliminado_nombre}/{eliminado_nombre}_Informacion', cambios['eliminados'])
+        self.assertNotIn(f'Personal/{modificado_nombre}/{modificado_nombre}_Informacion', cambios['eliminados'])
+
+        # El manifiesto del incremental refleja el estado actual completo
+        informes_manifiesto = [r for r in incremental.manifiesto if r.endswith('_Informacion')]
+        self.assertEqual(len(informes_manifiesto), 2)
+
+    def test_incremental_incluye_cambios_en_relacionados(self):
+        """Editar solo una experiencia o un contrato histórico incluye a la persona"""
+        experiencia = ExperienciaLaboral.objects.create(
+            informacion_basica=self.candidatos[0], fecha_inicial=date(2020, 1, 1),
+            fecha_terminacion=date(2020, 12, 31), meses_experiencia=11, dias_experiencia=365,
+            cargo='Analista', objeto_contractual='Objeto', funciones='Funciones',
+        )
+        base = ejecutar_exportacion(ExportacionPersonal.objects.create().pk)
+
+        experiencia.cargo = 'Coordinador'
+        experiencia.save()
+        ContratoHistorico.objects.create(
+            cedula=int(self.candidatos[2].cedula), nombre_contratista='X', numero_registro=1, contrato='CT',
+            fecha_inicio=date(2019, 1, 1), fecha_fin=date(2019, 6, 30), dias_brutos=181, traslape='NO',
+            dias_reales_contribuidos=181,
+        )
+
+        incremental = ejecutar_exportacion(ExportacionPersonal.objects.create(
+            tipo='INCREMENTAL', base=base, desde=base.iniciado_en
+        ).pk)
+
+        nombres, _ = self._leer_zip(incremental)
+        informes = sorted(n for n in nombres if n.endswith('_Informacion.xlsx'))
+        esperados = sorted(
+            f'Personal/{nombre}/{nombre}_Informacion.xlsx'
+            for nombre in (c.nombre_completo.replace(' ', '_') for c in (self.candidatos[0], self.candidatos[2]))
+        )
+        self.assertEqual(informes, esperados)
+
+    def test_iniciar_incremental_desde_endpoint(self):
+        """El endpoint crea una exportación incremental a partir de una base"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post(reverse('formapp:exportacion_iniciar'), {'base': self.base.pk})
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['tipo'], 'INCREMENTAL')
+        exportacion = ExportacionPersonal.objects.get(pk=response.json()['id'])
+        self.assertEqual(exportacion.base, self.base)
+        self.assertEqual(exportacion.desde, self.base.iniciado_en)
+
+    def test_parametros_invalidos(self):
+        """Una fecha mal formada o una base inexistente responden 400"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('formapp:download_all'), {'desde': 'ayer'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('formapp:exportacion_iniciar'), {'base': 9999})
+        self.assertEqual(response.status_code, 400)
+
+    def test_descarga_streaming_incremental_sin_cambios(self):
+        """Sin cambios desde la base, el ZIP solo trae el consolidado y el resumen"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('formapp:download_all'), {'base': self.base.pk})
+
+        self.assertIn('Personal_Cambios', response['Content-Disposition'])
+        datos = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(datos)) as zip_file:
+            self.assertEqual(sorted(zip_file.namelist()), ['Personal_Completo.xlsx', '_cambios.json'])
+            self.assertEqual(json.loads(zip_file.read('_cambios.json'))['eliminados'], [])
+
+
+class ExportacionConsolidadaTest(TestCase):
+    """Tests para la exportación tabular completa en CSV/XLSX"""
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.applicants = [crear_persona(f'200000000{i}') for i in range(3)]
+
+        primero = self.applicants[0]
+        for meses in (12, 6):
+            ExperienciaLaboral.objects.create(
+                informacion_basica=primero, fecha_inicial=date(2020, 1, 1),
+                fecha_terminacion=date(2021, 1, 1), meses_experiencia=meses, dias_experiencia=meses * 30,
+                cargo='Analista', objeto_contractual='Objeto', funciones='Funciones',
+            )
+        CalculoExperiencia.objects.create(
+            informacion_basica=primero, total_meses_experiencia=18, total_dias_experiencia=540,
+            total_experiencia_anos=1.5, anos_y_meses_experiencia='1 año y 6 meses',
+        )
+        HistorialCorreccion.objects.create(informacion_basica=primero, mensaje_admin='Falta RUT', admin_usuario='admin')
+        InformacionBasica.objects.filter(pk=self.applicants[1].pk).update(estado='VERIFICADO')
+
+    def _csv(self, **params):
+        response = self.client.get(reverse('formapp:exportacion_consolidado'), {'formato': 'csv', **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        texto = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.DictReader(io.StringIO(texto)))
+
+    def test_csv_con_esquema_completo(self):
+        filas = {fila['Cédula']: fila for fila in self._csv()}
+
+        self.assertEqual(len(filas), 3)
+        primero = filas[self.applicants[0].cedula]
+        self.assertEqual(primero['N° Experiencias Laborales'], '2')
+        self.assertEqual(primero['N° Posgrados'], '0')
+        self.assertEqual(primero['Total Meses Experiencia'], '18')
+        self.assertEqual(primero['Correcciones Solicitadas'], '1')
+        self.assertNotEqual(primero['Última Solicitud de Corrección'], '')
+        self.assertEqual(primero['Estado'], 'Recibido')
+        self.assertEqual(filas[self.applicants[2].cedula]['Total Meses Experiencia'], '')
+
+    def test_filtros(self):
+        filas = self._csv(estado='VERIFICADO')
+        self.assertEqual([fila['Cédula'] for fila in filas], [self.applicants[1].cedula])
+
+        filas = self._csv(search=self.applicants[2].cedula)
+        self.assertEqual([fila['Cédula'] for fila in filas], [self.applicants[2].cedula])
+
+        response = self.client.get(reverse('formapp:exportacion_consolidado'), {'estado': 'NO_EXISTE'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_xlsx(self):
+        response = self.client.get(reverse('formapp:exportacion_consolidado'), {'formato': 'xlsx'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('.xlsx', response['Content-Disposition'])
+        ws = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual(ws['B3'].value, 'Cédula')
+        self.assertEqual([ws.cell(row=4 + i, column=2).value for i in range(3)],
+                         [a.cedula for a in self.applicants])
+        self.assertIsNotNone(ws.cell(row=4, column=40).value)
+
+    def test_consultas_constantes(self):
+        """La cantidad de consultas no depende del número de personas"""
+        with self.assertNumQueries(1):
+            filas = list(iterar_filas_exportacion(queryset_consolidado()))
+        self.assertEqual(len(filas), 3)
+
+    def test_formato_invalido(self):
+        response = self.client.get(reverse('formapp:exportacion_consolidado'), {'formato': 'pdf'})
+        self.assertEqual(response.status_code, 400)
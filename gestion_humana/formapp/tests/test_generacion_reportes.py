@@ -0,0 +1,250 @@
+"""
+Tests para la generación de reportes por persona a partir de snapshots
+y para su caché invalidada por señales.
+"""
+import io
+import pickle
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from openpyxl import load_workbook
+from PyPDF2 import PdfReader
+
+from formapp import generacion_reportes
+from formapp.generacion_reportes import (
+    crear_snapshot, generar_reportes_persona, iterar_reportes, obtener_reportes_persona
+)
+from formapp.exportaciones import queryset_exportacion
+from formapp.report_generators_pdf import (
+    RenderizadorAnexo11, generar_anexo11_pdf, obtener_renderizador_anexo11
+)
+from formapp.models import InformacionBasica, ExperienciaLaboral, CalculoExperiencia
+from formapp.services import calcular_experiencia_total, recalcular_experiencias_en_lote
+from formapp.signals import reportes_agrupados
+from formapp.tests import crear_experiencia, crear_persona
+from basedatosaquicali.models import ContratoHistorico
+
+TEMP_REPORTES_CACHE_ROOT = tempfile.mkdtemp()
+
+
+def _valores_excel(excel_bytes):
+    wb = load_workbook(io.BytesIO(excel_bytes))
+    return {
+        ws.title: [[c.value for c in fila] for fila in ws.iter_rows()]
+        for ws in wb.worksheets
+    }
+
+
+def _texto_pdf(pdf_bytes):
+    return [pagina.extract_text() for pagina in PdfReader(io.BytesIO(pdf_bytes)).pages]
+
+
+@override_settings(REPORTES_CACHE_ACTIVO=False)
+class GeneracionReportesTest(TestCase):
+    """Tests para snapshots y generación en procesos"""
+
+    def setUp(self):
+        self.applicants = [crear_persona(f'30000000{i}', perfil='Profesional') for i in range(2)]
+        for applicant in self.applicants:
+            crear_experiencia(applicant, date(2020, 1, 1), 366, cargo_anexo_11='Analista')
+        CalculoExperiencia.objects.create(
+            informacion_basica=self.applicants[0], total_meses_experiencia=12,
+            total_dias_experiencia=366, total_experiencia_anos=1, anos_y_meses_experiencia='1 año',
+        )
+
+    def test_snapshot_genera_lo_mismo_sin_consultas(self):
+        """El snapshot se puede serializar y produce el mismo Excel sin tocar la base de datos"""
+        for applicant in self.applicants:
+            snapshot = pickle.loads(pickle.dumps(crear_snapshot(applicant)))
+            excel_orm, pdf_orm = generar_reportes_persona(applicant)
+
+            with self.assertNumQueries(0):
+                excel_snap, pdf_snap = generar_reportes_persona(
+                    snapshot, snapshot.experiencias_historicas, snapshot.resumen_historico
+                )
+
+            self.assertEqual(_valores_excel(excel_snap), _valores_excel(excel_orm))
+            self.assertTrue(pdf_snap.startswith(b'%PDF'))
+
+    def test_pool_de_procesos_conserva_orden(self):
+        """Con varios procesos los resultados llegan en el orden de las personas"""
+        resultados = list(iterar_reportes(self.applicants, procesos=2))
+
+        self.assertEqual([r[0] for r in resultados], self.applicants)
+        for applicant, excel_bytes, pdf_bytes in resultados:
+            hoja = load_workbook(io.BytesIO(excel_bytes))['Información Básica']
+            self.assertEqual(hoja['B3'].value, applicant.cedula)
+            self.assertTrue(pdf_bytes.startswith(b'%PDF'))
+
+    def test_historicos_en_una_consulta(self):
+        """Los contratos históricos de toda la exportación se cargan en una sola consulta"""
+        for applicant in self.applicants:
+            for mes in (1, 6):
+                ContratoHistorico.objects.create(
+                    cedula=int(applicant.cedula), nombre_contratista=applicant.nombre_completo,
+                    numero_registro=mes, contrato=f'CT-{applicant.pk}-{mes}',
+                    fecha_inicio=date(2019, mes, 1), fecha_fin=date(2019, mes + 3, 1),
+                    dias_brutos=90, traslape='NO', dias_reales_contribuidos=90,
+                )
+        applicants = list(queryset_exportacion())
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultados = list(iterar_reportes(applicants, procesos=0))
+
+        historicas = [q for q in consultas.captured_queries if 'contratohistorico' in q['sql'].lower()]
+        self.assertEqual(len(historicas), 1)
+        for applicant, excel_bytes, _ in resultados:
+            hoja = load_workbook(io.BytesIO(excel_bytes))['Experiencia Histórica']
+            self.assertEqual(hoja['B4'].value, 2)
+            self.assertEqual([hoja['B8'].value, hoja['B9'].value, hoja['B10'].value],
+                             [f'CT-{applicant.pk}-1', f'CT-{applicant.pk}-6', None])
+
+    def test_formato_de_hojas(self):
+        """Los estilos con nombre y la plantilla producen el formato esperado en cada hoja"""
+        excel_bytes, _ = generar_reportes_persona(self.applicants[0])
+        wb = load_workbook(io.BytesIO(excel_bytes))
+
+        self.assertEqual(wb.sheetnames, [
+            'Información Básica', 'Experiencia Laboral', 'Bachiller', 'Técnico y Tecnólogo',
+            'Información Académica', 'Posgrados', 'Especializaciones', 'Cálculo Experiencia',
+        ])
+        basica = wb['Información Básica']
+        self.assertEqual(basica['A1'].font.sz, 14)
+        self.assertEqual(basica['A3'].fill.start_color.rgb, '00E8E8E8')
+        self.assertEqual(basica['B3'].border.left.style, 'thin')
+        self.assertIn('A13:B13', [str(rango) for rango in basica.merged_cells.ranges])
+
+        experiencia = wb['Experiencia Laboral']
+        self.assertEqual(experiencia['A3'].value, 'Cargo')
+        self.assertEqual(experiencia['H3'].fill.start_color.rgb, '00366092')
+        self.assertEqual(experiencia['A3'].alignment.horizontal, 'center')
+        self.assertEqual(experiencia['C4'].value, '2020-01-01')
+        self.assertEqual(experiencia['H4'].border.bottom.style, 'thin')
+        self.assertEqual(experiencia.column_dimensions['H'].width, 20)
+        self.assertIn('A1:H1', [str(rango) for rango in experiencia.merged_cells.ranges])
+        self.assertEqual(wb['Cálculo Experiencia']['B3'].value, 12)
+
+    def test_anexo11_renderizador_compartido(self):
+        """El renderizador compartido produce lo mismo que uno nuevo"""
+        self.assertIs(obtener_renderizador_anexo11(), obtener_renderizador_anexo11())
+        fecha = date(2025, 11, 4)
+        renderizador = obtener_renderizador_anexo11()
+
+        # Dos PDFs seguidos con el mismo renderizador no comparten estado de los párrafos fijos
+        renderizador.renderizar(self.applicants[1], fecha)
+        pdf = renderizador.renderizar(self.applicants[0], fecha)
+        self.assertEqual(_texto_pdf(pdf), _texto_pdf(RenderizadorAnexo11().renderizar(self.applicants[0], fecha)))
+        paginas = _texto_pdf(pdf)
+        self.assertEqual(len(paginas), 2)
+        self.assertIn('Cali, 04 de noviembre de 2025', paginas[0])
+        self.assertIn('cuatro (4)', paginas[0])
+        self.assertIn('1 años', paginas[1])
+        self.assertTrue(generar_anexo11_pdf(self.applicants[0]).getvalue().startswith(b'%PDF'))
+
+
+@override_settings(REPORTES_CACHE_ACTIVO=True, REPORTES_CACHE_ROOT=TEMP_REPORTES_CACHE_ROOT)
+class ReportesCacheTest(TestCase):
+    """Tests para la caché de reportes y su invalidación por señales"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_REPORTES_CACHE_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.applicant = crear_persona('300000009', perfil='Profesional')
+        crear_experiencia(self.applicant, date(2020, 1, 1), 366, cargo_anexo_11='Analista')
+        self.generar = mock.patch.object(
+            generacion_reportes, 'generar_reportes_persona',
+            wraps=generacion_reportes.generar_reportes_persona,
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _obtener(self):
+        return obtener_reportes_persona(InformacionBasica.objects.get(pk=self.applicant.pk))
+
+    def test_segunda_lectura_desde_cache(self):
+        primero = self._obtener()
+        segundo = self._obtener()
+
+        self.assertEqual(primero, segundo)
+        self.assertEqual(self.generar.call_count, 1)
+
+    def test_cambio_en_relacionado_invalida(self):
+        """Guardar una experiencia laboral incrementa la versión y se regenera"""
+        self._obtener()
+        version = InformacionBasica.objects.get(pk=self.applicant.pk).version_reportes
+
+        experiencia = self.applicant.experiencias_laborales.first()
+        experiencia.cargo = 'Coordinador'
+        experiencia.save()
+
+        self.assertGreater(InformacionBasica.objects.get(pk=self.applicant.pk).version_reportes, version)
+        excel_bytes, _ = self._obtener()
+        self.assertEqual(self.generar.call_count, 2)
+        self.assertEqual(load_workbook(io.BytesIO(excel_bytes))['Experiencia Laboral']['A4'].value, 'Coordinador')
+
+    def test_recalculo_masivo_invalida(self):
+        """recalcular_experiencias_en_lote guarda con bulk_create (sin señales) e invalida igual"""
+        calcular_experiencia_total(self.applicant)
+        def total_dias(excel_bytes):
+            filas = _valores_excel(excel_bytes)['Cálculo Experiencia']
+            return dict(fila[:2] for fila in filas if fila[0])['Total Días Experiencia']
+
+        self.assertEqual(total_dias(self._obtener()[0]), 367)
+
+        # Cambiar las fechas sin señales y recalcular en lote
+        ExperienciaLaboral.objects.filter(informacion_basica=self.applicant).update(fecha_terminacion=date(2022, 1, 1))
+        recalcular_experiencias_en_lote(InformacionBasica.objects.filter(pk=self.applicant.pk))
+
+        excel_bytes, _ = self._obtener()
+        self.assertEqual(self.generar.call_count, 2)
+        self.assertEqual(total_dias(excel_bytes), 732)
+
+    def test_guardar_instancia_desactualizada_no_retrocede_version(self):
+        """Una instancia cargada antes de un cambio relacionado no reutiliza una versión ya usada"""
+        desactualizada = InformacionBasica.objects.get(pk=self.applicant.pk)
+        ExperienciaLaboral.objects.filter(informacion_basica=self.applicant).first().save()
+        version_actual = InformacionBasica.objects.get(pk=self.applicant.pk).version_reportes
+
+        desactualizada.telefono = '3110000000'
+        desactualizada.save()
+
+        self.assertGreater(desactualizada.version_reportes, version_actual)
+        self.assertEqual(
+            InformacionBasica.objects.get(pk=self.applicant.pk).version_reportes,
+            desactualizada.version_reportes,
+        )
+
+    def test_guardar_persona_sin_consulta_extra(self):
+        """La versión se incrementa en el mismo UPDATE y se lee solo si se consulta"""
+        applicant = InformacionBasica.objects.get(pk=self.applicant.pk)
+        version = applicant.version_reportes
+
+        applicant.telefono = '3110000000'
+        with CaptureQueriesContext(connection) as consultas:
+            applicant.save()
+
+        self.assertEqual([q['sql'].split()[0] for q in consultas.captured_queries], ['UPDATE'])
+        self.assertEqual(applicant.version_reportes, version + 1)
+
+    def test_formset_invalida_una_vez(self):
+        """Dentro de reportes_agrupados cada fila guardada no escribe en InformacionBasica"""
+        version = InformacionBasica.objects.get(pk=self.applicant.pk).version_reportes
+        experiencia = self.applicant.experiencias_laborales.first()
+
+        with CaptureQueriesContext(connection) as consultas:
+            with reportes_agrupados():
+                for cargo in ('Coordinador', 'Director', 'Gerente'):
+                    experiencia.cargo = cargo
+                    experiencia.save()
+
+        actualizaciones = [q for q in consultas.captured_queries
+                           if q['sql'].startswith('UPDATE "formapp_informacionbasica"')]
+        self.assertEqual(len(actualizaciones), 1)
+        self.assertEqual(InformacionBasica.objects.get(pk=self.applicant.pk).version_reportes, version + 1)
@@ -0,0 +1,130 @@
+"""
+Tests de propiedades para formapp.intervalos: con intervalos aleatorios
+(semilla fija) cada operación se compara con el conjunto de días cubiertos.
+"""
+import random
+from datetime import date, timedelta
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from formapp.intervalos import (
+    agregar_bloque,
+    anos_meses_dias,
+    bloques_afectados,
+    bloques_fusionados,
+    dias_bloques,
+    dias_fusionados_por_grupo,
+    fusionar_intervalos,
+    meses_y_dias_entre,
+    texto_anos_meses_dias,
+)
+
+INICIO = date(2010, 1, 1)
+
+
+def intervalos_aleatorios(aleatorio, cantidad):
+    intervalos = []
+    for _ in range(cantidad):
+        inicio = INICIO + timedelta(days=aleatorio.randrange(2000))
+        intervalos.append((inicio, inicio + timedelta(days=aleatorio.choice([0, 1, 30, aleatorio.randrange(400)]))))
+    return intervalos
+
+
+def dias_cubiertos(intervalos):
+    dias = set()
+    for inicio, fin in intervalos:
+        dias.update(range(inicio.toordinal(), fin.toordinal() + 1))
+    return dias
+
+
+class IntervalosTest(SimpleTestCase):
+    """Propiedades de la fusión y de la aritmética de bloques"""
+
+    def setUp(self):
+        self.aleatorio = random.Random(24)
+
+    def test_fusionar_cubre_los_mismos_dias_sin_traslapes(self):
+        for _ in range(300):
+            intervalos = intervalos_aleatorios(self.aleatorio, self.aleatorio.randrange(12))
+            fusionados = fusionar_intervalos(intervalos)
+
+            self.assertEqual(dias_cubiertos(fusionados), dias_cubiertos(intervalos))
+            for (_, fin), (siguiente, _) in zip(fusionados, fusionados[1:]):
+                self.assertLess(fin, siguiente)
+            # El orden de entrada no importa y fusionar es idempotente
+            self.assertEqual(fusionar_intervalos(sorted(intervalos, reverse=True)), fusionados)
+            self.assertEqual(fusionar_intervalos(fusionados), fusionados)
+
+            bloques = bloques_fusionados(intervalos)
+            self.assertEqual(bloques, [[inicio.toordinal(), fin.toordinal()] for inicio, fin in fusionados])
+            self.assertEqual(dias_bloques(bloques), len(dias_cubiertos(intervalos)))
+
+    def test_fusionar_casos_limite(self):
+        dia = date(2020, 1, 1)
+        self.assertEqual(fusionar_intervalos([]), [])
+        self.assertEqual(fusionar_intervalos([(dia, dia)]), [(dia, dia)])
+        # Intervalos que se tocan en un día se unen; días consecutivos no
+        siguiente = dia + timedelta(days=1)
+        self.assertEqual(fusionar_intervalos([(dia, siguiente), (siguiente, siguiente)]), [(dia, siguiente)])
+        self.assertEqual(fusionar_intervalos([(dia, dia), (siguiente, siguiente)]), [(dia, dia), (siguiente, siguiente)])
+        # Uno contenido en otro
+        self.assertEqual(fusionar_intervalos([(3, 10), (4, 5), (1, 2)]), [(1, 2), (3, 10)])
+
+    def test_agregar_bloque_igual_que_fusionar_todo(self):
+        for _ in range(200):
+            intervalos = intervalos_aleatorios(self.aleatorio, self.aleatorio.randrange(10))
+            bloques = bloques_fusionados(intervalos)
+            total = dias_bloques(bloques)
+            for inicio, fin in intervalos_aleatorios(self.aleatorio, 5):
+                total += agregar_bloque(bloques, inicio.toordinal(), fin.toordinal())
+                intervalos.append((inicio, fin))
+
+                self.assertEqual(bloques, bloques_fusionados(intervalos))
+                self.assertEqual(total, len(dias_cubiertos(intervalos)))
+
+    def test_bloques_afectados(self):
+        for _ in range(200):
+            bloques = bloques_fusionados(intervalos_aleatorios(self.aleatorio, self.aleatorio.randrange(10)))
+            inicio = INICIO.toordinal() + self.aleatorio.randrange(2400)
+            fin = inicio + self.aleatorio.randrange(300)
+
+            desde, hasta = bloques_afectados(bloques, inicio, fin)
+
+            esperados = [i for i, (b_inicio, b_fin) in enumerate(bloques) if b_inicio <= fin and b_fin >= inicio]
+            self.assertEqual(list(range(desde, hasta)), esperados)
+
+    def test_dias_fusionados_por_grupo_igual_que_por_persona(self):
+        for _ in range(50):
+            total_grupos = self.aleatorio.randrange(1, 8)
+            por_grupo = [intervalos_aleatorios(self.aleatorio, self.aleatorio.randrange(6)) for _ in range(total_grupos)]
+            grupos = np.array([g for g, intervalos in enumerate(por_grupo) for _ in intervalos], dtype=np.int64)
+            inicios = np.array([i.toordinal() for intervalos in por_grupo for i, _ in intervalos], dtype=np.int64)
+            fines = np.array([f.toordinal() for intervalos in por_grupo for _, f in intervalos], dtype=np.int64)
+
+            dias = dias_fusionados_por_grupo(grupos, inicios, fines, total_grupos)
+
+            self.assertEqual(list(dias), [len(dias_cubiertos(intervalos)) for intervalos in por_grupo])
+
+    def test_anos_meses_dias(self):
+        for total_dias in list(range(800)) + [self.aleatorio.randrange(30000) for _ in range(200)]:
+            anos, meses, dias = anos_meses_dias(total_dias)
+            self.assertEqual(anos * 365 + meses * 30 + dias, total_dias)
+            self.assertTrue(0 <= meses <= 12 and 0 <= dias < 30)
+        self.assertEqual(texto_anos_meses_dias(547), '1 años, 6 meses y 2 días')
+        self.assertEqual(texto_anos_meses_dias(425), '1 años y 2 meses')
+
+    def test_meses_y_dias_entre(self):
+        self.assertEqual(meses_y_dias_entre(date(2020, 1, 31), date(2020, 2, 29)), (0, 29))
+        self.assertEqual(meses_y_dias_entre(date(2020, 1, 15), date(2021, 1, 15)), (12, 366))
+        for _ in range(300):
+            inicio, fin = intervalos_aleatorios(self.aleatorio, 1)[0]
+            meses, dias = meses_y_dias_entre(inicio, fin)
+
+            self.assertEqual(dias, (fin - inicio).days)
+            # Meses completos: sumar meses al inicio no pasa del fin, sumar uno más sí
+            def sumar_meses(cantidad):
+                indice = inicio.month - 1 + cantidad
+                return (inicio.year + indice // 12, indice % 12 + 1, inicio.day)
+            self.assertLessEqual(sumar_meses(meses), (fin.year, fin.month, fin.day))
+            self.assertGreater(sumar_meses(meses + 1), (fin.year, fin.month, fin.day))
@@ -0,0 +1,245 @@
+"""
+Tests para el recálculo masivo de experiencia (comando recalcular_experiencias)
+y la actualización incremental sobre los intervalos fusionados guardados.
+"""
+import io
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.db import connection
+from django.forms import inlineformset_factory
+from django.test import TestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from basedatosaquicali.models import ContratoHistorico
+from formapp.models import InformacionBasica, ExperienciaLaboral, CalculoExperiencia
+from formapp.services import (
+    actualizar_experiencia_incremental,
+    calcular_experiencia_total,
+    campos_calculo_experiencia,
+    intervalos_cambiados,
+    rangos_de_cedulas,
+    recalcular_experiencias_en_lote,
+)
+from formapp.tests import crear_contrato_historico, crear_experiencia, crear_persona
+
+
+class RecalcularExperienciasTest(TestCase):
+    """El recálculo por conjunto guarda lo mismo que calcular_experiencia_total"""
+
+    def setUp(self):
+        self.candidatos = [crear_persona(str(1000 + i)) for i in range(6)]
+        for i, candidato in enumerate(self.candidatos):
+            for j in range(i):
+                crear_experiencia(candidato, date(2015 + j, 1, 1), 200 + 30 * i)
+            if i % 2:
+                # Traslapa con la primera experiencia del formulario
+                crear_contrato_historico(1000 + i, date(2015, 6, 1), date(2016, 7, 5))
+        crear_persona('CE-77')
+        crear_contrato_historico(99999, date(2020, 1, 1), date(2020, 4, 10))
+
+    def _calculos(self):
+        return {
+            calculo.informacion_basica_id: (
+                calculo.total_meses_experiencia, calculo.total_dias_experiencia,
+                calculo.total_experiencia_anos, calculo.anos_y_meses_experiencia,
+            )
+            for calculo in CalculoExperiencia.objects.all()
+        }
+
+    def test_igual_que_calcular_experiencia_total(self):
+        for candidato in InformacionBasica.objects.all():
+            calcular_experiencia_total(candidato)
+        esperado = self._calculos()
+        CalculoExperiencia.objects.filter(informacion_basica=self.candidatos[1]).delete()
+        CalculoExperiencia.objects.filter(informacion_basica=self.candidatos[2]).update(total_dias_experiencia=1)
+        versiones = dict(InformacionBasica.objects.values_list('pk', 'version_reportes'))
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = recalcular_experiencias_en_lote(InformacionBasica.objects.all())
+
+        # Candidatos, experiencias, contratos, los cálculos guardados, un INSERT ... ON CONFLICT
+        # y la invalidación de reportes, más el savepoint de la transacción
+        self.assertEqual(len(consultas.captured_queries), 8)
+        self.assertEqual(self._calculos(), esperado)
+        self.assertEqual(resultado, {'procesados': 7, 'con_historico': 3, 'sin_historico': 4, 'errores': []})
+        # Solo se invalidan los reportes de quienes cambiaron sus totales
+        cambiaron = {
+            pk for pk, version in InformacionBasica.objects.values_list('pk', 'version_reportes')
+            if version != versiones[pk]
+        }
+        self.assertEqual(cambiaron, {self.candidatos[1].pk, self.candidatos[2].pk})
+
+        # Sin cambios no se escribe nada
+        with CaptureQueriesContext(connection) as consultas:
+            recalcular_experiencias_en_lote(InformacionBasica.objects.all())
+        escrituras = [q for q in consultas.captured_queries if q['sql'].split()[0] in ('INSERT', 'UPDATE')]
+        self.assertEqual(escrituras, [])
+
+    def test_rangos_de_cedulas(self):
+        rangos = rangos_de_cedulas(InformacionBasica.objects.all(), 3)
+
+        self.assertEqual(rangos, [('1000', '1002'), ('1003', '1005'), ('CE-77', 'CE-77')])
+        self.assertEqual(rangos_de_cedulas(InformacionBasica.objects.filter(cedula='1004'), 4), [('1004', '1004')])
+        self.assertEqual(rangos_de_cedulas(InformacionBasica.objects.none(), 2), [])
+
+    def test_rango_de_cedulas_en_orden_de_texto(self):
+        # '9' > '10' como texto: el rango ('10', '9') contiene cédulas fuera del orden numérico
+        for cedula in ('9', '10', '95', '100'):
+            crear_persona(cedula)
+            crear_contrato_historico(int(cedula), date(2019, 1, 1), date(2019, 1, 31))
+        desde, hasta = rangos_de_cedulas(InformacionBasica.objects.filter(cedula__in=['9', '10', '95', '100']), 1)[0]
+        self.assertEqual((desde, hasta), ('10', '95'))
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = recalcular_experiencias_en_lote(
+                InformacionBasica.objects.filter(cedula__gte=desde, cedula__lte=hasta)
+            )
+
+        # También entran las cédulas 1000-1005 del setUp (las impares con contrato)
+        self.assertEqual(resultado, {'procesados': 10, 'con_historico': 7, 'sin_historico': 3, 'errores': []})
+        sql_contratos = [q['sql'] for q in consultas.captured_queries if 'contratohistorico' in q['sql']]
+        self.assertEqual(len(sql_contratos), 1)
+        self.assertIn(' IN (', sql_contratos[0])
+
+    def test_comando(self):
+        salida = io.StringIO()
+        call_command('recalcular_experiencias', verbose=True, stdout=salida)
+
+        texto = salida.getvalue()
+        self.assertIn('Total procesados: 7/7', texto)
+        self.assertIn('Con experiencia histórica: 3', texto)
+        self.assertIn('(Cédula: 1001)\n   📝 Formulario: 1 exp | 💾 Histórico: 1 exp', texto)
+        self.assertIn('(Cédula: 1002)\n   📝 Solo formulario: 2 exp', texto)
+        self.assertEqual(CalculoExperiencia.objects.count(), 7)
+
+    def test_comando_continua_tras_un_error(self):
+        calcular = campos_calculo_experiencia
+
+        def falla_en_1003(intervalos, cedula):
+            if cedula == '1003':
+                raise ValueError('fecha inválida')
+            return calcular(intervalos, cedula)
+
+        salida = io.StringIO()
+        with mock.patch('formapp.services.campos_calculo_experiencia', side_effect=falla_en_1003):
+            call_command('recalcular_experiencias', stdout=salida)
+
+        texto = salida.getvalue()
+        self.assertIn('(Cédula: 1003): fecha inválida', texto)
+        self.assertIn('Total procesados: 6/7', texto)
+        self.assertIn('Errores: 1', texto)
+        self.assertIn('completado con algunos errores', texto)
+        self.assertEqual(CalculoExperiencia.objects.count(), 6)
+        self.assertFalse(CalculoExperiencia.objects.filter(informacion_basica__cedula='1003').exists())
+
+
+class ExperienciaIncrementalTest(TestCase):
+    """La actualización incremental deja el mismo cálculo que el cálculo completo"""
+
+    def setUp(self):
+        self.candidato = crear_persona('2000')
+        crear_experiencia(self.candidato, date(2018, 1, 1), 100)
+        crear_contrato_historico(2000, date(2018, 3, 1), date(2018, 12, 26))
+        crear_contrato_historico(2000, date(2021, 1, 1), date(2021, 3, 2))
+        calcular_experiencia_total(self.candidato)
+
+    def _esperado(self):
+        intervalos = list(self.candidato.experiencias_laborales.values_list('fecha_inicial', 'fecha_terminacion'))
+        intervalos += ContratoHistorico.objects.filter(cedula=2000).values_list('fecha_inicio', 'fecha_fin')
+        campos = campos_calculo_experiencia(intervalos, '2000')
+        campos['total_experiencia_anos'] = Decimal(str(campos['total_experiencia_anos']))
+        return campos
+
+    def _guardado(self):
+        calculo = CalculoExperiencia.objects.get(informacion_basica=self.candidato)
+        return {campo: getattr(calculo, campo) for campo in self._esperado()}
+
+    def test_cambios_aleatorios(self):
+        aleatorio = random.Random(21)
+        for _ in range(40):
+            experiencias = list(self.candidato.experiencias_laborales.all())
+            operacion = aleatorio.choice(['agregar', 'eliminar', 'cambiar'] if experiencias else ['agregar'])
+            agregados, eliminados = [], []
+            if operacion != 'agregar':
+                experiencia = aleatorio.choice(experiencias)
+                eliminados.append((experiencia.fecha_inicial, experiencia.fecha_terminacion))
+                experiencia._actualizacion_incremental = True
+                experiencia.delete()
+            if operacion != 'eliminar':
+                inicio = date(2016, 1, 1) + timedelta(days=aleatorio.randrange(3000))
+                experiencia = crear_experiencia(self.candidato, inicio, aleatorio.randrange(1, 400), incremental=True)
+                agregados.append((experiencia.fecha_inicial, experiencia.fecha_terminacion))
+
+            actualizar_experiencia_incremental(self.candidato, agregados, eliminados)
+
+            self.assertIsNotNone(CalculoExperiencia.objects.get(informacion_basica=self.candidato).intervalos_fusionados)
+            self.assertEqual(self._guardado(), self._esperado())
+
+    def test_agregar_no_relee_las_experiencias(self):
+        experiencia = crear_experiencia(self.candidato, date(2023, 1, 1), 30, incremental=True)
+
+        with CaptureQueriesContext(connection) as consultas:
+            actualizar_experiencia_incremental(
+                self.candidato, agregados=[(experiencia.fecha_inicial, experiencia.fecha_terminacion)]
+            )
+
+        tablas = ' '.join(q['sql'] for q in consultas.captured_queries)
+        self.assertNotIn('formapp_experiencialaboral', tablas)
+        self.assertNotIn('basedatosaquicali_contratohistorico', tablas)
+        self.assertEqual(self._guardado()['total_dias_experiencia'], self._esperado()['total_dias_experiencia'])
+
+    def test_contrato_historico_nuevo_obliga_calculo_completo(self):
+        crear_contrato_historico(2000, date(2024, 1, 1), date(2024, 1, 11))
+        self.assertIsNone(CalculoExperiencia.objects.get(informacion_basica=self.candidato).intervalos_fusionados)
+
+        actualizar_experiencia_incremental(self.candidato)
+
+        self.assertEqual(self._guardado(), self._esperado())
+
+    def test_guardado_desde_el_admin_de_experiencias_descarta_intervalos(self):
+        model_admin = site._registry[ExperienciaLaboral]
+        request = RequestFactory().post('/')
+        experiencia = self.candidato.experiencias_laborales.get()
+        experiencia.fecha_terminacion = date(2019, 6, 30)
+
+        model_admin.save_model(request, experiencia, None, True)
+
+        self.assertIsNone(CalculoExperiencia.objects.get(informacion_basica=self.candidato).intervalos_fusionados)
+        nueva = crear_experiencia(self.candidato, date(2023, 1, 1), 30, incremental=True)
+        actualizar_experiencia_incremental(self.candidato, agregados=[(nueva.fecha_inicial, nueva.fecha_terminacion)])
+        self.assertEqual(self._guardado(), self._esperado())
+
+        calcular_experiencia_total(self.candidato)
+        model_admin.delete_model(request, experiencia)
+        self.assertIsNone(CalculoExperiencia.objects.get(informacion_basica=self.candidato).intervalos_fusionados)
+        actualizar_experiencia_incremental(self.candidato)
+        self.assertEqual(self._guardado(), self._esperado())
+
+    def test_intervalos_cambiados_en_formset(self):
+        primera = crear_experiencia(self.candidato, date(2010, 1, 1), 10)
+        segunda = crear_experiencia(self.candidato, date(2011, 1, 1), 10)
+        FormSet = inlineformset_factory(
+            InformacionBasica, ExperienciaLaboral, fields=['fecha_inicial', 'fecha_terminacion'], extra=1,
+        )
+        datos = {
+            'experiencias_laborales-TOTAL_FORMS': '3', 'experiencias_laborales-INITIAL_FORMS': '2',
+            'experiencias_laborales-0-id': primera.pk, 'experiencias_laborales-0-fecha_inicial': '2010-01-01',
+            'experiencias_laborales-0-fecha_terminacion': '2010-03-01',
+            'experiencias_laborales-1-id': segunda.pk, 'experiencias_laborales-1-fecha_inicial': '2011-01-01',
+            'experiencias_laborales-1-fecha_terminacion': '2011-01-11', 'experiencias_laborales-1-DELETE': 'on',
+            'experiencias_laborales-2-fecha_inicial': '2012-01-01',
+            'experiencias_laborales-2-fecha_terminacion': '2012-02-01',
+        }
+        experiencias = ExperienciaLaboral.objects.filter(pk__in=[primera.pk, segunda.pk]).order_by('pk')
+        formset = FormSet(datos, instance=self.candidato, queryset=experiencias)
+        self.assertTrue(formset.is_valid(), formset.errors)
+
+        agregados, eliminados = intervalos_cambiados(formset)
+
+        self.assertEqual(agregados, [(date(2010, 1, 1), date(2010, 3, 1)), (date(2012, 1, 1), date(2012, 2, 1))])
+        self.assertEqual(eliminados, [(date(2010, 1, 1), date(2010, 1, 11)), (date(2011, 1, 1), date(2011, 1, 11))])
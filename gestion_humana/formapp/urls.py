@@ -14,6 +14,12 @@ from .views.views_admin import (
 from .views.views_reports import (
     download_all_zip,
     download_individual_zip,
+    exportar_consolidado,
+    iniciar_exportacion,
+    exportacion_estado,
+    exportacion_descargar,
+    cache_documentos_estado,
+    metricas_http,
 )
 
 app_name = 'formapp'
@@ -32,5 +38,11 @@ urlpatterns = [
     
     # Rutas de reportes
     path('admin/download-all/', download_all_zip, name='download_all'),
+    path('admin/exportaciones/consolidado/', exportar_consolidado, name='exportacion_consolidado'),
+    path('admin/exportaciones/iniciar/', iniciar_exportacion, name='exportacion_iniciar'),
+    path('admin/exportaciones/<int:pk>/estado/', exportacion_estado, name='exportacion_estado'),
+    path('admin/exportaciones/<int:pk>/descargar/', exportacion_descargar, name='exportacion_descargar'),
+    path('admin/cache-documentos/estado/', cache_documentos_estado, name='cache_documentos_estado'),
+    path('admin/metricas-http/', metricas_http, name='metricas_http'),
     path('admin/applicants/<int:pk>/download/', download_individual_zip, name='download_individual'),
 ]
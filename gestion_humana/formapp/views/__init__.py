@@ -14,6 +14,12 @@ from .views_admin import (
 from .views_reports import (
     download_individual_zip,
     download_all_zip,
+    exportar_consolidado,
+    iniciar_exportacion,
+    exportacion_estado,
+    exportacion_descargar,
+    cache_documentos_estado,
+    metricas_http,
 )
 
 __all__ = [
@@ -29,4 +35,10 @@ __all__ = [
     # Report views
     'download_individual_zip',
     'download_all_zip',
+    'exportar_consolidado',
+    'iniciar_exportacion',
+    'exportacion_estado',
+    'exportacion_descargar',
+    'cache_documentos_estado',
+    'metricas_http',
 ]
@@ -32,11 +32,15 @@ from ..forms import (
     AnexosAdicionalesForm,
 )
 from ..services import (
-    calcular_experiencia_total,
+    actualizar_experiencia_incremental,
+    intervalos_cambiados,
+    marcar_actualizacion_incremental,
     enviar_correo_solicitud_correccion,
     obtener_experiencias_historicas,
     obtener_resumen_experiencia_historica
 )
+from ..intervalos import meses_y_dias_entre
+from ..signals import reportes_agrupados
 
 import logging
 import traceback
@@ -88,7 +92,8 @@ class ApplicantDetailView(LoginRequiredMixin, DetailView):
         context = super().get_context_data(**kwargs)
 
         # Obtener experiencias históricas del candidato
-        experiencias_historicas = obtener_experiencias_historicas(self.object.cedula)
+        experiencias_historicas = list(obtener_experiencias_historicas(self.object.cedula))
+        # Resumen guardado en ResumenHistorico
         resumen_historico = obtener_resumen_experiencia_historica(self.object.cedula)
 
         context['experiencias_historicas'] = experiencias_historicas
@@ -144,7 +149,7 @@ def applicant_edit_view(request, pk):
 
         if form_valid and documentos_valid and antecedentes_valid and anexos_valid and experiencia_valid and basica_valid and superior_valid and academica_valid and posgrado_valid and especializacion_valid:
             try:
-                with transaction.atomic():
+                with transaction.atomic(), reportes_agrupados():
                     informacion_basica = form.save()
 
                     # Guardar documentos de identidad
@@ -164,10 +169,10 @@ def applicant_edit_view(request, pk):
 
                     # Guardar todos los formsets
                     # Guardar experiencia laboral - usar save() que maneja automáticamente todo
+                    marcar_actualizacion_incremental(experiencia_formset)
                     experiencia_formset.save()
 
                     # Recalcular meses y días SOLO para experiencias que cambiaron sus fechas
-                    from datetime import datetime as dt
                     experiencias_modificadas = []
 
                     for form_exp in experiencia_formset:
@@ -177,35 +182,9 @@ def applicant_edit_view(request, pk):
                             if form_exp.has_changed() and ('fecha_inicial' in form_exp.changed_data or 'fecha_terminacion' in form_exp.changed_data):
                                 experiencia = form_exp.instance
                                 if experiencia.fecha_inicial and experiencia.fecha_terminacion:
-                                    fecha_inicio = dt.combine(experiencia.fecha_inicial, dt.min.time())
-                                    fecha_fin = dt.combine(experiencia.fecha_terminacion, dt.min.time())
-
-                                    # Calcular diferencia
-                                    delta = fecha_fin - fecha_inicio
-                                    total_dias = delta.days
-
-                                    # Calcular meses
-                                    anos = fecha_fin.year - fecha_inicio.year
-                                    meses = fecha_fin.month - fecha_inicio.month
-                                    dias = fecha_fin.day - fecha_inicio.day
-
-                                    if dias < 0:
-                                        meses -= 1
-                                        # Obtener días del mes anterior
-                                        if fecha_inicio.month == 1:
-                                            ultimo_dia = dt(fecha_inicio.year - 1, 12, 31).day
-                                        else:
-                                            ultimo_dia = dt(fecha_inicio.year, fecha_inicio.month - 1, 1).day
-                                        dias += ultimo_dia
-
-                                    if meses < 0:
-                                        anos -= 1
-                                        meses += 12
-
-                                    total_meses = (anos * 12) + meses
-
-                                    experiencia.meses_experiencia = total_meses
-                                    experiencia.dias_experiencia = total_dias
+                                    experiencia.meses_experiencia, experiencia.dias_experiencia = meses_y_dias_entre(
+                                        experiencia.fecha_inicial, experiencia.fecha_terminacion
+                                    )
                                     experiencias_modificadas.append(experiencia)
 
                     # Guardar solo las experiencias que se modificaron (bulk update)
@@ -218,7 +197,9 @@ def applicant_edit_view(request, pk):
                     
                     # Calcular experiencia total automáticamente SOLO si hubo cambios en el formset
                     if experiencia_formset.has_changed():
-                        calcular_experiencia_total(informacion_basica)
+                        actualizar_experiencia_incremental(
+                            informacion_basica, *intervalos_cambiados(experiencia_formset)
+                        )
 
                     # Guardar los demás formsets
                     basica_formset.save()
@@ -29,7 +29,15 @@ from ..forms import (
     AntecedentesForm,
     AnexosAdicionalesForm,
 )
-from ..services import calcular_experiencia_total, enviar_correo_async
+from ..services import (
+    actualizar_experiencia_incremental,
+    calcular_experiencia_total,
+    enviar_correo_async,
+    intervalos_cambiados,
+    marcar_actualizacion_incremental,
+)
+from ..intervalos import meses_y_dias_entre
+from ..signals import reportes_agrupados
 
 import logging
 
@@ -67,7 +75,7 @@ def public_form_view(request):
             # Solo proceder si TODO es válido
             if documentos_valid and antecedentes_valid and anexos_valid and experiencia_valid and basica_valid and superior_valid and academica_valid and posgrado_valid and especializacion_valid:
                 try:
-                    with transaction.atomic():
+                    with transaction.atomic(), reportes_agrupados():
                         informacion_basica = form.save()
 
                         # Guardar documentos de identidad
@@ -403,7 +411,7 @@ def public_update_view(request, token):
            posgrado_valid and especializacion_valid:
             
             try:
-                with transaction.atomic():
+                with transaction.atomic(), reportes_agrupados():
                     # GUARDAR SOLO LOS CAMPOS EDITABLES
                     # Los campos no editables mantienen sus valores actuales de la BD
 
@@ -453,44 +461,29 @@ def public_update_view(request, token):
                     # OPTIMIZACIÓN: Solo procesar experiencia si está en campos_editables
                     if 'experiencia_laboral' in campos_editables:
                         tiempo_pre_exp = time.time()
+                        marcar_actualizacion_incremental(experiencia_formset)
                         experiencia_formset.save()
                         
                         # Recalcular experiencia (lógica idéntica a admin)
-                        from datetime import datetime as dt
                         experiencias_modificadas = []
                         for form_exp in experiencia_formset:
                             if form_exp.instance.pk and not form_exp.cleaned_data.get('DELETE', False):
                                 if form_exp.has_changed() and ('fecha_inicial' in form_exp.changed_data or 'fecha_terminacion' in form_exp.changed_data):
                                     experiencia = form_exp.instance
                                     if experiencia.fecha_inicial and experiencia.fecha_terminacion:
-                                        fecha_inicio = dt.combine(experiencia.fecha_inicial, dt.min.time())
-                                        fecha_fin = dt.combine(experiencia.fecha_terminacion, dt.min.time())
-                                        delta = fecha_fin - fecha_inicio
-                                        total_dias = delta.days
-                                        anos = fecha_fin.year - fecha_inicio.year
-                                        meses = fecha_fin.month - fecha_inicio.month
-                                        dias = fecha_fin.day - fecha_inicio.day
-                                        if dias < 0:
-                                            meses -= 1
-                                            if fecha_inicio.month == 1:
-                                                ultimo_dia = dt(fecha_inicio.year - 1, 12, 31).day
-                                            else:
-                                                ultimo_dia = dt(fecha_inicio.year, fecha_inicio.month - 1, 1).day
-                                            dias += ultimo_dia
-                                        if meses < 0:
-                                            anos -= 1
-                                            meses += 12
-                                        total_meses = (anos * 12) + meses
-                                        experiencia.meses_experiencia = total_meses
-                                        experiencia.dias_experiencia = total_dias
+                                        experiencia.meses_experiencia, experiencia.dias_experiencia = meses_y_dias_entre(
+                                            experiencia.fecha_inicial, experiencia.fecha_terminacion
+                                        )
                                         experiencias_modificadas.append(experiencia)
                         
                         if experiencias_modificadas:
                             from ..models import ExperienciaLaboral
                             ExperienciaLaboral.objects.bulk_update(experiencias_modificadas, ['meses_experiencia', 'dias_experiencia'])
 
-                        # Recalcular experiencia total solo si se modificó experiencia
-                        calcular_experiencia_total(informacion_basica)
+                        # Recalcular experiencia total solo con los intervalos que cambiaron
+                        actualizar_experiencia_incremental(
+                            informacion_basica, *intervalos_cambiados(experiencia_formset)
+                        )
                         
                         tiempo_post_exp = time.time()
                         logger.info(f'[CORRECCIÓN-TIMING] ⏱️ Cálculo de experiencia: {tiempo_post_exp - tiempo_pre_exp:.2f}s')
@@ -4,93 +4,116 @@ Refactorizado desde views.py para mejor organización.
 """
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, FileResponse
+from django.views.decorators.http import require_POST
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, StreamingHttpResponse, FileResponse, JsonResponse, Http404
+)
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from datetime import datetime
 import zipfile
 import io
 import os
 import logging
 import tempfile
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-
-from ..models import InformacionBasica
-from ..report_generators_excel import create_excel_for_person
-from ..report_generators_pdf import generar_anexo11_pdf
+from ..models import InformacionBasica, ExportacionPersonal
+from ..generacion_reportes import obtener_reportes_persona
+from ..zip_streaming import iterar_zip, escribir_entrada
+from .. import cliente_http
+from ..cache_documentos import obtener_cache
+from ..descargas import MotorDescargas
+from ..consolidado import (
+    FORMATOS_EXPORTACION,
+    queryset_consolidado,
+    iterar_csv_exportacion,
+    escribir_xlsx_exportacion,
+)
+from ..exportaciones import (
+    get_file_extension,
+    iterar_entradas_personal,
+    iterar_entradas_incrementales,
+    resolver_base_incremental,
+    queryset_exportacion,
+    ruta_archivo_exportacion,
+    ejecutar_exportacion_async,
+    recuperar_exportaciones_abandonadas,
+)
 
 logger = logging.getLogger(__name__)
 
-def get_file_extension(file_field, file_content=None):
-    """Helper para obtener la extensión del archivo"""
-    if not file_field:
-        return '.pdf'
-    
-    ext = os.path.splitext(file_field.name)[1]
-    if not ext and hasattr(file_field, 'url'):
-        url = file_field.url
-        if '.' in url.split('/')[-1]:
-            ext = '.' + url.split('/')[-1].split('.')[-1].split('?')[0]
-            
-    if not ext:
-        # Intentar detectar por contenido magic bytes
-        if file_content:
-             content_start = file_content[:10]
-        else:
-             try:
-                 with file_field.open('rb') as f:
-                     content_start = f.read(10)
-                     file_field.seek(0)
-             except:
-                 content_start = b''
-                 
-        if content_start.startswith(b'%PDF'):
-            ext = '.pdf'
-        elif content_start.startswith(b'\x89PNG'):
-            ext = '.png'
-        elif content_start.startswith(b'\xff\xd8\xff'):
-            ext = '.jpg'
-        else:
-            ext = '.pdf' # Default
-            
-    return ext
-
-
-def read_file_content_safe(file_field, connect_timeout=5, read_timeout=20):
+def _tareas_documentos_individual(applicant):
     """
-    Lee contenido de archivos locales o remotos (Cloudinary) con timeout para evitar
-    bloqueos largos durante la creación de ZIPs masivos.
+    Lista los documentos de una persona para su ZIP individual.
+
+    Returns:
+        Lista de tuplas (field, zip_path_sin_extension)
     """
-    if not file_field:
-        return None
+    tareas = []
+
+    def _collect(field, path):
+        if field:
+            tareas.append((field, path))
+
+    # 3. Certificados laborales
+    for idx, experiencia in enumerate(applicant.experiencias_laborales.all(), start=1):
+        cargo_safe = experiencia.cargo.replace(' ', '_').replace('/', '-')
+        _collect(experiencia.certificado_laboral, f"Certificados_Laborales/{idx}_{cargo_safe}")
+
+    # 4. Documentos de identidad
+    if hasattr(applicant, 'documentos_identidad'):
+        docs = applicant.documentos_identidad
+        _collect(docs.fotocopia_cedula, "Documentos_Identidad/Cedula")
+        _collect(docs.libreta_militar, "Documentos_Identidad/Libreta_Militar")
+        _collect(docs.hoja_de_vida, "Documentos_Identidad/Hoja_de_Vida")
+
+    # 5. Antecedentes
+    if hasattr(applicant, 'antecedentes'):
+        ant = applicant.antecedentes
+        _collect(ant.certificado_procuraduria, "Antecedentes/Procuraduria")
+        _collect(ant.certificado_contraloria, "Antecedentes/Contraloria")
+        _collect(ant.certificado_policia, "Antecedentes/Policia")
+        _collect(ant.certificado_medidas_correctivas, "Antecedentes/Medidas_Correctivas")
+        _collect(ant.certificado_delitos_sexuales, "Antecedentes/Delitos_Sexuales")
+        _collect(ant.certificado_redam, "Antecedentes/REDAM")
+
+    # 6. Documentos académicos
+    for idx, academica in enumerate(applicant.formacion_academica.all(), start=1):
+        profesion_safe = academica.profesion.replace(' ', '_').replace('/', '-')[:30]
+        _collect(academica.fotocopia_titulo, f"Documentos_Academicos/{idx}_{profesion_safe}_Titulo")
+        _collect(academica.fotocopia_tarjeta_profesional, f"Documentos_Academicos/{idx}_{profesion_safe}_Tarjeta_Profesional")
+        _collect(academica.certificado_vigencia_tarjeta, f"Documentos_Academicos/{idx}_{profesion_safe}_Certificado_Vigencia")
+
+    # 6.1. Educación Básica
+    for idx, edu in enumerate(applicant.educacion_basica.all(), start=1):
+        _collect(edu.acta_grado_diploma, f"Educacion_Basica/{idx}_Diploma_Bachiller")
+
+    # 6.2. Educación Superior
+    for idx, edu in enumerate(applicant.educacion_superior.all(), start=1):
+        nivel_safe = edu.nivel.replace(' ', '_')
+        _collect(edu.documento_soporte, f"Educacion_Superior/{idx}_{nivel_safe}_Diploma")
+
+    # 6.3. Posgrados
+    for idx, edu in enumerate(applicant.posgrados.all(), start=1):
+        nombre_safe = edu.nombre_posgrado.replace(' ', '_')[:30]
+        _collect(edu.acta_grado_diploma, f"Posgrados/{idx}_{nombre_safe}_Diploma")
+
+    # 6.4. Especializaciones
+    for idx, edu in enumerate(applicant.especializaciones.all(), start=1):
+        nombre_safe = edu.nombre_especializacion.replace(' ', '_')[:30]
+        _collect(edu.acta_grado_diploma, f"Especializaciones/{idx}_{nombre_safe}_Diploma")
+
+    # 7. Anexos adicionales
+    if hasattr(applicant, 'anexos_adicionales'):
+        anexos = applicant.anexos_adicionales
+        _collect(anexos.anexo_03_datos_personales, "Anexos/ANEXO_03_Datos_Personales")
+        _collect(anexos.carta_intencion, "Anexos/Carta_Intencion")
+        _collect(anexos.otros_documentos, "Anexos/Otros_Documentos")
+
+    return tareas
 
-    try:
-        file_url = getattr(file_field, 'url', None)
-    except Exception:
-        file_url = None
-
-    # Si es URL remota, usar requests con timeout explícito.
-    if isinstance(file_url, str) and file_url.startswith(('http://', 'https://')):
-        try:
-            response = requests.get(file_url, timeout=(connect_timeout, read_timeout))
-            response.raise_for_status()
-            return response.content
-        except requests.RequestException as e:
-            logger.error(
-                f"Timeout/error descargando archivo remoto "
-                f"{getattr(file_field, 'name', 'sin_nombre')}: {e}"
-            )
-            return None
-
-    # Fallback para almacenamiento local.
-    try:
-        with file_field.open('rb') as f:
-            return f.read()
-    except Exception as e:
-        logger.error(f"Error leyendo archivo {getattr(file_field, 'name', 'sin_nombre')}: {e}")
-        return None
 
 @login_required
 def download_individual_zip(request, pk):
@@ -102,188 +125,25 @@ def download_individual_zip(request, pk):
 
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
         # 1. Agregar Excel con toda la información
-        wb = create_excel_for_person(applicant)
-        excel_buffer = io.BytesIO()
-        wb.save(excel_buffer)
-        excel_buffer.seek(0)
+        excel_bytes, pdf_bytes = obtener_reportes_persona(applicant)
 
         filename_safe = applicant.nombre_completo.replace(' ', '_')
-        zip_file.writestr(
-            f"{filename_safe}_Informacion.xlsx",
-            excel_buffer.getvalue()
-        )
+        escribir_entrada(zip_file, f"{filename_safe}_Informacion.xlsx", excel_bytes)
 
         # 2. Agregar PDF ANEXO 11
-        try:
-            pdf_buffer = generar_anexo11_pdf(applicant)
-            zip_file.writestr(
-                f"{filename_safe}_ANEXO_11.pdf",
-                pdf_buffer.getvalue()
-            )
-        except Exception as e:
-            logger.error(f"Error al generar PDF ANEXO 11: {str(e)}")
-
-        # 3. Agregar certificados laborales
-        for idx, experiencia in enumerate(applicant.experiencias_laborales.all(), start=1):
-            if experiencia.certificado_laboral:
-                try:
-                    certificado_file = experiencia.certificado_laboral
-                    with certificado_file.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(certificado_file, file_content)
-                    cargo_safe = experiencia.cargo.replace(' ', '_').replace('/', '-')
-                    zip_file.writestr(
-                        f"Certificados_Laborales/{idx}_{cargo_safe}{ext}",
-                        file_content
-                    )
-                except Exception as e:
-                    logger.error(f"Error al agregar certificado {idx} de {applicant.nombre_completo}: {e}")
-
-        # 4. Agregar documentos de identidad
-        try:
-            if hasattr(applicant, 'documentos_identidad'):
-                docs = applicant.documentos_identidad
-
-                # Fotocopia cédula
-                if docs.fotocopia_cedula:
-                    with docs.fotocopia_cedula.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(docs.fotocopia_cedula, file_content)
-                    zip_file.writestr(f"Documentos_Identidad/Cedula{ext}", file_content)
-
-                # Libreta militar
-                if docs.libreta_militar:
-                    with docs.libreta_militar.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(docs.libreta_militar, file_content)
-                    zip_file.writestr(f"Documentos_Identidad/Libreta_Militar{ext}", file_content)
-
-                # Hoja de vida
-                if docs.hoja_de_vida:
-                    with docs.hoja_de_vida.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(docs.hoja_de_vida, file_content)
-                    zip_file.writestr(f"Documentos_Identidad/Hoja_de_Vida{ext}", file_content)
-        except Exception as e:
-            logger.error(f"Error al agregar documentos de identidad de {applicant.nombre_completo}: {e}")
-
-        # 5. Agregar antecedentes
-        try:
-            if hasattr(applicant, 'antecedentes'):
-                ant = applicant.antecedentes
-                antecedentes_files = [
-                    (ant.certificado_procuraduria, "Procuraduria"),
-                    (ant.certificado_contraloria, "Contraloria"),
-                    (ant.certificado_policia, "Policia"),
-                    (ant.certificado_medidas_correctivas, "Medidas_Correctivas"),
-                    (ant.certificado_delitos_sexuales, "Delitos_Sexuales"),
-                    (ant.certificado_redam, "REDAM"),
-                ]
-                for archivo, nombre in antecedentes_files:
-                    if archivo:
-                        with archivo.open('rb') as f:
-                            file_content = f.read()
-                        ext = get_file_extension(archivo, file_content)
-                        zip_file.writestr(f"Antecedentes/{nombre}{ext}", file_content)
-        except Exception as e:
-            logger.error(f"Error al agregar antecedentes de {applicant.nombre_completo}: {e}")
-
-        # 6. Agregar documentos académicos
-        for idx, academica in enumerate(applicant.formacion_academica.all(), start=1):
+        if pdf_bytes is not None:
+            escribir_entrada(zip_file, f"{filename_safe}_ANEXO_11.pdf", pdf_bytes)
+
+        # 3-7. Recolectar los documentos y descargarlos en paralelo
+        tareas = _tareas_documentos_individual(applicant)
+        for zip_path, field, file_content in MotorDescargas().descargar(tareas):
+            if not file_content:
+                continue
             try:
-                profesion_safe = academica.profesion.replace(' ', '_').replace('/', '-')[:30]
-
-                if academica.fotocopia_titulo:
-                    with academica.fotocopia_titulo.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(academica.fotocopia_titulo, file_content)
-                    zip_file.writestr(f"Documentos_Academicos/{idx}_{profesion_safe}_Titulo{ext}", file_content)
-
-                if academica.fotocopia_tarjeta_profesional:
-                    with academica.fotocopia_tarjeta_profesional.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(academica.fotocopia_tarjeta_profesional, file_content)
-                    zip_file.writestr(f"Documentos_Academicos/{idx}_{profesion_safe}_Tarjeta_Profesional{ext}", file_content)
-
-                if academica.certificado_vigencia_tarjeta:
-                    with academica.certificado_vigencia_tarjeta.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(academica.certificado_vigencia_tarjeta, file_content)
-                    zip_file.writestr(f"Documentos_Academicos/{idx}_{profesion_safe}_Certificado_Vigencia{ext}", file_content)
+                ext = get_file_extension(field, file_content)
+                escribir_entrada(zip_file, f"{zip_path}{ext}", file_content)
             except Exception as e:
-                logger.error(f"Error al agregar documentos académicos {idx} de {applicant.nombre_completo}: {e}")
-
-        # 6.1. Agregar Educación Básica
-        for idx, edu in enumerate(applicant.educacion_basica.all(), start=1):
-            if edu.acta_grado_diploma:
-                try:
-                    with edu.acta_grado_diploma.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(edu.acta_grado_diploma, file_content)
-                    zip_file.writestr(f"Educacion_Basica/{idx}_Diploma_Bachiller{ext}", file_content)
-                except Exception as e:
-                    logger.error(f"Error al agregar educación básica de {applicant.nombre_completo}: {e}")
-
-        # 6.2. Agregar Educación Superior
-        for idx, edu in enumerate(applicant.educacion_superior.all(), start=1):
-            if edu.documento_soporte:
-                try:
-                    with edu.documento_soporte.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(edu.documento_soporte, file_content)
-                    nivel_safe = edu.nivel.replace(' ', '_')
-                    zip_file.writestr(f"Educacion_Superior/{idx}_{nivel_safe}_Diploma{ext}", file_content)
-                except Exception as e:
-                    logger.error(f"Error al agregar educación superior de {applicant.nombre_completo}: {e}")
-
-        # 6.3. Agregar Posgrados
-        for idx, edu in enumerate(applicant.posgrados.all(), start=1):
-            if edu.acta_grado_diploma:
-                try:
-                    with edu.acta_grado_diploma.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(edu.acta_grado_diploma, file_content)
-                    nombre_safe = edu.nombre_posgrado.replace(' ', '_')[:30]
-                    zip_file.writestr(f"Posgrados/{idx}_{nombre_safe}_Diploma{ext}", file_content)
-                except Exception as e:
-                    logger.error(f"Error al agregar posgrado de {applicant.nombre_completo}: {e}")
-
-        # 6.4. Agregar Especializaciones
-        for idx, edu in enumerate(applicant.especializaciones.all(), start=1):
-            if edu.acta_grado_diploma:
-                try:
-                    with edu.acta_grado_diploma.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(edu.acta_grado_diploma, file_content)
-                    nombre_safe = edu.nombre_especializacion.replace(' ', '_')[:30]
-                    zip_file.writestr(f"Especializaciones/{idx}_{nombre_safe}_Diploma{ext}", file_content)
-                except Exception as e:
-                    logger.error(f"Error al agregar especialización de {applicant.nombre_completo}: {e}")
-
-        # 7. Agregar anexos adicionales
-        try:
-            if hasattr(applicant, 'anexos_adicionales'):
-                anexos = applicant.anexos_adicionales
-
-                if anexos.anexo_03_datos_personales:
-                    with anexos.anexo_03_datos_personales.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(anexos.anexo_03_datos_personales, file_content)
-                    zip_file.writestr(f"Anexos/ANEXO_03_Datos_Personales{ext}", file_content)
-
-                if anexos.carta_intencion:
-                    with anexos.carta_intencion.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(anexos.carta_intencion, file_content)
-                    zip_file.writestr(f"Anexos/Carta_Intencion{ext}", file_content)
-
-                if anexos.otros_documentos:
-                    with anexos.otros_documentos.open('rb') as f:
-                        file_content = f.read()
-                    ext = get_file_extension(anexos.otros_documentos, file_content)
-                    zip_file.writestr(f"Anexos/Otros_Documentos{ext}", file_content)
-        except Exception as e:
-            logger.error(f"Error al agregar anexos de {applicant.nombre_completo}: {e}")
+                logger.error(f"Error al agregar {zip_path} de {applicant.nombre_completo}: {e}")
 
     # Preparar respuesta
     zip_buffer.seek(0)
@@ -292,204 +152,206 @@ def download_individual_zip(request, pk):
 
     return response
 
+def _parametros_incrementales(datos):
+    """
+    Lee los parámetros de exportación incremental (`base` y/o `desde`).
+
+    Returns:
+        tuple: (desde, exportacion_base) o (None, None) si se pidió una exportación completa
+
+    Raises:
+        ValueError: si los parámetros no son válidos
+    """
+    base_id = datos.get('base') or None
+    desde_texto = datos.get('desde') or None
+    if not base_id and not desde_texto:
+        return None, None
+
+    desde = None
+    if desde_texto:
+        desde = parse_datetime(desde_texto)
+        if desde is None:
+            raise ValueError('El parámetro "desde" debe ser una fecha ISO (AAAA-MM-DDTHH:MM)')
+        if timezone.is_naive(desde):
+            desde = timezone.make_aware(desde)
+
+    try:
+        return resolver_base_incremental(base_id=base_id, desde=desde)
+    except (ExportacionPersonal.DoesNotExist, ValueError):
+        raise ValueError(f'La exportación base {base_id} no existe o no está completada')
+
+
 @login_required
 def download_all_zip(request):
-    """Descarga un ZIP con toda la información de TODO el personal"""
-    applicants = (
-        InformacionBasica.objects
-        .select_related('documentos_identidad', 'antecedentes', 'anexos_adicionales')
-        .prefetch_related(
-            'formacion_academica',
-            'educacion_basica',
-            'educacion_superior',
-            'posgrados',
-            'especializaciones',
-            'experiencias_laborales',
+    """
+    Descarga un ZIP con toda la información de TODO el personal.
+    El ZIP se transmite en streaming: cada entrada se envía al navegador
+    apenas se genera o descarga, sin armar el archivo completo antes.
+    Con ?base=<id exportación> o ?desde=<fecha ISO> solo incluye los cambios.
+    """
+    try:
+        desde, base = _parametros_incrementales(request.GET)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    applicants = queryset_exportacion()
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    if desde:
+        entradas = iterar_entradas_incrementales(
+            applicants,
+            desde,
+            manifiesto_base=base.manifiesto if base else None,
+            base_id=base.pk if base else None,
         )
+        filename = f"Personal_Cambios_{timestamp}.zip"
+    else:
+        entradas = iterar_entradas_personal(applicants)
+        filename = f"Personal_Completo_{timestamp}.zip"
+
+    response = StreamingHttpResponse(iterar_zip(entradas), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    return response
+
+
+@login_required
+def exportar_consolidado(request):
+    """
+    Exporta una fila por persona con el esquema completo (datos básicos,
+    cálculo de experiencia, conteos de formación y experiencia, estado y
+    correcciones) sin documentos.
+    ?formato=csv|xlsx (default xlsx). Acepta los filtros de filtrar_personal:
+    search, estado (repetible), perfil, actualizado_desde y actualizado_hasta.
+    """
+    formato = (request.GET.get('formato') or 'xlsx').lower()
+    if formato not in FORMATOS_EXPORTACION:
+        return HttpResponseBadRequest(f'Formato no soportado: {formato}. Use csv o xlsx')
+
+    try:
+        queryset = queryset_consolidado(request.GET)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    filename = f"Personal_Consolidado_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+
+    if formato == 'csv':
+        response = StreamingHttpResponse(iterar_csv_exportacion(queryset), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    # El libro write-only se arma en un archivo temporal que FileResponse
+    # transmite por bloques y cierra (eliminándolo) al terminar
+    archivo = tempfile.TemporaryFile()
+    try:
+        escribir_xlsx_exportacion(queryset, archivo)
+    except Exception:
+        archivo.close()
+        raise
+    archivo.seek(0)
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=filename,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
     )
 
-    # Crear archivo ZIP temporal para evitar exceso de RAM.
-    zip_buffer = tempfile.SpooledTemporaryFile(max_size=20 * 1024 * 1024, mode='w+b')
 
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # 1. Crear Excel consolidado con TODO el personal
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Personal Completo"
-
-        # Título
-        ws['A1'] = "REGISTRO COMPLETO DE PERSONAL"
-        ws['A1'].font = Font(bold=True, size=14, color="2C3E50")
-        ws.merge_cells('A1:J1')
-
-        # Encabezados
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
+def _estado_exportacion(exportacion):
+    """Representación JSON del estado de una exportación"""
+    datos = {
+        'id': exportacion.pk,
+        'tipo': exportacion.tipo,
+        'estado': exportacion.estado,
+        'estado_display': exportacion.get_estado_display(),
+        'fase': exportacion.fase,
+        'fase_display': exportacion.get_fase_display(),
+        'porcentaje': exportacion.porcentaje,
+        'personas_procesadas': exportacion.personas_procesadas,
+        'total_personas': exportacion.total_personas,
+        'archivos_procesados': exportacion.archivos_procesados,
+        'total_archivos': exportacion.total_archivos,
+        'estado_url': reverse('formapp:exportacion_estado', kwargs={'pk': exportacion.pk}),
+        'descarga_url': None,
+        'error': exportacion.mensaje_error,
+    }
+    if exportacion.estado == 'COMPLETADO':
+        datos['descarga_url'] = reverse('formapp:exportacion_descargar', kwargs={'pk': exportacion.pk})
+    return datos
+
+
+@login_required
+@require_POST
+def iniciar_exportacion(request):
+    """
+    Crea una exportación del ZIP completo y la procesa fuera de la petición.
+    Con `base` (ID de exportación) o `desde` (fecha ISO) en el POST se crea
+    una exportación incremental con solo los cambios.
+    Con EXPORTACIONES_EN_HILO desactivado queda en cola para el comando
+    procesar_exportaciones, siempre que EXPORTACIONES_WORKER indique que hay
+    un worker que la procese.
+    """
+    en_hilo = getattr(settings, 'EXPORTACIONES_EN_HILO', True)
+    if not en_hilo and not getattr(settings, 'EXPORTACIONES_WORKER', False):
+        return JsonResponse(
+            {'error': 'No hay un worker de exportaciones configurado; use la descarga directa.'},
+            status=503,
         )
 
-        headers = ["Cédula", "Nombre Completo", "Género", "Teléfono", "Correo",
-                   "Perfil", "Área del Conocimiento", "Profesión", "Contrato", "Observaciones"]
-
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=3, column=col)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = border
-
-        # Datos
-        row = 4
-        for applicant in applicants:
-            ws.cell(row=row, column=1, value=applicant.cedula).border = border
-            ws.cell(row=row, column=2, value=applicant.nombre_completo).border = border
-            ws.cell(row=row, column=3, value=applicant.genero).border = border
-            ws.cell(row=row, column=4, value=applicant.telefono).border = border
-            ws.cell(row=row, column=5, value=applicant.correo).border = border
-            ws.cell(row=row, column=6, value=applicant.perfil or "N/A").border = border
-            ws.cell(row=row, column=7, value=applicant.area_del_conocimiento or "N/A").border = border
-            ws.cell(row=row, column=8, value=applicant.profesion or "N/A").border = border
-            ws.cell(row=row, column=9, value=applicant.contrato or "N/A").border = border
-            ws.cell(row=row, column=10, value=applicant.observacion or "N/A").border = border
-            row += 1
-
-        # Ajustar anchos de columna
-        for col in range(1, 11):
-            ws.column_dimensions[chr(64 + col)].width = 20
-
-        # Guardar Excel consolidado
-        excel_buffer = io.BytesIO()
-        wb.save(excel_buffer)
-        excel_buffer.seek(0)
-        zip_file.writestr("Personal_Completo.xlsx", excel_buffer.getvalue())
-
-        # --- Fase 1 + 2: Excel/PDF individual por persona (CPU local) y recolección de tareas HTTP ---
-        file_tasks = []  # lista de (field, zip_path_sin_extension)
-
-        for applicant in applicants:
-            filename_safe = applicant.nombre_completo.replace(' ', '_')
-
-            # 2. Excel individual
-            wb_individual = create_excel_for_person(applicant)
-            excel_individual_buffer = io.BytesIO()
-            wb_individual.save(excel_individual_buffer)
-            excel_individual_buffer.seek(0)
-            zip_file.writestr(
-                f"Personal/{filename_safe}/{filename_safe}_Informacion.xlsx",
-                excel_individual_buffer.getvalue()
-            )
-
-            # 2.1. PDF ANEXO 11 individual
-            try:
-                pdf_buffer_individual = generar_anexo11_pdf(applicant)
-                zip_file.writestr(
-                    f"Personal/{filename_safe}/{filename_safe}_ANEXO_11.pdf",
-                    pdf_buffer_individual.getvalue()
-                )
-            except Exception as e:
-                logger.error(f"Error al generar PDF ANEXO 11 para {applicant.nombre_completo}: {str(e)}")
-
-            # Recolectar tareas de descarga HTTP (documentos en Cloudinary)
-            def _collect(field, path):
-                if field:
-                    file_tasks.append((field, path))
-
-            # 3. Documentos de identidad
-            if hasattr(applicant, 'documentos_identidad') and applicant.documentos_identidad:
-                docs_id = applicant.documentos_identidad
-                _collect(docs_id.fotocopia_cedula,  f"Personal/{filename_safe}/Documentos_Identidad/Cedula")
-                _collect(docs_id.hoja_de_vida,      f"Personal/{filename_safe}/Documentos_Identidad/Hoja_de_Vida")
-                _collect(docs_id.libreta_militar,   f"Personal/{filename_safe}/Documentos_Identidad/Libreta_Militar")
-
-            # 4. Antecedentes
-            if hasattr(applicant, 'antecedentes') and applicant.antecedentes:
-                antec = applicant.antecedentes
-                _collect(antec.certificado_procuraduria,       f"Personal/{filename_safe}/Antecedentes/Procuraduria")
-                _collect(antec.certificado_contraloria,        f"Personal/{filename_safe}/Antecedentes/Contraloria")
-                _collect(antec.certificado_policia,            f"Personal/{filename_safe}/Antecedentes/Policia")
-                _collect(antec.certificado_medidas_correctivas,f"Personal/{filename_safe}/Antecedentes/Medidas_Correctivas")
-                _collect(antec.certificado_delitos_sexuales,   f"Personal/{filename_safe}/Antecedentes/Delitos_Sexuales")
-                _collect(antec.certificado_redam,              f"Personal/{filename_safe}/Antecedentes/REDAM")
-
-            # 5. Documentos académicos
-            for idx, academica in enumerate(applicant.formacion_academica.all(), start=1):
-                profesion_safe = academica.profesion.replace(' ', '_').replace('/', '-')[:30]
-                _collect(academica.fotocopia_titulo,               f"Personal/{filename_safe}/Documentos_Academicos/{idx}_{profesion_safe}_Titulo")
-                _collect(academica.fotocopia_tarjeta_profesional,  f"Personal/{filename_safe}/Documentos_Academicos/{idx}_{profesion_safe}_Tarjeta_Profesional")
-                _collect(academica.certificado_vigencia_tarjeta,   f"Personal/{filename_safe}/Documentos_Academicos/{idx}_{profesion_safe}_Vigencia_Tarjeta")
-
-            # 5.1. Educación Básica
-            for idx, edu in enumerate(applicant.educacion_basica.all(), start=1):
-                _collect(edu.acta_grado_diploma, f"Personal/{filename_safe}/Educacion_Basica/{idx}_Diploma_Bachiller")
-
-            # 5.2. Educación Superior
-            for idx, edu in enumerate(applicant.educacion_superior.all(), start=1):
-                nivel_safe = edu.nivel.replace(' ', '_')
-                _collect(edu.documento_soporte, f"Personal/{filename_safe}/Educacion_Superior/{idx}_{nivel_safe}_Diploma")
-
-            # 5.3. Posgrados
-            for idx, edu in enumerate(applicant.posgrados.all(), start=1):
-                nombre_safe = edu.nombre_posgrado.replace(' ', '_')[:30]
-                _collect(edu.acta_grado_diploma, f"Personal/{filename_safe}/Posgrados/{idx}_{nombre_safe}_Diploma")
-
-            # 5.4. Especializaciones
-            for idx, edu in enumerate(applicant.especializaciones.all(), start=1):
-                nombre_safe = edu.nombre_especializacion.replace(' ', '_')[:30]
-                _collect(edu.acta_grado_diploma, f"Personal/{filename_safe}/Especializaciones/{idx}_{nombre_safe}_Diploma")
-
-            # 6. Anexos adicionales
-            if hasattr(applicant, 'anexos_adicionales') and applicant.anexos_adicionales:
-                anexos = applicant.anexos_adicionales
-                _collect(anexos.anexo_03_datos_personales, f"Personal/{filename_safe}/Anexos/Anexo_03_Datos_Personales")
-                _collect(anexos.carta_intencion,           f"Personal/{filename_safe}/Anexos/Carta_Intencion")
-                _collect(anexos.otros_documentos,          f"Personal/{filename_safe}/Anexos/Otros_Documentos")
-
-            # 7. Certificados laborales
-            for idx, experiencia in enumerate(applicant.experiencias_laborales.all(), start=1):
-                if experiencia.certificado_laboral:
-                    cargo_safe = experiencia.cargo.replace(' ', '_').replace('/', '-')[:30]
-                    _collect(experiencia.certificado_laboral, f"Personal/{filename_safe}/Certificados_Laborales/{idx}_{cargo_safe}")
-
-        # --- Fase 3: descargar en paralelo (10 workers) ---
-        logger.info(f"Descargando {len(file_tasks)} archivos de Cloudinary en paralelo…")
-
-        def _fetch_one(task):
-            field, zip_path = task
-            content = read_file_content_safe(field, connect_timeout=10, read_timeout=60)
-            return zip_path, content, field
-
-        downloaded = {}  # zip_path -> (content, field)
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = {executor.submit(_fetch_one, task): task for task in file_tasks}
-            for future in as_completed(futures):
-                try:
-                    zip_path, content, field = future.result()
-                    if content:
-                        downloaded[zip_path] = (content, field)
-                except Exception as e:
-                    logger.error(f"Error en descarga paralela: {e}")
-
-        # --- Fase 4: escribir archivos descargados al ZIP ---
-        for zip_path, (content, field) in downloaded.items():
-            try:
-                ext = get_file_extension(field, content)
-                zip_file.writestr(f"{zip_path}{ext}", content)
-            except Exception as e:
-                logger.error(f"Error al escribir {zip_path} al ZIP: {e}")
+    try:
+        desde, base = _parametros_incrementales(request.POST)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    exportacion = ExportacionPersonal.objects.create(
+        solicitado_por=request.user.username,
+        tipo='INCREMENTAL' if desde else 'COMPLETA',
+        base=base,
+        desde=desde,
+    )
 
-    # Preparar respuesta
-    zip_buffer.seek(0)
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    response = FileResponse(
-        zip_buffer,
+    if en_hilo:
+        ejecutar_exportacion_async(exportacion)
+
+    return JsonResponse(_estado_exportacion(exportacion), status=202)
+
+
+@login_required
+def exportacion_estado(request, pk):
+    """Estado y progreso de una exportación (para consulta periódica)"""
+    if getattr(settings, 'EXPORTACIONES_EN_HILO', True):
+        # Sin worker que la recupere: si el hilo murió con el proceso web, se informa el error
+        recuperar_exportaciones_abandonadas(reencolar=False, pk=pk)
+    exportacion = get_object_or_404(ExportacionPersonal, pk=pk)
+    return JsonResponse(_estado_exportacion(exportacion))
+
+
+@login_required
+def exportacion_descargar(request, pk):
+    """Descarga el ZIP de una exportación completada"""
+    exportacion = get_object_or_404(ExportacionPersonal, pk=pk, estado='COMPLETADO')
+    ruta = ruta_archivo_exportacion(exportacion)
+    if not exportacion.archivo or not os.path.exists(ruta):
+        raise Http404('El archivo de la exportación ya no está disponible')
+
+    return FileResponse(
+        open(ruta, 'rb'),
         content_type='application/zip',
         as_attachment=True,
-        filename=f"Personal_Completo_{timestamp}.zip",
+        filename=exportacion.archivo,
     )
 
-    return response
+
+@login_required
+def cache_documentos_estado(request):
+    """Contadores de la caché local de documentos (aciertos/fallos) para monitoreo"""
+    cache = obtener_cache()
+    if cache is None:
+        return JsonResponse({'activo': False})
+    return JsonResponse({'activo': True, **cache.estadisticas()})
+
+
+@login_required
+def metricas_http(request):
+    """Métricas acumuladas de las descargas HTTP del proceso (bytes, latencia, estados)"""
+    return JsonResponse(cliente_http.metricas.resumen())
@@ -0,0 +1,173 @@
+"""
+Escritura de archivos ZIP en streaming.
+Genera el ZIP por partes a medida que se agregan las entradas, usando
+descriptores de datos (data descriptors) para no necesitar retroceder en el
+archivo. Así la respuesta HTTP empieza a enviarse de inmediato y la memoria
+del worker queda acotada por la entrada que se está escribiendo.
+
+Una entrada también puede ser una función que escribe su contenido en el
+flujo de la entrada (p. ej. un libro de Excel que se guarda directamente
+en el ZIP) sin copias intermedias; sus bytes comprimidos se entregan al
+terminar de escribirla.
+
+La compresión se decide por entrada: los formatos que ya vienen comprimidos
+(JPEG, PNG, HEIC, PDF, ...) se guardan sin comprimir para no gastar CPU en
+deflate sin ganancia de tamaño; el resto se comprime con el nivel configurado.
+"""
+import os
+import time
+import zipfile
+
+from django.conf import settings
+
+# Tamaño de los bloques en que se escribe cada entrada y se entregan los bytes
+TAMANO_BLOQUE = 64 * 1024
+
+# Extensiones de formatos que ya están comprimidos
+EXTENSIONES_COMPRIMIDAS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.heif', '.pdf',
+    '.zip', '.rar', '.7z', '.gz', '.mp3', '.mp4',
+}
+
+# Firmas (magic bytes) de formatos ya comprimidos, para archivos sin extensión confiable
+FIRMAS_COMPRIMIDAS = (
+    b'%PDF',               # PDF
+    b'\xff\xd8\xff',       # JPEG
+    b'\x89PNG',            # PNG
+    b'GIF8',               # GIF
+)
+
+
+def _es_heic(contenido):
+    # ISO BMFF: 'ftyp' en el byte 4 seguido de la marca heic/heix/mif1/...
+    return contenido[4:8] == b'ftyp' and contenido[8:12] in (b'heic', b'heix', b'hevc', b'mif1', b'msf1')
+
+
+def politica_compresion(ruta, contenido=b''):
+    """
+    Decide cómo comprimir una entrada del ZIP.
+
+    Args:
+        ruta: Ruta de la entrada dentro del ZIP (se usa su extensión).
+        contenido: Bytes de la entrada (se revisan sus primeros bytes).
+
+    Returns:
+        tuple: (compress_type, compresslevel)
+    """
+    ext = os.path.splitext(ruta)[1].lower()
+    inicio = contenido[:16]
+    if (ext in EXTENSIONES_COMPRIMIDAS or inicio.startswith(FIRMAS_COMPRIMIDAS)
+            or _es_heic(inicio)):
+        return zipfile.ZIP_STORED, None
+    return zipfile.ZIP_DEFLATED, settings.ZIP_NIVEL_COMPRESION
+
+
+def escribir_entrada(zip_file, ruta, contenido):
+    """Agrega una entrada a un ZipFile aplicando la política de compresión"""
+    compress_type, nivel = politica_compresion(ruta, contenido)
+    zip_file.writestr(ruta, contenido, compress_type=compress_type, compresslevel=nivel)
+
+
+class _BufferSalida:
+    """
+    Destino de escritura no posicionable para ZipFile.
+    Acumula los bytes escritos hasta que el generador los drena.
+    Al no exponer tell()/seek(), zipfile escribe las entradas con
+    descriptores de datos en lugar de reescribir los encabezados.
+    """
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, data):
+        self._partes.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drenar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+# ZipFile.open(zinfo, 'w') toma el nivel de compresión de la propia entrada.
+# Python 3.13 lo expone como compress_level; antes solo existía _compresslevel.
+_ATRIBUTO_NIVEL = 'compress_level' if hasattr(zipfile.ZipInfo, 'compress_level') else '_compresslevel'
+
+
+def _crear_zipinfo(ruta, tamano, compression, compresslevel=None):
+    zinfo = zipfile.ZipInfo(ruta, date_time=time.localtime()[:6])
+    zinfo.compress_type = compression
+    setattr(zinfo, _ATRIBUTO_NIVEL, compresslevel)
+    # Conocer el tamaño antes de escribir permite decidir si hace falta ZIP64
+    zinfo.file_size = tamano
+    zinfo.external_attr = 0o644 << 16
+    return zinfo
+
+
+def _escribir_entrada_funcion(zip_file, salida, ruta, escribir, compression):
+    """Escribe una entrada cuyo contenido produce una función; su tamaño no se conoce antes"""
+    if compression is None:
+        compress_type, nivel = politica_compresion(ruta)
+    else:
+        compress_type, nivel = compression, None
+    zinfo = _crear_zipinfo(ruta, 0, compress_type, nivel)
+    # Sin tamaño previo se reservan los campos ZIP64 por si la entrada supera 4 GB
+    with zip_file.open(zinfo, 'w', force_zip64=True) as destino:
+        escribir(destino)
+    datos = salida.drenar()
+    if datos:
+        yield datos
+
+
+def iterar_zip(entradas, compression=None):
+    """
+    Genera los bytes de un archivo ZIP a partir de un iterable de entradas.
+
+    Args:
+        entradas: Iterable de tuplas (ruta_en_zip, contenido). El contenido son
+            bytes o una función escribir(destino) que escribe la entrada en el
+            archivo binario recibido. Se consume de forma perezosa, por lo que
+            puede ser un generador que descarga o genera cada archivo justo
+            antes de entregarlo.
+        compression: Método de compresión para todas las entradas. Si es None
+            se decide por entrada con politica_compresion.
+
+    Yields:
+        bytes: Fragmentos consecutivos del archivo ZIP.
+    """
+    salida = _BufferSalida()
+
+    with zipfile.ZipFile(salida, 'w', compression or zipfile.ZIP_DEFLATED) as zip_file:
+        for ruta, contenido in entradas:
+            if contenido is None:
+                continue
+
+            if callable(contenido):
+                yield from _escribir_entrada_funcion(zip_file, salida, ruta, contenido, compression)
+                continue
+
+            if compression is None:
+                compress_type, nivel = politica_compresion(ruta, contenido)
+            else:
+                compress_type, nivel = compression, None
+            zinfo = _crear_zipinfo(ruta, len(contenido), compress_type, nivel)
+            vista = memoryview(contenido)
+            with zip_file.open(zinfo, 'w') as destino:
+                for inicio in range(0, len(vista), TAMANO_BLOQUE):
+                    destino.write(vista[inicio:inicio + TAMANO_BLOQUE])
+                    datos = salida.drenar()
+                    if datos:
+                        yield datos
+
+            # Descriptor de datos y restos de la entrada
+            datos = salida.drenar()
+            if datos:
+                yield datos
+
+    # Directorio central
+    datos = salida.drenar()
+    if datos:
+        yield datos
@@ -200,6 +200,54 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = 150 * 1024 * 1024  # 150 MB por request
 FILE_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024    # >2 MB se escribe a disco temporal
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 2000
 
+# Exportaciones masivas en segundo plano (ZIP completo del personal).
+# Los archivos generados se guardan en disco local, no en Cloudinary.
+EXPORTACIONES_ROOT = config('EXPORTACIONES_ROOT', default=str(BASE_DIR / 'exportaciones'))
+# True: se procesan en un hilo del mismo proceso web (el despliegue de railway.json
+# solo levanta el proceso web); con gunicorn -k gevent ese hilo es un greenlet y la
+# fase de Excel/PDF bloquea al worker web.
+# False: quedan en cola para el worker `python manage.py procesar_exportaciones --continuo`.
+# Solo se encolan si EXPORTACIONES_WORKER indica que ese worker existe y comparte
+# EXPORTACIONES_ROOT (un volumen) con el proceso web; si no, quedarían PENDIENTE siempre.
+EXPORTACIONES_EN_HILO = config('EXPORTACIONES_EN_HILO', default=True, cast=bool)
+EXPORTACIONES_WORKER = config('EXPORTACIONES_WORKER', default=False, cast=bool)
+# Cada cuántos segundos la exportación en curso registra que sigue viva, y sin
+# latido por cuánto tiempo se considera abandonada (se vuelve a encolar o falla)
+EXPORTACIONES_LATIDO_SEGUNDOS = config('EXPORTACIONES_LATIDO_SEGUNDOS', default=30, cast=int)
+EXPORTACIONES_LATIDO_MAXIMO = config('EXPORTACIONES_LATIDO_MAXIMO', default=300, cast=int)
+# Intentos antes de marcar con ERROR una exportación que sigue quedando abandonada
+EXPORTACIONES_MAX_INTENTOS = config('EXPORTACIONES_MAX_INTENTOS', default=2, cast=int)
+
+# Caché local de documentos descargados para las exportaciones (LRU acotado por tamaño)
+DOCUMENTOS_CACHE_ACTIVO = config('DOCUMENTOS_CACHE_ACTIVO', default=True, cast=bool)
+DOCUMENTOS_CACHE_ROOT = config('DOCUMENTOS_CACHE_ROOT', default=str(BASE_DIR / 'cache_documentos'))
+DOCUMENTOS_CACHE_MAX_MB = config('DOCUMENTOS_CACHE_MAX_MB', default=1024, cast=int)
+
+# Caché local de los reportes por persona (Excel de información y ANEXO 11)
+REPORTES_CACHE_ACTIVO = config('REPORTES_CACHE_ACTIVO', default=True, cast=bool)
+REPORTES_CACHE_ROOT = config('REPORTES_CACHE_ROOT', default=str(BASE_DIR / 'cache_reportes'))
+REPORTES_CACHE_MAX_MB = config('REPORTES_CACHE_MAX_MB', default=256, cast=int)
+
+# Descarga concurrente de documentos (ZIP individual y masivo)
+DESCARGAS_MAX_WORKERS = config('DESCARGAS_MAX_WORKERS', default=10, cast=int)
+DESCARGAS_INTENTOS = config('DESCARGAS_INTENTOS', default=3, cast=int)
+DESCARGAS_ESPERA_BASE = config('DESCARGAS_ESPERA_BASE', default=0.5, cast=float)
+DESCARGAS_CONNECT_TIMEOUT = config('DESCARGAS_CONNECT_TIMEOUT', default=5, cast=int)
+DESCARGAS_READ_TIMEOUT = config('DESCARGAS_READ_TIMEOUT', default=20, cast=int)
+# Archivos descargados que pueden esperar a ser escritos en el ZIP (acota la memoria)
+DESCARGAS_PROFUNDIDAD_COLA = config('DESCARGAS_PROFUNDIDAD_COLA', default=20, cast=int)
+
+# Nivel de deflate (1-9) para las entradas que sí se comprimen en los ZIP exportados
+ZIP_NIVEL_COMPRESION = config('ZIP_NIVEL_COMPRESION', default=6, cast=int)
+
+# Procesos para generar los Excel/PDF por persona en la exportación masiva.
+# 0 o 1: en el mismo proceso. En Railway se puede usar el número de núcleos.
+REPORTES_PROCESOS = config('REPORTES_PROCESOS', default=0, cast=int)
+# Sesión HTTP compartida: reintentos de estados 429/5xx (los cortes de conexión
+# y lectura los reintenta el motor de descargas) y número de hosts con pool propio
+HTTP_REINTENTOS = config('HTTP_REINTENTOS', default=2, cast=int)
+HTTP_POOL_HOSTS = config('HTTP_POOL_HOSTS', default=4, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -10,7 +10,7 @@ django.setup()
 
 from formapp.models import InformacionBasica, ExperienciaLaboral
 from basedatosaquicali.models import ContratoHistorico
-from datetime import date
+from formapp.intervalos import anos_meses_dias
 
 # Buscar candidato
 cedula = '862272'
@@ -41,9 +41,7 @@ try:
             print(f'   Días: {dias}')
             print()
 
-        anos_form = total_dias_formulario // 365
-        meses_form = (total_dias_formulario % 365) // 30
-        dias_form = (total_dias_formulario % 365) % 30
+        anos_form, meses_form, dias_form = anos_meses_dias(total_dias_formulario)
 
         print(f'📊 SUBTOTAL FORMULARIO:')
         print(f'  - Total días: {total_dias_formulario}')
@@ -79,9 +77,7 @@ try:
             total_dias_historico_bruto += exp.dias_brutos
             total_dias_historico_real += exp.dias_reales_contribuidos
 
-        anos_hist = total_dias_historico_real // 365
-        meses_hist = (total_dias_historico_real % 365) // 30
-        dias_hist = (total_dias_historico_real % 365) % 30
+        anos_hist, meses_hist, dias_hist = anos_meses_dias(total_dias_historico_real)
 
         print(f'\n📊 SUBTOTAL HISTÓRICO:')
         print(f'  - Total días brutos: {total_dias_historico_bruto}')
@@ -99,9 +95,7 @@ try:
     print('\n🔢 SUMA SIMPLE (Formulario + Histórico, sin verificar traslapes entre ellos):')
     print('-'*70)
     total_simple = total_dias_formulario + total_dias_historico_real
-    anos_simple = total_simple // 365
-    meses_simple = (total_simple % 365) // 30
-    dias_simple = (total_simple % 365) % 30
+    anos_simple, meses_simple, dias_simple = anos_meses_dias(total_simple)
 
     print(f'Formulario: {total_dias_formulario:,} días')
     print(f'Histórico:  {total_dias_historico_real:,} días (ya sin traslapes internos)')